@@ -0,0 +1,482 @@
+"""
+标注层：箭头、矩形框、文字、高亮以命令列表保存（保留模式），底图始终不修改
+显示：图片按 256x256 分块，只有被标注覆盖到的块才缓存"底图 + 标注"的渲染结果，其余块直接画底图；
+一次编辑只让它覆盖到的块失效并重新绘制，拖动中的图形不进缓存，直接画在最上层
+撤销 / 重做只是把命令在两个列表之间移动（并让相关的块失效），不保存整张图片的副本
+打码（马赛克 / 模糊）也是命令：松开鼠标后在工作线程中从底图算好打码后的小图（拖动中和计算完成前只画矩形框），
+算好后才加入命令列表；保存前先等待计算中的打码，保存的图片中这块区域只有打码结果
+保存时把底图和命令列表交给工作线程合成（flatten），界面不等待
+"""
+import math
+import time
+
+from PyQt5.QtWidgets import QWidget, QInputDialog
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QRectF, QRunnable, QThreadPool
+from PyQt5.QtGui import QImage, QPainter, QPen, QColor, QFont, QFontMetrics, QPolygonF
+
+from redaction import REDACT_MODES, redacted_patch
+from task_results import TaskResults
+
+# 缓存分块边长（图像像素）
+TILE_SIZE = 256
+# 默认颜色 / 线宽 / 字号
+DEFAULT_COLOR = QColor(244, 67, 54)
+DEFAULT_WIDTH = 4
+DEFAULT_TEXT_SIZE = 24
+# 高亮（荧光笔）颜色，按正片叠底混合
+HIGHLIGHT_COLOR = QColor(255, 235, 59)
+# 拖动打码区域时的矩形框颜色 / 线宽
+REDACT_DRAFT_COLOR = QColor(255, 255, 255)
+REDACT_DRAFT_WIDTH = 1
+
+# 工具名 → 显示名
+TOOLS = {
+    'arrow': "➜ 箭头",
+    'box': "▭ 矩形",
+    'text': "T 文字",
+    'highlight': "🖍 高亮",
+    **REDACT_MODES,
+}
+
+
+class Annotation:
+    """标注命令：创建后不再修改（撤销 / 重做和后台合成都可以安全地共享同一个对象）
+
+    bounds(): 影响到的区域（图像坐标，含线宽和抗锯齿余量）
+    paint(painter): 在图像坐标中绘制
+    """
+
+    def bounds(self):
+        raise NotImplementedError
+
+    def paint(self, painter):
+        raise NotImplementedError
+
+
+class ArrowAnnotation(Annotation):
+    """箭头：从 start 指向 end"""
+
+    def __init__(self, start, end, color=DEFAULT_COLOR, width=DEFAULT_WIDTH):
+        self.start = QPoint(start)
+        self.end = QPoint(end)
+        self.color = QColor(color)
+        self.width = width
+        self.head = max(12, width * 4)
+
+    def bounds(self):
+        margin = self.head + self.width
+        return QRect(self.start, self.end).normalized().adjusted(-margin, -margin, margin, margin)
+
+    def paint(self, painter):
+        start, end = QPointF(self.start), QPointF(self.end)
+        angle = math.atan2(end.y() - start.y(), end.x() - start.x())
+        spread = math.radians(28)
+        left = end - QPointF(math.cos(angle - spread), math.sin(angle - spread)) * self.head
+        right = end - QPointF(math.cos(angle + spread), math.sin(angle + spread)) * self.head
+        # 线画到箭头底边中点，避免线头从箭头尖上露出来
+        base = (left + right) / 2
+
+        painter.setPen(QPen(self.color, self.width, Qt.SolidLine, Qt.RoundCap))
+        painter.drawLine(start, base)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.color)
+        painter.drawPolygon(QPolygonF([end, left, right]))
+        painter.setBrush(Qt.NoBrush)
+
+
+class BoxAnnotation(Annotation):
+    """矩形框"""
+
+    def __init__(self, rect, color=DEFAULT_COLOR, width=DEFAULT_WIDTH):
+        self.rect = QRect(rect).normalized()
+        self.color = QColor(color)
+        self.width = width
+
+    def bounds(self):
+        margin = self.width + 1
+        return self.rect.adjusted(-margin, -margin, margin, margin)
+
+    def paint(self, painter):
+        painter.setPen(QPen(self.color, self.width, Qt.SolidLine, Qt.SquareCap, Qt.MiterJoin))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(self.rect)
+
+
+class HighlightAnnotation(Annotation):
+    """高亮：正片叠底，文字仍然清晰可见"""
+
+    def __init__(self, rect, color=HIGHLIGHT_COLOR):
+        self.rect = QRect(rect).normalized()
+        self.color = QColor(color)
+
+    def bounds(self):
+        return QRect(self.rect)
+
+    def paint(self, painter):
+        mode = painter.compositionMode()
+        painter.setCompositionMode(QPainter.CompositionMode_Multiply)
+        painter.fillRect(self.rect, self.color)
+        painter.setCompositionMode(mode)
+
+
+class TextAnnotation(Annotation):
+    """文字：pos 为文字左上角"""
+
+    def __init__(self, pos, text, color=DEFAULT_COLOR, size=DEFAULT_TEXT_SIZE):
+        self.pos = QPoint(pos)
+        self.text = text
+        self.color = QColor(color)
+        self.font = QFont()
+        self.font.setPixelSize(size)
+        self.font.setBold(True)
+        # 在创建时算好文字区域（之后只读）
+        metrics = QFontMetrics(self.font)
+        self.rect = metrics.boundingRect(QRect(self.pos, metrics.size(0, text)), Qt.AlignLeft | Qt.AlignTop, text)
+
+    def bounds(self):
+        return self.rect.adjusted(-2, -2, 2, 2)
+
+    def paint(self, painter):
+        painter.setFont(self.font)
+        painter.setPen(self.color)
+        painter.drawText(self.rect, Qt.AlignLeft | Qt.AlignTop, self.text)
+
+
+class RedactAnnotation(Annotation):
+    """打码：mode 为 'mosaic'（马赛克）或 'blur'（模糊）
+
+    打码结果在创建时从底图算好（之后只读），绘制时整块覆盖，区域内之前的标注也一起被盖住；
+    合成保存时底图的原始像素不会出现在输出中
+    """
+
+    def __init__(self, base, rect, mode='mosaic'):
+        self.rect = QRect(rect).normalized().intersected(base.rect())
+        self.mode = mode
+        self.patch = redacted_patch(base, self.rect, mode)
+
+    def bounds(self):
+        return QRect(self.rect)
+
+    def paint(self, painter):
+        if self.patch is not None:
+            painter.drawImage(self.rect.topLeft(), self.patch)
+
+
+def make_annotation(tool, start, end, base=None):
+    """拖动形成的标注（文字工具不在这里创建；打码需要底图 base）"""
+    if tool == 'arrow':
+        return ArrowAnnotation(start, end)
+    if tool == 'box':
+        return BoxAnnotation(QRect(start, end))
+    if tool == 'highlight':
+        return HighlightAnnotation(QRect(start, end))
+    if tool in REDACT_MODES and base is not None:
+        return RedactAnnotation(base, QRect(start, end), tool)
+    return None
+
+
+def draft_annotation(tool, start, end):
+    """拖动中显示的图形：打码只画矩形框（打码结果较慢，松开后在工作线程中计算一次）"""
+    if tool in REDACT_MODES:
+        return BoxAnnotation(QRect(start, end), REDACT_DRAFT_COLOR, REDACT_DRAFT_WIDTH)
+    return make_annotation(tool, start, end)
+
+
+def paint_annotations(painter, commands, area):
+    """按顺序绘制与 area 相交的标注"""
+    painter.setRenderHint(QPainter.Antialiasing, True)
+    painter.setRenderHint(QPainter.TextAntialiasing, True)
+    for command in commands:
+        if command.bounds().intersects(area):
+            command.paint(painter)
+
+
+def flatten(base, commands):
+    """底图 + 标注 → 新的 QImage（线程安全：只用 QImage 和 QPainter，可以在工作线程中调用）"""
+    image = base.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    paint_annotations(painter, commands, image.rect())
+    painter.end()
+    return image if base.hasAlphaChannel() else image.convertToFormat(QImage.Format_RGB32)
+
+
+class AnnotationDocument:
+    """底图 + 标注命令列表 + 重做栈（撤销 / 重做只移动命令，返回需要重绘的区域）"""
+
+    def __init__(self, base):
+        self.base = base
+        self.commands = []
+        self.redo_stack = []
+
+    def add(self, command):
+        self.commands.append(command)
+        self.redo_stack.clear()
+        return command.bounds()
+
+    def undo(self):
+        if not self.commands:
+            return None
+        command = self.commands.pop()
+        self.redo_stack.append(command)
+        return command.bounds()
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        self.commands.append(command)
+        return command.bounds()
+
+    def is_modified(self):
+        return bool(self.commands)
+
+    def snapshot(self):
+        """(底图, 命令列表的副本)：交给工作线程合成（命令不可变，浅拷贝即可）"""
+        return self.base, list(self.commands)
+
+
+class TileCache:
+    """分块渲染缓存：(列, 行) → 渲染好的块（QImage），None 表示这一块没有标注，直接画底图"""
+
+    def __init__(self, document, tile_size=TILE_SIZE):
+        self.document = document
+        self.tile_size = tile_size
+        self.tiles = {}
+        self.rendered = 0
+        self.render_ms = 0.0
+
+    def keys_in(self, rect):
+        """与 rect（图像坐标）相交的块"""
+        rect = rect.intersected(self.document.base.rect())
+        if rect.isEmpty():
+            return []
+        size = self.tile_size
+        return [(tx, ty)
+                for ty in range(rect.top() // size, rect.bottom() // size + 1)
+                for tx in range(rect.left() // size, rect.right() // size + 1)]
+
+    def tile_rect(self, key):
+        size = self.tile_size
+        return QRect(key[0] * size, key[1] * size, size, size).intersected(self.document.base.rect())
+
+    def invalidate(self, rect):
+        """编辑影响到的块失效（下次绘制时重新渲染）"""
+        if rect is None:
+            return
+        for key in self.keys_in(rect):
+            self.tiles.pop(key, None)
+
+    def clear(self):
+        self.tiles.clear()
+
+    def tile(self, key):
+        """取一块（没有缓存时渲染），没有标注时返回 None"""
+        if key in self.tiles:
+            return self.tiles[key]
+
+        rect = self.tile_rect(key)
+        commands = [command for command in self.document.commands if command.bounds().intersects(rect)]
+        if not commands:
+            self.tiles[key] = None
+            return None
+
+        start = time.perf_counter()
+        image = QImage(rect.size(), QImage.Format_ARGB32_Premultiplied)
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(0, 0, self.document.base, rect.x(), rect.y(), rect.width(), rect.height())
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.translate(-rect.topLeft())
+        paint_annotations(painter, commands, rect)
+        painter.end()
+
+        self.tiles[key] = image
+        self.rendered += 1
+        self.render_ms += (time.perf_counter() - start) * 1000
+        return image
+
+    def draw(self, painter, area):
+        """把图像坐标中的 area 画到 painter（painter 已经按图像坐标缩放）"""
+        base = self.document.base
+        for key in self.keys_in(area):
+            rect = self.tile_rect(key)
+            part = rect.intersected(area)
+            image = self.tile(key)
+            if image is None:
+                painter.drawImage(part, base, part)
+            else:
+                painter.drawImage(part, image, part.translated(-rect.topLeft()))
+
+
+class FlattenTask(QRunnable):
+    """在工作线程中合成标注，完成后通过 owner.results 把结果交给主线程的 owner.on_flattened"""
+
+    def __init__(self, owner, base, commands, callback):
+        super().__init__()
+        self.owner = owner
+        self.base = base
+        self.commands = commands
+        self.callback = callback
+
+    def run(self):
+        start = time.perf_counter()
+        image = flatten(self.base, self.commands)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"[标注] 已合成 {len(self.commands)} 个标注（{elapsed:.1f} ms）")
+        self.owner.results.post(self.owner.on_flattened, image, self.callback)
+
+
+class RedactTask(QRunnable):
+    """在工作线程中计算打码结果，完成后通过 owner.results 把打码命令交给主线程的 owner.on_redacted"""
+
+    def __init__(self, owner, outline, base, rect, mode):
+        super().__init__()
+        self.owner = owner
+        self.outline = outline
+        self.base = base
+        self.rect = rect
+        self.mode = mode
+
+    def run(self):
+        command = RedactAnnotation(self.base, self.rect, self.mode)
+        self.owner.results.post(self.owner.on_redacted, self.outline, command)
+
+
+class AnnotationCanvas(QWidget):
+    """显示截图 + 标注；选择了工具时在上面拖动绘制，没有选择工具时鼠标事件交给父窗口（拖动窗口）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.cache = None
+        self.ratio = 1.0
+        self.tool = None
+        self.press_pos = None
+        self.draft = None
+        # 计算中的打码（只显示矩形框），一次算一个，按松开鼠标的顺序加入命令列表
+        self.pending = []
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.results = TaskResults(self)
+
+    def set_image(self, image, ratio=1.0):
+        """换上新的截图（清空标注）"""
+        self.document = AnnotationDocument(image)
+        self.cache = TileCache(self.document)
+        self.ratio = ratio
+        self.draft = None
+        self.pending = []
+        self.press_pos = None
+        self.setFixedSize(int(image.width() / ratio), int(image.height() / ratio))
+        self.update()
+
+    def clear(self):
+        self.document = None
+        self.cache = None
+        self.draft = None
+        self.pending = []
+
+    def set_tool(self, tool):
+        """选择工具（None = 不标注，鼠标拖动窗口）"""
+        self.tool = tool
+        self.setCursor(Qt.CrossCursor if tool else Qt.ArrowCursor)
+
+    def is_modified(self):
+        return self.document is not None and self.document.is_modified()
+
+    def to_image(self, pos):
+        """窗口坐标 → 图像坐标"""
+        return QPoint(int(pos.x() * self.ratio), int(pos.y() * self.ratio))
+
+    def to_widget(self, rect):
+        """图像坐标 → 窗口坐标（向外取整，保证覆盖）"""
+        return QRectF(rect.x() / self.ratio, rect.y() / self.ratio,
+                      rect.width() / self.ratio, rect.height() / self.ratio).toAlignedRect().adjusted(-1, -1, 1, 1)
+
+    def apply(self, bounds):
+        """编辑（添加 / 撤销 / 重做）后：让相关的块失效，只重绘这一块区域"""
+        if bounds is None:
+            return False
+        self.cache.invalidate(bounds)
+        self.update(self.to_widget(bounds))
+        return True
+
+    def add(self, command):
+        return self.apply(self.document.add(command))
+
+    def undo(self):
+        return self.document is not None and self.apply(self.document.undo())
+
+    def redo(self):
+        return self.document is not None and self.apply(self.document.redo())
+
+    def start_redaction(self, start, end, mode):
+        """打码：先显示矩形框，在工作线程中算好打码结果后再加入命令列表"""
+        outline = draft_annotation(mode, start, end)
+        self.pending.append(outline)
+        self.update(self.to_widget(outline.bounds()))
+        self.pool.start(RedactTask(self, outline, self.document.base, QRect(start, end), mode))
+
+    def on_redacted(self, outline, command):
+        # 计算期间换了截图或关闭了窗口：丢弃
+        if outline not in self.pending:
+            return
+        self.pending.remove(outline)
+        self.update(self.to_widget(outline.bounds()))
+        self.add(command)
+
+    def wait_for_done(self, msecs=-1):
+        """等待计算中的打码并加入命令列表（保存前调用）"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
+
+    def paintEvent(self, event):
+        if self.document is None:
+            return
+        painter = QPainter(self)
+        painter.scale(1 / self.ratio, 1 / self.ratio)
+        for area in event.region().rects():
+            area = QRect(self.to_image(area.topLeft()), self.to_image(area.bottomRight() + QPoint(1, 1)))
+            self.cache.draw(painter, area.adjusted(0, 0, -1, -1))
+        for outline in self.pending + ([self.draft] if self.draft is not None else []):
+            paint_annotations(painter, [outline], outline.bounds())
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if self.tool is None or self.document is None or event.button() != Qt.LeftButton:
+            event.ignore()
+            return
+        self.press_pos = self.to_image(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if self.press_pos is None:
+            event.ignore()
+            return
+        old = self.draft.bounds() if self.draft is not None else None
+        self.draft = draft_annotation(self.tool, self.press_pos, self.to_image(event.pos()))
+        for bounds in (old, self.draft.bounds() if self.draft is not None else None):
+            if bounds is not None:
+                self.update(self.to_widget(bounds))
+
+    def mouseReleaseEvent(self, event):
+        if self.press_pos is None:
+            event.ignore()
+            return
+        start, end = self.press_pos, self.to_image(event.pos())
+        self.press_pos = None
+        if self.draft is not None:
+            self.update(self.to_widget(self.draft.bounds()))
+            self.draft = None
+
+        if self.tool == 'text':
+            text, ok = QInputDialog.getText(self, "添加文字", "文字:")
+            if ok and text:
+                self.add(TextAnnotation(end, text))
+            return
+        if (end - start).manhattanLength() < 3:
+            return
+        if self.tool in REDACT_MODES:
+            self.start_redaction(start, end, self.tool)
+        else:
+            self.add(make_annotation(self.tool, start, end))
@@ -0,0 +1,171 @@
+"""
+标注层性能测试：4K 截图上逐个添加 120 个标注（箭头 / 矩形 / 文字 / 高亮）
+1. 每次编辑后重新渲染的块数和耗时，对比每次编辑都重画整张图
+2. 撤销 / 重做：每步耗时；撤销栈保存的是命令，不保存整张图片（对比每步保存一份整图的内存）
+3. 分块缓存拼出的画面与工作线程合成（flatten）的结果逐像素一致
+   （正片叠底按块分段混合时 Qt 的舍入可能差 1，允许每个通道差 ≤ 1）
+4. 预览窗口：拖动画一个矩形，保存时合成在后台进行，主线程立即返回
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_annotations.py
+"""
+import sys
+import time
+import random
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QEventLoop, QPoint, QRect, QTimer
+from PyQt5.QtGui import QImage, QPainter
+
+from bench_capture import make_desktop_pixmap, send_mouse
+from image_buffer import NUMPY_AVAILABLE, pixel_array
+from annotations import (AnnotationDocument, TileCache, ArrowAnnotation, BoxAnnotation,
+                         HighlightAnnotation, TextAnnotation, flatten)
+from float_preview import FloatPreview
+
+WIDTH, HEIGHT = 3840, 2160
+EDITS = 120
+
+
+def random_annotation(rng):
+    x, y = rng.randrange(50, WIDTH - 450), rng.randrange(50, HEIGHT - 300)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return ArrowAnnotation(QPoint(x, y), QPoint(x + rng.randrange(-300, 300), y + rng.randrange(-200, 200)))
+    if kind == 1:
+        return BoxAnnotation(QRect(x, y, rng.randrange(40, 400), rng.randrange(30, 250)))
+    if kind == 2:
+        return HighlightAnnotation(QRect(x, y, rng.randrange(80, 400), 28))
+    return TextAnnotation(QPoint(x, y), f"注意这里 #{rng.randrange(1000)}")
+
+
+def render_dirty(cache, bounds):
+    """模拟一次重绘：只取编辑影响到的块"""
+    for key in cache.keys_in(bounds):
+        cache.tile(key)
+
+
+def compose(cache):
+    """用分块缓存拼出整张画面（与界面绘制的路径相同）"""
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    cache.draw(painter, image.rect())
+    painter.end()
+    return image.convertToFormat(QImage.Format_RGB32)
+
+
+def same_image(a, b):
+    """两张同尺寸图片是否一致（每个通道允许差 1）；没有 NumPy 时要求完全相同"""
+    if not NUMPY_AVAILABLE:
+        return a == b
+    import numpy as np
+    pixels_a = pixel_array(a)
+    pixels_b = pixel_array(b)
+    if pixels_a.shape != pixels_b.shape:
+        return False
+    diff = np.abs(pixels_a.view(np.uint8).astype(np.int16) - pixels_b.view(np.uint8))
+    return int(diff.max()) <= 1
+
+
+def bench_edits(base):
+    rng = random.Random(4)
+    document = AnnotationDocument(base)
+    cache = TileCache(document)
+
+    start = time.perf_counter()
+    for _ in range(EDITS):
+        bounds = document.add(random_annotation(rng))
+        cache.invalidate(bounds)
+        render_dirty(cache, bounds)
+    edit_ms = (time.perf_counter() - start) * 1000 / EDITS
+    tiles_per_edit = cache.rendered / EDITS
+
+    start = time.perf_counter()
+    for _ in range(3):
+        flatten(base, document.commands)
+    full_ms = (time.perf_counter() - start) * 1000 / 3
+
+    total_tiles = len(cache.keys_in(base.rect()))
+    print(f"  {WIDTH}x{HEIGHT}，{EDITS} 次编辑：每次编辑 {edit_ms:.2f} ms，"
+          f"重新渲染 {tiles_per_edit:.1f} 块（共 {total_tiles} 块）")
+    print(f"  对比：每次编辑重画整张图 {full_ms:.1f} ms")
+
+    # 撤销 / 重做
+    rendered = cache.rendered
+    start = time.perf_counter()
+    for _ in range(EDITS // 2):
+        bounds = document.undo()
+        cache.invalidate(bounds)
+        render_dirty(cache, bounds)
+    for _ in range(EDITS // 2):
+        bounds = document.redo()
+        cache.invalidate(bounds)
+        render_dirty(cache, bounds)
+    step_ms = (time.perf_counter() - start) * 1000 / EDITS
+    tile_bytes = sum(image.sizeInBytes() for image in cache.tiles.values() if image is not None)
+    full_mb = base.sizeInBytes() / 1024 / 1024
+    print(f"\n  撤销 / 重做 {EDITS} 步：每步 {step_ms:.2f} ms，"
+          f"重新渲染 {(cache.rendered - rendered) / EDITS:.1f} 块")
+    print(f"  撤销栈中的整图副本: 0（对比每步保存整图 {EDITS} x {full_mb:.1f} MB = {EDITS * full_mb:.0f} MB）")
+    print(f"  分块缓存: {tile_bytes / 1024 / 1024:.1f} MB（只缓存有标注的块）")
+
+    same = same_image(compose(cache), flatten(base, document.commands))
+    print(f"\n  分块缓存画面与合成结果逐像素一致: {'✓' if same else '✗'}")
+    return same
+
+
+def bench_preview(app, base):
+    preview = FloatPreview()
+    pixmap = make_desktop_pixmap(1600, 900)
+    preview.set_pixmap(pixmap)
+    preview.show()
+    app.processEvents()
+
+    canvas = preview.canvas
+    preview.select_tool('box')
+    send_mouse(canvas, QEvent.MouseButtonPress, QPoint(100, 100))
+    for i in range(1, 21):
+        send_mouse(canvas, QEvent.MouseMove, QPoint(100 + i * 20, 100 + i * 10))
+        app.processEvents()
+    send_mouse(canvas, QEvent.MouseButtonRelease, QPoint(500, 300), Qt.NoButton)
+    app.processEvents()
+    drawn = len(canvas.document.commands) == 1
+
+    # 换成 4K 底图和较多标注，测保存时主线程的耗时
+    rng = random.Random(8)
+    canvas.set_image(base)
+    for _ in range(EDITS):
+        canvas.add(random_annotation(rng))
+
+    results = []
+    loop = QEventLoop()
+    start = time.perf_counter()
+    preview.with_output_image(lambda image: (results.append(image), loop.quit()))
+    call_ms = (time.perf_counter() - start) * 1000
+    QTimer.singleShot(10000, loop.quit)
+    loop.exec_()
+    total_ms = (time.perf_counter() - start) * 1000
+
+    flattened = bool(results) and same_image(results[0], flatten(base, canvas.document.commands))
+    print(f"\n  预览窗口拖动画矩形: {'✓' if drawn else '✗'}")
+    print(f"  保存（4K，{EDITS} 个标注）: 主线程 {call_ms:.2f} ms 返回，后台合成完成 {total_ms:.0f} ms，"
+          f"结果正确: {'✓' if flattened else '✗'}")
+    preview.close()
+    return drawn and flattened
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  标注层性能测试")
+    print("=" * 60)
+
+    base = make_desktop_pixmap(WIDTH, HEIGHT).toImage().convertToFormat(QImage.Format_RGB32)
+    passed = bench_edits(base)
+    passed = bench_preview(app, base) and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
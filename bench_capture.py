@@ -0,0 +1,305 @@
+"""
+截图流程性能测试
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_capture.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QEventLoop, QPoint, QRect, QTimer
+from PyQt5.QtGui import QPixmap, QPainter, QColor, QFont, QLinearGradient, QMouseEvent
+from PyQt5.QtTest import QTest
+
+from capture_session import CaptureSession
+from float_preview import FloatPreview
+from hotkeys import HotkeyDispatcher, FakeHotkeySource
+from screen_capture import CaptureFrame
+from screen_selector import ScreenSelector
+
+# 常见桌面分辨率：1080p / 4K / 三屏 4K
+RESOLUTIONS = [(1920, 1080), (3840, 2160), (11520, 2160)]
+
+# 热键 → 遮罩第一帧绘制 的延迟预算（毫秒），预热模式必须满足
+HOTKEY_BUDGET_MS = 50.0
+
+# 放大镜每帧绘制耗时上限（毫秒，60 Hz 刷新间隔）
+LOUPE_BUDGET_MS = 1000.0 / 60
+
+
+def make_desktop_pixmap(width, height):
+    """生成一张接近真实桌面内容的合成截图（渐变 + 色块 + 文字）"""
+    pixmap = QPixmap(width, height)
+    painter = QPainter(pixmap)
+
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(30, 60, 120))
+    gradient.setColorAt(1, QColor(200, 120, 40))
+    painter.fillRect(0, 0, width, height, gradient)
+
+    painter.setFont(QFont("Arial", 12))
+    for y in range(0, height, 180):
+        for x in range(0, width, 320):
+            painter.fillRect(x + 10, y + 10, 300, 160, QColor((x * 7) % 255, (y * 3) % 255, 200))
+            painter.setPen(Qt.black)
+            painter.drawText(x + 20, y + 40, f"窗口 {x},{y} 截图工具 benchmark")
+
+    painter.end()
+    return pixmap
+
+
+def time_ms(func, repeat=3):
+    """多次运行取最小耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_temp_png():
+    """旧流程每次截图额外付出的整帧 PNG 编码 + 写临时文件开销"""
+    print("\n[1] 已移除的整帧临时 PNG 开销（旧流程在遮罩显示前执行）")
+    print(f"  {'分辨率':>14} | {'PNG 临时文件':>12} | {'BMP 落盘模式':>12} | {'内存模式':>8}")
+
+    for width, height in RESOLUTIONS:
+        pixmap = make_desktop_pixmap(width, height)
+        fd, path = tempfile.mkstemp(suffix='.img')
+        os.close(fd)
+
+        png_ms = time_ms(lambda: pixmap.save(path, 'PNG'))
+        bmp_ms = time_ms(lambda: pixmap.save(path, 'BMP'))
+        os.remove(path)
+
+        print(f"  {width:>6}x{height:<7} | {png_ms:>9.1f} ms | {bmp_ms:>9.1f} ms | {0.0:>5.1f} ms")
+
+
+def bench_overlay_latency(app, runs=5):
+    """触发 → 遮罩第一帧绘制 的实测延迟"""
+    print(f"\n[2] 触发 → 遮罩显示延迟（当前平台: {app.platformName()}，{runs} 次）")
+
+    for spool in (False, True):
+        session = CaptureSession(spool_to_disk=spool)
+        results = []
+
+        for _ in range(runs):
+            session.start()
+            loop = QEventLoop()
+            session.selector.first_painted.connect(loop.quit)
+            loop.exec_()
+            results.append(session.timings['overlay'])
+            QTest.keyClick(session.selector, Qt.Key_Escape)
+
+        mode = "落盘模式" if spool else "内存模式"
+        print(f"  {mode}: 最小 {min(results):.1f} ms，平均 {sum(results) / len(results):.1f} ms")
+
+
+def send_mouse(widget, event_type, pos, buttons=Qt.LeftButton):
+    """直接投递鼠标事件（不依赖窗口系统的真实光标）"""
+    button = Qt.NoButton if event_type == QEvent.MouseMove else Qt.LeftButton
+    event = QMouseEvent(event_type, pos, widget.mapToGlobal(pos), button, buttons, Qt.NoModifier)
+    QApplication.sendEvent(widget, event)
+
+
+def scripted_drag(app, selector, steps=200):
+    """模拟一次从左上到右下的拖动，每个移动事件后处理一次绘制"""
+    width, height = selector.width(), selector.height()
+    start = QPoint(width // 4, height // 4)
+    send_mouse(selector, QEvent.MouseButtonPress, start)
+    app.processEvents()
+    selector.paint_stats.reset()
+
+    for i in range(1, steps + 1):
+        pos = QPoint(start.x() + i * width // (4 * steps), start.y() + i * height // (4 * steps))
+        send_mouse(selector, QEvent.MouseMove, pos)
+        app.processEvents()
+
+    return selector.paint_stats
+
+
+def bench_selection_paint(app, width=3840, height=2160):
+    """拖动选择框时每帧的绘制耗时：整窗重绘 vs 只重绘脏矩形"""
+    print(f"\n[3] 拖动选择框的绘制耗时（{width}x{height} 背景，200 次移动）")
+
+    pixmap = make_desktop_pixmap(width, height)
+    for full_repaint in (True, False):
+        selector = ScreenSelector(CaptureFrame(pixmap, QRect(0, 0, width, height)))
+        selector.full_repaint = full_repaint
+        selector.coalesce_moves = False
+        selector.show()
+        app.processEvents()
+
+        stats = scripted_drag(app, selector)
+        mode = "整窗重绘" if full_repaint else "脏矩形重绘"
+        print(f"  {mode}: {stats}")
+
+        selector.hide()
+        selector.deleteLater()
+
+
+def bench_move_storm(app, rate=8000, seconds=1.0, width=3840, height=2160):
+    """合成鼠标事件风暴：按 rate 个/秒投递移动事件，统计渲染 / 合并数量"""
+    print(f"\n[4] 鼠标事件风暴（{rate} 个/秒，持续 {seconds:.1f} 秒）")
+
+    selector = ScreenSelector(CaptureFrame(make_desktop_pixmap(width, height), QRect(0, 0, width, height)))
+    selector.show()
+    app.processEvents()
+
+    results = []
+    selector.selection_finished.connect(results.append)
+
+    start_pos = QPoint(100, 100)
+    send_mouse(selector, QEvent.MouseButtonPress, start_pos)
+    selector.paint_stats.reset()
+
+    total = int(rate * seconds)
+    begin = time.perf_counter()
+    for i in range(total):
+        # 按目标速率投递事件，空闲时交给事件循环（刷新定时器在这里触发）
+        while time.perf_counter() - begin < i / rate:
+            app.processEvents()
+        pos = QPoint(start_pos.x() + i % 2000, start_pos.y() + (i * 3) % 1200)
+        send_mouse(selector, QEvent.MouseMove, pos)
+    elapsed = time.perf_counter() - begin
+
+    end_pos = QPoint(1234, 987)
+    send_mouse(selector, QEvent.MouseButtonRelease, end_pos, Qt.NoButton)
+
+    stats = selector.move_stats
+    interval_ms = selector.refresh_interval() * 1000
+    print(f"  刷新间隔 {interval_ms:.1f} ms：{stats}")
+    print(f"  渲染帧率 {stats.rendered / elapsed:.1f} 帧/秒，绘制 {selector.paint_stats}")
+
+    expected = QRect(start_pos, end_pos).normalized()
+    honoured = bool(results) and results[0] == expected
+    print(f"  松开位置生效: {'✓' if honoured else '✗'} {results[0] if results else None}")
+
+
+def bench_loupe(app, width=7680, height=4320, moves=300):
+    """放大镜跟随鼠标（没有按下，8K 背景）：每帧绘制耗时；对比每次移动都把截图转成 QImage"""
+    print(f"\n[6] 放大镜跟随鼠标（{width}x{height} 背景，{moves} 次移动，预算 {LOUPE_BUDGET_MS:.1f} ms/帧）")
+
+    pixmap = make_desktop_pixmap(width, height)
+    frame = CaptureFrame(pixmap, QRect(0, 0, width, height))
+    selector = ScreenSelector(frame)
+    selector.coalesce_moves = False
+    selector.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    frame.tile_images()
+    cache_ms = (time.perf_counter() - start) * 1000
+
+    selector.paint_stats.reset()
+    for i in range(moves):
+        pos = QPoint(50 + i * (width - 100) // moves, 50 + (i * 37) % (height - 100))
+        send_mouse(selector, QEvent.MouseMove, pos, Qt.NoButton)
+        app.processEvents()
+    stats = selector.paint_stats
+
+    color = selector.pixel_color()
+    expected = QColor(pixmap.copy(selector.cursor_pos.x(), selector.cursor_pos.y(), 1, 1).toImage().pixel(0, 0))
+    correct = color is not None and color == expected
+
+    # 光栅后端上 toImage() 与 QPixmap 共享数据；其他后端每次转换都是整幅拷贝，这里用 copy() 模拟
+    naive_ms = time_ms(lambda: pixmap.toImage().copy().pixel(selector.cursor_pos), repeat=5)
+    print(f"  缓存 QImage（每次截图一次）: {cache_ms:.2f} ms")
+    print(f"  绘制: {stats}")
+    print(f"  对比：每次移动都整幅转换成 QImage 再取色 {naive_ms:.1f} ms/次")
+    print(f"  取色与截图一致: {'✓' if correct else '✗'} {color.name() if color else None}")
+
+    selector.hide()
+    selector.deleteLater()
+    frame.discard()
+    return correct and stats.max_ms <= LOUPE_BUDGET_MS
+
+
+def bench_hotkey_to_paint(app, runs=10):
+    """热键 → 遮罩第一帧绘制：每次新建窗口 vs 预热复用；返回预热模式是否满足预算"""
+    print(f"\n[5] 热键 → 遮罩第一帧绘制（假热键源，{runs} 次，预算 {HOTKEY_BUDGET_MS:.0f} ms）")
+
+    source = FakeHotkeySource()
+    dispatcher = HotkeyDispatcher()
+    dispatcher.attach(source)
+    passed = True
+
+    for prewarm in (False, True):
+        session = CaptureSession(prewarm=prewarm)
+        preview = FloatPreview() if prewarm else None
+        press_time = [0.0]
+        dispatcher.register(1, lambda: session.start(trigger_time=press_time[0]))
+
+        overlay_results = []
+        preview_results = []
+        for _ in range(runs):
+            # 按下热键，等待排队分发
+            loop = QEventLoop()
+            dispatcher.dispatched.connect(loop.quit)
+            press_time[0] = time.perf_counter()
+            source.press(1)
+            loop.exec_()
+            dispatcher.dispatched.disconnect(loop.quit)
+
+            # 等待遮罩第一帧绘制
+            selector = session.selector
+            if selector.first_paint_time is None:
+                loop = QEventLoop()
+                selector.first_painted.connect(loop.quit)
+                loop.exec_()
+                selector.first_painted.disconnect(loop.quit)
+            overlay_results.append(session.timings['overlay'])
+
+            # 完成选择并显示预览（预热模式复用预览窗口）
+            captured = []
+            session.captured.connect(lambda pixmap, rect: captured.append(pixmap))
+            send_mouse(selector, QEvent.MouseButtonPress, QPoint(10, 10))
+            send_mouse(selector, QEvent.MouseButtonRelease, QPoint(200, 150), Qt.NoButton)
+            session.captured.disconnect()
+
+            start = time.perf_counter()
+            if prewarm:
+                preview.set_pixmap(captured[0])
+            else:
+                preview = FloatPreview(captured[0])
+            preview.show()
+            preview.close()
+            preview_results.append((time.perf_counter() - start) * 1000)
+            app.processEvents()
+
+        worst = max(overlay_results)
+        mode = "预热复用" if prewarm else "每次新建"
+        print(f"  {mode}: 遮罩平均 {sum(overlay_results) / runs:.1f} ms，最差 {worst:.1f} ms；"
+              f"预览准备平均 {sum(preview_results) / runs:.1f} ms")
+
+        if prewarm:
+            passed = worst <= HOTKEY_BUDGET_MS
+            print(f"  预算检查: {'✓ 通过' if passed else '✗ 超出预算'}")
+
+    return passed
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  截图流程性能测试")
+    print("=" * 60)
+
+    bench_temp_png()
+    bench_overlay_latency(app)
+    bench_selection_paint(app)
+    bench_move_storm(app)
+    passed = bench_hotkey_to_paint(app)
+    passed = bench_loupe(app) and passed
+
+    print()
+    QTimer.singleShot(0, app.quit)
+    app.exec_()
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
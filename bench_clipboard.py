@@ -0,0 +1,190 @@
+"""
+剪贴板测试：4K 单屏合成桌面，直接检查 Qt 剪贴板中的内容
+1. 复制：主线程耗时、不编码、不拷贝像素（剪贴板中的图像与截图共享内存）
+   对比：复制时立即编码 PNG（默认压缩级别），保存到桌面再打开文件
+2. 读取原始图像（接受位图的程序）：不编码
+3. 读取 image/png：第一次请求时编码，再次请求使用缓存，解码后与原图一致
+4. 大图：复制后在工作线程中提前编码，请求 PNG 时主线程几乎不用等；历史中已有的 PNG 直接使用
+5. 预览窗口：复制按钮 / Ctrl+C 复制截图，有标注时复制合成后的图像
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_clipboard.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QBuffer, QIODevice, QPoint
+from PyQt5.QtGui import QImage
+from PyQt5.QtTest import QTest
+
+from bench_capture import make_desktop_pixmap, time_ms, send_mouse
+from image_clipboard import ImageClipboard, PNG_MIME
+from float_preview import FloatPreview
+from capture_history import CaptureHistory
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def default_png(image):
+    """对比用：按 Qt 默认压缩级别编码 PNG（QClipboard.setImage 在请求 PNG 时的做法）"""
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+
+def save_and_reopen(image):
+    """对比用：保存到桌面再打开文件"""
+    path = os.path.join(tempfile.mkdtemp(prefix='clipboard_'), "截图.png")
+    image.save(path, "PNG")
+    reopened = QImage(path)
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    return reopened
+
+
+def png_image(data):
+    return QImage.fromData(bytes(data), "PNG").convertToFormat(QImage.Format_RGB32)
+
+
+def wait_until(app, condition, timeout_s=5.0):
+    deadline = time.perf_counter() + timeout_s
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+def bench_lazy(image):
+    """不提前编码：复制 → 读原始图像 → 读 PNG 两次"""
+    clipboard = ImageClipboard(prepare_pixels=WIDTH * HEIGHT + 1)
+    system = QApplication.clipboard()
+
+    start = time.perf_counter()
+    data = clipboard.copy(image)
+    copy_ms = (time.perf_counter() - start) * 1000
+
+    raw = system.image()
+    shared = int(raw.constBits()) == int(image.constBits())
+    raw_ok = raw == image and data.encodes == 0
+
+    start = time.perf_counter()
+    first = system.mimeData().data(PNG_MIME)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    second = system.mimeData().data(PNG_MIME)
+    second_ms = (time.perf_counter() - start) * 1000
+    png_ok = png_image(first) == image.convertToFormat(QImage.Format_RGB32)
+    cached = data.encodes == 1 and first == second
+
+    eager_ms = time_ms(lambda: default_png(image), repeat=1)
+    file_ms = time_ms(lambda: save_and_reopen(image), repeat=1)
+
+    print(f"\n  复制（主线程）: {copy_ms:.2f} ms，编码 0 次，剪贴板图像与截图共享内存: {'✓' if shared else '✗'}")
+    print(f"    对比: 复制时立即编码 PNG {eager_ms:.0f} ms，保存到桌面再打开 {file_ms:.0f} ms")
+    print(f"  读取原始图像: 内容一致且不编码: {'✓' if raw_ok else '✗'}")
+    print(f"  读取 image/png: 第一次 {first_ms:.0f} ms（{len(first) / 1024:.0f} KB），"
+          f"再次 {second_ms:.2f} ms；解码一致: {'✓' if png_ok else '✗'}，只编码一次: {'✓' if cached else '✗'}")
+    clipboard.shutdown()
+    return shared and raw_ok and png_ok and cached and copy_ms < 50
+
+
+def bench_prepared(image):
+    """大图提前编码：复制后立即请求原始图像不等待，过一会儿请求 PNG 几乎不用等"""
+    clipboard = ImageClipboard()
+    system = QApplication.clipboard()
+
+    start = time.perf_counter()
+    data = clipboard.copy(image)
+    copy_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    raw = system.image()
+    raw_ms = (time.perf_counter() - start) * 1000
+
+    data.pending.result()  # 模拟用户切换到目标程序再粘贴的间隔
+    start = time.perf_counter()
+    png = system.mimeData().data(PNG_MIME)
+    png_ms = (time.perf_counter() - start) * 1000
+    ok = raw == image and data.encodes == 1 and png_image(png) == image.convertToFormat(QImage.Format_RGB32)
+    print(f"\n  大图提前编码: 复制 {copy_ms:.2f} ms，读取原始图像 {raw_ms:.2f} ms，"
+          f"请求 PNG 时主线程等待 {png_ms:.2f} ms（工作线程编码 {data.encode_ms:.0f} ms）: {'✓' if ok else '✗'}")
+    clipboard.shutdown()
+    return ok and png_ms < 20
+
+
+def bench_history(image):
+    """从历史复制：后台压缩好的 PNG 直接放进剪贴板，不再编码（raw_entries=0：每张都压缩）"""
+    history = CaptureHistory(raw_entries=0, cache_dir=tempfile.mkdtemp(prefix='clipboard_history_'))
+    history.add(image)
+    history.wait_for_done()
+    entry = history.recent(1)[0]
+
+    clipboard = ImageClipboard()
+    data = clipboard.copy(history.get(entry.id), entry.data)
+    png = QApplication.clipboard().mimeData().data(PNG_MIME)
+    ok = entry.data is not None and data.encodes == 0 and bytes(png) == entry.data
+    print(f"  从历史复制，使用已压缩的 PNG，不再编码: {'✓' if ok else '✗'}")
+    clipboard.shutdown()
+    history.clear()
+    return ok
+
+
+def bench_preview(app):
+    pixmap = make_desktop_pixmap(1600, 900)
+    clipboard = ImageClipboard()
+    preview = FloatPreview(clipboard=clipboard)
+    system = QApplication.clipboard()
+
+    # 复制按钮
+    system.clear()
+    preview.set_pixmap(pixmap)
+    preview.show()
+    app.processEvents()
+    preview.copy_btn.click()
+    button_ok = system.image() == pixmap.toImage() and not preview.isVisible()
+
+    # Ctrl+C，有标注：复制合成后的图像
+    system.clear()
+    preview.set_pixmap(pixmap)
+    preview.show()
+    preview.activateWindow()
+    app.processEvents()
+    preview.select_tool('box')
+    send_mouse(preview.canvas, QEvent.MouseButtonPress, QPoint(100, 100))
+    send_mouse(preview.canvas, QEvent.MouseMove, QPoint(400, 300))
+    send_mouse(preview.canvas, QEvent.MouseButtonRelease, QPoint(400, 300), Qt.NoButton)
+    app.processEvents()
+    QTest.keyClick(preview, Qt.Key_C, Qt.ControlModifier)
+    preview.wait_for_done()
+    copied = wait_until(app, lambda: not system.image().isNull())
+    annotated = system.image()
+    shortcut_ok = (copied and not preview.isVisible() and annotated.size() == pixmap.size()
+                   and annotated.convertToFormat(QImage.Format_RGB32)
+                   != pixmap.toImage().convertToFormat(QImage.Format_RGB32))
+
+    print(f"\n  预览窗口复制按钮: {'✓' if button_ok else '✗'}")
+    print(f"  预览窗口 Ctrl+C（有标注，复制合成后的图像）: {'✓' if shortcut_ok else '✗'}")
+    clipboard.shutdown()
+    return button_ok and shortcut_ok
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  剪贴板测试")
+    print("=" * 60)
+
+    image = make_desktop_pixmap(WIDTH, HEIGHT).toImage()
+    passed = bench_lazy(image)
+    passed = bench_prepared(image) and passed
+    passed = bench_history(image) and passed
+    passed = bench_preview(app) and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+边缘吸附性能测试：合成桌面（渐变背景 + 色块窗口 + 文字）
+1. 整帧边缘图 + 行 / 列投影的计算耗时和内存（4K / 8K）
+2. 每次吸附查询的耗时，对比每次移动都在光标附近现算边缘
+3. 拖到色块角附近松开，选择框吸附到色块的精确边界（向右下拖、向左上拖）
+4. 实际截图会话：边缘图在后台算好后交给选择窗口，遮罩显示不被拖慢
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_edge_snap.py
+"""
+import sys
+import time
+import random
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEvent, QEventLoop, QPoint, QRect, QTimer
+
+from bench_capture import make_desktop_pixmap, send_mouse, time_ms
+from capture_session import CaptureSession
+from screen_capture import CaptureFrame
+from screen_selector import ScreenSelector
+from edge_snap import NUMPY_AVAILABLE, EdgeTile, EdgeMap, channel_edges, SNAP_DISTANCE
+from image_buffer import pixel_array
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# make_desktop_pixmap 中第 (i, j) 个色块：左上角 (320 i + 10, 180 j + 10)，300x160
+BOX = QRect(320 + 10, 180 + 10, 300, 160)
+
+
+def local_edges(pixels, pos, anchor):
+    """对比用：不预先计算，每次移动时在光标附近 ±SNAP_DISTANCE 行的选择框跨度上现算水平边缘"""
+    x0, x1 = sorted((pos.x(), anchor.x()))
+    strip = pixels[pos.y() - SNAP_DISTANCE:pos.y() + SNAP_DISTANCE + 2, x0:x1 + 1]
+    channels = strip.view(np.uint8).reshape(len(strip), -1, 4)
+    counts = channel_edges(channels[1:], channels[:-1]).sum(axis=1)
+    return int(counts.argmax())
+
+
+def bench_compute():
+    print(f"\n  {'分辨率':<10} | {'边缘图':>8} | {'投影内存':>8}")
+    for width, height in ((3840, 2160), (7680, 4320)):
+        image = make_desktop_pixmap(width, height).toImage()
+        start = time.perf_counter()
+        tile = EdgeTile(image)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {width}x{height:<5} | {elapsed:>5.0f} ms | {tile.nbytes / 1024 / 1024:>5.1f} MB")
+    return image, tile
+
+
+def bench_lookup(image, tile):
+    edge_map = EdgeMap([(QRect(0, 0, tile.width, tile.height), tile)])
+    rng = random.Random(9)
+    pairs = [(QPoint(rng.randrange(100, 7500), rng.randrange(100, 4200)),
+              QPoint(rng.randrange(100, 7500), rng.randrange(100, 4200))) for _ in range(5000)]
+    start = time.perf_counter()
+    for pos, anchor in pairs:
+        edge_map.snap(pos, anchor)
+    snap_us = (time.perf_counter() - start) * 1e6 / len(pairs)
+
+    pixels = pixel_array(image)
+    naive_us = time_ms(lambda: [local_edges(pixels, pos, anchor) for pos, anchor in pairs[:200]]) * 1000 / 200
+    print(f"\n  吸附查询（8K，随机选择框）: {snap_us:.1f} µs/次；每次现算附近边缘 {naive_us:.0f} µs/次")
+
+
+def drag(app, selector, start, end):
+    results = []
+    selector.selection_finished.connect(results.append)
+    send_mouse(selector, QEvent.MouseButtonPress, start)
+    for i in range(1, 11):
+        send_mouse(selector, QEvent.MouseMove, start + (end - start) * i / 10)
+        app.processEvents()
+    send_mouse(selector, QEvent.MouseButtonRelease, end)
+    selector.selection_finished.disconnect(results.append)
+    return results[0] if results else None
+
+
+def bench_selector(app):
+    width, height = 1920, 1080
+    pixmap = make_desktop_pixmap(width, height)
+    frame = CaptureFrame(pixmap, QRect(0, 0, width, height))
+    edge_map = EdgeMap([(frame.rect(), EdgeTile(pixmap.toImage()))])
+
+    passed = True
+    cases = (("向右下拖", BOX.topLeft(), BOX.bottomRight() + QPoint(5, -4)),
+             ("向左上拖", BOX.bottomRight(), BOX.topLeft() + QPoint(-3, 6)))
+    for name, start, end in cases:
+        selector = ScreenSelector(frame)
+        selector.coalesce_moves = False
+        selector.show()
+        app.processEvents()
+        selector.set_edge_map(edge_map)
+        rect = drag(app, selector, start, end)
+        ok = rect == BOX
+        passed = passed and ok
+        print(f"  {name}到色块角附近（偏 {abs(end.x() - (BOX.right() if end.x() > start.x() else BOX.left()))}, "
+              f"{abs(end.y() - (BOX.bottom() if end.y() > start.y() else BOX.top()))} px）: "
+              f"{'✓' if ok else '✗'} {rect}")
+        selector.deleteLater()
+    return passed
+
+
+def bench_session(app):
+    """实际截图会话：边缘图在后台线程计算，完成后交给选择窗口"""
+    session = CaptureSession(prewarm=True, window_source=None)
+    loop = QEventLoop()
+    session.edges_ready.connect(lambda *_: QTimer.singleShot(0, loop.quit))
+    QTimer.singleShot(5000, loop.quit)
+    session.start()
+    loop.exec_()
+    ready = session.selector is not None and session.selector.edge_map is not None
+    overlay = session.timings.get('overlay')
+    print(f"\n  截图会话: 遮罩显示 {overlay if overlay is not None else float('nan'):.1f} ms，"
+          f"后台边缘图 {session.timings.get('edges', float('nan')):.1f} ms，"
+          f"已交给选择窗口: {'✓' if ready else '✗'}")
+    session.selector.close()
+    session.on_selection_cancelled()
+    return ready
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  边缘吸附性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    image, tile = bench_compute()
+    bench_lookup(image, tile)
+    print()
+    passed = bench_selector(app)
+    passed = bench_session(app) and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
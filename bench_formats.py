@@ -0,0 +1,135 @@
+"""
+输出格式性能测试：每种格式的编码耗时、解码耗时、文件大小
+语料 = 合成截图（桌面、界面文字、渐变、噪声）+ 命令行给出的真实截图（文件或目录）
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_formats.py [截图目录...]
+"""
+import os
+import sys
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont, QLinearGradient
+
+import image_formats
+from bench_capture import make_desktop_pixmap, time_ms
+
+# 真实截图支持的扩展名
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".qoi")
+
+
+def make_text_image(width, height):
+    """界面 / 代码编辑器：浅色背景上的大量小字"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(250, 250, 250))
+    painter = QPainter(image)
+    painter.setFont(QFont("Monospace", 10))
+    painter.fillRect(0, 0, 240, height, QColor(235, 238, 242))
+    for i, y in enumerate(range(20, height, 18)):
+        painter.setPen(QColor(120, 120, 120))
+        painter.drawText(250, y, f"{i + 1:>4}")
+        painter.setPen(QColor(30, 30, 140) if i % 3 else QColor(20, 120, 40))
+        painter.drawText(300, y, f"def handle_event_{i}(self, event):  # 截图工具 line {i * 37 % 1000}")
+    painter.end()
+    return image
+
+
+def make_gradient_image(width, height):
+    """大面积渐变（壁纸、阴影）"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(10, 40, 90))
+    gradient.setColorAt(0.5, QColor(120, 180, 220))
+    gradient.setColorAt(1, QColor(240, 200, 120))
+    painter.fillRect(0, 0, width, height, gradient)
+    painter.end()
+    return image
+
+
+def make_noise_image(width, height):
+    """随机噪声（照片 / 视频画面的最坏情况）"""
+    pixels = os.urandom(width * height * 4)
+    # RGB32 忽略最高字节（不透明）；QImage 不持有 bytes 的引用，copy() 得到自己的像素数据
+    return QImage(pixels, width, height, width * 4, QImage.Format_RGB32).copy()
+
+
+def synthetic_corpus():
+    """合成语料：(名称, QImage)"""
+    return [
+        ("桌面 1080p", make_desktop_pixmap(1920, 1080).toImage()),
+        ("桌面 4K", make_desktop_pixmap(3840, 2160).toImage()),
+        ("界面文字 1080p", make_text_image(1920, 1080)),
+        ("渐变 1080p", make_gradient_image(1920, 1080)),
+        ("噪声 720p", make_noise_image(1280, 720)),
+    ]
+
+
+def real_corpus(paths):
+    """命令行给出的真实截图（文件或目录）"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+
+    corpus = []
+    for path in files:
+        try:
+            corpus.append((os.path.basename(path), image_formats.read_image(path)))
+        except IOError as e:
+            print(f"✗ 跳过 {path}: {e}")
+    return corpus
+
+
+def bench_image(name, image, formats):
+    """对一张图片测试所有格式"""
+    raw_bytes = image.width() * image.height() * 4
+    print(f"\n  {name}（{image.width()}x{image.height()}，原始 {raw_bytes / 1024 / 1024:.1f} MB）")
+    print(f"    {'格式':<24} | {'编码':>9} | {'解码':>9} | {'大小':>10} | {'压缩比':>6}")
+
+    results = {}
+    for fmt in formats:
+        data = fmt.encode(image)
+        # 慢的格式少跑几次
+        repeat = 1 if len(data) > 4 * 1024 * 1024 or fmt.qt_format is None else 3
+        encode_ms = time_ms(lambda: fmt.encode(image), repeat)
+        decode_ms = time_ms(lambda: fmt.decode(data), repeat)
+        results[fmt.key] = (encode_ms, decode_ms, len(data))
+        print(f"    {fmt.label:<24} | {encode_ms:>6.1f} ms | {decode_ms:>6.1f} ms | "
+              f"{len(data) / 1024:>7.0f} KB | {raw_bytes / len(data):>5.1f}x")
+    return results
+
+
+def main():
+    app = QApplication(sys.argv)
+    formats = image_formats.available_formats()
+
+    print("=" * 60)
+    print("  输出格式性能测试")
+    print("=" * 60)
+    print(f"可用格式: {', '.join(fmt.key for fmt in formats)}")
+    if not any(fmt.key == "qoi" for fmt in formats):
+        print("（未安装 NumPy，跳过 QOI）")
+
+    corpus = synthetic_corpus() + real_corpus(sys.argv[1:])
+
+    totals = {fmt.key: [0.0, 0.0, 0] for fmt in formats}
+    for name, image in corpus:
+        for key, values in bench_image(name, image, formats).items():
+            for i, value in enumerate(values):
+                totals[key][i] += value
+
+    print(f"\n  合计（{len(corpus)} 张）")
+    for fmt in formats:
+        encode_ms, decode_ms, size = totals[fmt.key]
+        print(f"    {fmt.label:<24} | 编码 {encode_ms:>7.1f} ms | 解码 {decode_ms:>7.1f} ms | "
+              f"{size / 1024 / 1024:>6.2f} MB")
+
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
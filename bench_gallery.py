@@ -0,0 +1,128 @@
+"""
+截图画廊性能测试：内存映射缩略图图集 vs 按需解码原图
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_gallery.py [截图数]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QFont
+
+from bench_capture import make_desktop_pixmap, time_ms
+from bench_library import fill_library
+from capture_library import CaptureLibrary
+from gallery_window import GalleryWindow
+from thumbnail_atlas import ThumbnailAtlas, make_thumbnail, THUMB_SIZE
+
+# 用于对比的原图尺寸
+ORIGINAL_SIZE = (1920, 1080)
+
+
+def process_memory_mb():
+    """(常驻内存, 私有内存) MB；私有内存不含映射文件的页面（可被系统回收），无法获取时返回 None"""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            resident, shared = (int(value) for value in f.read().split()[1:3])
+        page_mb = resource.getpagesize() / 1024 / 1024
+        return resident * page_mb, (resident - shared) * page_mb
+    except (ImportError, OSError):
+        return None
+
+
+def make_thumbnails(count):
+    """几种不同内容的缩略图，循环使用（生成缩略图本身不是这里要测的）"""
+    base = make_desktop_pixmap(*ORIGINAL_SIZE).toImage()
+    thumbnails = []
+    for i in range(count):
+        image = base.copy(i * 97 % 800, i * 53 % 400, 1100 - i % 7 * 90, 660)
+        painter = QPainter(image)
+        painter.setFont(QFont("Arial", 60))
+        painter.setPen(Qt.white)
+        painter.drawText(40, 120, f"#{i}")
+        painter.end()
+        thumbnails.append(make_thumbnail(image))
+    return thumbnails
+
+
+def bench_scroll(app, gallery):
+    """从头滚动到尾，每一屏完整重绘一次"""
+    view = gallery.view
+    scrollbar = view.verticalScrollBar()
+    pages = 0
+    start = time.perf_counter()
+    for value in range(0, scrollbar.maximum() + 1, max(1, scrollbar.pageStep())):
+        scrollbar.setValue(value)
+        view.viewport().repaint()
+        pages += 1
+    elapsed = (time.perf_counter() - start) * 1000
+    return pages, elapsed / max(1, pages)
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print("=" * 60)
+    print("  截图画廊性能测试")
+    print("=" * 60)
+
+    root = tempfile.mkdtemp(prefix='gallery_bench_')
+    library = CaptureLibrary(root)
+    metas, _, _ = fill_library(library, count)
+
+    thumbnails = make_thumbnails(64)
+    start = time.perf_counter()
+    for record_id in library.ids():
+        library.atlas.add(record_id, *thumbnails[record_id % len(thumbnails)])
+    write_ms = (time.perf_counter() - start) * 1000
+    atlas_mb = os.path.getsize(library.atlas.atlas_path) / 1024 / 1024
+    print(f"  {count} 张缩略图写入图集 {write_ms:.0f} ms，图集 {atlas_mb:.1f} MB")
+
+    open_ms = time_ms(lambda: ThumbnailAtlas(root).close(), repeat=3)
+    print(f"  打开图集（读取偏移索引）: {open_ms:.1f} ms")
+
+    memory_before = process_memory_mb()
+    gallery = GalleryWindow(library)
+    start = time.perf_counter()
+    gallery.show()
+    app.processEvents()
+    gallery.view.viewport().repaint()
+    first_ms = (time.perf_counter() - start) * 1000
+    visible = len(gallery.view.visible_range(gallery.view.viewport().rect()))
+    print(f"  打开画廊 + 第一屏 {visible} 张: {first_ms:.1f} ms")
+
+    pages, page_ms = bench_scroll(app, gallery)
+    memory_after = process_memory_mb()
+    print(f"  滚动浏览全部 {pages} 屏: 平均 {page_ms:.2f} ms/屏")
+    if memory_before is not None:
+        print(f"  进程私有内存: 打开前 {memory_before[1]:.0f} MB，浏览全部后 {memory_after[1]:.0f} MB"
+              f"（常驻 {memory_before[0]:.0f} → {memory_after[0]:.0f} MB，差值为映射的图集页面）")
+
+    # 对比：每一屏按需解码原图再缩放
+    fd, path = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    make_desktop_pixmap(*ORIGINAL_SIZE).save(path, 'PNG')
+
+    def decode_page():
+        from image_formats import read_image
+        for _ in range(visible):
+            read_image(path).scaled(THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    decode_ms = time_ms(decode_page, repeat=1)
+    os.remove(path)
+    print(f"  对比：一屏 {visible} 张按需解码 {ORIGINAL_SIZE[0]}x{ORIGINAL_SIZE[1]} PNG: {decode_ms:.0f} ms")
+
+    gallery.close()
+    library.close()
+    shutil.rmtree(root, ignore_errors=True)
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
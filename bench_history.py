@@ -0,0 +1,105 @@
+"""
+截图历史长时间运行测试：连续加入几百张截图，检查内存占用保持平稳
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_history.py [截图数]
+"""
+import sys
+import time
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QFont
+
+from bench_capture import make_desktop_pixmap
+from capture_history import CaptureHistory
+
+# 测试用的预算（比默认值小，几百张截图内就能触发落盘和淘汰）
+MEMORY_BUDGET = 16 * 1024 * 1024
+DISK_BUDGET = 12 * 1024 * 1024
+MAX_ENTRIES = 150
+
+# 后半程进程内存允许的增长（MB）
+RSS_TOLERANCE_MB = 16.0
+
+
+def process_rss_mb():
+    """当前进程常驻内存（MB），无法获取时返回 None"""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except (ImportError, OSError):
+        return None
+
+
+def make_capture(base, index):
+    """每张截图内容都不同（避免压缩结果完全一样）"""
+    image = base.copy()
+    painter = QPainter(image)
+    painter.setFont(QFont("Arial", 28))
+    painter.setPen(Qt.white)
+    for row in range(8):
+        painter.drawText(40 + index % 300, 80 + row * 90, f"截图 #{index} 第 {row} 行 {index * 7919 % 100000}")
+    painter.end()
+    return image
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+
+    print("=" * 60)
+    print("  截图历史长时间运行测试")
+    print("=" * 60)
+
+    cache_dir = tempfile.mkdtemp(prefix='history_soak_')
+    history = CaptureHistory(memory_budget=MEMORY_BUDGET, disk_budget=DISK_BUDGET,
+                             max_entries=MAX_ENTRIES, cache_dir=cache_dir)
+    base = make_desktop_pixmap(1280, 720).toImage()
+    raw_limit = history.raw_entries * base.sizeInBytes()
+
+    start = time.perf_counter()
+    samples = []
+    over_budget = 0
+    for index in range(count):
+        history.add(make_capture(base, index))
+
+        # 截图之间有间隔：让后台压缩跟上
+        if index % 5 == 4:
+            history.wait_for_done()
+        if history.memory_usage() > MEMORY_BUDGET + raw_limit:
+            over_budget += 1
+
+        if (index + 1) % 50 == 0:
+            rss = process_rss_mb()
+            samples.append(rss)
+            rss_text = f"，进程 {rss:.0f} MB" if rss is not None else ""
+            print(f"  {index + 1:>4} 张: {history.stats()}{rss_text}")
+
+    history.wait_for_done()
+    elapsed = time.perf_counter() - start
+
+    # 随机取回几张（包括已落盘的）
+    for entry in history.recent()[::37]:
+        image = history.get(entry.id)
+        assert image is not None and image.width() == base.width()
+
+    print(f"\n  {count} 张用时 {elapsed:.1f} s，超出内存预算 {over_budget} 次")
+
+    passed = over_budget == 0 and len(history) <= MAX_ENTRIES
+    samples = [rss for rss in samples if rss is not None]
+    if len(samples) >= 4:
+        half = samples[len(samples) // 2]
+        growth = samples[-1] - half
+        print(f"  后半程进程内存增长: {growth:+.1f} MB（允许 {RSS_TOLERANCE_MB:.0f} MB）")
+        passed = passed and growth <= RSS_TOLERANCE_MB
+
+    history.clear()
+    print(f"  结果: {'✓ 内存平稳' if passed else '✗ 内存持续增长'}")
+    app.quit()
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
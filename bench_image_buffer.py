@@ -0,0 +1,195 @@
+"""
+零拷贝图像缓冲测试：4K 单屏，统计每次截图 / 采样过程中复制的像素字节数（旧做法 vs image_buffer）
+判断方法：每一步结果的像素内存如果落在抓屏图像的内存范围之外，就算作一次拷贝（按它的大小计）
+1. 交互截图：整屏选区 / 部分选区的裁剪（之后哈希、历史、预览都共享裁剪结果）
+2. 采样（定时截图、区域监视、录制、滚动截图）：抓屏 → 裁剪 → 转成数组 → 滚动截图保留上一帧
+3. 分析 ARGB32_Premultiplied 图像（标注合成结果等）：旧做法先整张转换为 RGB32
+4. 所有权：整帧丢弃、垃圾回收之后，数组 / 视图仍然指向有效的像素
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_image_buffer.py
+"""
+import gc
+import sys
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage
+
+from bench_capture import make_desktop_pixmap, time_ms
+from screen_capture import CaptureFrame
+from image_buffer import NUMPY_AVAILABLE, pixel_array, crop_array
+from image_hash import content_hash
+from scroll_stitch import ScrollStitcher
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+WIDTH, HEIGHT = 3840, 2160
+SELECTION = QRect(800, 400, 1600, 900)
+FULL = QRect(0, 0, WIDTH, HEIGHT)
+
+
+def legacy_pixels(image):
+    """对比用：旧的 timelapse.image_pixels（不是 RGB32 就整张转换；调用方要自己持有图像）"""
+    if image.format() != QImage.Format_RGB32:
+        image = image.convertToFormat(QImage.Format_RGB32)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint32).reshape(image.height(), image.bytesPerLine() // 4)
+    return rows[:, :image.width()], image
+
+
+def legacy_crop(frame, rect):
+    """对比用：旧的 CaptureFrame.crop（单屏时总是复制选区，整屏也复制）"""
+    (tile_rect, pixmap), = frame.tiles
+    return pixmap.copy(rect.translated(-tile_rect.topLeft()))
+
+
+class CopyMeter:
+    """统计落在抓屏图像内存之外的像素字节数（同一份拷贝上的视图、共享只算一次）"""
+
+    def __init__(self, *sources):
+        self.ranges = [self.bounds(source) for source in sources]
+        self.copied = 0
+
+    @staticmethod
+    def bounds(obj):
+        if isinstance(obj, np.ndarray):
+            start = obj.__array_interface__['data'][0]
+            return start, start + sum((n - 1) * step for n, step in zip(obj.shape, obj.strides)) + obj.itemsize
+        if not isinstance(obj, QImage):
+            obj = obj.toImage()
+        start = int(obj.constBits())
+        return start, start + obj.sizeInBytes()
+
+    def check(self, obj):
+        """obj 的像素如果是新的一份，计入拷贝；返回 obj"""
+        low, high = self.bounds(obj)
+        if not any(start <= low and high <= end for start, end in self.ranges):
+            self.copied += high - low
+            self.ranges.append((low, high))
+        return obj
+
+
+def capture_frame():
+    pixmap = make_desktop_pixmap(WIDTH, HEIGHT)
+    return CaptureFrame(pixmap, FULL), pixmap.toImage()
+
+
+def interactive(rect, legacy):
+    """交互截图：裁剪 → 哈希 → 历史 / 预览（共享裁剪结果）"""
+    frame, screen = capture_frame()
+    meter = CopyMeter(screen)
+    crop = legacy_crop(frame, rect) if legacy else frame.crop(rect)
+    frame.discard()
+    image = meter.check(crop.toImage())
+    content_hash(image)
+    meter.check(crop.toImage())  # 历史 / 预览 / 截图库都是 toImage()
+    return meter.copied
+
+
+def sampling(legacy, frames=3):
+    """采样：抓屏 → 裁剪 → 像素数组 → 滚动截图（保留这一帧作为上一帧）；返回每帧的拷贝字节数"""
+    copied = 0
+    for _ in range(frames):
+        frame, screen = capture_frame()
+        meter = CopyMeter(screen)
+        if legacy:
+            image = meter.check(legacy_crop(frame, SELECTION).toImage())
+            frame.discard()
+            pixels, image = legacy_pixels(image)
+            meter.check(pixels)
+            # 旧的 ScrollStitcher 用 pixels.copy() 保存上一帧
+            meter.check(pixels.copy())
+        else:
+            image = meter.check(frame.crop_image(SELECTION))
+            frame.discard()
+            meter.check(pixel_array(image))
+            stitcher = ScrollStitcher()
+            stitcher.add(image)
+            meter.check(stitcher.frame)
+            stitcher.close()
+        copied += meter.copied
+    return copied // frames
+
+
+def analysis(legacy):
+    """分析 ARGB32_Premultiplied 图像（边缘图、打码、哈希等都从像素数组开始）"""
+    image = make_desktop_pixmap(WIDTH, HEIGHT).toImage().convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    meter = CopyMeter(image)
+    if legacy:
+        pixels, converted = legacy_pixels(image)
+    else:
+        pixels = pixel_array(image)
+    meter.check(pixels)
+    return meter.copied
+
+
+def bench_copies():
+    rows = (
+        ("交互截图 · 整屏", lambda legacy: interactive(FULL, legacy)),
+        (f"交互截图 · 选区 {SELECTION.width()}x{SELECTION.height()}", lambda legacy: interactive(SELECTION, legacy)),
+        (f"采样每帧 · 选区 {SELECTION.width()}x{SELECTION.height()}", sampling),
+        ("分析 ARGB32_Premultiplied 整屏", analysis),
+    )
+    print(f"\n  {'路径':<28} | {'旧做法':>9} | {'现在':>9}")
+    results = []
+    for name, func in rows:
+        before, after = func(True), func(False)
+        results.append((before, after))
+        print(f"  {name:<28} | {before / 1024 / 1024:>6.1f} MB | {after / 1024 / 1024:>6.1f} MB")
+    print("  （部分选区的交互截图保留一次拷贝：结果比整帧活得久，不让小截图占着整屏的内存）")
+
+    frame, screen = capture_frame()
+    crop_ms = time_ms(lambda: legacy_crop(frame, SELECTION).toImage(), repeat=5)
+    view_ms = time_ms(lambda: frame.crop_image(SELECTION), repeat=5)
+    frame.discard()
+    print(f"\n  采样裁剪耗时: 复制 {crop_ms:.2f} ms，视图 {view_ms:.3f} ms")
+    return all(after <= before for before, after in results) and results[0][1] == 0 and results[2][1] == 0
+
+
+def bench_lifetime():
+    """整帧丢弃、原图像对象删除、垃圾回收之后，数组 / 视图仍然有效且内容正确"""
+    frame, screen = capture_frame()
+    expected = screen.copy(SELECTION).convertToFormat(QImage.Format_RGB32)
+    view = frame.crop_array(SELECTION)
+    image = frame.crop_image(SELECTION)
+    frame.discard()
+    del frame, screen
+    gc.collect()
+    # 分配并写入一些内存，已释放的内存如果被重用，内容会被改掉
+    garbage = [make_desktop_pixmap(WIDTH, HEIGHT).toImage() for _ in range(2)]
+
+    ok = (np.array_equal(view, crop_array(expected, expected.rect())) and image == expected
+          and not view.flags.writeable)
+    del garbage
+    print(f"\n  整帧丢弃后视图仍然有效、内容正确、只读: {'✓' if ok else '✗'}")
+
+    # 裁剪结果与数组视图一致（同一块内存）
+    frame, screen = capture_frame()
+    same = np.shares_memory(frame.crop_array(SELECTION), pixel_array(screen))
+    full = frame.crop(FULL).toImage()
+    shared = int(full.constBits()) == int(screen.constBits())
+    frame.discard()
+    print(f"  选区视图与屏幕图像共享内存: {'✓' if same else '✗'}，整屏裁剪共享屏幕图像: {'✓' if shared else '✗'}")
+    return ok and same and shared
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  零拷贝图像缓冲测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    passed = bench_copies()
+    passed = bench_lifetime() and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+截图库索引性能测试：十万张截图的搜索 = 索引查询，对比遍历分片目录
+只写空文件和索引记录（不编码图片），测试的是元数据查询本身
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_library.py [截图数]
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from PyQt5.QtWidgets import QApplication
+
+from bench_capture import time_ms
+from capture_library import CaptureLibrary
+
+SCREENS = ["DISPLAY1", "DISPLAY2", "DISPLAY3"]
+SIZES = [(1920, 1080), (800, 600), (640, 480), (1280, 720), (300, 200), (3840, 2160)]
+
+# 查询耗时上限（毫秒）
+QUERY_BUDGET_MS = 50.0
+
+
+def fill_library(library, count, days=365):
+    """写入 count 条记录（过去 days 天内随机分布）和对应的空文件"""
+    rng = random.Random(0)
+    now = time.time()
+    metas = []
+    for i in range(count):
+        created = now - rng.random() * days * 86400
+        width, height = rng.choice(SIZES)
+        meta = {
+            'created': created,
+            'x': rng.randrange(0, 3000), 'y': rng.randrange(0, 1500),
+            'width': width, 'height': height,
+            'screen': rng.choice(SCREENS),
+            'format': "png",
+            'bytes': width * height // 20,
+            'hash': hashlib.sha256(i.to_bytes(8, 'little')).hexdigest()[:32],
+        }
+        meta['path'] = library.shard_path(created, library.output_format)
+        metas.append(meta)
+
+    start = time.perf_counter()
+    for meta in metas:
+        path = os.path.join(library.root, meta['path'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+    files_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    library.add_records(metas)
+    index_s = time.perf_counter() - start
+    return metas, files_s, index_s
+
+
+def walk_day(root, day):
+    """不用索引：遍历整个截图库，按修改时间找出某一天的截图"""
+    start, end = day.timestamp(), (day + timedelta(days=1)).timestamp()
+    found = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".png"):
+                path = os.path.join(directory, name)
+                mtime = os.stat(path).st_mtime
+                if start <= mtime < end:
+                    found.append(path)
+    return found
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("=" * 60)
+    print("  截图库索引性能测试")
+    print("=" * 60)
+
+    root = tempfile.mkdtemp(prefix='library_bench_')
+    library = CaptureLibrary(root)
+    metas, files_s, index_s = fill_library(library, count)
+    print(f"  {count} 张: 创建空文件 {files_s:.1f} s，写入索引 {index_s:.2f} s"
+          f"（{index_s / count * 1e6:.1f} µs/条）")
+
+    sample = metas[count // 2]
+    day = datetime.fromtimestamp(sample['created']).replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = datetime.now() - timedelta(days=7)
+
+    queries = [
+        ("最近 50 张", lambda: library.recent(50)),
+        ("某一天的截图", lambda: library.search(start=day, end=day + timedelta(days=1), limit=1000)),
+        ("某屏幕最近一周", lambda: library.search(screen="DISPLAY2", start=week_ago, limit=1000)),
+        ("宽度 ≥ 3840", lambda: library.search(min_width=3840, limit=100)),
+        ("按哈希查找", lambda: library.search(hash=sample['hash'])),
+        ("总数", lambda: library.count()),
+        ("某一天的数量", lambda: library.count(start=day, end=day + timedelta(days=1))),
+    ]
+
+    print(f"\n  {'查询':<16} | {'耗时':>9} | {'结果':>6}")
+    passed = True
+    for name, query in queries:
+        elapsed = time_ms(query, repeat=5)
+        result = query()
+        size = result if isinstance(result, int) else len(result)
+        passed = passed and elapsed <= QUERY_BUDGET_MS
+        print(f"  {name:<16} | {elapsed:>6.2f} ms | {size:>6}")
+
+    # 遍历目录对比（空文件的修改时间都是刚才，这里只比较遍历本身的开销）
+    walk_ms = time_ms(lambda: walk_day(root, day), repeat=1)
+    print(f"\n  对比：遍历目录 + stat 找某一天的截图 {walk_ms:.0f} ms")
+
+    library.close()
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"  结果: {'✓' if passed else '✗'} 所有查询 ≤ {QUERY_BUDGET_MS:.0f} ms")
+    app.quit()
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+区域录制性能测试：30 秒 10 帧/秒的界面操作录像（打字、光标闪烁、进度条）
+1. 逐帧比较 + 保存变化部分的耗时，录制期间占用的内存
+2. GIF / APNG：只写变化部分 vs 每帧写完整画面，文件大小和编码耗时
+3. 解码检查：APNG 用这里的简单解码器读回，每一帧与原图逐像素一致；
+   GIF 用 Qt 读回（桌面背景是渐变，颜色超过 255 种，走量化调色板，误差应在量化范围内）
+4. 实际录制（ClipRecorder）时主线程事件循环的最大间隔：录制、停止和编码（工作线程）都不应卡住界面
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_recorder.py [秒数]
+"""
+import os
+import sys
+import time
+import zlib
+import struct
+import shutil
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QImage, QImageReader, QPainter, QColor, QFont
+
+from bench_capture import make_desktop_pixmap
+from image_buffer import pixel_array
+from recorder import (NUMPY_AVAILABLE, Clip, Delta, ClipRecorder, write_gif, write_apng,
+                      PNG_SIGNATURE, APNG_BLEND_OVER)
+
+SIZE = QSize(800, 600)
+FPS = 10
+# 主线程事件循环间隔上限（毫秒）
+STALL_BUDGET_MS = 50.0
+# GIF 量化调色板（颜色超过 255 种时）允许的通道误差
+GIF_QUANT_ERROR = 16
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class ScriptedSource:
+    """模拟界面操作：逐字打出一段文字、光标闪烁、进度条前进"""
+
+    TEXT = "The quick brown fox jumps over the lazy dog. 截图工具录制测试。" * 3
+
+    def __init__(self, size=SIZE):
+        self.base = make_desktop_pixmap(size.width(), size.height()).toImage()
+        self.index = 0
+
+    def grab(self):
+        index = self.index
+        self.index += 1
+        image = self.base.copy()
+        painter = QPainter(image)
+        painter.fillRect(40, 200, 720, 220, QColor(250, 250, 250))
+        painter.setPen(Qt.black)
+        painter.setFont(QFont("Arial", 14))
+        typed = self.TEXT[:index // 2]
+        for line in range(0, len(typed), 48):
+            painter.drawText(56, 230 + line // 48 * 26, typed[line:line + 48])
+        if index // 5 % 2:
+            painter.fillRect(56 + len(typed) % 48 * 12, 214 + len(typed) // 48 * 26, 2, 20, Qt.black)
+        painter.fillRect(40, 460, 720 * index // 300, 12, QColor(33, 150, 243))
+        painter.end()
+        return image
+
+
+def full_frame_clip(clip, images):
+    """对比用：与 clip 相同的帧和显示时间，但每一帧都完整保存（不做差分）"""
+    full = Clip(clip.width, clip.height)
+    for delta, image in zip(clip.frames, images):
+        frame = Delta(0, 0, pixel_array(image).copy(), None, delta.timestamp)
+        frame.duration = delta.duration
+        full.frames.append(frame)
+    return full
+
+
+def read_apng(path):
+    """简单 APNG 解码（只支持这里写出的 RGBA + Up 过滤），返回每帧 (高, 宽, 4) 数组"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.startswith(PNG_SIGNATURE)
+    offset = len(PNG_SIGNATURE)
+    canvas, frames, control = None, [], None
+
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        crc = struct.unpack_from(">I", data, offset + 8 + length)[0]
+        assert zlib.crc32(kind + body) == crc, f"CRC 错误: {kind}"
+        offset += 12 + length
+
+        if kind == b"IHDR":
+            width, height = struct.unpack_from(">II", body)
+            canvas = np.zeros((height, width, 4), dtype=np.uint8)
+        elif kind == b"fcTL":
+            control = struct.unpack(">IIIIIHHBB", body)
+        elif kind in (b"IDAT", b"fdAT"):
+            _, width, height, x, y, _, _, _, blend = control
+            raw = zlib.decompress(body if kind == b"IDAT" else body[4:])
+            rows = np.frombuffer(raw, dtype=np.uint8).reshape(height, width * 4 + 1)
+            assert (rows[:, 0] == 2).all()
+            pixels = np.cumsum(rows[:, 1:], axis=0, dtype=np.uint8).reshape(height, width, 4)
+            area = canvas[y:y + height, x:x + width]
+            if blend == APNG_BLEND_OVER:
+                opaque = pixels[:, :, 3] == 255
+                area[opaque] = pixels[opaque]
+            else:
+                area[:] = pixels
+            frames.append(canvas.copy())
+    return frames
+
+
+def rgba_of(image):
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4).copy()
+
+
+def verify_gif(path, images):
+    """Qt 读回 GIF，逐帧与原图比较，返回最大通道误差（精确调色板时为 0）"""
+    reader = QImageReader(path)
+    worst = 0
+    for image in images:
+        frame = reader.read()
+        if frame.isNull():
+            return 255
+        diff = np.abs(rgba_of(frame).astype(np.int16) - rgba_of(image).astype(np.int16))
+        worst = max(worst, int(diff[:, :, :3].max()))
+    return worst
+
+
+def bench_encode(seconds, directory):
+    source = ScriptedSource()
+    count = seconds * FPS
+    images = [source.grab() for _ in range(count)]
+
+    clip = Clip(SIZE.width(), SIZE.height())
+    start = time.perf_counter()
+    for index, image in enumerate(images):
+        clip.add(image, index / FPS)
+    add_ms = (time.perf_counter() - start) * 1000 / count
+    clip.finish(count / FPS)
+
+    # 画面有变化的帧（没变的帧只延长上一帧的显示时间）
+    changed, previous = [], None
+    for image in images:
+        if previous is None or image != previous:
+            changed.append(image)
+        previous = image
+
+    raw_mb = count * SIZE.width() * SIZE.height() * 4 / 1024 / 1024
+    print(f"  {seconds} 秒 {FPS} 帧/秒 {SIZE.width()}x{SIZE.height()}：抓取 {count} 帧，"
+          f"有变化 {len(clip.frames)} 帧")
+    print(f"  逐帧比较 + 保存变化部分: {add_ms:.2f} ms/帧，"
+          f"录制数据 {clip.memory_bytes / 1024 / 1024:.1f} MB（完整帧 {raw_mb:.0f} MB）")
+
+    full = full_frame_clip(clip, changed)
+
+    print(f"\n  {'格式':<6} | {'只写变化':>16} | {'每帧完整':>16}")
+    passed = True
+    for name, writer in (("GIF", write_gif), ("APNG", write_apng)):
+        results = []
+        for kind, data in (("delta", clip), ("full", full)):
+            path = os.path.join(directory, f"{kind}.{name.lower()}")
+            start = time.perf_counter()
+            writer(data, path)
+            elapsed = (time.perf_counter() - start) * 1000
+            results.append((os.path.getsize(path) / 1024, elapsed, path))
+        (delta_kb, delta_ms, delta_path), (full_kb, full_ms, _) = results
+        print(f"  {name:<6} | {delta_kb:>6.0f} KB {delta_ms:>5.0f} ms | {full_kb:>6.0f} KB {full_ms:>5.0f} ms")
+
+        if name == "GIF":
+            error = verify_gif(delta_path, changed)
+            passed = passed and error <= GIF_QUANT_ERROR
+            print(f"         读回（Qt）逐帧最大通道误差: {error}（量化调色板，上限 {GIF_QUANT_ERROR}）")
+        else:
+            frames = read_apng(delta_path)
+            exact = len(frames) == len(changed) and all(
+                (frame == rgba_of(image)).all() for frame, image in zip(frames, changed))
+            passed = passed and exact
+            print(f"         读回逐帧一致: {'✓' if exact else '✗'}")
+    return passed
+
+
+def bench_responsiveness(app, directory):
+    """实际录制 3 秒并编码，测量主线程事件循环的最大间隔"""
+    recorder = ClipRecorder()
+    gaps = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        gaps.append((now - last[0]) * 1000)
+        last[0] = now
+
+    ticker = QTimer()
+    ticker.timeout.connect(tick)
+    ticker.start(5)
+
+    path = os.path.join(directory, "live.gif")
+    recorder.finished.connect(lambda _: app.quit())
+    recorder.failed.connect(lambda *_: app.quit())
+    recorder.start(ScriptedSource(), path, fps=FPS)
+    QTimer.singleShot(3000, recorder.stop)
+    app.exec_()
+    ticker.stop()
+    recorder.close()
+
+    worst = max(gaps[1:]) if len(gaps) > 1 else 0.0
+    print(f"\n  实际录制 3 秒 + 后台编码：主线程事件循环最大间隔 {worst:.1f} ms（{len(gaps)} 次计时）")
+    return worst <= STALL_BUDGET_MS and os.path.exists(path)
+
+
+def main():
+    app = QApplication(sys.argv)
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    print("=" * 60)
+    print("  区域录制性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    directory = tempfile.mkdtemp(prefix='recorder_bench_')
+    passed = bench_encode(seconds, directory)
+    passed = bench_responsiveness(app, directory) and passed
+    shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
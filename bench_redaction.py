@@ -0,0 +1,160 @@
+"""
+打码性能测试：4K 合成桌面
+1. 马赛克 / 模糊在不同大小区域上的耗时；模糊对比逐个偏移相加（与半径平方成正比），马赛克对比逐块求平均
+2. 结果正确：模糊与逐像素计算的窗口平均一致（允许差 1），马赛克每块颜色相同且等于块内平均
+3. 不可恢复：合成（flatten）后的图片中打码区域只有打码结果，分块缓存拼出的画面与合成结果一致
+4. 预览窗口：选择马赛克工具拖动，保存的图片已打码
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_redaction.py
+"""
+import sys
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QEventLoop, QPoint, QRect, QTimer
+from PyQt5.QtGui import QImage
+
+from bench_capture import make_desktop_pixmap, send_mouse, time_ms
+from annotations import AnnotationDocument, TileCache, RedactAnnotation, flatten
+from redaction import NUMPY_AVAILABLE, MOSAIC_BLOCK, BLUR_RADIUS, redacted_patch, blur_pixels, pixelate_pixels
+from image_buffer import crop_array
+from float_preview import FloatPreview
+from bench_annotations import compose, same_image
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+WIDTH, HEIGHT = 3840, 2160
+REGIONS = (("令牌一行", QRect(330, 200, 600, 40)),
+           ("对话框", QRect(640, 360, 1200, 700)),
+           ("整屏", QRect(0, 0, WIDTH, HEIGHT)))
+
+
+def channels_of(image, rect):
+    """image 中 rect 区域的 (高, 宽, 4) uint8 视图"""
+    return crop_array(image, rect).view(np.uint8).reshape(rect.height(), rect.width(), 4)
+
+
+def shifted_blur(channels, radius):
+    """对比用：逐个偏移相加求窗口和（(2r + 1)² 次整块相加）"""
+    height, width = channels.shape[:2]
+    padded = np.zeros((height + 2 * radius, width + 2 * radius, 4), dtype=np.uint32)
+    counts = np.zeros((height + 2 * radius, width + 2 * radius, 1), dtype=np.uint32)
+    padded[radius:radius + height, radius:radius + width] = channels
+    counts[radius:radius + height, radius:radius + width] = 1
+    sums = np.zeros((height, width, 4), dtype=np.uint32)
+    total = np.zeros((height, width, 1), dtype=np.uint32)
+    for dy in range(2 * radius + 1):
+        for dx in range(2 * radius + 1):
+            sums += padded[dy:dy + height, dx:dx + width]
+            total += counts[dy:dy + height, dx:dx + width]
+    return ((sums + total // 2) // total).astype(np.uint8)
+
+
+def block_mosaic(channels, block):
+    """对比用：逐块求平均"""
+    result = np.empty_like(channels)
+    for y in range(0, channels.shape[0], block):
+        for x in range(0, channels.shape[1], block):
+            part = channels[y:y + block, x:x + block]
+            result[y:y + block, x:x + block] = (part.mean(axis=(0, 1)) + 0.5).astype(np.uint8)
+    return result
+
+
+def bench_speed(base):
+    print(f"\n  {'区域':<6} | {'大小':>9} | {'马赛克':>8} | {'模糊':>8}")
+    for name, rect in REGIONS:
+        mosaic_ms = time_ms(lambda: redacted_patch(base, rect, 'mosaic'), repeat=3)
+        blur_ms = time_ms(lambda: redacted_patch(base, rect, 'blur'), repeat=3)
+        print(f"  {name:<6} | {rect.width():>4}x{rect.height():<4} | {mosaic_ms:>5.1f} ms | {blur_ms:>5.1f} ms")
+
+    name, rect = REGIONS[0]
+    channels = channels_of(base, rect)
+    naive_blur = time_ms(lambda: shifted_blur(channels, BLUR_RADIUS))
+    naive_mosaic = time_ms(lambda: block_mosaic(channels, MOSAIC_BLOCK))
+    print(f"  对比（{name}）: 逐个偏移相加模糊 {naive_blur:.0f} ms，逐块求平均马赛克 {naive_mosaic:.0f} ms")
+
+
+def bench_correct(base):
+    rect = QRect(300, 180, 160, 90)
+    channels = channels_of(base, rect)
+    blurred = blur_pixels(channels, 5).astype(np.int16)
+    blur_ok = int(np.abs(blurred - shifted_blur(channels, 5)).max()) <= 1
+
+    mosaic = pixelate_pixels(channels, MOSAIC_BLOCK)
+    mosaic_ok = np.array_equal(mosaic, block_mosaic(channels, MOSAIC_BLOCK))
+    print(f"\n  模糊与逐像素窗口平均一致: {'✓' if blur_ok else '✗'}")
+    print(f"  马赛克每块等于块内平均: {'✓' if mosaic_ok else '✗'}")
+    return blur_ok and mosaic_ok
+
+
+def bench_flatten(base):
+    # 跨多个缓存块的打码区域，上面再盖一个打码
+    commands = [RedactAnnotation(base, QRect(300, 150, 700, 300), 'blur'),
+                RedactAnnotation(base, QRect(600, 200, 500, 120), 'mosaic')]
+    document = AnnotationDocument(base)
+    cache = TileCache(document)
+    for command in commands:
+        cache.invalidate(document.add(command))
+
+    output = flatten(base, document.commands)
+    top = commands[-1]
+    hidden = output.copy(top.rect) == top.patch and output.copy(top.rect) != base.copy(top.rect)
+    tiles_ok = same_image(compose(cache), output)
+    print(f"\n  合成后打码区域只有打码结果（不含原像素）: {'✓' if hidden else '✗'}")
+    print(f"  分块缓存画面与合成结果一致: {'✓' if tiles_ok else '✗'}")
+    return hidden and tiles_ok
+
+
+def bench_preview(app):
+    preview = FloatPreview()
+    pixmap = make_desktop_pixmap(1600, 900)
+    preview.set_pixmap(pixmap)
+    preview.show()
+    app.processEvents()
+
+    canvas = preview.canvas
+    preview.select_tool('mosaic')
+    start, end = QPoint(100, 80), QPoint(500, 240)
+    send_mouse(canvas, QEvent.MouseButtonPress, start)
+    for i in range(1, 11):
+        send_mouse(canvas, QEvent.MouseMove, start + (end - start) * i / 10)
+        app.processEvents()
+    send_mouse(canvas, QEvent.MouseButtonRelease, end, Qt.NoButton)
+    app.processEvents()
+
+    results = []
+    loop = QEventLoop()
+    preview.with_output_image(lambda image: (results.append(image), loop.quit()))
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+
+    original = pixmap.toImage().convertToFormat(QImage.Format_RGB32)
+    rect = QRect(canvas.to_image(start), canvas.to_image(end))
+    expected = redacted_patch(original, rect, 'mosaic')
+    saved = bool(results) and results[0].convertToFormat(QImage.Format_RGB32).copy(rect) == expected
+    print(f"\n  预览窗口拖动马赛克，保存的图片已打码: {'✓' if saved else '✗'}")
+    preview.close()
+    return saved
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("  打码性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    base = make_desktop_pixmap(WIDTH, HEIGHT).toImage().convertToFormat(QImage.Format_RGB32)
+    bench_speed(base)
+    passed = bench_correct(base)
+    passed = bench_flatten(base) and passed
+    passed = bench_preview(app) and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+区域监视性能测试：用合成画面（FakeRegionSource）代替真实屏幕
+1. 单次采样的开销：签名 + 比较，以及画面完全没变时的逐字节比较（快速路径）
+2. 按默认采样间隔监视一段时间（静止画面 / 带噪点的画面）：
+   进程 CPU 占用、触发次数（应与画面变化次数一致，噪点不触发）
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_region_watch.py [总秒数]
+"""
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QSize, QTimer
+
+from bench_capture import time_ms
+from region_watch import (RegionWatcher, FakeRegionSource, signature, changed_fraction,
+                          DEFAULT_INTERVAL_MS)
+
+# 监视时进程 CPU 占用上限（百分比，不含生成合成画面的开销）
+CPU_BUDGET_PERCENT = 1.0
+
+
+class TimedSource:
+    """记录采样源自身的耗时（合成画面是用 QPainter 画出来的，真实抓屏时没有这部分开销）"""
+
+    def __init__(self, source):
+        self.source = source
+        self.seconds = 0.0
+
+    def grab(self):
+        start = time.perf_counter()
+        image = self.source.grab()
+        self.seconds += time.perf_counter() - start
+        return image
+
+
+def bench_sample_cost():
+    print(f"\n  {'区域':<10} | {'签名 + 比较':>11} | {'逐字节相同':>9}")
+    for size in (QSize(400, 200), QSize(800, 450), QSize(1920, 1080)):
+        source = FakeRegionSource(size, change_every=1)
+        a, b = source.grab(), source.grab()
+        same = a.copy()
+        sig_a = signature(a)
+        sign_ms = time_ms(lambda: changed_fraction(sig_a, signature(b)), repeat=5)
+        full_ms = time_ms(lambda: a == same, repeat=5)
+        print(f"  {size.width()}x{size.height():<5} | {sign_ms:>8.2f} ms | {full_ms:>6.2f} ms")
+
+
+def bench_watch(app, seconds, noise):
+    """默认采样间隔下监视 seconds 秒"""
+    changes_every = 4
+    source = TimedSource(FakeRegionSource(QSize(800, 450), change_every=changes_every, noise=noise))
+    watcher = RegionWatcher()
+    watcher.start(source, DEFAULT_INTERVAL_MS, cooldown_ms=DEFAULT_INTERVAL_MS)
+
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    app.exec_()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start - source.seconds
+    watcher.stop()
+
+    expected = (source.source.grabs - 1) // changes_every
+    cpu_percent = cpu / wall * 100
+    kind = "带噪点" if noise else "静止时完全不变"
+    print(f"\n  监视 {wall:.1f} s（每 {DEFAULT_INTERVAL_MS} ms 采样，800x450，{kind}）：")
+    print(f"  采样 {watcher.samples} 次，画面变化 {expected} 次，触发 {watcher.triggered} 次")
+    print(f"  CPU 占用（不含生成合成画面）: {cpu_percent:.2f}%"
+          f"（{cpu * 1000 / max(1, watcher.samples):.2f} ms/次采样）")
+    return watcher.triggered == expected, cpu_percent
+
+
+def main():
+    app = QApplication(sys.argv)
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print("=" * 60)
+    print("  区域监视性能测试")
+    print("=" * 60)
+
+    bench_sample_cost()
+    passed = True
+    for noise in (False, True):
+        correct, cpu_percent = bench_watch(app, seconds / 2, noise)
+        passed = passed and correct and cpu_percent <= CPU_BUDGET_PERCENT
+
+    print(f"\n  结果: {'✓' if passed else '✗'} 每次变化都触发、噪点不触发，CPU ≤ {CPU_BUDGET_PERCENT}%")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
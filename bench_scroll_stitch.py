@@ -0,0 +1,172 @@
+"""
+滚动截图性能测试：合成一份很长的聊天记录，视口带固定标题栏、底栏和滚动条，按随机距离向下滚动
+1. 每帧对齐耗时（行哈希 + 配对），对比逐个候选位移整块比较像素的暴力搜索
+2. 拼接结果写成 PNG 后用 Qt 读回，与原文档（标题栏 + 全部内容 + 底栏）逐像素一致（滚动条列除外）
+3. 拼接期间 Python 侧内存峰值（tracemalloc）与整张长图大小的对比
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_scroll_stitch.py [文档高度]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import tracemalloc
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+
+from image_buffer import NUMPY_AVAILABLE, pixel_array
+from scroll_stitch import ScrollStitcher, SCROLLBAR_MARGIN
+
+WIDTH = 900
+VIEW_HEIGHT = 700
+HEADER = 56
+FOOTER = 48
+SCROLLBAR = 12
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def make_document(height, seed=7):
+    """长聊天记录：左右交替的气泡，每条消息若干行文字"""
+    rng = random.Random(seed)
+    image = QImage(WIDTH, height, QImage.Format_RGB32)
+    image.fill(QColor(237, 237, 237))
+    painter = QPainter(image)
+    painter.setFont(QFont("Arial", 12))
+    y, index = 16, 0
+    while y < height - 20:
+        lines = rng.randint(1, 4)
+        bubble_h = lines * 22 + 16
+        bubble_w = rng.randint(220, 560)
+        mine = index % 2 == 1
+        x = WIDTH - SCROLLBAR_MARGIN - bubble_w - 60 if mine else 60
+        painter.fillRect(x - 44, y, 34, 34, QColor(rng.randint(0, 255), rng.randint(0, 255), 200))
+        painter.fillRect(x, y, bubble_w, bubble_h, QColor(149, 236, 105) if mine else Qt.white)
+        painter.setPen(Qt.black)
+        for line in range(lines):
+            text = f"#{index} " + "".join(rng.choice("abcdefghij klmnopqrstuvwxyz") for _ in range(40))
+            painter.drawText(x + 10, y + 26 + line * 22, text)
+        y += bubble_h + rng.randint(10, 30)
+        index += 1
+    painter.end()
+    return image
+
+
+def render_view(document, top):
+    """视口：文档第 top 行起的内容 + 固定标题栏 / 底栏 + 随滚动位置变化的滚动条"""
+    content = VIEW_HEIGHT - HEADER - FOOTER
+    image = QImage(WIDTH, VIEW_HEIGHT, QImage.Format_RGB32)
+    painter = QPainter(image)
+    painter.drawImage(0, HEADER, document, 0, top, WIDTH, content)
+    painter.fillRect(0, 0, WIDTH, HEADER, QColor(40, 44, 52))
+    painter.setPen(Qt.white)
+    painter.setFont(QFont("Arial", 16))
+    painter.drawText(20, 36, "项目讨论组 (8)")
+    painter.fillRect(0, VIEW_HEIGHT - FOOTER, WIDTH, FOOTER, QColor(245, 245, 245))
+    painter.fillRect(20, VIEW_HEIGHT - FOOTER + 10, WIDTH - 140, FOOTER - 20, Qt.white)
+    painter.fillRect(WIDTH - SCROLLBAR, HEADER, SCROLLBAR, content, QColor(230, 230, 230))
+    thumb = content * content // document.height()
+    position = HEADER + (content - thumb) * top // max(1, document.height() - content)
+    painter.fillRect(WIDTH - SCROLLBAR + 2, position, SCROLLBAR - 4, thumb, QColor(150, 150, 150))
+    painter.end()
+    return image
+
+
+def scroll_positions(document_height, seed=3):
+    """随机向下滚动（每次 40 ~ 内容区高度的 80%），偶尔停住不动"""
+    rng = random.Random(seed)
+    content = VIEW_HEIGHT - HEADER - FOOTER
+    positions, top = [0], 0
+    while top < document_height - content:
+        top = min(document_height - content, top + rng.choice([0, rng.randint(40, content * 4 // 5)]))
+        positions.append(top)
+    return positions
+
+
+def brute_force_shift(old, new):
+    """对比用：逐个候选位移整块比较像素，取一致行最多的位移"""
+    height = len(new)
+    width = new.shape[1] - SCROLLBAR_MARGIN
+    best, best_rows = 0, -1
+    for shift in range(1, height):
+        rows = int((new[:height - shift, :width] == old[shift:, :width]).all(axis=1).sum())
+        if rows > best_rows:
+            best, best_rows = shift, rows
+    return best
+
+
+def expected_image(document, last_top):
+    content = VIEW_HEIGHT - HEADER - FOOTER
+    first, last = render_view(document, 0), render_view(document, last_top)
+    rows = [pixel_array(first)[:HEADER],
+            pixel_array(document)[:last_top + content],
+            pixel_array(last)[VIEW_HEIGHT - FOOTER:]]
+    return np.vstack(rows)
+
+
+def main():
+    app = QApplication(sys.argv)
+    document_height = int(sys.argv[1]) if len(sys.argv) > 1 else 12000
+
+    print("=" * 60)
+    print("  滚动截图性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    document = make_document(document_height)
+    positions = scroll_positions(document_height)
+    frames = [render_view(document, top) for top in positions]
+    shifts = [b - a for a, b in zip(positions, positions[1:])]
+
+    directory = tempfile.mkdtemp(prefix='scroll_bench_')
+    tracemalloc.start()
+    stitcher = ScrollStitcher(directory)
+    found = [stitcher.add(frame) for frame in frames]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    path = os.path.join(directory, "stitched.png")
+    start = time.perf_counter()
+    stitcher.write_png(path)
+    write_ms = (time.perf_counter() - start) * 1000
+    width, height = stitcher.width, stitcher.height
+    stitcher.close()
+
+    aligned = found[1:] == shifts
+    print(f"  文档 {WIDTH}x{document_height}，视口 {WIDTH}x{VIEW_HEIGHT}"
+          f"（标题栏 {HEADER} px、底栏 {FOOTER} px、滚动条），{len(frames)} 帧")
+    print(f"  滚动距离识别: {'✓' if aligned else '✗'}"
+          f"（{sum(1 for s in shifts if s)} 次滚动，{shifts.count(0)} 次未滚动，跳过 {stitcher.rejected} 帧）")
+    print(f"  对齐（行哈希 + 配对）: {stitcher.match_ms / len(frames):.2f} ms/帧")
+
+    old, new = pixel_array(frames[1]), pixel_array(frames[2])
+    start = time.perf_counter()
+    brute = brute_force_shift(old, new)
+    brute_ms = (time.perf_counter() - start) * 1000
+    print(f"  对比：逐位移整块比较像素 {brute_ms:.0f} ms/帧（结果 {brute}，应为 {shifts[1]}）")
+
+    full_mb = width * height * 4 / 1024 / 1024
+    print(f"\n  长图 {width}x{height}（{full_mb:.1f} MB），"
+          f"拼接时 Python 侧内存峰值 {peak / 1024 / 1024:.1f} MB")
+    print(f"  流式写 PNG: {write_ms:.0f} ms，{os.path.getsize(path) / 1024:.0f} KB")
+
+    result = QImage(path)
+    expected = expected_image(document, positions[-1])
+    same = (not result.isNull() and (height, width) == expected.shape
+            and (pixel_array(result)[:, :-SCROLLBAR_MARGIN] == expected[:, :-SCROLLBAR_MARGIN]).all())
+    print(f"  读回与原文档逐像素一致（滚动条列除外）: {'✓' if same else '✗'}")
+    shutil.rmtree(directory, ignore_errors=True)
+
+    passed = aligned and same and peak < full_mb * 1024 * 1024 / 2
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+相似截图搜索性能测试
+1. 感知哈希的计算耗时（1080p / 4K）
+2. 区分能力：同一截图的小改动 / JPEG 重新编码 / 缩放 vs 不相关的截图
+3. 十万个哈希中查询：多索引哈希表 vs 逐个比较（结果必须一致）
+4. 截图库 find_similar 端到端耗时
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_similarity.py [哈希数]
+"""
+import sys
+import random
+import shutil
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage, QPainter, QFont, QColor
+
+from bench_capture import time_ms
+from capture_library import CaptureLibrary, DEFAULT_SIMILAR_RADIUS
+from image_hash import NUMPY_AVAILABLE, perceptual_hash, hamming
+from similarity_index import SimilarityIndex
+
+# 查询耗时上限（毫秒）
+QUERY_BUDGET_MS = 10.0
+
+
+def jpeg_roundtrip(image, quality=70):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "JPEG", quality)
+    return QImage.fromData(data, "JPEG")
+
+
+def with_text(image, text, position=(60, 200)):
+    """在截图上加一行字（模拟界面上的小变化）"""
+    image = image.copy()
+    painter = QPainter(image)
+    painter.setFont(QFont("Arial", 28))
+    painter.setPen(Qt.white)
+    painter.drawText(*position, text)
+    painter.end()
+    return image
+
+
+def make_screen(seed, width=1920, height=1080):
+    """合成截图：随机位置的窗口 + 几行文字，seed 不同的截图互不相关
+    （bench_capture 的规则网格图几乎只有渐变，低频系数都接近 0，不适合测试感知哈希）
+    """
+    rng = random.Random(seed)
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    painter = QPainter(image)
+    painter.setFont(QFont("Arial", 14))
+    for _ in range(12):
+        x, y = rng.randrange(width - 220), rng.randrange(height - 180)
+        w, h = rng.randrange(200, width // 2), rng.randrange(160, height // 2)
+        painter.fillRect(x, y, w, h, QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        painter.setPen(Qt.black)
+        for line in range(y + 30, y + h - 10, 24):
+            painter.drawText(x + 12, line, "截图工具 benchmark " * (w // 200))
+    painter.end()
+    return image
+
+
+def bench_robustness(base):
+    """相似变体与不相关截图的汉明距离"""
+    reference = perceptual_hash(base)
+    variants = [
+        ("加一行文字", with_text(base, "Hello 截图 12:34")),
+        ("JPEG 质量 70", jpeg_roundtrip(base)),
+        ("缩小到 50%", base.scaled(base.width() // 2, base.height() // 2,
+                                 Qt.IgnoreAspectRatio, Qt.SmoothTransformation)),
+        ("裁掉边缘 2%", base.copy(19, 11, base.width() - 38, base.height() - 22)),
+    ]
+    print(f"\n  {'变体':<12} | 汉明距离")
+    similar = []
+    for name, image in variants:
+        distance = hamming(reference, perceptual_hash(image))
+        similar.append(distance)
+        print(f"  {name:<12} | {distance:>4}")
+
+    others = [hamming(reference, perceptual_hash(make_screen(seed))) for seed in range(1, 21)]
+    print(f"  {'不相关 x20':<12} | 最小 {min(others)}，平均 {sum(others) / len(others):.1f}")
+    return max(similar) <= DEFAULT_SIMILAR_RADIUS < min(others)
+
+
+def random_near(rng, value, distance):
+    """与 value 汉明距离恰好为 distance 的随机哈希"""
+    for position in rng.sample(range(64), distance):
+        value ^= 1 << position
+    return value
+
+
+def bench_index(count):
+    """count 个随机哈希 + 植入的近邻：多索引哈希表 vs 逐个比较"""
+    rng = random.Random(1)
+    index = SimilarityIndex()
+    for key in range(count):
+        index.add(key, rng.getrandbits(64))
+
+    queries = [rng.getrandbits(64) for _ in range(20)]
+    for i, query in enumerate(queries):
+        for j, distance in enumerate((0, 3, 6, 9, 12)):
+            index.add(count + i * 10 + j, random_near(rng, query, distance))
+
+    correct = all(index.query(query, DEFAULT_SIMILAR_RADIUS) == index.scan(query, DEFAULT_SIMILAR_RADIUS)
+                  for query in queries)
+    query_ms = time_ms(lambda: [index.query(query, DEFAULT_SIMILAR_RADIUS) for query in queries],
+                       repeat=3) / len(queries)
+    scan_ms = time_ms(lambda: index.scan(queries[0], DEFAULT_SIMILAR_RADIUS), repeat=1)
+    candidates = sum(len(index.candidates(query, DEFAULT_SIMILAR_RADIUS)) for query in queries) / len(queries)
+
+    print(f"\n  {len(index)} 个哈希，半径 {DEFAULT_SIMILAR_RADIUS}：")
+    print(f"  多索引哈希表: {query_ms:.2f} ms/次（平均验证 {candidates:.0f} 个候选）")
+    print(f"  逐个比较:     {scan_ms:.1f} ms/次")
+    print(f"  结果一致: {'✓' if correct else '✗'}")
+    return correct and query_ms <= QUERY_BUDGET_MS
+
+
+def bench_library(count):
+    """截图库端到端：加载索引 + 查询（含读取记录详情）"""
+    root = tempfile.mkdtemp(prefix='similarity_bench_')
+    library = CaptureLibrary(root)
+    rng = random.Random(2)
+    metas = []
+    for i in range(count):
+        metas.append({
+            'created': 1.7e9 + i, 'x': 0, 'y': 0, 'width': 1920, 'height': 1080, 'screen': "",
+            'format': "png", 'bytes': 0, 'hash': f"{i:032x}", 'path': f"{i}.png",
+            'phash': rng.getrandbits(64),
+        })
+    target = metas[count // 2]['phash']
+    for i in range(30):
+        metas.append(dict(metas[0], created=1.8e9 + i, hash=f"near{i:028x}",
+                          phash=random_near(rng, target, i % DEFAULT_SIMILAR_RADIUS)))
+    library.add_records(metas)
+
+    load_ms = time_ms(lambda: library.load_similarity_index() or library.wait_for_done(), repeat=1)
+    find_ms = time_ms(lambda: library.find_similar(target), repeat=5)
+    results = library.find_similar(target)
+    print(f"\n  截图库 {library.count()} 张：加载感知哈希索引 {load_ms:.0f} ms（只在第一次查询时，在工作线程中）")
+    print(f"  find_similar: {find_ms:.2f} ms，找到 {len(results)} 张")
+
+    library.close()
+    shutil.rmtree(root, ignore_errors=True)
+    return len(results) == 31 and find_ms <= QUERY_BUDGET_MS * 5
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("=" * 60)
+    print("  相似截图搜索性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    for width, height in ((1920, 1080), (3840, 2160)):
+        image = make_screen(0, width, height)
+        print(f"  感知哈希 {width}x{height}: {time_ms(lambda: perceptual_hash(image)):.1f} ms")
+
+    passed = bench_robustness(make_screen(0))
+    passed = bench_index(count) and passed
+    passed = bench_library(count) and passed
+
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    app.quit()
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
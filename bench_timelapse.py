@@ -0,0 +1,112 @@
+"""
+定时截图性能测试：模拟通宵记录一个长时间任务（桌面基本不变，只有时钟、进度条和日志在变）
+对比：只存变化的小块 vs 每帧存一张 PNG vs 未压缩整帧；并检查重建的每一帧与原图一致
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_timelapse.py [帧数]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QPainter, QFont, QColor
+
+from bench_capture import make_desktop_pixmap, time_ms
+from timelapse import NUMPY_AVAILABLE, TimelapseWriter, TimelapseReader, KEYFRAME_INTERVAL
+
+SIZE = (1920, 1080)
+
+
+def make_frame(base, index):
+    """第 index 帧：右下角时钟、底部进度条、偶尔多一行日志"""
+    image = base.copy()
+    painter = QPainter(image)
+    painter.setFont(QFont("Arial", 12))
+    painter.fillRect(1760, 1050, 160, 30, QColor(20, 20, 20))
+    painter.setPen(Qt.white)
+    painter.drawText(1775, 1070, time.strftime("%H:%M:%S", time.gmtime(index * 10)))
+
+    painter.fillRect(200, 1000, 1200, 16, QColor(60, 60, 60))
+    painter.fillRect(200, 1000, 1200 * index // 1000 % 1200, 16, QColor(76, 175, 80))
+
+    painter.setPen(Qt.black)
+    for line in range(index // 25 % 30):
+        painter.drawText(40, 250 + line * 22, f"[{line:04d}] step {line} done, loss={1 / (line + 1):.4f}")
+    painter.end()
+    return image
+
+
+def png_size(image):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return data.size()
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print("=" * 60)
+    print("  定时截图性能测试")
+    print("=" * 60)
+    if not NUMPY_AVAILABLE:
+        print("✗ 需要 NumPy: pip install numpy")
+        return 1
+
+    base = make_desktop_pixmap(*SIZE).toImage()
+    directory = tempfile.mkdtemp(prefix='timelapse_bench_')
+    path = os.path.join(directory, "bench.tlap")
+
+    writer = TimelapseWriter(path, *SIZE)
+    write_s = 0.0
+    for index in range(count):
+        frame = make_frame(base, index)
+        start = time.perf_counter()
+        writer.write_frame(frame, timestamp=index * 10.0)
+        write_s += time.perf_counter() - start
+    writer.close()
+
+    size_mb = writer.bytes_written / 1024 / 1024
+    raw_mb = writer.raw_bytes / 1024 / 1024
+    sample = [make_frame(base, index) for index in random.Random(0).sample(range(count), 10)]
+    png_mb = sum(png_size(image) for image in sample) / len(sample) * count / 1024 / 1024
+    tiles = writer.columns * writer.rows
+    print(f"  {count} 帧 {SIZE[0]}x{SIZE[1]}，小块 {writer.tile_size}x{writer.tile_size}（每帧 {tiles} 块）")
+    print(f"  写入: 平均 {write_s / count * 1000:.1f} ms/帧（比较 + 压缩 + 写文件）")
+    print(f"  平均每帧变化 {writer.tiles_written / count:.1f} 块（含每 {KEYFRAME_INTERVAL} 帧一个关键帧）")
+    print(f"\n  {'存储方式':<14} | {'大小':>9}")
+    print(f"  {'变化小块':<14} | {size_mb:>6.1f} MB")
+    print(f"  {'每帧一张 PNG':<14} | {png_mb:>6.1f} MB（按 10 帧抽样估算）")
+    print(f"  {'未压缩整帧':<14} | {raw_mb:>6.0f} MB")
+
+    open_ms = time_ms(lambda: TimelapseReader(path).close())
+    print(f"\n  打开（读取 {count} 个帧头）: {open_ms:.1f} ms")
+
+    reader = TimelapseReader(path)
+    worst = min(count - 1, KEYFRAME_INTERVAL - 1)
+    random_ms = time_ms(lambda: TimelapseReader(path).frame(worst), repeat=3)
+    print(f"  随机读取（关键帧后第 {worst} 帧，最坏情况）: {random_ms:.1f} ms")
+
+    start = time.perf_counter()
+    correct = True
+    for index in range(count):
+        image = reader.frame(index)
+        if index % 7 == 0:
+            correct = correct and image == make_frame(base, index).convertToFormat(image.format())
+    sequential_ms = (time.perf_counter() - start) * 1000 / count
+    print(f"  顺序读取: {sequential_ms:.1f} ms/帧（含抽查比较）")
+    print(f"  重建结果与原图一致: {'✓' if correct else '✗'}")
+    reader.close()
+
+    shutil.rmtree(directory, ignore_errors=True)
+    app.quit()
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+窗口吸附性能测试：用合成窗口（FakeWindowSource）代替真实窗口枚举
+1. 建网格索引的耗时，以及每次命中测试的耗时：网格索引 vs 逐个检查所有矩形；结果必须一致
+2. 选择窗口中悬停高亮的每帧绘制耗时，单击选中的矩形是否正确
+可以在 Linux 下无界面运行：QT_QPA_PLATFORM=offscreen python bench_window_snap.py [顶层窗口数]
+"""
+import sys
+import time
+import random
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+
+from bench_capture import make_desktop_pixmap, send_mouse
+from screen_capture import CaptureFrame
+from screen_selector import ScreenSelector
+from window_snap import WindowIndex, SnapTarget, FakeWindowSource
+
+# 三屏 4K
+GEOMETRY = QRect(0, 0, 11520, 2160)
+QUERIES = 20000
+
+
+def linear_hit(targets, pos):
+    """对比用：检查所有矩形，取优先级最高的"""
+    hits = [target for target in targets if target.rect.contains(pos)]
+    return min(hits, key=SnapTarget.priority) if hits else None
+
+
+def bench_index(count):
+    targets = FakeWindowSource(GEOMETRY, count=count).snapshot()
+    start = time.perf_counter()
+    index = WindowIndex(targets)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(5)
+    points = [QPoint(rng.randrange(GEOMETRY.width()), rng.randrange(GEOMETRY.height())) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    fast = [index.hit(pos) for pos in points]
+    grid_us = (time.perf_counter() - start) * 1e6 / len(points)
+
+    sample = points[:QUERIES // 20]
+    start = time.perf_counter()
+    slow = [linear_hit(targets, pos) for pos in sample]
+    linear_us = (time.perf_counter() - start) * 1e6 / len(sample)
+
+    same = fast[:len(sample)] == slow
+    cells = sum(len(entries) for entries in index.grid.values()) / max(1, len(index.grid))
+    print(f"  {count} 个顶层窗口，{len(targets)} 个矩形（{GEOMETRY.width()}x{GEOMETRY.height()}）")
+    print(f"  建索引: {build_ms:.1f} ms，{len(index.grid)} 个格子，平均每格 {cells:.1f} 个矩形")
+    print(f"  命中测试: 网格 {grid_us:.1f} µs/次，逐个检查 {linear_us:.0f} µs/次"
+          f"（{linear_us / grid_us:.0f}x）")
+    print(f"  结果一致（{len(sample)} 个点）: {'✓' if same else '✗'}")
+    return index, same
+
+
+def bench_selector(app, index, moves=300):
+    width, height = 3840, 2160
+    frame = CaptureFrame(make_desktop_pixmap(width, height), QRect(0, 0, width, height))
+    selector = ScreenSelector(frame)
+    selector.coalesce_moves = False
+    selector.show()
+    app.processEvents()
+    selector.set_window_index(index)
+
+    selector.paint_stats.reset()
+    for i in range(moves):
+        pos = QPoint(40 + i * (width - 80) // moves, 40 + (i * 53) % (height - 80))
+        send_mouse(selector, QEvent.MouseMove, pos, Qt.NoButton)
+        app.processEvents()
+    print(f"\n  悬停高亮（4K 背景，{moves} 次移动）: {selector.paint_stats}")
+
+    # 单击选中光标下的窗口
+    results = []
+    selector.selection_finished.connect(results.append)
+    pos = QPoint(width // 2, height // 2)
+    send_mouse(selector, QEvent.MouseMove, pos, Qt.NoButton)
+    app.processEvents()
+    target = index.hit(pos)
+    send_mouse(selector, QEvent.MouseButtonPress, pos)
+    send_mouse(selector, QEvent.MouseButtonRelease, pos + QPoint(2, 1), Qt.NoButton)
+    expected = target.rect.intersected(selector.rect()) if target else None
+    correct = bool(results) and results[0] == expected
+    print(f"  单击选中窗口: {'✓' if correct else '✗'} {target}")
+    frame.discard()
+    return correct
+
+
+def main():
+    app = QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    print("=" * 60)
+    print("  窗口吸附性能测试")
+    print("=" * 60)
+
+    index, same = bench_index(count)
+    correct = bench_selector(app, index)
+
+    passed = same and correct
+    print(f"\n  结果: {'✓' if passed else '✗'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+截图历史：最近的截图保存在一个有内存预算的环形队列里，预览窗口关闭后仍然可以找回
+按最近使用顺序分三级存放：
+  1. 最近使用的几张保持原始 QImage（立即可用）
+  2. 其余的在后台线程池中压缩（PNG 快速级别），只在内存中保留压缩数据
+  3. 内存超出预算时，最久未使用的压缩数据写入缓存目录（最近使用的原始图像也提前压缩、写入缓存目录，
+     压缩失败的原始图像直接淘汰；最新的一张总是保留）
+条数或缓存目录超出上限时淘汰最久未使用的截图，所以截图再多内存占用也保持平稳
+与已有截图像素完全相同的截图（内容哈希相同）不重复存放，只把原来那张标记为最近使用
+"""
+import os
+import time
+import shutil
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+
+from PyQt5.QtCore import QObject, QRect, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import image_formats
+from image_hash import content_hash as compute_content_hash
+from task_results import TaskResults
+
+# 默认内存预算（原始图像 + 压缩数据）
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# 默认缓存目录上限
+DEFAULT_DISK_BUDGET = 1024 * 1024 * 1024
+# 最多保留的截图数
+DEFAULT_MAX_ENTRIES = 200
+# 保持原始图像的最近截图数
+DEFAULT_RAW_ENTRIES = 2
+# 历史压缩格式：PNG 快速级别解码最快，重新打开历史截图时等待最短
+HISTORY_FORMAT = "png_fast"
+
+
+class HistoryEntry:
+    """一张历史截图（原始图像 / 压缩数据 / 缓存文件至少有一个）"""
+
+    def __init__(self, entry_id, image, rect, content_hash):
+        self.id = entry_id
+        self.content_hash = content_hash
+        self.rect = QRect(rect)
+        self.width = image.width()
+        self.height = image.height()
+        self.created = datetime.now()
+
+        self.image = image      # 原始图像
+        self.data = None        # 压缩数据（内存中）
+        self.path = None        # 压缩数据（缓存文件）
+        self.file_size = 0
+        self.compressing = False
+        # 压缩失败：不再重试，内存超出预算时直接淘汰
+        self.compress_failed = False
+
+    def __str__(self):
+        return f"{self.created.strftime('%H:%M:%S')}  {self.width} x {self.height}"
+
+    @property
+    def state(self):
+        if self.image is not None:
+            return "原始"
+        return "压缩" if self.data is not None else "磁盘"
+
+    def memory_bytes(self):
+        """占用的内存"""
+        size = len(self.data) if self.data is not None else 0
+        if self.image is not None:
+            size += self.image.sizeInBytes()
+        return size
+
+    def disk_bytes(self):
+        """占用的缓存目录空间"""
+        return self.file_size if self.path is not None else 0
+
+    def is_encoded(self):
+        """是否已经有压缩数据（可以直接丢弃原始图像）"""
+        return self.data is not None or self.path is not None
+
+    def remove_file(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class CompressTask(QRunnable):
+    """压缩一张历史截图（在工作线程中运行）"""
+
+    def __init__(self, history, entry_id, image, fmt):
+        super().__init__()
+        self.history = history
+        self.entry_id = entry_id
+        self.image = image
+        self.fmt = fmt
+
+    def run(self):
+        data, error = b"", ""
+        try:
+            data = self.fmt.encode(self.image)
+        except Exception as e:
+            error = str(e) or "未知错误"
+        self.history.results.post(self.history.on_task_done, self.entry_id, data, error)
+
+
+class CaptureHistory(QObject):
+    """截图历史（按最近使用顺序，最久未使用的在最前）"""
+
+    # 历史变化（添加 / 淘汰）
+    changed = pyqtSignal()
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, disk_budget=DEFAULT_DISK_BUDGET,
+                 max_entries=DEFAULT_MAX_ENTRIES, raw_entries=DEFAULT_RAW_ENTRIES,
+                 cache_dir=None, parent=None):
+        super().__init__(parent)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.max_entries = max_entries
+        self.raw_entries = raw_entries
+        self.fmt = image_formats.get_format(HISTORY_FORMAT)
+
+        # 没有指定缓存目录时用临时目录，clear() 时一起删除
+        self.own_cache_dir = cache_dir is None
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.entries = OrderedDict()
+        # 内容哈希 → 截图 ID
+        self.hashes = {}
+        self.next_id = 1
+        self.evicted = 0
+        self.deduplicated = 0
+
+        # 压缩是 CPU 密集的，一个线程就够，不和保存任务抢核心
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # 工作线程 → 主线程：压缩结果
+        self.results = TaskResults(self)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, image, rect=None, content_hash=None):
+        """加入一张截图，返回截图 ID
+
+        content_hash: 裁剪时已经算好的内容哈希（没有时在这里计算）；
+        与已有截图相同时不新增，返回原来那张的 ID
+        """
+        if not isinstance(image, QImage):
+            image = image.toImage()
+        content_hash = content_hash or compute_content_hash(image)
+
+        existing = self.hashes.get(content_hash)
+        if existing is not None:
+            self.entries.move_to_end(existing)
+            self.deduplicated += 1
+            print(f"[历史] 与截图 #{existing} 相同，不重复存放")
+            self.enforce()
+            self.changed.emit()
+            return existing
+
+        entry = HistoryEntry(self.next_id, image, rect or QRect(0, 0, image.width(), image.height()),
+                             content_hash)
+        self.next_id += 1
+        self.entries[entry.id] = entry
+        self.hashes[content_hash] = entry.id
+
+        self.enforce()
+        self.changed.emit()
+        return entry.id
+
+    def recent(self, count=None):
+        """最近的截图，最新的在前"""
+        entries = list(reversed(self.entries.values()))
+        return entries if count is None else entries[:count]
+
+    def get(self, entry_id):
+        """取出一张截图（QImage），并标记为最近使用；不存在时返回 None"""
+        entry = self.entries.get(entry_id)
+        if entry is None:
+            return None
+
+        self.entries.move_to_end(entry_id)
+        if entry.image is None:
+            start = time.perf_counter()
+            source = entry.state
+            if entry.data is not None:
+                data = entry.data
+            else:
+                with open(entry.path, 'rb') as f:
+                    data = f.read()
+            # 重新变成原始图像；压缩数据保留，以后降级时不需要再压缩
+            entry.image = self.fmt.decode(data)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"[历史] 恢复截图 #{entry_id}（{source}，{elapsed_ms:.1f} ms）")
+
+        image = entry.image
+        self.enforce()
+        return image
+
+    def enforce(self):
+        """按预算降级 / 淘汰"""
+        entries = list(self.entries.values())
+
+        # 1. 最近使用的几张之外的原始图像：已有压缩数据的直接丢弃原图，否则后台压缩
+        older = entries[:-self.raw_entries] if self.raw_entries > 0 else entries
+        for entry in older:
+            if entry.image is None or entry.compressing or entry.compress_failed:
+                continue
+            if entry.is_encoded():
+                entry.image = None
+            else:
+                self.compress(entry)
+
+        # 2. 内存超出预算：从最久未使用的开始，已有压缩数据的丢弃原图，压缩数据写入缓存目录；
+        #    还没压缩的原始图像（最近使用的几张）提前压缩，完成后再写入；压缩失败的直接淘汰
+        memory = self.memory_usage()
+        for entry in entries[:-1]:
+            if memory <= self.memory_budget:
+                break
+            if entry.image is not None:
+                if entry.compress_failed:
+                    memory -= entry.memory_bytes()
+                    self.evict(entry)
+                    continue
+                if not entry.is_encoded():
+                    if not entry.compressing:
+                        self.compress(entry)
+                    continue
+                memory -= entry.image.sizeInBytes()
+                entry.image = None
+            if entry.data is not None:
+                memory -= len(entry.data)
+                self.spill(entry)
+
+        # 3. 条数或缓存目录超出上限：淘汰最久未使用的
+        disk = self.disk_usage()
+        while self.entries and (len(self.entries) > self.max_entries or disk > self.disk_budget):
+            oldest = next(iter(self.entries.values()))
+            disk -= oldest.disk_bytes()
+            self.evict(oldest)
+
+    def compress(self, entry):
+        """提交后台压缩任务"""
+        entry.compressing = True
+        self.pool.start(CompressTask(self, entry.id, entry.image, self.fmt))
+
+    def on_task_done(self, entry_id, data, error):
+        """压缩完成（主线程）"""
+        entry = self.entries.get(entry_id)
+        if entry is None:
+            return  # 压缩期间已被淘汰
+
+        entry.compressing = False
+        if error:
+            print(f"✗ 历史截图 #{entry_id} 压缩失败: {error}")
+            entry.compress_failed = True
+            self.enforce()
+            return
+
+        entry.data = data
+        self.enforce()
+
+    def spill(self, entry):
+        """压缩数据写入缓存目录，释放内存"""
+        if self.cache_dir is None:
+            self.cache_dir = tempfile.mkdtemp(prefix='capture_history_')
+
+        path = os.path.join(self.cache_dir, f"{entry.id}.{self.fmt.extension}")
+        try:
+            with open(path, 'wb') as f:
+                f.write(entry.data)
+        except OSError as e:
+            print(f"✗ 历史截图 #{entry.id} 写入缓存失败: {e}")
+            return
+
+        entry.path = path
+        entry.file_size = len(entry.data)
+        entry.data = None
+
+    def evict(self, entry):
+        """淘汰一张截图"""
+        del self.entries[entry.id]
+        self.hashes.pop(entry.content_hash, None)
+        entry.image = None
+        entry.data = None
+        entry.remove_file()
+        self.evicted += 1
+        self.changed.emit()
+
+    def memory_usage(self):
+        return sum(entry.memory_bytes() for entry in self.entries.values())
+
+    def disk_usage(self):
+        return sum(entry.disk_bytes() for entry in self.entries.values())
+
+    def stats(self):
+        """统计信息"""
+        states = {"原始": 0, "压缩": 0, "磁盘": 0}
+        for entry in self.entries.values():
+            states[entry.state] += 1
+        counts = "，".join(f"{name} {count}" for name, count in states.items())
+        return (f"{len(self.entries)} 张（{counts}），内存 {self.memory_usage() / 1024 / 1024:.1f} MB，"
+                f"磁盘 {self.disk_usage() / 1024 / 1024:.1f} MB，已淘汰 {self.evicted} 张，"
+                f"去重 {self.deduplicated} 张")
+
+    def wait_for_done(self, msecs=-1):
+        """等待后台压缩完成，并处理压缩结果"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
+
+    def clear(self):
+        """清空历史（退出程序前调用）"""
+        self.pool.clear()
+        self.pool.waitForDone()
+        for entry in list(self.entries.values()):
+            entry.remove_file()
+        self.entries.clear()
+        self.hashes.clear()
+
+        if self.own_cache_dir and self.cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self.cache_dir = None
+        self.changed.emit()
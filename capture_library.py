@@ -0,0 +1,603 @@
+"""
+截图库：快速保存模式把截图直接写入按日期分片的目录，不弹文件对话框
+每张截图（时间、区域、屏幕、尺寸、格式、哈希、路径）记录在内嵌的 SQLite 索引中，
+浏览和搜索十万张以上的截图是一次索引查询，不需要遍历目录
+目录结构：<根目录>/YYYY/MM/DD/HHMMSS_微秒.<扩展名>，索引：<根目录>/library.db
+编码、哈希和写文件在线程池中进行；索引只在主线程中读写（SQLite 连接不跨线程，
+工作线程需要读取时使用自己的连接）
+保存时顺便生成缩略图，追加到内存映射的缩略图图集（画廊浏览用）
+去重：像素内容哈希与已有截图（或正在保存的截图）相同时不再编码和写文件，
+只新增一条引用同一个文件的记录
+相似搜索：保存时计算 64 位感知哈希（需要 NumPy），查询时用多索引哈希表找出汉明距离相近的截图，
+不需要逐张比较；多索引哈希表第一次查询时在工作线程中加载（十万张约 0.6 秒），之后随新记录更新
+"""
+import os
+import time
+import sqlite3
+from datetime import datetime
+
+from PyQt5.QtCore import QObject, QRect, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import image_formats
+import image_hash
+from image_hash import content_hash as compute_content_hash
+from similarity_index import SimilarityIndex
+from task_results import TaskResults
+from thumbnail_atlas import ThumbnailAtlas, make_thumbnail
+
+# 默认截图库位置
+DEFAULT_LIBRARY_DIR = os.path.join(os.path.expanduser("~"), "Pictures", "截图库")
+# 索引文件名（位于截图库根目录）
+INDEX_NAME = "library.db"
+# 同时编码的任务数（与 ImageSaver 相同）
+DEFAULT_MAX_THREADS = 2
+
+# 相似搜索的默认汉明距离上限（64 位感知哈希）
+DEFAULT_SIMILAR_RADIUS = 10
+
+# 索引结构版本（PRAGMA user_version）
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id      INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    x       INTEGER NOT NULL,
+    y       INTEGER NOT NULL,
+    width   INTEGER NOT NULL,
+    height  INTEGER NOT NULL,
+    screen  TEXT NOT NULL DEFAULT '',
+    format  TEXT NOT NULL,
+    bytes   INTEGER NOT NULL,
+    hash    TEXT NOT NULL,
+    path    TEXT NOT NULL,
+    phash   INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_captures_created ON captures(created);
+CREATE INDEX IF NOT EXISTS idx_captures_screen ON captures(screen, created);
+CREATE INDEX IF NOT EXISTS idx_captures_size ON captures(width, height);
+CREATE INDEX IF NOT EXISTS idx_captures_hash ON captures(hash);
+CREATE INDEX IF NOT EXISTS idx_captures_path ON captures(path);
+CREATE INDEX IF NOT EXISTS idx_captures_phash_missing ON captures(id) WHERE phash IS NULL;
+"""
+
+# 版本 0 → 1：path 去掉 UNIQUE 约束（去重后多条记录引用同一个文件），需要重建表；
+# 旧记录的 hash 是文件哈希，与新的像素内容哈希不会相同，只是不参与去重
+MIGRATE_V0 = """
+BEGIN;
+DROP INDEX IF EXISTS idx_captures_created;
+DROP INDEX IF EXISTS idx_captures_screen;
+DROP INDEX IF EXISTS idx_captures_size;
+DROP INDEX IF EXISTS idx_captures_hash;
+ALTER TABLE captures RENAME TO captures_v0;
+""" + SCHEMA + """
+INSERT INTO captures (id, created, x, y, width, height, screen, format, bytes, hash, path)
+    SELECT id, created, x, y, width, height, screen, format, bytes, hash, path FROM captures_v0;
+DROP TABLE captures_v0;
+COMMIT;
+"""
+
+# 版本 1 → 2：增加感知哈希（旧记录为 NULL，查找相似截图时在后台补算）
+MIGRATE_V1 = "ALTER TABLE captures ADD COLUMN phash INTEGER"
+
+COLUMNS = "id, created, x, y, width, height, screen, format, bytes, hash, path, phash"
+
+
+def phash_to_db(value):
+    """无符号 64 位感知哈希 → SQLite 的有符号 64 位整数"""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def phash_from_db(value):
+    if value is None:
+        return None
+    return value + (1 << 64) if value < 0 else value
+
+
+class CaptureRecord:
+    """索引中的一条截图记录"""
+
+    def __init__(self, row, root):
+        (self.id, created, x, y, width, height,
+         self.screen, self.format, self.bytes, self.hash, path, phash) = row
+        self.phash = phash_from_db(phash)
+        self.created = datetime.fromtimestamp(created)
+        self.rect = QRect(x, y, width, height)
+        self.relative_path = path
+        self.path = os.path.join(root, path)
+        # 是否是去重后引用已有文件的记录（只在 saved 信号中有意义）
+        self.deduplicated = False
+
+    def __repr__(self):
+        return f"CaptureRecord({self.id}, {self.path!r})"
+
+    def __str__(self):
+        return (f"{self.created.strftime('%Y-%m-%d %H:%M:%S')}  "
+                f"{self.rect.width()} x {self.rect.height()}  {self.screen}")
+
+
+class LibrarySaveTask(QRunnable):
+    """编码并写入截图库，顺便生成缩略图（在工作线程中运行）"""
+
+    def __init__(self, library, image, meta, fmt):
+        super().__init__()
+        self.library = library
+        self.image = image
+        self.meta = meta
+        self.fmt = fmt
+
+    def run(self):
+        error = ""
+        path = os.path.join(self.library.root, self.meta['path'])
+
+        # 先写临时文件再改名，失败时不会留下半个文件
+        temp_path = path + ".part"
+        try:
+            data = self.fmt.encode(self.image)
+            self.meta['thumbnail'] = make_thumbnail(self.image)
+            if image_hash.NUMPY_AVAILABLE:
+                self.meta['phash'] = image_hash.perceptual_hash(self.image)
+            self.meta['bytes'] = len(data)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        except Exception as e:
+            error = str(e) or "未知错误"
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+        self.library.results.post(self.library.on_task_done, self.meta, error)
+
+
+class ThumbnailTask(QRunnable):
+    """为没有缩略图的记录补生成缩略图（在工作线程中运行）"""
+
+    def __init__(self, library, record_id, path):
+        super().__init__()
+        self.library = library
+        self.record_id = record_id
+        self.path = path
+
+    def run(self):
+        thumbnail = None
+        try:
+            thumbnail = make_thumbnail(image_formats.read_image(self.path))
+        except Exception as e:
+            print(f"✗ 生成缩略图失败: {self.path}: {e}")
+        self.library.results.post(self.library.on_thumbnail_done, self.record_id, thumbnail)
+
+
+class PerceptualHashTask(QRunnable):
+    """为没有感知哈希的记录（旧版本保存的截图）补算感知哈希（在工作线程中运行）"""
+
+    def __init__(self, library, record_id, path):
+        super().__init__()
+        self.library = library
+        self.record_id = record_id
+        self.path = path
+
+    def run(self):
+        value = None
+        try:
+            value = image_hash.perceptual_hash(image_formats.read_image(self.path))
+        except Exception as e:
+            print(f"✗ 计算感知哈希失败: {self.path}: {e}")
+        self.library.results.post(self.library.on_phash_done, self.record_id, value)
+
+
+class SimilarityLoadTask(QRunnable):
+    """从索引中加载全部感知哈希，建好多索引哈希表（在工作线程中运行，使用自己的数据库连接）"""
+
+    def __init__(self, library, db_path):
+        super().__init__()
+        self.library = library
+        self.db_path = db_path
+
+    def run(self):
+        start = time.perf_counter()
+        index = SimilarityIndex()
+        try:
+            db = sqlite3.connect(self.db_path)
+            try:
+                for record_id, value in db.execute("SELECT id, phash FROM captures WHERE phash IS NOT NULL"):
+                    index.add(record_id, phash_from_db(value))
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            print(f"✗ 加载感知哈希索引失败: {e}")
+            index = None
+        self.library.results.post(self.library.on_similarity_loaded, index, (time.perf_counter() - start) * 1000)
+
+
+class CaptureLibrary(QObject):
+    """截图库（分片目录 + SQLite 索引）"""
+
+    # 存入成功：CaptureRecord
+    saved = pyqtSignal(object)
+    # 存入失败：文件路径、错误信息
+    failed = pyqtSignal(str, str)
+    # 缩略图已加入图集：记录 ID
+    thumbnail_ready = pyqtSignal(int)
+    # 感知哈希索引加载完成（find_similar 可以返回结果了）
+    similarity_ready = pyqtSignal()
+
+    def __init__(self, root=None, max_threads=DEFAULT_MAX_THREADS, parent=None):
+        super().__init__(parent)
+        self.root = root or DEFAULT_LIBRARY_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self.output_format = image_formats.get_format(image_formats.DEFAULT_FORMAT)
+
+        # WAL：写入索引时不阻塞读取，单条插入不必每次都完整同步到磁盘
+        self.db_path = os.path.join(self.root, INDEX_NAME)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.migrate()
+        self.atlas = ThumbnailAtlas(self.root)
+        # 正在补生成缩略图的记录；生成失败的记录（文件丢失或损坏）本次运行不再重试
+        self.thumbnail_requests = set()
+        self.thumbnail_failed = set()
+
+        # 感知哈希索引（第一次查找相似截图时才在工作线程中加载）；正在补算感知哈希的记录
+        # 加载期间新增 / 删除的记录先记下来（记录 ID, 感知哈希或 None），加载完成后补上
+        self.similarity = None
+        self.similarity_loading = False
+        self.similarity_updates = []
+        self.phash_requests = set()
+
+        # 本次运行已分配的文件名（同一微秒内的多张截图加序号区分）
+        self.reserved = set()
+
+        # 正在保存的截图：内容哈希 → 截图信息；保存期间又来的相同截图等它完成后引用同一个文件
+        self.pending_hashes = {}
+        self.waiting = {}
+        self.deduplicated = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.pending = 0
+        # 工作线程 → 主线程：保存结果、缩略图、感知哈希、感知哈希索引
+        self.results = TaskResults(self)
+
+    def migrate(self):
+        """创建或升级索引结构"""
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'captures'").fetchone()
+
+        if exists and version < 1:
+            print("[截图库] 升级索引结构...")
+            self.db.executescript(MIGRATE_V0)
+        elif exists and version < 2:
+            print("[截图库] 升级索引结构（增加感知哈希）...")
+            self.db.execute(MIGRATE_V1)
+            self.db.executescript(SCHEMA)
+        else:
+            self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def set_output_format(self, fmt):
+        """设置快速保存的格式（OutputFormat 或格式名）"""
+        if isinstance(fmt, str):
+            fmt = image_formats.get_format(fmt)
+        self.output_format = fmt
+
+    def shard_path(self, created, fmt):
+        """按日期分片的相对路径：YYYY/MM/DD/HHMMSS_微秒.扩展名"""
+        moment = datetime.fromtimestamp(created)
+        base = os.path.join(moment.strftime("%Y"), moment.strftime("%m"), moment.strftime("%d"),
+                            moment.strftime("%H%M%S_%f"))
+        path = f"{base}.{fmt.extension}"
+        counter = 1
+        while path in self.reserved or os.path.exists(os.path.join(self.root, path)):
+            path = f"{base}_{counter}.{fmt.extension}"
+            counter += 1
+        self.reserved.add(path)
+        return path
+
+    def quick_save(self, image, rect=None, screen="", fmt=None, content_hash=None):
+        """快速保存到截图库，立即返回；完成后发出 saved 信号
+
+        rect: 截图区域（全局坐标），screen: 所在屏幕名称
+        content_hash: 裁剪时已经算好的内容哈希（没有时在这里计算）
+        """
+        if not isinstance(image, QImage):
+            image = image.toImage()
+        if isinstance(fmt, str):
+            fmt = image_formats.get_format(fmt)
+        fmt = fmt or self.output_format
+        rect = rect or QRect(0, 0, image.width(), image.height())
+
+        created = time.time()
+        meta = {
+            'created': created,
+            'x': rect.x(), 'y': rect.y(),
+            'width': image.width(), 'height': image.height(),
+            'screen': screen or "",
+            'hash': content_hash or compute_content_hash(image),
+        }
+
+        # 相同的截图正在保存：等它完成后引用同一个文件
+        original = self.pending_hashes.get(meta['hash'])
+        if original is not None:
+            self.waiting.setdefault(meta['hash'], []).append(meta)
+            print(f"[截图库] 与正在保存的 {original['path']} 相同，跳过编码")
+            return
+
+        # 截图库中已有相同的截图（文件还在）：直接引用
+        for record in self.search(hash=meta['hash'], limit=1):
+            if os.path.exists(record.path):
+                self.add_duplicate(meta, record)
+                return
+
+        meta['format'] = fmt.key
+        meta['path'] = self.shard_path(created, fmt)
+        self.pending_hashes[meta['hash']] = meta
+
+        self.pending += 1
+        self.pool.start(LibrarySaveTask(self, image, meta, fmt))
+        print(f"[截图库] 已加入队列: {meta['path']}（{fmt.label}，排队 {self.pending} 个）")
+
+    def on_task_done(self, meta, error):
+        """写文件完成（主线程）：记录到索引"""
+        self.pending -= 1
+        self.reserved.discard(meta['path'])
+        self.pending_hashes.pop(meta['hash'], None)
+        duplicates = self.waiting.pop(meta['hash'], [])
+        path = os.path.join(self.root, meta['path'])
+
+        if error:
+            print(f"✗ 存入截图库失败: {path}: {error}")
+            for _ in range(1 + len(duplicates)):
+                self.failed.emit(path, error)
+            return
+
+        thumbnail = meta.pop('thumbnail')
+        record = self.get(self.add_record(meta))
+        self.atlas.add(record.id, *thumbnail)
+        self.thumbnail_ready.emit(record.id)
+        print(f"✓ 已存入截图库: {path}")
+        self.saved.emit(record)
+
+        for duplicate in duplicates:
+            self.add_duplicate(duplicate, record)
+
+    def add_duplicate(self, meta, original):
+        """记录一张与 original 相同的截图：不写文件，引用同一个文件和缩略图"""
+        meta.update(format=original.format, bytes=original.bytes, path=original.relative_path,
+                    phash=original.phash)
+        record = self.get(self.add_record(meta))
+        record.deduplicated = True
+        self.deduplicated += 1
+
+        if self.atlas.add_alias(record.id, original.id):
+            self.thumbnail_ready.emit(record.id)
+        print(f"✓ 已存入截图库（与 #{original.id} 相同，引用同一个文件）: {record.path}")
+        self.saved.emit(record)
+
+    def add_record(self, meta):
+        """写入一条索引记录，返回记录 ID"""
+        return self.add_records([meta])[-1]
+
+    def add_records(self, metas):
+        """批量写入索引记录（同一个事务），返回记录 ID 列表"""
+        ids = []
+        with self.db:
+            for meta in metas:
+                cursor = self.db.execute(
+                    "INSERT INTO captures (created, x, y, width, height, screen, format, bytes, hash, path, phash) "
+                    "VALUES (:created, :x, :y, :width, :height, :screen, :format, :bytes, :hash, :path, :phash)",
+                    dict(meta, phash=phash_to_db(meta.get('phash'))))
+                ids.append(cursor.lastrowid)
+
+        for record_id, meta in zip(ids, metas):
+            if meta.get('phash') is not None:
+                self.update_similarity(record_id, meta['phash'])
+        return ids
+
+    def where(self, start=None, end=None, screen=None, min_width=None, min_height=None,
+              fmt=None, hash=None):
+        """把搜索条件组合成 WHERE 子句和参数（每个条件都有对应的索引）"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("created >= ?")
+            params.append(start.timestamp() if isinstance(start, datetime) else start)
+        if end is not None:
+            clauses.append("created < ?")
+            params.append(end.timestamp() if isinstance(end, datetime) else end)
+        if screen is not None:
+            clauses.append("screen = ?")
+            params.append(screen)
+        if min_width is not None:
+            clauses.append("width >= ?")
+            params.append(min_width)
+        if min_height is not None:
+            clauses.append("height >= ?")
+            params.append(min_height)
+        if fmt is not None:
+            clauses.append("format = ?")
+            params.append(fmt)
+        if hash is not None:
+            clauses.append("hash = ?")
+            params.append(hash)
+
+        sql = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return sql, params
+
+    def search(self, limit=100, offset=0, **filters):
+        """搜索截图（最新的在前）
+
+        filters: start / end（datetime 或时间戳）、screen、min_width、min_height、fmt、hash
+        """
+        where, params = self.where(**filters)
+        rows = self.db.execute(
+            f"SELECT {COLUMNS} FROM captures{where} ORDER BY created DESC LIMIT ? OFFSET ?",
+            params + [limit, offset])
+        return [CaptureRecord(row, self.root) for row in rows]
+
+    def ids(self, **filters):
+        """符合条件的所有记录 ID（最新的在前），画廊只加载 ID，需要时再查询详情"""
+        where, params = self.where(**filters)
+        rows = self.db.execute(f"SELECT id FROM captures{where} ORDER BY created DESC", params)
+        return [row[0] for row in rows]
+
+    def count(self, **filters):
+        """符合条件的截图数"""
+        where, params = self.where(**filters)
+        return self.db.execute(f"SELECT COUNT(*) FROM captures{where}", params).fetchone()[0]
+
+    def recent(self, limit=20):
+        return self.search(limit=limit)
+
+    def get(self, record_id):
+        """按 ID 取记录，不存在时返回 None"""
+        row = self.db.execute(f"SELECT {COLUMNS} FROM captures WHERE id = ?", (record_id,)).fetchone()
+        return CaptureRecord(row, self.root) if row else None
+
+    def request_thumbnail(self, record_id):
+        """为没有缩略图的记录在后台补生成缩略图，完成后发出 thumbnail_ready"""
+        if (record_id in self.atlas or record_id in self.thumbnail_requests
+                or record_id in self.thumbnail_failed):
+            return
+        record = self.get(record_id)
+        if record is None:
+            return
+
+        self.thumbnail_requests.add(record_id)
+        self.pool.start(ThumbnailTask(self, record_id, record.path))
+
+    def on_thumbnail_done(self, record_id, thumbnail):
+        """补生成的缩略图（主线程）：追加到图集"""
+        self.thumbnail_requests.discard(record_id)
+        if thumbnail is None:
+            self.thumbnail_failed.add(record_id)
+            return
+        self.atlas.add(record_id, *thumbnail)
+        self.thumbnail_ready.emit(record_id)
+
+    def load_similarity_index(self):
+        """在工作线程中加载感知哈希索引，完成后发出 similarity_ready（已加载或正在加载时不重复）"""
+        if self.similarity is not None or self.similarity_loading:
+            return
+        self.similarity_loading = True
+        self.similarity_updates = []
+        self.pool.start(SimilarityLoadTask(self, self.db_path))
+
+    def on_similarity_loaded(self, index, elapsed_ms):
+        """感知哈希索引加载完成（主线程）：补上加载期间的变化"""
+        self.similarity_loading = False
+        updates, self.similarity_updates = self.similarity_updates, []
+        if index is None:
+            return
+        for record_id, value in updates:
+            if value is None:
+                index.remove(record_id)
+            else:
+                index.add(record_id, value)
+        self.similarity = index
+        print(f"[截图库] 感知哈希索引已加载: {len(index)} 张（{elapsed_ms:.0f} ms）")
+        self.similarity_ready.emit()
+
+    def update_similarity(self, record_id, value):
+        """记录的感知哈希变化（value 为 None 表示删除）：更新已加载的索引，正在加载时记下来"""
+        if self.similarity is not None:
+            if value is None:
+                self.similarity.remove(record_id)
+            else:
+                self.similarity.add(record_id, value)
+        elif self.similarity_loading:
+            self.similarity_updates.append((record_id, value))
+
+    def find_similar(self, image, radius=DEFAULT_SIMILAR_RADIUS, limit=50, exclude_hash=None):
+        """查找与 image（QImage / QPixmap，或 64 位感知哈希）相似的截图
+
+        返回 [(汉明距离, CaptureRecord), ...]，最相似的在前；
+        内容完全相同的多条记录（去重后引用同一个文件）只返回最新的一条，
+        exclude_hash: 排除这个内容哈希（例如查询图本身）
+        索引还没加载时在工作线程中加载并返回 None，加载完成后发出 similarity_ready，届时再查询
+        """
+        if not image_hash.NUMPY_AVAILABLE:
+            print("✗ 查找相似截图需要 NumPy: pip install numpy")
+            return []
+        self.backfill_phashes()
+        if self.similarity is None:
+            self.load_similarity_index()
+            return None
+        value = image if isinstance(image, int) else image_hash.perceptual_hash(image)
+
+        candidates = []
+        for distance, record_id in self.similarity.query(value, radius):
+            record = self.get(record_id)
+            if record is not None and record.hash != exclude_hash:
+                candidates.append((distance, record))
+
+        # 内容相同的记录只保留最新的一条：先按时间从新到旧排序再去重
+        candidates.sort(key=lambda result: -result[1].created.timestamp())
+        results = []
+        seen = set()
+        for distance, record in candidates:
+            if record.hash not in seen:
+                seen.add(record.hash)
+                results.append((distance, record))
+
+        # 同一距离内新的在前
+        results.sort(key=lambda result: (result[0], -result[1].created.timestamp()))
+        return results[:limit]
+
+    def backfill_phashes(self):
+        """为没有感知哈希的记录在后台补算（完成后自动加入索引，下次查询生效）"""
+        rows = self.db.execute("SELECT id, path FROM captures WHERE phash IS NULL").fetchall()
+        for record_id, path in rows:
+            if record_id in self.phash_requests:
+                continue
+            self.phash_requests.add(record_id)
+            self.pool.start(PerceptualHashTask(self, record_id, os.path.join(self.root, path)))
+        return len(rows)
+
+    def on_phash_done(self, record_id, value):
+        """补算的感知哈希（主线程）：写入数据库和索引；失败的记录保留在 phash_requests 中，本次运行不再重试"""
+        if value is None:
+            return
+        self.phash_requests.discard(record_id)
+        with self.db:
+            cursor = self.db.execute("UPDATE captures SET phash = ? WHERE id = ?",
+                                     (phash_to_db(value), record_id))
+        if cursor.rowcount:
+            self.update_similarity(record_id, value)
+
+    def remove(self, record_id, delete_file=True):
+        """删除记录（默认同时删除文件；文件还被其他记录引用时保留）"""
+        record = self.get(record_id)
+        if record is None:
+            return False
+        with self.db:
+            self.db.execute("DELETE FROM captures WHERE id = ?", (record_id,))
+        self.update_similarity(record_id, None)
+        shared = self.db.execute("SELECT 1 FROM captures WHERE path = ? LIMIT 1",
+                                 (record.relative_path,)).fetchone()
+        if delete_file and not shared:
+            try:
+                os.remove(record.path)
+            except OSError:
+                pass
+        return True
+
+    def wait_for_done(self, msecs=-1):
+        """等待所有任务完成，并处理任务结果（写入索引）"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
+
+    def close(self):
+        """等待排队中的任务并关闭索引（退出程序前调用）"""
+        self.wait_for_done()
+        self.atlas.close()
+        self.db.close()
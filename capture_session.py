@@ -0,0 +1,196 @@
+"""
+截图会话：抓屏 → 显示选择窗口 → 等待选择结果 → 裁剪
+完全由 Qt 信号驱动，控制权始终交还给主事件循环（不再 while + processEvents 空转）
+整帧只保存在内存中；spool_to_disk=True 时整帧落盘，选择结束后立即释放内存
+prewarm=True 时预先创建好隐藏的选择窗口，每次截图只换背景再显示
+抓屏的同时在工作线程中枚举窗口矩形（window_source）并计算边缘图，完成后交给选择窗口用于吸附
+"""
+import time
+
+from PyQt5.QtCore import QObject, QPoint, QRect, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QPixmap
+
+from image_hash import content_hash
+from screen_capture import grab_screen, virtual_geometry
+from edge_snap import NUMPY_AVAILABLE, EdgeMapTask
+from screen_selector import ScreenSelector
+from window_snap import WindowSnapshotTask, default_window_source
+
+
+class CaptureSession(QObject):
+    """一次截图会话"""
+
+    # 截图成功：裁剪后的图片 + 选中区域（虚拟桌面坐标，加上 origin 得到全局坐标）
+    captured = pyqtSignal(QPixmap, QRect)
+    # 用户取消或选择了空区域
+    cancelled = pyqtSignal()
+    # 窗口索引已建好（工作线程 → 主线程，内部使用）：会话序号、WindowIndex、耗时
+    windows_ready = pyqtSignal(int, object, float)
+    # 边缘图已算好（工作线程 → 主线程，内部使用）：会话序号、EdgeMap、耗时
+    edges_ready = pyqtSignal(int, object, float)
+
+    def __init__(self, spool_to_disk=False, prewarm=False, window_source="default", parent=None):
+        super().__init__(parent)
+        self.spool_to_disk = spool_to_disk
+        self.selector = None
+        self.frame = None
+        # 最近一次截图的耗时（毫秒）：grab / spool / overlay（请求到第一帧绘制）
+        self.timings = {}
+        self.start_time = None
+        # 最近一次截图的虚拟桌面左上角（全局坐标）和像素内容哈希（去重用）
+        self.origin = QPoint()
+        self.content_hash = None
+
+        # 窗口吸附的窗口来源（None = 不启用）；边缘吸附需要 NumPy
+        # 两项都在工作线程中计算，sequence 用于丢弃上一次截图迟到的结果
+        self.window_source = default_window_source() if window_source == "default" else window_source
+        self.snap_to_edges = NUMPY_AVAILABLE
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.sequence = 0
+        self.windows_ready.connect(self.on_windows_ready)
+        self.edges_ready.connect(self.on_edges_ready)
+
+        # 预热：提前创建选择窗口（原生窗口、样式、全屏几何），之后反复使用
+        self.overlay = None
+        if prewarm:
+            self.overlay = self.create_selector()
+            self.overlay.setGeometry(virtual_geometry())
+            self.overlay.ensurePolished()
+            self.overlay.winId()
+
+    def is_active(self):
+        """选择窗口是否正在显示"""
+        return self.selector is not None
+
+    def start(self, trigger_time=None):
+        """抓屏并显示全屏选择窗口，立即返回
+
+        trigger_time: 触发时刻（time.perf_counter()），例如热键到达的时间；默认为调用时刻
+        """
+        if self.is_active():
+            print("截图进行中，忽略重复请求")
+            return False
+
+        self.start_time = trigger_time if trigger_time is not None else time.perf_counter()
+        self.timings = {}
+
+        self.frame = grab_screen()
+        self.timings['grab'] = self.frame.grab_ms
+        self.sequence += 1
+        if self.window_source is not None:
+            self.pool.start(WindowSnapshotTask(self, self.window_source,
+                                               self.frame.geometry.topLeft(), self.sequence))
+        if self.snap_to_edges:
+            self.pool.start(EdgeMapTask(self, self.frame.tile_images(), self.sequence))
+        if self.spool_to_disk:
+            self.frame.spool()
+            self.timings['spool'] = self.frame.spool_ms
+            print(f"✓ 整帧已落盘: {self.frame.spool_path}（{self.frame.spool_ms:.1f} ms）")
+
+        if self.overlay is not None:
+            self.selector = self.overlay
+            self.selector.reset(self.frame)
+        else:
+            self.selector = self.create_selector(self.frame)
+
+        self.selector.show()
+        self.selector.raise_()
+        self.selector.activateWindow()
+
+        print("请按住鼠标左键拖动选择截图区域")
+        print("按 ESC 键取消")
+        return True
+
+    def on_windows_ready(self, sequence, index, elapsed_ms):
+        """窗口索引建好：交给仍在进行的同一次截图的选择窗口"""
+        if sequence != self.sequence or self.selector is None:
+            return
+        self.timings['windows'] = elapsed_ms
+        self.selector.set_window_index(index)
+        print(f"[窗口吸附] {len(index)} 个窗口 / 控件（{elapsed_ms:.1f} ms）")
+
+    def on_edges_ready(self, sequence, edge_map, elapsed_ms):
+        """边缘图算好：交给仍在进行的同一次截图的选择窗口"""
+        if sequence != self.sequence or self.selector is None:
+            return
+        self.timings['edges'] = elapsed_ms
+        self.selector.set_edge_map(edge_map)
+        print(f"[边缘吸附] 边缘图已就绪（{elapsed_ms:.1f} ms，{edge_map.nbytes / 1024 / 1024:.1f} MB）")
+
+    def on_first_painted(self, paint_time):
+        """遮罩第一帧已绘制：记录触发到显示的延迟"""
+        self.timings['overlay'] = (paint_time - self.start_time) * 1000
+        print(f"[计时] 触发 → 遮罩显示: {self.timings['overlay']:.1f} ms"
+              f"（抓屏 {self.timings['grab']:.1f} ms）")
+
+    def on_selection_finished(self, rect):
+        """选择完成：从背景截图中裁剪选中区域"""
+        self.release_selector()
+        frame = self.release_frame()
+        self.origin = frame.geometry.topLeft()
+
+        if rect.isEmpty():
+            print("未选择区域，已取消")
+            frame.discard()
+            self.cancelled.emit()
+            return
+
+        print(f"截取区域: x={rect.x()}, y={rect.y()}, w={rect.width()}, h={rect.height()}")
+
+        # 直接从已经截取的背景中获取选中区域，确保内容和背景完全一致
+        pixmap = frame.crop(rect)
+        frame.discard()
+
+        # 裁剪时立即计算内容哈希（直接读取像素内存），历史和截图库用它去重
+        start = time.perf_counter()
+        self.content_hash = content_hash(pixmap)
+        self.timings['hash'] = (time.perf_counter() - start) * 1000
+
+        print(f"✓ 截图成功: {pixmap.width()}x{pixmap.height()}"
+              f"（内容哈希 {self.content_hash[:12]}…，{self.timings['hash']:.1f} ms）")
+        self.captured.emit(pixmap, rect)
+
+    def global_rect(self, rect):
+        """captured 信号中的区域 → 全局坐标"""
+        return rect.translated(self.origin)
+
+    def on_selection_cancelled(self):
+        """ESC 取消"""
+        self.release_selector()
+        self.release_frame().discard()
+        self.cancelled.emit()
+
+    def create_selector(self, frame=None):
+        """创建选择窗口并连接信号"""
+        selector = ScreenSelector(frame)
+        selector.first_painted.connect(self.on_first_painted)
+        selector.selection_finished.connect(self.on_selection_finished)
+        selector.selection_cancelled.connect(self.on_selection_cancelled)
+        return selector
+
+    def release_selector(self):
+        """选择结束：预热的窗口保留复用，临时创建的窗口等它关闭后由事件循环释放"""
+        selector = self.selector
+        self.selector = None
+        if selector is None:
+            return None
+
+        # 选择窗口不再持有整帧，整帧的生命周期由会话管理
+        selector.frame = None
+        selector.set_window_index(None)
+        selector.set_edge_map(None)
+
+        if selector is not self.overlay:
+            selector.first_painted.disconnect(self.on_first_painted)
+            selector.selection_finished.disconnect(self.on_selection_finished)
+            selector.selection_cancelled.disconnect(self.on_selection_cancelled)
+            selector.deleteLater()
+        return selector
+
+    def release_frame(self):
+        """取出整帧；落盘模式下释放内存中的整帧，只保留文件"""
+        frame = self.frame
+        self.frame = None
+        frame.release()
+        return frame
@@ -0,0 +1,176 @@
+"""
+边缘吸附：没有窗口边界可吸附时（网页、画布），拖动的选择框边缘吸附到附近明显的图像边缘
+截图后在工作线程中用 NumPy 对整帧算一次边缘图（相邻像素任一颜色通道的差超过阈值；
+只看灰度会漏掉亮度相近、色相不同的边界），
+再按 32 像素分块统计每一行 / 每一列的边缘像素数，沿块方向做前缀和（行 / 列投影）
+拖动时只需查光标附近 ±SNAP_DISTANCE 行（列）在选择框跨度上（按块取整）的边缘数：
+每行两次前缀和相减，与图像大小、选择框大小无关
+每个屏幕单独计算（按逻辑坐标，高 DPI 屏幕先缩放到逻辑尺寸），按行分段处理以限制临时内存
+"""
+import time
+
+from PyQt5.QtCore import Qt, QPoint, QRunnable
+
+from image_buffer import NUMPY_AVAILABLE, pixel_array
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# 相邻像素颜色通道差超过多少算边缘（0-255）
+EDGE_THRESHOLD = 24
+# 投影分块大小（像素）
+BLOCK = 32
+# 吸附距离（像素）
+SNAP_DISTANCE = 8
+# 选择框跨度上至少多少比例是边缘像素才吸附
+MIN_EDGE_FRACTION = 0.6
+# 分段计算的行数（BLOCK 的整数倍）
+CHUNK_ROWS = 512
+
+
+# 每像素 4 个字节（小端 ARGB32：B G R A）中 RGB 三个字节的掩码
+RGB_BYTES = np.array([1, 1, 1, 0], dtype=np.uint8).view(np.uint32)[0] if NUMPY_AVAILABLE else 0
+
+
+def channel_edges(a, b, threshold=EDGE_THRESHOLD):
+    """两组 (..., 4) uint8 像素逐个比较：任一 RGB 通道差超过阈值的位置（bool）
+    全程按字节运算，最后把每像素 4 个 bool 字节当作一个 uint32 判断，不做逐通道的归约
+    """
+    diff = np.maximum(a, b)
+    diff -= np.minimum(a, b)
+    over = diff > threshold
+    return (over.view(np.uint32)[..., 0] & RGB_BYTES) != 0
+
+
+class EdgeTile:
+    """一个屏幕的边缘投影
+
+    row_prefix[y, b]：第 y 行与 y+1 行之间的水平边缘，在前 b 个横向块中的像素数
+    col_prefix[b, x]：第 x 列与 x+1 列之间的垂直边缘，在前 b 个纵向块中的像素数
+    """
+
+    def __init__(self, image, threshold=EDGE_THRESHOLD):
+        pixels = pixel_array(image)
+        height, width = pixels.shape
+        self.width, self.height = width, height
+        blocks_x = -(-width // BLOCK)
+        blocks_y = -(-height // BLOCK)
+        row_counts = np.zeros((height, blocks_x), dtype=np.uint8)
+        col_counts = np.zeros((blocks_y, width), dtype=np.uint8)
+
+        for top in range(0, height, CHUNK_ROWS):
+            bottom = min(height, top + CHUNK_ROWS)
+            # 多取一行，计算与下一段之间的水平边缘
+            chunk = pixels[top:min(height, bottom + 1)]
+            channels = chunk.view(np.uint8).reshape(len(chunk), width, 4)
+
+            edges = channel_edges(channels[1:], channels[:-1], threshold)
+            padded = np.zeros((len(edges), blocks_x * BLOCK), dtype=bool)
+            padded[:, :width] = edges
+            row_counts[top:top + len(edges)] = padded.reshape(len(edges), blocks_x, BLOCK).sum(axis=2)
+
+            rows = bottom - top
+            edges = channel_edges(channels[:rows, 1:], channels[:rows, :-1], threshold)
+            padded = np.zeros((-(-rows // BLOCK) * BLOCK, width), dtype=bool)
+            padded[:rows, :width - 1] = edges
+            col_counts[top // BLOCK:top // BLOCK + len(padded) // BLOCK] = \
+                padded.reshape(-1, BLOCK, width).sum(axis=1)
+
+        self.row_prefix = np.zeros((height, blocks_x + 1), dtype=np.int32)
+        np.cumsum(row_counts, axis=1, dtype=np.int32, out=self.row_prefix[:, 1:])
+        self.col_prefix = np.zeros((blocks_y + 1, width), dtype=np.int32)
+        np.cumsum(col_counts, axis=0, dtype=np.int32, out=self.col_prefix[1:])
+
+    @property
+    def nbytes(self):
+        return self.row_prefix.nbytes + self.col_prefix.nbytes
+
+    def snap_row(self, y, x0, x1, distance=SNAP_DISTANCE):
+        """y 附近在 [x0, x1] 跨度上最强的水平边缘所在行（边缘在该行与下一行之间），没有时返回 None"""
+        first, last = max(0, y - distance), min(self.height - 2, y + distance)
+        if first > last:
+            return None
+        b0, b1 = max(0, x0) // BLOCK, min(self.width - 1, x1) // BLOCK + 1
+        counts = self.row_prefix[first:last + 1, b1] - self.row_prefix[first:last + 1, b0]
+        return self.best(counts, first, y, min(self.width, b1 * BLOCK) - b0 * BLOCK)
+
+    def snap_column(self, x, y0, y1, distance=SNAP_DISTANCE):
+        """x 附近在 [y0, y1] 跨度上最强的垂直边缘所在列（边缘在该列与下一列之间），没有时返回 None"""
+        first, last = max(0, x - distance), min(self.width - 2, x + distance)
+        if first > last:
+            return None
+        b0, b1 = max(0, y0) // BLOCK, min(self.height - 1, y1) // BLOCK + 1
+        counts = self.col_prefix[b1, first:last + 1] - self.col_prefix[b0, first:last + 1]
+        return self.best(counts, first, x, min(self.height, b1 * BLOCK) - b0 * BLOCK)
+
+    @staticmethod
+    def best(counts, first, center, span):
+        """边缘像素最多的位置（相同时取离 center 最近的）；比例不够时返回 None"""
+        positions = np.arange(first, first + len(counts))
+        order = np.lexsort((np.abs(positions - center), -counts))
+        index = order[0]
+        if counts[index] < MIN_EDGE_FRACTION * span:
+            return None
+        return int(positions[index])
+
+
+class EdgeMap:
+    """整帧的边缘投影：[(rect, EdgeTile), ...]，rect 为屏幕在帧内的位置（逻辑坐标）"""
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+
+    @property
+    def nbytes(self):
+        return sum(tile.nbytes for _, tile in self.tiles)
+
+    def snap(self, pos, anchor):
+        """拖动中的角 pos 吸附到附近的边缘（anchor 为选择框固定的对角），返回吸附后的位置
+
+        拖动的是下（右）边时选择框包含边缘内侧的那一行（列），是上（左）边时从边缘外侧的下一行（列）开始
+        """
+        for rect, tile in self.tiles:
+            if not rect.contains(pos):
+                continue
+            local, other = pos - rect.topLeft(), anchor - rect.topLeft()
+            x0, x1 = sorted((local.x(), other.x()))
+            y0, y1 = sorted((local.y(), other.y()))
+
+            x, y = local.x(), local.y()
+            bottom = local.y() >= other.y()
+            row = tile.snap_row(y if bottom else y - 1, x0, x1)
+            if row is not None:
+                y = row if bottom else row + 1
+            right = local.x() >= other.x()
+            column = tile.snap_column(x if right else x - 1, y0, y1)
+            if column is not None:
+                x = column if right else column + 1
+            return QPoint(x, y) + rect.topLeft()
+        return pos
+
+
+class EdgeMapTask(QRunnable):
+    """计算边缘投影（在工作线程中运行），完成后通过 owner.edges_ready 信号回到主线程
+
+    images: CaptureFrame.tile_images() 的结果（QImage 可以跨线程读取，QPixmap 不行）
+    """
+
+    def __init__(self, owner, images, token):
+        super().__init__()
+        self.owner = owner
+        self.images = images
+        self.token = token
+
+    def run(self):
+        start = time.perf_counter()
+        tiles = []
+        try:
+            for rect, image, ratio in self.images:
+                if ratio != 1.0:
+                    image = image.scaled(rect.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+                tiles.append((rect, EdgeTile(image)))
+        except Exception as e:
+            print(f"✗ 计算边缘图失败: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        self.owner.edges_ready.emit(self.token, EdgeMap(tiles), elapsed)
@@ -0,0 +1,339 @@
+"""
+悬浮预览窗口（各版本共用）
+窗口框架（按钮、样式、布局）只创建一次；托盘版可以预先创建好，
+每次截图只调用 set_pixmap() 换上新图片再显示
+保存交给后台线程池（ImageSaver），选好文件名后窗口立即关闭
+保存对话框列出所有可用格式，默认选中保存线程池当前的输出格式
+提供截图库时显示"快速保存"按钮：不弹对话框，直接存入截图库
+recordable=True 时显示"录制"按钮：关闭预览并发出 record_requested 信号，由应用录制同一区域
+标注工具栏：箭头 / 矩形 / 文字 / 高亮，撤销 / 重做（Ctrl+Z / Ctrl+Y）；有标注时保存前在工作线程中合成
+"复制"按钮 / Ctrl+C：复制到剪贴板（ImageClipboard，不编码，PNG 在目标程序请求时才生成）
+"""
+import os
+from datetime import datetime
+
+from PyQt5.QtWidgets import (QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QDialog,
+                             QShortcut)
+from PyQt5.QtCore import Qt, QRect, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QKeySequence
+
+import image_formats
+from annotations import AnnotationCanvas, FlattenTask, TOOLS
+from image_saver import ImageSaver
+from image_clipboard import ImageClipboard
+from task_results import TaskResults
+
+# 标注工具按钮样式
+TOOL_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #444;
+        color: white;
+        border: none;
+        padding: 4px 10px;
+        font-size: 13px;
+        border-radius: 3px;
+    }
+    QPushButton:hover {
+        background-color: #555;
+    }
+    QPushButton:checked {
+        background-color: #FF9800;
+    }
+"""
+
+
+class FloatPreview(QDialog):
+    """悬浮预览窗口"""
+
+    # 录制截图区域：区域（全局坐标）
+    record_requested = pyqtSignal(QRect)
+
+    def __init__(self, pixmap=None, saver=None, library=None, recordable=False, clipboard=None):
+        super().__init__()
+        self.pixmap = None
+        self.capture_rect = None
+        self.capture_screen = ""
+        self.content_hash = None
+        self.setModal(True)  # 设置为模态对话框
+
+        # 后台保存线程池（可以由应用共享，保存结果的提示由应用连接 saved / failed 信号）
+        self.saver = saver if saver is not None else ImageSaver(parent=self)
+        # 剪贴板（可以由应用共享）
+        self.clipboard = clipboard if clipboard is not None else ImageClipboard(parent=self)
+        # 截图库（可选，快速保存用）
+        self.library = library
+        self.recordable = recordable
+
+        # 标注合成线程（保存前把标注画到图像上）
+        self.flatten_pool = QThreadPool(self)
+        self.flatten_pool.setMaxThreadCount(1)
+        # 工作线程 → 主线程：合成后的图像和后续操作
+        self.results = TaskResults(self)
+
+        # 窗口标题
+        self.setWindowTitle("截图预览")
+
+        # 窗口标志：置顶 + 无边框
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
+
+        # 鼠标拖动相关
+        self.drag_position = None
+
+        # 创建界面
+        self.create_ui()
+
+        if pixmap is not None:
+            self.set_pixmap(pixmap)
+
+    def set_pixmap(self, pixmap, rect=None, screen="", content_hash=None):
+        """换上新的截图（复用已经创建好的窗口框架）
+
+        rect / screen: 截图区域（全局坐标）和所在屏幕，快速保存时记录到截图库
+        content_hash: 裁剪时算好的内容哈希（截图库去重用）
+        """
+        self.pixmap = pixmap
+        self.capture_rect = rect
+        self.capture_screen = screen
+        self.content_hash = content_hash
+        self.canvas.set_image(pixmap.toImage(), pixmap.devicePixelRatio())
+        self.select_tool(None)
+        self.record_btn.setVisible(self.recordable and rect is not None)
+
+        # 窗口大小
+        self.resize(pixmap.width(), pixmap.height() + 100)
+
+    def hideEvent(self, event):
+        """关闭（隐藏）时释放截图和标注，窗口框架保留给下一次使用"""
+        self.pixmap = None
+        self.canvas.clear()
+        super().hideEvent(event)
+
+    def create_ui(self):
+        """创建用户界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # 1. 截图 + 标注（没有选择标注工具时可拖动窗口）
+        self.canvas = AnnotationCanvas()
+        layout.addWidget(self.canvas)
+
+        # 标注工具栏：再次点击已选中的工具取消选择
+        tool_layout = QHBoxLayout()
+        tool_layout.setContentsMargins(10, 6, 10, 0)
+        self.tool_buttons = {}
+        for tool, label in TOOLS.items():
+            button = QPushButton(label)
+            button.setCheckable(True)
+            button.setStyleSheet(TOOL_BUTTON_STYLE)
+            button.clicked.connect(lambda checked, tool=tool: self.select_tool(tool if checked else None))
+            tool_layout.addWidget(button)
+            self.tool_buttons[tool] = button
+        tool_layout.addStretch()
+        for label, slot in (("↶ 撤销", self.canvas.undo), ("↷ 重做", self.canvas.redo)):
+            button = QPushButton(label)
+            button.setStyleSheet(TOOL_BUTTON_STYLE)
+            button.clicked.connect(slot)
+            tool_layout.addWidget(button)
+        layout.addLayout(tool_layout)
+        QShortcut(QKeySequence.Undo, self, self.canvas.undo)
+        QShortcut(QKeySequence.Redo, self, self.canvas.redo)
+
+        # 2. 按钮栏
+        button_layout = QHBoxLayout()
+        button_layout.setContentsMargins(10, 10, 10, 10)
+
+        # 保存按钮
+        self.save_btn = QPushButton("💾 保存")
+        self.save_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 14px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        self.save_btn.clicked.connect(self.save_image)
+        button_layout.addWidget(self.save_btn)
+
+        # 快速保存按钮（存入截图库）
+        self.quick_save_btn = QPushButton("⚡ 快速保存")
+        self.quick_save_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 14px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+        """)
+        self.quick_save_btn.clicked.connect(self.quick_save)
+        self.quick_save_btn.setVisible(self.library is not None)
+        button_layout.addWidget(self.quick_save_btn)
+
+        # 复制按钮（复制到剪贴板）
+        self.copy_btn = QPushButton("📋 复制")
+        self.copy_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #607D8B;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 14px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #455A64;
+            }
+        """)
+        self.copy_btn.clicked.connect(self.copy_image)
+        button_layout.addWidget(self.copy_btn)
+        QShortcut(QKeySequence.Copy, self, self.copy_image)
+
+        # 录制按钮（录制同一区域的动画）
+        self.record_btn = QPushButton("⏺ 录制")
+        self.record_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 14px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+        """)
+        self.record_btn.clicked.connect(self.request_record)
+        self.record_btn.setVisible(False)
+        button_layout.addWidget(self.record_btn)
+
+        # 关闭按钮
+        self.close_btn = QPushButton("✖ 关闭")
+        self.close_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #f44336;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 14px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #da190b;
+            }
+        """)
+        self.close_btn.clicked.connect(self.close)
+        button_layout.addWidget(self.close_btn)
+
+        layout.addLayout(button_layout)
+
+    def select_tool(self, tool):
+        """选择标注工具（None = 不标注）"""
+        self.canvas.set_tool(tool)
+        for name, button in self.tool_buttons.items():
+            button.setChecked(name == tool)
+
+    def with_output_image(self, callback):
+        """用最终图像调用 callback：没有标注时直接使用截图；有标注时在工作线程中合成，完成后在主线程调用
+
+        计算中的打码先等它完成（不能保存未打码的原图）
+        """
+        self.canvas.wait_for_done()
+        if not self.canvas.is_modified():
+            callback(self.pixmap.toImage())
+            return
+        base, commands = self.canvas.document.snapshot()
+        self.flatten_pool.start(FlattenTask(self, base, commands, callback))
+
+    def on_flattened(self, image, callback):
+        callback(image)
+
+    def wait_for_done(self, msecs=-1):
+        """等待计算中的打码和排队中的标注合成（退出程序前调用），并执行后续的保存操作"""
+        self.canvas.wait_for_done(msecs)
+        done = self.flatten_pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
+
+    def mousePressEvent(self, event):
+        """鼠标按下：开始拖动"""
+        if event.button() == Qt.LeftButton:
+            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
+
+    def mouseMoveEvent(self, event):
+        """鼠标移动：拖动窗口"""
+        if event.buttons() == Qt.LeftButton and self.drag_position:
+            self.move(event.globalPos() - self.drag_position)
+
+    def save_image(self):
+        """保存截图"""
+        # 生成默认文件名（带时间戳）
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        current = self.saver.output_format
+        default_filename = f"截图_{timestamp}.{current.extension}"
+
+        # 每个格式一个过滤器，当前格式排在最前
+        formats = image_formats.available_formats()
+        filters = {fmt.file_filter(): fmt for fmt in formats}
+
+        # 获取桌面路径
+        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
+
+        # 文件保存对话框
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "保存截图",
+            os.path.join(desktop_path, default_filename),
+            ";;".join(list(filters) + ["所有文件 (*.*)"]),
+            current.file_filter()
+        )
+
+        if file_path:
+            # 选中的格式与扩展名不符（手动改了扩展名）时按扩展名选择
+            fmt = filters.get(selected_filter)
+            if fmt is None or not file_path.lower().endswith("." + fmt.extension):
+                fmt = image_formats.format_for_path(file_path, current)
+
+            # 转成 QImage（有标注时先在后台合成）交给后台编码和写文件，不等待完成
+            self.with_output_image(lambda image: self.saver.save(image, file_path, fmt))
+
+            # 关闭窗口
+            self.close()
+
+    def quick_save(self):
+        """快速保存：直接存入截图库（不弹对话框）"""
+        if self.library is None or self.pixmap is None:
+            return
+
+        # 有标注（包括计算中的打码）时内容哈希与原截图不同，由截图库按合成后的图像重新计算
+        self.canvas.wait_for_done()
+        rect, screen = self.capture_rect, self.capture_screen
+        content_hash = None if self.canvas.is_modified() else self.content_hash
+        self.with_output_image(lambda image: self.library.quick_save(image, rect, screen,
+                                                                     content_hash=content_hash))
+        self.close()
+
+    def copy_image(self):
+        """复制到剪贴板（有标注时先在后台合成），然后关闭窗口"""
+        if self.pixmap is None:
+            return
+        self.with_output_image(self.clipboard.copy)
+        self.close()
+
+    def request_record(self):
+        """录制截图区域：先关闭预览（预览窗口不能出现在录像里）"""
+        if self.capture_rect is None:
+            return
+        rect = QRect(self.capture_rect)
+        self.close()
+        self.record_requested.emit(rect)
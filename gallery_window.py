@@ -0,0 +1,199 @@
+"""
+截图画廊：浏览截图库中的所有截图
+只加载记录 ID 列表；滚动时只绘制可见的格子，缩略图直接从内存映射的图集中绘制（不解码），
+所以几千上万张截图也能即时打开，内存占用与截图数量基本无关
+没有缩略图的记录（例如旧版本保存的截图）在后台补生成，完成后刷新对应格子
+"""
+from PyQt5.QtWidgets import QAbstractScrollArea, QLabel, QVBoxLayout, QWidget
+from PyQt5.QtCore import Qt, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+from thumbnail_atlas import THUMB_SIZE
+
+# 格子尺寸：缩略图 + 边距 + 一行文字
+CELL_MARGIN = 8
+LABEL_HEIGHT = 18
+CELL_SIZE = QSize(THUMB_SIZE.width() + CELL_MARGIN * 2,
+                  THUMB_SIZE.height() + CELL_MARGIN * 2 + LABEL_HEIGHT)
+
+# 文字缓存上限（滚动浏览整个截图库时内存不随截图数增长）
+MAX_CACHED_LABELS = 2000
+
+
+class GalleryView(QAbstractScrollArea):
+    """缩略图网格（虚拟化：只绘制可见的格子）"""
+
+    # 双击：记录 ID
+    activated = pyqtSignal(int)
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.ids = []
+        self.positions = {}
+        self.labels = {}
+        self.selected = None
+
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(CELL_SIZE.height() // 4)
+        self.viewport().setStyleSheet("background-color: #2b2b2b;")
+        library.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def set_ids(self, ids):
+        self.ids = ids
+        self.positions = {record_id: index for index, record_id in enumerate(ids)}
+        self.labels = {}
+        self.selected = None
+        self.update_scrollbar()
+        self.viewport().update()
+
+    def columns(self):
+        return max(1, self.viewport().width() // CELL_SIZE.width())
+
+    def update_scrollbar(self):
+        rows = (len(self.ids) + self.columns() - 1) // self.columns()
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setRange(0, max(0, rows * CELL_SIZE.height() - self.viewport().height()))
+        scrollbar.setPageStep(self.viewport().height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbar()
+
+    def cell_rect(self, index):
+        """第 index 个格子在视口中的位置"""
+        row, column = divmod(index, self.columns())
+        return QRect(column * CELL_SIZE.width(),
+                     row * CELL_SIZE.height() - self.verticalScrollBar().value(),
+                     CELL_SIZE.width(), CELL_SIZE.height())
+
+    def visible_range(self, area):
+        """与 area（视口坐标）相交的格子序号范围"""
+        top = self.verticalScrollBar().value() + area.top()
+        bottom = self.verticalScrollBar().value() + area.bottom()
+        columns = self.columns()
+        first = max(0, top // CELL_SIZE.height() * columns)
+        last = min(len(self.ids), (bottom // CELL_SIZE.height() + 1) * columns)
+        return range(first, last)
+
+    def index_at(self, pos):
+        if pos.x() >= self.columns() * CELL_SIZE.width():
+            return None
+        row = (pos.y() + self.verticalScrollBar().value()) // CELL_SIZE.height()
+        index = row * self.columns() + pos.x() // CELL_SIZE.width()
+        return index if 0 <= index < len(self.ids) else None
+
+    def label(self, record_id):
+        """格子下方的文字（只查询看到过的记录）"""
+        if record_id not in self.labels:
+            if len(self.labels) >= MAX_CACHED_LABELS:
+                self.labels.clear()
+            record = self.library.get(record_id)
+            self.labels[record_id] = (record.created.strftime("%m-%d %H:%M:%S") if record else "")
+        return self.labels[record_id]
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        area = event.rect()
+
+        for index in self.visible_range(area):
+            record_id = self.ids[index]
+            cell = self.cell_rect(index)
+            thumb_area = QRect(cell.x() + CELL_MARGIN, cell.y() + CELL_MARGIN,
+                               THUMB_SIZE.width(), THUMB_SIZE.height())
+
+            if record_id == self.selected:
+                painter.fillRect(cell.adjusted(2, 2, -2, -2), QColor(33, 150, 243, 90))
+
+            image = self.library.atlas.view(record_id)
+            if image is None:
+                painter.fillRect(thumb_area, QColor(60, 60, 60))
+                self.library.request_thumbnail(record_id)
+            else:
+                # 缩略图居中
+                x = thumb_area.x() + (thumb_area.width() - image.width()) // 2
+                y = thumb_area.y() + (thumb_area.height() - image.height()) // 2
+                painter.drawImage(x, y, image)
+
+            painter.setPen(QPen(QColor(200, 200, 200)))
+            painter.drawText(QRect(cell.x(), thumb_area.bottom() + 2, cell.width(), LABEL_HEIGHT),
+                             Qt.AlignCenter, self.label(record_id))
+
+        painter.end()
+
+    def on_thumbnail_ready(self, record_id):
+        """补生成的缩略图完成：只刷新对应格子"""
+        index = self.positions.get(record_id)
+        if index is not None and index in self.visible_range(self.viewport().rect()):
+            self.viewport().update(self.cell_rect(index))
+
+    def mousePressEvent(self, event):
+        index = self.index_at(event.pos())
+        self.selected = self.ids[index] if index is not None else None
+        self.viewport().update()
+
+    def mouseDoubleClickEvent(self, event):
+        index = self.index_at(event.pos())
+        if index is not None:
+            self.activated.emit(self.ids[index])
+
+
+class GalleryWindow(QWidget):
+    """截图画廊窗口（可以反复打开，每次打开时重新加载记录）"""
+
+    # 双击打开一张截图：记录 ID
+    capture_activated = pyqtSignal(int)
+
+    def __init__(self, library):
+        super().__init__()
+        self.library = library
+        self.setWindowTitle("截图画廊")
+        self.resize(CELL_SIZE.width() * 6 + 30, CELL_SIZE.height() * 4 + 40)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.view = GalleryView(library)
+        self.view.activated.connect(self.capture_activated)
+        layout.addWidget(self.view)
+
+        self.status_label = QLabel()
+        self.status_label.setContentsMargins(8, 4, 8, 4)
+        layout.addWidget(self.status_label)
+
+        # 只显示指定的记录（例如相似截图的搜索结果）；None 表示显示全部
+        self.filter_ids = None
+        self.filter_text = ""
+
+    def show_ids(self, ids, text):
+        """只显示指定的记录（按给定顺序），text 显示在状态栏"""
+        self.filter_ids = list(ids)
+        self.filter_text = text
+        self.setWindowTitle(f"截图画廊 - {text}")
+        self.reload()
+
+    def show_all(self):
+        """显示截图库中的全部截图"""
+        self.filter_ids = None
+        self.filter_text = ""
+        self.setWindowTitle("截图画廊")
+        self.reload()
+
+    def reload(self):
+        """重新加载记录 ID（最新的在前）"""
+        if self.filter_ids is not None:
+            self.view.set_ids(self.filter_ids)
+            self.status_label.setText(f"{self.filter_text}：{len(self.filter_ids)} 张，双击打开")
+            return
+
+        ids = self.library.ids()
+        self.view.set_ids(ids)
+        self.status_label.setText(f"共 {len(ids)} 张截图，双击打开")
+
+    def showEvent(self, event):
+        self.reload()
+        super().showEvent(event)
+
+    def on_saved(self, record):
+        """新截图存入截图库：窗口打开且显示全部时刷新"""
+        if self.isVisible() and self.filter_ids is None:
+            self.reload()
@@ -0,0 +1,105 @@
+"""
+热键分发层
+热键来源（Windows RegisterHotKey 窗口 / 测试用的假热键源）只负责发出 hotkey_pressed(int) 信号，
+分发器以排队连接（QueuedConnection）接收，再按热键 ID 调用注册的动作。
+每次按键都是一个独立的排队事件：没有轮询延迟，也不会丢失连续的按键。
+可配置的热键用文字保存（如 "Ctrl+Alt+Shift+C"），parse_hotkey() 换算成 RegisterHotKey 的参数。
+"""
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QKeySequence
+
+# Qt 修饰键 → RegisterHotKey 的修饰键（MOD_ALT / MOD_CONTROL / MOD_SHIFT / MOD_WIN）
+WIN32_MODIFIERS = (
+    (Qt.AltModifier, 0x0001),
+    (Qt.ControlModifier, 0x0002),
+    (Qt.ShiftModifier, 0x0004),
+    (Qt.MetaModifier, 0x0008),
+)
+VK_F1 = 0x70
+
+
+def parse_hotkey(text):
+    """热键文字 → (修饰键, 虚拟键码)；只支持 字母 / 数字 / F1-F24 加至少一个修饰键，否则返回 None"""
+    sequence = QKeySequence(text)
+    if sequence.count() != 1:
+        return None
+    combined = int(sequence[0])
+    key = combined & ~int(Qt.KeyboardModifierMask)
+    modifiers = 0
+    for qt_modifier, win32_modifier in WIN32_MODIFIERS:
+        if combined & int(qt_modifier):
+            modifiers |= win32_modifier
+    if not modifiers:
+        return None
+
+    if Qt.Key_A <= key <= Qt.Key_Z or Qt.Key_0 <= key <= Qt.Key_9:
+        return modifiers, key  # 与 ASCII 码相同
+    if Qt.Key_F1 <= key <= Qt.Key_F24:
+        return modifiers, VK_F1 + key - Qt.Key_F1
+    return None
+
+
+def hotkey_label(text):
+    """显示用的热键文字：Ctrl+Alt+C → Ctrl + Alt + C"""
+    return " + ".join(QKeySequence(text).toString().split("+"))
+
+
+class HotkeyDispatcher(QObject):
+    """热键 ID → 动作 的注册表"""
+
+    # 动作执行后发出，参数为热键 ID（便于调试 / 测试观察）
+    dispatched = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.actions = {}
+        self.sources = []
+
+    def register(self, hotkey_id, action, description=""):
+        """注册热键动作（同一 ID 重复注册会覆盖）"""
+        self.actions[hotkey_id] = (action, description)
+
+    def unregister(self, hotkey_id):
+        """取消热键动作"""
+        self.actions.pop(hotkey_id, None)
+
+    def attach(self, source):
+        """连接热键来源：任何带 hotkey_pressed(int) 信号的对象"""
+        source.hotkey_pressed.connect(self.dispatch, Qt.QueuedConnection)
+        self.sources.append(source)
+
+    def detach(self, source):
+        """断开热键来源"""
+        if source in self.sources:
+            source.hotkey_pressed.disconnect(self.dispatch)
+            self.sources.remove(source)
+
+    def dispatch(self, hotkey_id):
+        """执行热键对应的动作"""
+        entry = self.actions.get(hotkey_id)
+        if entry is None:
+            print(f"[热键] 未注册的热键 ID: {hotkey_id}")
+            return
+
+        action, description = entry
+        if description:
+            print(f"[热键] 执行: {description}")
+
+        try:
+            action()
+        except Exception as e:
+            print(f"[热键] 动作执行失败: {e}")
+            import traceback
+            traceback.print_exc()
+
+        self.dispatched.emit(hotkey_id)
+
+
+class FakeHotkeySource(QObject):
+    """假热键源：不依赖 Windows API，用于 Linux 下测试或脚本驱动"""
+
+    hotkey_pressed = pyqtSignal(int)
+
+    def press(self, hotkey_id):
+        """模拟一次热键按下"""
+        self.hotkey_pressed.emit(hotkey_id)
@@ -0,0 +1,91 @@
+"""
+QImage ↔ NumPy 零拷贝桥：截图、裁剪、哈希、编码、分析都在同一块像素内存上进行
+32 位格式（RGB32 / ARGB32 / ARGB32_Premultiplied）在小端机器上都是每像素 B G R A 四个字节，直接引用，
+其他格式先转换为 RGB32（这是唯一的一次拷贝）
+
+所有权规则：
+1. pixel_array / channel_array / crop_array 返回的数组直接引用 QImage 的像素内存，
+   并通过数组的 base 持有这张 QImage：数组（及其切片、view）存在期间像素内存不会被释放，
+   调用方不需要再单独保存图像
+2. 数组只读：QImage 与 QPixmap、其他 QImage 隐式共享同一块内存，写入会改到所有共享者；要修改先 .copy()
+3. 数组存在期间不要用 Qt 修改这张图像（QPainter、bits()、setPixel）：Qt 会先分离出新的内存，
+   数组仍然有效，但看到的是修改前的像素
+4. array_image 得到的 QImage 引用数组的内存并持有数组：不要在上面绘制（会直接写进数组），
+   交给只保存 C++ 对象的地方（QPixmap.fromImage、剪贴板、QImage 类型的信号参数）之前先 .copy()；
+   Python 对象本身（object 类型的信号参数、队列）可以直接传递
+"""
+from PyQt5 import sip
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 可以直接引用的格式（每像素 4 字节 B G R A）
+VIEW_FORMATS = (QImage.Format_RGB32, QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied)
+
+
+def as_image(source):
+    """QPixmap → QImage（光栅后端下是浅拷贝，共享像素内存）；QImage 原样返回"""
+    return source if isinstance(source, QImage) else source.toImage()
+
+
+def viewable(image):
+    """可以直接引用像素内存的 QImage（格式不符时转换为 RGB32）"""
+    image = as_image(image)
+    if image.format() not in VIEW_FORMATS:
+        image = image.convertToFormat(QImage.Format_RGB32)
+    return image
+
+
+class ImageBuffer:
+    """QImage 像素内存的持有者：NumPy 通过 __array_interface__ 引用它，它就是数组的 base"""
+
+    def __init__(self, image):
+        self.image = image
+        self.__array_interface__ = {
+            'shape': (image.height(), image.bytesPerLine() // 4),
+            'typestr': '<u4',
+            'data': (int(image.constBits()), True),
+            'version': 3,
+        }
+
+
+def pixel_array(image):
+    """QImage / QPixmap → (高, 宽) 的 uint32 只读数组（不拷贝，见模块说明中的所有权规则）"""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("需要 NumPy: pip install numpy")
+    image = viewable(image)
+    return np.asarray(ImageBuffer(image))[:, :image.width()]
+
+
+def channel_array(image):
+    """QImage / QPixmap → (高, 宽, 4) 的 uint8 只读数组，通道顺序 B G R A（不拷贝）"""
+    pixels = pixel_array(image)
+    return pixels.view(np.uint8).reshape(pixels.shape[0], pixels.shape[1], 4)
+
+
+def crop_array(image, rect):
+    """图像中 rect 区域的 (高, 宽) uint32 视图（不拷贝；rect 先裁到图像范围内）"""
+    pixels = pixel_array(image)
+    rect = QRect(rect).intersected(QRect(0, 0, pixels.shape[1], pixels.shape[0]))
+    return pixels[rect.top():rect.bottom() + 1, rect.left():rect.right() + 1]
+
+
+def array_image(array):
+    """(高, 宽) uint32 或 (高, 宽, 4) uint8 数组 → 引用数组内存的 RGB32 QImage（不拷贝，QImage 持有数组）
+
+    每行内的像素必须连续（行间可以有间隔，例如 crop_array 的结果）；否则先拷贝一次
+    """
+    if array.ndim == 3:
+        array = array.view(np.uint32).reshape(array.shape[:2])
+    if array.strides[1] != 4 or array.strides[0] % 4:
+        array = np.ascontiguousarray(array)
+    height, width = array.shape
+    image = QImage(sip.voidptr(array.__array_interface__['data'][0]),
+                   width, height, array.strides[0], QImage.Format_RGB32)
+    image.owner = array
+    return image
@@ -0,0 +1,110 @@
+"""
+复制截图到剪贴板：复制时不编码、不拷贝像素
+剪贴板中放的是 ImageMimeData：
+- 原始图像（setImageData，与截图共享像素内存）：接受位图的程序直接取用
+  （Windows 上由 Qt 转成 DIB，其他平台作为 application/x-qt-image），不经过任何编码
+- image/png：只在目标程序请求时才编码（retrieveData），用最快的压缩级别，结果缓存；
+  同一次复制被粘贴多次、被剪贴板管理器读取时不再重复编码（Qt 默认每次请求都按默认级别重新编码）；
+  已经有 PNG 数据时（例如历史中压缩过的截图）直接使用
+剪贴板请求是同步的，主线程要等编码完成：大图（≥ PREPARE_PIXELS）复制后在工作线程中提前编码，
+请求到来时通常已经编码好，界面不会卡住；要原始图像的程序不等待这次编码
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QMimeData, QByteArray, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import image_formats
+
+# 剪贴板中 PNG 的 MIME 类型 / 编码预设
+PNG_MIME = "image/png"
+PNG_FORMAT = "png_fast"
+# 超过这个像素数的截图，复制后在工作线程中提前编码 PNG（4K 整屏 PNG 编码要 200 ms 以上）
+PREPARE_PIXELS = 4_000_000
+
+
+class ImageMimeData(QMimeData):
+    """剪贴板内容：原始图像 + 按需编码的 PNG
+
+    png: 已经编码好的 PNG 字节串（没有时在请求时编码）
+    """
+
+    def __init__(self, image, png=None):
+        super().__init__()
+        self.image = image
+        self.setImageData(image)
+        self.png = png
+        self.pending = None       # 工作线程中的提前编码（Future）
+        self.encodes = 0
+        self.encode_ms = 0.0
+
+    def prepare(self, executor):
+        """在工作线程中提前编码 PNG"""
+        if self.png is None and self.pending is None:
+            self.pending = executor.submit(self.encode)
+
+    def encode(self):
+        """编码 PNG（可以在工作线程中调用：只读取图像）"""
+        start = time.perf_counter()
+        data = image_formats.get_format(PNG_FORMAT).encode(self.image)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.encodes += 1
+        self.encode_ms += elapsed
+        print(f"[剪贴板] 已编码 PNG: {self.image.width()}x{self.image.height()}，"
+              f"{len(data) / 1024:.0f} KB（{elapsed:.1f} ms）")
+        return data
+
+    def png_data(self):
+        """PNG 字节串：已经有的直接返回，正在提前编码的等它完成，否则现在编码"""
+        if self.png is None:
+            self.png = self.pending.result() if self.pending is not None else self.encode()
+            self.pending = None
+        return self.png
+
+    def hasFormat(self, mimetype):
+        return mimetype == PNG_MIME or super().hasFormat(mimetype)
+
+    def formats(self):
+        formats = super().formats()
+        return formats if PNG_MIME in formats else formats + [PNG_MIME]
+
+    def retrieveData(self, mimetype, preferred_type):
+        """剪贴板读取数据时调用（主线程）"""
+        if mimetype == PNG_MIME:
+            return QByteArray(self.png_data())
+        return super().retrieveData(mimetype, preferred_type)
+
+
+class ImageClipboard(QObject):
+    """复制图像到系统剪贴板（在主线程中使用）；剪贴板接管 ImageMimeData，被替换时由 Qt 释放"""
+
+    # 已复制：宽、高
+    copied = pyqtSignal(int, int)
+
+    def __init__(self, prepare_pixels=PREPARE_PIXELS, parent=None):
+        super().__init__(parent)
+        self.prepare_pixels = prepare_pixels
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def copy(self, image, png=None):
+        """复制图像（QImage / QPixmap），立即返回放入剪贴板的 ImageMimeData
+
+        png: 已经编码好的 PNG 字节串（可选）
+        image 不能是 image_buffer 的视图（剪贴板会长期持有 C++ 对象），视图先 .copy()
+        """
+        if not isinstance(image, QImage):
+            image = image.toImage()
+        data = ImageMimeData(image, png)
+        if image.width() * image.height() >= self.prepare_pixels:
+            data.prepare(self.executor)
+        QApplication.clipboard().setMimeData(data)
+
+        print(f"✓ 已复制到剪贴板: {image.width()}x{image.height()}")
+        self.copied.emit(image.width(), image.height())
+        return data
+
+    def shutdown(self):
+        """退出前等待提前编码完成（退出时 Qt 会把剪贴板内容交给系统，那时需要用到 PNG）"""
+        self.executor.shutdown(wait=True)
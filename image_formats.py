@@ -0,0 +1,166 @@
+"""
+输出格式
+PNG（可选压缩级别）、JPEG / WebP（可选质量）、QOI（快速无损，需要 NumPy）。
+每种预设都是一个 OutputFormat：负责编码成字节、解码、写文件，保存线程池和性能测试共用。
+"""
+import os
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage, QImageReader, QImageWriter
+
+import qoi_codec
+
+# 默认保存格式
+DEFAULT_FORMAT = "png"
+
+
+def png_compression_ratio(level):
+    """zlib 压缩级别（0-9）→ Qt PNG 插件的压缩比参数（0-100，内部再换算回 0-9）"""
+    return (level * 91 + 8) // 9
+
+
+class OutputFormat:
+    """一种输出格式预设"""
+
+    def __init__(self, key, label, extension, qt_format=None, quality=-1, level=-1):
+        self.key = key
+        self.label = label
+        self.extension = extension
+        self.qt_format = qt_format      # Qt 图像插件名；None 表示自带编码器（QOI）
+        self.quality = quality          # JPEG / WebP 质量（0-100），-1 为插件默认值
+        self.level = level              # PNG 压缩级别（0-9），-1 为插件默认值
+
+    def __repr__(self):
+        return f"OutputFormat({self.key!r})"
+
+    def file_filter(self):
+        """保存对话框中的过滤器文字"""
+        return f"{self.label} (*.{self.extension})"
+
+    def is_available(self):
+        """当前环境是否能编码这种格式"""
+        if self.qt_format is None:
+            return qoi_codec.NUMPY_AVAILABLE
+        return self.qt_format.encode() in QImageWriter.supportedImageFormats()
+
+    def configure(self, writer):
+        """设置 Qt 编码参数"""
+        if self.quality >= 0:
+            writer.setQuality(self.quality)
+        if self.level >= 0:
+            writer.setCompression(png_compression_ratio(self.level))
+
+    def encode(self, image):
+        """编码为字节串"""
+        if self.qt_format is None:
+            return encode_qoi(image)
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        writer = QImageWriter(buffer, self.qt_format.encode())
+        self.configure(writer)
+        if not writer.write(image):
+            raise IOError(f"{self.label} 编码失败: {writer.errorString()}")
+        return bytes(data)
+
+    def decode(self, data):
+        """从字节串解码为 QImage"""
+        if self.qt_format is None:
+            return decode_qoi(data)
+
+        image = QImage.fromData(data, self.qt_format.encode())
+        if image.isNull():
+            raise IOError(f"{self.label} 解码失败")
+        return image
+
+    def write(self, image, path):
+        """写文件"""
+        if self.qt_format is None:
+            with open(path, 'wb') as f:
+                f.write(encode_qoi(image))
+            return
+
+        writer = QImageWriter(path, self.qt_format.encode())
+        self.configure(writer)
+        if not writer.write(image):
+            raise IOError(writer.errorString())
+
+
+def encode_qoi(image):
+    """QImage → QOI 字节串（不透明图像写成 3 通道）"""
+    import numpy as np
+
+    rgba = image.convertToFormat(QImage.Format_RGBA8888)
+    width, height = rgba.width(), rgba.height()
+    bits = rgba.constBits()
+    bits.setsize(rgba.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, rgba.bytesPerLine())
+    pixels = rows[:, :width * 4]
+
+    channels = 4 if image.hasAlphaChannel() else 3
+    return qoi_codec.encode(pixels, width, height, channels)
+
+
+def decode_qoi(data):
+    """QOI 字节串 → QImage"""
+    pixels, width, height, _ = qoi_codec.decode(data)
+    # QImage 不持有 bytes 的引用，copy() 得到自己的像素数据
+    return QImage(pixels, width, height, width * 4, QImage.Format_RGBA8888).copy()
+
+
+# 所有预设（顺序即菜单顺序）
+FORMATS = [
+    OutputFormat("png_fast", "PNG 快速（压缩级别 1）", "png", "png", level=1),
+    OutputFormat("png", "PNG 标准（压缩级别 6）", "png", "png", level=6),
+    OutputFormat("png_small", "PNG 最小（压缩级别 9）", "png", "png", level=9),
+    OutputFormat("jpeg", "JPEG（质量 90）", "jpg", "jpeg", quality=90),
+    OutputFormat("webp", "WebP（质量 90）", "webp", "webp", quality=90),
+    OutputFormat("qoi", "QOI 快速无损", "qoi", None),
+]
+FORMATS_BY_KEY = {fmt.key: fmt for fmt in FORMATS}
+
+
+def available_formats():
+    """当前环境可用的格式"""
+    return [fmt for fmt in FORMATS if fmt.is_available()]
+
+
+def get_format(key):
+    """按名称取格式，不存在或不可用时退回默认 PNG"""
+    fmt = FORMATS_BY_KEY.get(key)
+    if fmt is None or not fmt.is_available():
+        return FORMATS_BY_KEY[DEFAULT_FORMAT]
+    return fmt
+
+
+def format_for_path(path, preferred=None):
+    """按扩展名确定格式；扩展名与首选格式一致时用首选格式（保留其压缩参数）"""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    if ext == "jpeg":
+        ext = "jpg"
+
+    if preferred is not None and preferred.extension == ext:
+        return preferred
+
+    # 同扩展名有多个预设（PNG）时取与扩展名同名的标准预设
+    candidates = [fmt for fmt in available_formats() if fmt.extension == ext]
+    for fmt in candidates:
+        if fmt.key == ext:
+            return fmt
+    if candidates:
+        return candidates[0]
+    return preferred or FORMATS_BY_KEY[DEFAULT_FORMAT]
+
+
+def read_image(path):
+    """读取图片文件（包括 QOI）"""
+    if path.lower().endswith(".qoi"):
+        with open(path, 'rb') as f:
+            return decode_qoi(f.read())
+
+    reader = QImageReader(path)
+    image = reader.read()
+    if image.isNull():
+        raise IOError(f"读取图片失败: {reader.errorString()}")
+    return image
@@ -0,0 +1,100 @@
+"""
+图像哈希
+内容哈希：对原始像素做精确哈希（用于去重），直接读取 QImage 的像素内存（memoryview），不拷贝
+感知哈希：64 位 DCT 哈希（pHash），看起来相似的截图汉明距离小（用于相似搜索，需要 NumPy）
+"""
+import hashlib
+import struct
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 内容哈希保留的十六进制位数（128 位）
+CONTENT_HASH_LENGTH = 32
+
+# 感知哈希：缩小到 32x32 灰度图，取 DCT 左上角 8x8 低频系数
+PHASH_IMAGE_SIZE = 32
+PHASH_BLOCK_SIZE = 8
+# 大图先最近邻抽样到 256x256 再平滑缩小（Qt 的平滑缩放对 4K 原图要 20 ms，抽样后 1 ms，结果几乎相同）
+PHASH_SAMPLE_SIZE = PHASH_IMAGE_SIZE * 8
+
+
+def dct_matrix(size):
+    """DCT-II 变换矩阵（正交归一化）"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+# 只用到左上角的低频部分，只保留矩阵的前 8 行
+DCT_ROWS = dct_matrix(PHASH_IMAGE_SIZE)[:PHASH_BLOCK_SIZE] if NUMPY_AVAILABLE else None
+
+
+def content_hash(image):
+    """原始像素的精确哈希（十六进制字符串）
+
+    尺寸和像素格式也参与哈希；每行末尾的对齐填充不参与（不同来源的同一张图结果一致）。
+    SHA-256 在有硬件加速的 CPU 上比 BLAKE2b 快一倍，且计算时释放 GIL。
+    """
+    if not hasattr(image, 'constBits'):
+        image = image.toImage()  # QPixmap（光栅后端下是浅拷贝）
+
+    width, height = image.width(), image.height()
+    digest = hashlib.sha256(struct.pack("<IIi", width, height, int(image.format())))
+    if image.isNull():
+        return digest.hexdigest()[:CONTENT_HASH_LENGTH]
+
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    pixels = memoryview(bits)
+
+    row_bytes = width * image.depth() // 8
+    stride = image.bytesPerLine()
+    if row_bytes == stride:
+        digest.update(pixels)
+    else:
+        for y in range(height):
+            digest.update(pixels[y * stride:y * stride + row_bytes])
+    return digest.hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def perceptual_hash(image):
+    """64 位感知哈希（DCT / pHash），返回无符号整数
+
+    先抽样、再用 Qt 的平滑缩放（面积平均）缩小到 32x32，再转灰度：
+    全尺寸图像只被读一遍，之后都是 32x32 的小矩阵运算
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("感知哈希需要 NumPy: pip install numpy")
+    if not hasattr(image, 'constBits'):
+        image = image.toImage()
+
+    if image.width() > PHASH_SAMPLE_SIZE or image.height() > PHASH_SAMPLE_SIZE:
+        image = image.scaled(PHASH_SAMPLE_SIZE, PHASH_SAMPLE_SIZE, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    small = image.scaled(PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format_Grayscale8)
+    bits = small.constBits()
+    bits.setsize(small.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(PHASH_IMAGE_SIZE, small.bytesPerLine())
+    pixels = rows[:, :PHASH_IMAGE_SIZE].astype(np.float64)
+
+    # 8x8 低频系数；去掉直流分量后与中位数比较
+    low = DCT_ROWS @ pixels @ DCT_ROWS.T
+    values = low.ravel()
+    signs = values > np.median(values[1:])
+    signs[0] = False
+
+    return int.from_bytes(np.packbits(signs).tobytes(), 'big')
+
+
+def hamming(a, b):
+    """两个哈希的汉明距离"""
+    return bin(a ^ b).count("1")
@@ -0,0 +1,105 @@
+"""
+后台保存：编码和写文件在线程池中进行，不阻塞界面
+截图先在主线程转成 QImage（QPixmap 只能在主线程使用），再交给工作线程；
+完成 / 失败通过信号回到主线程。多个保存任务可以排队，不影响继续截图。
+输出格式（PNG 压缩级别、JPEG / WebP 质量、QOI）由 image_formats 中的预设决定。
+"""
+import os
+import time
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import image_formats
+from task_results import TaskResults
+
+# 同时编码的任务数：PNG 压缩是 CPU 密集的，留出核心给界面
+DEFAULT_MAX_THREADS = 2
+
+
+class SaveTask(QRunnable):
+    """一个保存任务（在工作线程中运行）"""
+
+    def __init__(self, saver, image, path, fmt):
+        super().__init__()
+        self.saver = saver
+        self.image = image
+        self.path = path
+        self.fmt = fmt
+
+    def run(self):
+        start = time.perf_counter()
+        error = ""
+
+        # 先写临时文件再改名，失败时不会留下半个文件
+        temp_path = self.path + ".part"
+        try:
+            self.fmt.write(self.image, temp_path)
+            os.replace(temp_path, self.path)
+
+        except Exception as e:
+            error = str(e) or "未知错误"
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.saver.results.post(self.saver.on_task_done, self.path, error, elapsed_ms)
+
+
+class ImageSaver(QObject):
+    """保存线程池"""
+
+    # 保存成功：文件路径
+    saved = pyqtSignal(str)
+    # 保存失败：文件路径、错误信息
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, max_threads=DEFAULT_MAX_THREADS, parent=None):
+        super().__init__(parent)
+        # 默认输出格式（文件扩展名与之不符时按扩展名选择）
+        self.output_format = image_formats.get_format(image_formats.DEFAULT_FORMAT)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.pending = 0
+        # 工作线程 → 主线程：保存结果
+        self.results = TaskResults(self)
+
+    def set_output_format(self, fmt):
+        """设置默认输出格式（OutputFormat 或格式名）"""
+        if isinstance(fmt, str):
+            fmt = image_formats.get_format(fmt)
+        self.output_format = fmt
+
+    def save(self, image, path, fmt=None):
+        """提交保存任务，立即返回
+
+        fmt: OutputFormat 或格式名；None 时按扩展名选择（扩展名相同时用默认输出格式的参数）
+        """
+        if not isinstance(image, QImage):
+            image = image.toImage()
+        if isinstance(fmt, str):
+            fmt = image_formats.get_format(fmt)
+        if fmt is None:
+            fmt = image_formats.format_for_path(path, self.output_format)
+
+        self.pending += 1
+        self.pool.start(SaveTask(self, image, path, fmt))
+        print(f"[保存] 已加入队列: {path}（{fmt.label}，排队 {self.pending} 个）")
+
+    def on_task_done(self, path, error, elapsed_ms):
+        """任务完成（主线程）"""
+        self.pending -= 1
+        if error:
+            print(f"✗ 保存失败: {path}: {error}")
+            self.failed.emit(path, error)
+        else:
+            print(f"✓ 截图已保存: {path}（{elapsed_ms:.1f} ms）")
+            self.saved.emit(path)
+
+    def wait_for_done(self, msecs=-1):
+        """等待所有任务完成（退出程序前调用），并发出完成信号"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
@@ -0,0 +1,237 @@
+"""
+QOI（Quite OK Image）无损格式编解码
+编码用 NumPy 向量化实现（不逐像素循环），用于"快速保存"：比 PNG 快得多，体积接近。
+格式规范：https://qoiformat.org/qoi-specification.pdf
+
+编码思路：QOI 看起来是顺序格式，但每个像素选择哪种操作只取决于
+  1. 是否等于前一个像素（RUN）
+  2. 颜色索引表中同一槽位最近一次写入的像素（INDEX）
+  3. 与前一个像素的差值（DIFF / LUMA / RGB / RGBA）
+索引表只在"非重复像素"处更新，所以第 2 点等价于：在哈希值相同的非重复像素中，
+上一个是否与当前像素相同 —— 按 (哈希, 位置) 稳定排序后与前一个元素比较即可。
+"""
+import struct
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+QOI_MAGIC = b"qoif"
+QOI_HEADER_SIZE = 14
+QOI_END_MARKER = b"\x00" * 7 + b"\x01"
+
+QOI_OP_INDEX = 0x00
+QOI_OP_DIFF = 0x40
+QOI_OP_LUMA = 0x80
+QOI_OP_RUN = 0xC0
+QOI_OP_RGB = 0xFE
+QOI_OP_RGBA = 0xFF
+
+# 一个 RUN 操作最多表示 62 个像素（63、64 被 RGB / RGBA 标记占用）
+QOI_MAX_RUN = 62
+
+# 操作类型（编码内部使用）
+KIND_INDEX, KIND_DIFF, KIND_LUMA, KIND_RGB, KIND_RGBA = range(5)
+KIND_SIZES = (1, 1, 2, 4, 5)
+
+
+def pixel_hash(r, g, b, a):
+    """QOI 颜色索引哈希"""
+    return (r * 3 + g * 5 + b * 7 + a * 11) % 64
+
+
+def encode(pixels, width, height, channels=4):
+    """把 RGBA 像素编码为 QOI 字节串
+
+    pixels: 形状为 (height, width, 4) 或 (N, 4) 的 uint8 数组，通道顺序 R, G, B, A
+    channels: 写入文件头的通道数（3 = 不透明图像，像素数据本身不变）
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("QOI 编码需要 NumPy: pip install numpy")
+
+    px = np.ascontiguousarray(pixels, dtype=np.uint8).reshape(-1, 4)
+    total = px.shape[0]
+    if total != width * height:
+        raise ValueError(f"像素数量 {total} 与尺寸 {width}x{height} 不符")
+
+    header = QOI_MAGIC + struct.pack(">IIBB", width, height, channels, 0)
+    if total == 0:
+        return header + QOI_END_MARKER
+
+    # 打包成 uint32 方便比较（与字节序无关，只用于判等）
+    packed = px.view(np.uint32).ravel()
+    initial = np.array([[0, 0, 0, 255]], dtype=np.uint8).view(np.uint32)[0, 0]
+    prev_packed = np.empty_like(packed)
+    prev_packed[0] = initial
+    prev_packed[1:] = packed[:-1]
+
+    # 1. 非重复像素（与前一个像素不同），其余像素归入 RUN
+    positions = np.flatnonzero(packed != prev_packed)
+    count = positions.size
+
+    cur = px[positions].astype(np.int16)
+    prev = np.empty_like(cur)
+    prev[:] = (0, 0, 0, 255)
+    has_prev = positions > 0
+    prev[has_prev] = px[positions[has_prev] - 1]
+
+    # 2. INDEX：同一哈希槽中上一个非重复像素与当前像素相同
+    hashes = (cur[:, 0] * 3 + cur[:, 1] * 5 + cur[:, 2] * 7 + cur[:, 3] * 11) % 64
+    order = np.argsort(hashes, kind="stable")
+    sorted_hash = hashes[order]
+    sorted_value = packed[positions][order]
+    hit_sorted = np.zeros(count, dtype=bool)
+    same_slot = sorted_hash[1:] == sorted_hash[:-1]
+    hit_sorted[1:] = same_slot & (sorted_value[1:] == sorted_value[:-1])
+    # 每个槽位的第一个像素：索引表初始为全 0，只有 (0,0,0,0) 会命中
+    first_in_slot = np.ones(count, dtype=bool)
+    first_in_slot[1:] = ~same_slot
+    hit_sorted |= first_in_slot & (sorted_value == 0)
+    index_hit = np.empty(count, dtype=bool)
+    index_hit[order] = hit_sorted
+
+    # 3. 与前一个像素的差值（按 8 位有符号数回绕）
+    diff = ((cur - prev + 128) % 256 - 128).astype(np.int16)
+    dr, dg, db = diff[:, 0], diff[:, 1], diff[:, 2]
+    dr_dg = dr - dg
+    db_dg = db - dg
+    same_alpha = cur[:, 3] == prev[:, 3]
+
+    is_diff = same_alpha & (dr >= -2) & (dr <= 1) & (dg >= -2) & (dg <= 1) & (db >= -2) & (db <= 1)
+    is_luma = (same_alpha & (dg >= -32) & (dg <= 31)
+               & (dr_dg >= -8) & (dr_dg <= 7) & (db_dg >= -8) & (db_dg <= 7))
+
+    kind = np.where(same_alpha, KIND_RGB, KIND_RGBA).astype(np.uint8)
+    kind[is_luma] = KIND_LUMA
+    kind[is_diff] = KIND_DIFF
+    kind[index_hit] = KIND_INDEX
+
+    # 4. 每个非重复像素之前的 RUN 长度和 RUN 操作数
+    run_before = np.diff(positions, prepend=-1) - 1
+    trailing_run = total - 1 - positions[-1] if count else total
+    run_ops = (run_before + QOI_MAX_RUN - 1) // QOI_MAX_RUN
+    trailing_ops = (trailing_run + QOI_MAX_RUN - 1) // QOI_MAX_RUN
+
+    op_size = np.asarray(KIND_SIZES, dtype=np.int64)[kind]
+    chunk = run_ops + op_size
+    chunk_start = np.zeros(count, dtype=np.int64)
+    if count:
+        np.cumsum(chunk[:-1], out=chunk_start[1:])
+    op_start = chunk_start + run_ops
+    body_size = int(chunk_start[-1] + chunk[-1]) + trailing_ops if count else trailing_ops
+
+    out = np.zeros(body_size, dtype=np.uint8)
+
+    # RUN 操作（包括结尾的 RUN）
+    run_lengths = np.append(run_before, trailing_run)
+    run_starts = np.append(chunk_start, body_size - trailing_ops)
+    run_counts = np.append(run_ops, trailing_ops)
+    write_runs(out, run_starts, run_counts, run_lengths)
+
+    # 各种像素操作
+    r, g, b, a = (cur[:, i].astype(np.uint8) for i in range(4))
+
+    sel = kind == KIND_INDEX
+    out[op_start[sel]] = QOI_OP_INDEX | hashes[sel]
+
+    sel = kind == KIND_DIFF
+    out[op_start[sel]] = (QOI_OP_DIFF | ((dr[sel] + 2) << 4) | ((dg[sel] + 2) << 2) | (db[sel] + 2))
+
+    sel = kind == KIND_LUMA
+    start = op_start[sel]
+    out[start] = QOI_OP_LUMA | (dg[sel] + 32)
+    out[start + 1] = ((dr_dg[sel] + 8) << 4) | (db_dg[sel] + 8)
+
+    sel = kind == KIND_RGB
+    start = op_start[sel]
+    out[start] = QOI_OP_RGB
+    out[start + 1], out[start + 2], out[start + 3] = r[sel], g[sel], b[sel]
+
+    sel = kind == KIND_RGBA
+    start = op_start[sel]
+    out[start] = QOI_OP_RGBA
+    out[start + 1], out[start + 2], out[start + 3], out[start + 4] = r[sel], g[sel], b[sel], a[sel]
+
+    return header + out.tobytes() + QOI_END_MARKER
+
+
+def write_runs(out, starts, counts, lengths):
+    """写入 RUN 操作：每段长度拆成若干个 62，最后一个操作写余数"""
+    has_run = counts > 0
+    starts, counts, lengths = starts[has_run], counts[has_run], lengths[has_run]
+    if not starts.size:
+        return
+
+    # 每段的第 k 个操作写在 start + k
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    out[np.repeat(starts, counts) + offsets] = QOI_OP_RUN | (QOI_MAX_RUN - 1)
+    out[starts + counts - 1] = QOI_OP_RUN | ((lengths - 1) % QOI_MAX_RUN)
+
+
+def read_header(data):
+    """读取文件头，返回 (width, height, channels, colorspace)"""
+    if len(data) < QOI_HEADER_SIZE or data[:4] != QOI_MAGIC:
+        raise ValueError("不是 QOI 文件")
+    return struct.unpack(">IIBB", data[4:QOI_HEADER_SIZE])
+
+
+def decode(data):
+    """解码 QOI 字节串，返回 (RGBA 字节串, width, height, channels)
+
+    QOI 解码依赖索引表的逐步更新，只能顺序进行；这里是直接的参考实现。
+    """
+    width, height, channels, _ = read_header(data)
+    total = width * height
+    out = bytearray(total * 4)
+    index = [(0, 0, 0, 0)] * 64
+
+    r, g, b, a = 0, 0, 0, 255
+    p = QOI_HEADER_SIZE
+    end = len(data) - len(QOI_END_MARKER)
+    pos = 0
+    limit = total * 4
+
+    while pos < limit:
+        if p >= end:
+            raise ValueError("QOI 数据不完整")
+        op = data[p]
+        p += 1
+
+        if op == QOI_OP_RGB:
+            r, g, b = data[p], data[p + 1], data[p + 2]
+            p += 3
+        elif op == QOI_OP_RGBA:
+            r, g, b, a = data[p], data[p + 1], data[p + 2], data[p + 3]
+            p += 4
+        else:
+            tag = op & 0xC0
+            if tag == QOI_OP_INDEX:
+                r, g, b, a = index[op]
+                out[pos:pos + 4] = (r, g, b, a)
+                pos += 4
+                continue
+            elif tag == QOI_OP_DIFF:
+                r = (r + ((op >> 4) & 0x03) - 2) & 0xFF
+                g = (g + ((op >> 2) & 0x03) - 2) & 0xFF
+                b = (b + (op & 0x03) - 2) & 0xFF
+            elif tag == QOI_OP_LUMA:
+                second = data[p]
+                p += 1
+                dg = (op & 0x3F) - 32
+                r = (r + dg - 8 + ((second >> 4) & 0x0F)) & 0xFF
+                g = (g + dg) & 0xFF
+                b = (b + dg - 8 + (second & 0x0F)) & 0xFF
+            else:
+                # RUN：重复前一个像素，索引表不变
+                run = (op & 0x3F) + 1
+                out[pos:pos + 4 * run] = bytes((r, g, b, a)) * run
+                pos += 4 * run
+                continue
+
+        index[(r * 3 + g * 5 + b * 7 + a * 11) % 64] = (r, g, b, a)
+        out[pos:pos + 4] = (r, g, b, a)
+        pos += 4
+
+    return bytes(out[:limit]), width, height, channels
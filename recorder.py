@@ -0,0 +1,529 @@
+"""
+区域录制：把选中区域录成短动画（APNG 或 GIF）
+录制：主线程定时器按目标帧率抓取区域（抓屏只在主线程进行），放入队列交给工作线程；
+工作线程把每帧与上一帧整帧比较（NumPy），只保留变化部分的外接矩形和变化掩码；画面不变时只延长上一帧的显示时间
+编码：停止后在线程池中进行，每帧只写变化的外接矩形，矩形内没变的像素写成透明（叠加在上一帧上）
+  APNG：无损 RGBA，逐行 Up 过滤（NumPy 整体计算）+ zlib
+  GIF：全局调色板（颜色不超过 255 种时精确，否则取 5 位量化颜色直方图中最常用的 255 种），索引 255 为透明；
+  LZW 只压缩游程、用 NumPy 整体计算（没有逐像素的 Python 循环，编码时不会一直占着 GIL）
+比较和编码都不在主线程，录制时界面不卡顿
+"""
+import os
+import time
+import zlib
+import queue
+import struct
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from image_buffer import NUMPY_AVAILABLE, pixel_array
+from task_results import TaskResults
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# 默认帧率
+DEFAULT_FPS = 10
+# 最长录制时间（秒）
+MAX_SECONDS = 120
+# 录制数据的内存上限（超出时自动停止）
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+# 等待比较的帧数上限（工作线程跟不上时丢帧）
+MAX_QUEUED_FRAMES = 4
+
+# GIF 透明色索引（调色板最多 255 种颜色）
+TRANSPARENT_INDEX = 255
+# 量化直方图：每个通道取高 5 位
+QUANT_BINS = 1 << 15
+# GIF LZW（最小码长 8）：清除码、结束码、第一个表项；清除码之间最多输出的码数（表项到 4095 为止）
+LZW_CLEAR_CODE = 256
+LZW_END_CODE = 257
+LZW_FIRST_CODE = 258
+LZW_SEGMENT = 4096 - LZW_FIRST_CODE
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# APNG 帧控制：dispose_op / blend_op
+APNG_DISPOSE_NONE = 0
+APNG_BLEND_SOURCE = 0
+APNG_BLEND_OVER = 1
+
+
+class Delta:
+    """一帧中变化的部分"""
+
+    def __init__(self, x, y, pixels, mask, timestamp):
+        self.x = x
+        self.y = y
+        self.pixels = pixels        # (高, 宽) uint32，RGB32
+        self.mask = mask            # (高, 宽) bool，True = 变化的像素；完整帧为 None
+        self.timestamp = timestamp
+        self.duration = 0.0         # 显示时间（秒），录制结束时计算
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+    def memory_bytes(self):
+        return self.pixels.nbytes + (self.mask.nbytes if self.mask is not None else 0)
+
+
+class Clip:
+    """录制的帧序列：第一帧完整，之后每帧只有变化的外接矩形"""
+
+    def __init__(self, width, height, memory_budget=DEFAULT_MEMORY_BUDGET):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("录制需要 NumPy: pip install numpy")
+        self.width = width
+        self.height = height
+        self.memory_budget = memory_budget
+        self.frames = []
+        self.previous = None
+        self.captured = 0
+        self.memory_bytes = 0
+
+    def add(self, image, timestamp):
+        """加入一帧（QImage）；超出内存预算时返回 False"""
+        pixels = pixel_array(image)
+        if pixels.shape != (self.height, self.width):
+            canvas = np.zeros((self.height, self.width), dtype=np.uint32)
+            height = min(self.height, pixels.shape[0])
+            width = min(self.width, pixels.shape[1])
+            canvas[:height, :width] = pixels[:height, :width]
+            pixels = canvas
+        self.captured += 1
+
+        if self.previous is None:
+            # previous 之后会原地更新，需要自己的一份；第一帧的增量直接引用这一帧的图像
+            self.previous = pixels.copy()
+            delta = Delta(0, 0, pixels, None, timestamp)
+        else:
+            changed = pixels != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if not len(rows):
+                return True
+            columns = np.flatnonzero(changed.any(axis=0))
+            top, bottom = rows[0], rows[-1] + 1
+            left, right = columns[0], columns[-1] + 1
+
+            area = pixels[top:bottom, left:right]
+            delta = Delta(int(left), int(top), area.copy(), changed[top:bottom, left:right].copy(), timestamp)
+            self.previous[top:bottom, left:right] = area
+
+        self.frames.append(delta)
+        self.memory_bytes += delta.memory_bytes()
+        return self.memory_bytes <= self.memory_budget
+
+    def finish(self, end_time):
+        """录制结束：丢掉停止之后才抓到的帧，计算每帧的显示时间"""
+        while len(self.frames) > 1 and self.frames[-1].timestamp > end_time:
+            self.frames.pop()
+        for current, following in zip(self.frames, self.frames[1:]):
+            current.duration = following.timestamp - current.timestamp
+        if self.frames:
+            self.frames[-1].duration = max(0.01, end_time - self.frames[-1].timestamp)
+        self.previous = None
+
+    def duration(self):
+        return sum(delta.duration for delta in self.frames)
+
+
+def to_rgba(delta):
+    """变化部分 → (高, 宽, 4) RGBA 字节，没变的像素透明"""
+    bgra = delta.pixels.view(np.uint8).reshape(delta.height, delta.width, 4)
+    rgba = bgra[:, :, [2, 1, 0, 3]]
+    rgba[:, :, 3] = 255
+    if delta.mask is not None:
+        rgba[~delta.mask] = 0
+    return rgba
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def png_image_data(rgba):
+    """逐行 Up 过滤后压缩（与上一行的差值，整幅一次计算）"""
+    height, width, _ = rgba.shape
+    rows = rgba.reshape(height, width * 4)
+    filtered = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+    return zlib.compress(filtered.tobytes(), 6)
+
+
+def write_apng(clip, path):
+    """写入 APNG（第一帧完整，之后每帧叠加变化部分）"""
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", clip.width, clip.height, 8, 6, 0, 0, 0)))
+        f.write(png_chunk(b"acTL", struct.pack(">II", len(clip.frames), 0)))
+
+        sequence = 0
+        for index, delta in enumerate(clip.frames):
+            delay = min(65535, max(1, round(delta.duration * 1000)))
+            blend = APNG_BLEND_SOURCE if delta.mask is None else APNG_BLEND_OVER
+            f.write(png_chunk(b"fcTL", struct.pack(">IIIIIHHBB", sequence, delta.width, delta.height,
+                                                   delta.x, delta.y, delay, 1000,
+                                                   APNG_DISPOSE_NONE, blend)))
+            sequence += 1
+
+            data = png_image_data(to_rgba(delta))
+            if index == 0:
+                f.write(png_chunk(b"IDAT", data))
+            else:
+                f.write(png_chunk(b"fdAT", struct.pack(">I", sequence) + data))
+                sequence += 1
+
+        f.write(png_chunk(b"IEND", b""))
+
+
+def quant_keys(pixels):
+    """RGB32 像素 → 15 位量化颜色（每个通道高 5 位）"""
+    return (((pixels >> 9) & 0x7C00) | ((pixels >> 6) & 0x03E0) | ((pixels >> 3) & 0x001F)).astype(np.int64)
+
+
+def changed_pixels(delta):
+    pixels = delta.pixels if delta.mask is None else delta.pixels[delta.mask]
+    return pixels.ravel() & 0xFFFFFF
+
+
+def build_palette(clip):
+    """全局调色板，返回 (调色板 (n, 3) uint8, 像素 → 索引的函数)"""
+    # 颜色不超过 255 种：精确调色板（录制的大多是界面，颜色很少）
+    colors = np.empty(0, dtype=np.uint32)
+    for delta in clip.frames:
+        colors = np.union1d(colors, np.unique(changed_pixels(delta)))
+        if len(colors) > TRANSPARENT_INDEX:
+            break
+    else:
+        palette = np.stack([(colors >> 16) & 255, (colors >> 8) & 255, colors & 255], axis=1)
+        return palette.astype(np.uint8), lambda pixels: np.searchsorted(colors, pixels & 0xFFFFFF).astype(np.uint8)
+
+    # 否则：量化颜色直方图中最常用的 255 种，取每一格中实际颜色的平均值
+    counts = np.zeros(QUANT_BINS)
+    sums = np.zeros((3, QUANT_BINS))
+    for delta in clip.frames:
+        pixels = changed_pixels(delta)
+        keys = quant_keys(pixels)
+        counts += np.bincount(keys, minlength=QUANT_BINS)
+        for channel, shift in enumerate((16, 8, 0)):
+            sums[channel] += np.bincount(keys, weights=(pixels >> shift) & 255, minlength=QUANT_BINS)
+
+    used = np.argsort(counts)[::-1][:TRANSPARENT_INDEX]
+    used = used[counts[used] > 0]
+    palette = (sums[:, used] / counts[used]).T.round().astype(np.int32)
+
+    # 查找表：每个量化颜色 → 最近的调色板颜色（分块计算距离）
+    keys = np.arange(QUANT_BINS)
+    centers = np.stack([(keys >> 10) & 31, (keys >> 5) & 31, keys & 31], axis=1) * 8 + 4
+    lookup = np.empty(QUANT_BINS, dtype=np.uint8)
+    for start in range(0, QUANT_BINS, 2048):
+        block = centers[start:start + 2048, None, :] - palette[None, :, :]
+        lookup[start:start + 2048] = (block * block).sum(axis=2).argmin(axis=1)
+    return palette.astype(np.uint8), lambda pixels: lookup[quant_keys(pixels)]
+
+
+def run_emissions(lengths):
+    """每段游程输出的码：长度 1, 2, ..., t（t(t+1)/2 ≤ n 的最大 t），再加剩下的 r 个像素（r 为 0 时不输出）"""
+    t = ((np.sqrt(8 * lengths + 1) - 1) // 2).astype(np.int64)
+    # 浮点误差修正
+    t -= t * (t + 1) // 2 > lengths
+    t += (t + 1) * (t + 2) // 2 <= lengths
+    rest = lengths - t * (t + 1) // 2
+    return t, rest, t + (rest > 0)
+
+
+def lzw_segment(lengths, colors):
+    """一个清除码之后的一段：每个输出码的值和位数
+
+    第 j 个码（从清除码之后数起）输出后建立表项 LZW_FIRST_CODE + j（这个码的字符串 + 下一个码的首字符），
+    所以同一段游程中长度 L 的码就是上一个码刚建立的表项，长度 L ≥ 2 的码值为 LZW_FIRST_CODE + 游程第一个码的序号 + L - 2
+    """
+    t, rest, counts = run_emissions(lengths)
+    total = int(counts.sum())
+    run = np.repeat(np.arange(len(lengths)), counts)
+    first = np.cumsum(counts) - counts
+    position = np.arange(total) - first[run]
+    length = np.where(position < t[run], position + 1, rest[run])
+    codes = np.where(length == 1, colors[run], LZW_FIRST_CODE + first[run] + length - 2)
+    return codes, lzw_code_sizes(np.arange(total))
+
+
+def lzw_code_sizes(positions):
+    """清除码之后第 j 个码的位数（与解码器同步增长：表项到 512、1024、2048 时加一位，最多 12 位）"""
+    table = LZW_FIRST_CODE - 1 + positions
+    return 9 + (table >= 512).astype(np.int64) + (table >= 1024) + (table >= 2048)
+
+
+def lzw_encode(indices):
+    """GIF 的 LZW 数据（8 位索引），NumPy 整体计算，不逐像素循环
+
+    只利用连续相同的像素（游程）：n 个相同的像素依次输出长度 1, 2, 3... 的码，
+    每个码都是上一个码刚建立的表项，约 √(2n) 个码；界面录像的变化部分大多是大片同色，压缩率接近完整的 LZW
+    码表满之前发清除码重新开始；循环只按段进行（每段最多 LZW_SEGMENT 个码）
+    """
+    indices = np.asarray(indices, dtype=np.uint8).ravel()
+    starts = np.concatenate(([0], np.flatnonzero(indices[1:] != indices[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(indices))).astype(np.int64)
+    colors = indices[starts].astype(np.int64)
+
+    codes, sizes = [np.array([LZW_CLEAR_CODE])], [np.array([9])]
+    run = 0
+    while run < len(lengths):
+        # 每段游程至少一个码：一段最多包含 LZW_SEGMENT 段游程
+        window = lengths[run:run + LZW_SEGMENT]
+        counts = np.cumsum(run_emissions(window)[2])
+        fit = int(np.searchsorted(counts, LZW_SEGMENT, side='right'))
+        left = LZW_SEGMENT - (int(counts[fit - 1]) if fit else 0)
+        seg_lengths = window[:fit]
+        seg_colors = colors[run:run + fit]
+        if fit < len(window) and left > 0:
+            # 放不下的游程拆开：这一段输出长度 1..left 的码，其余像素留给下一段
+            part = left * (left + 1) // 2
+            seg_lengths = np.append(seg_lengths, part)
+            seg_colors = np.append(seg_colors, colors[run + fit])
+            lengths[run + fit] -= part
+        run += fit
+
+        segment_codes, segment_sizes = lzw_segment(seg_lengths, seg_colors)
+        codes.append(segment_codes)
+        sizes.append(segment_sizes)
+        # 清除码 / 结束码的位数与下一个码相同
+        codes.append(np.array([LZW_CLEAR_CODE if run < len(lengths) else LZW_END_CODE]))
+        sizes.append(lzw_code_sizes(np.array([len(segment_codes)])))
+    if len(codes) == 1:
+        codes.append(np.array([LZW_END_CODE]))
+        sizes.append(np.array([9]))
+
+    return pack_codes(np.concatenate(codes), np.concatenate(sizes))
+
+
+def pack_codes(codes, sizes):
+    """变长码按 GIF 的位序（低位在前）拼接成字节"""
+    offsets = np.cumsum(sizes) - sizes
+    bits = np.zeros(-(-int(sizes.sum()) // 8) * 8, dtype=np.uint8)
+    for bit in range(12):
+        used = sizes > bit
+        bits[offsets[used] + bit] = (codes[used] >> bit) & 1
+    return np.packbits(bits, bitorder='little').tobytes()
+
+
+def gif_sub_blocks(data):
+    """GIF 数据子块：每块最多 255 字节，以长度 0 的块结束"""
+    blocks = bytearray()
+    for start in range(0, len(data), 255):
+        chunk = data[start:start + 255]
+        blocks.append(len(chunk))
+        blocks += chunk
+    blocks.append(0)
+    return bytes(blocks)
+
+
+def write_gif(clip, path):
+    """写入 GIF（全局调色板，每帧只写变化的外接矩形）"""
+    palette, index_of = build_palette(clip)
+    table = bytearray(palette.tobytes())
+    table += b"\0" * (768 - len(table))
+
+    with open(path, 'wb') as f:
+        f.write(b"GIF89a" + struct.pack("<HHBBB", clip.width, clip.height, 0xF7, 0, 0))
+        f.write(table)
+        # 无限循环
+        f.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+        # 延时以 1/100 秒为单位，按累计时间取整，整段时长不会因舍入漂移
+        elapsed = 0.0
+        for delta in clip.frames:
+            start = round(elapsed * 100)
+            elapsed += delta.duration
+            delay = max(1, round(elapsed * 100) - start)
+
+            transparent = delta.mask is not None
+            flags = (1 << 2) | (1 if transparent else 0)  # 不处置（保留上一帧）+ 透明色
+            f.write(b"\x21\xF9\x04" + struct.pack("<BHB", flags, delay, TRANSPARENT_INDEX) + b"\0")
+            f.write(b"\x2C" + struct.pack("<HHHHB", delta.x, delta.y, delta.width, delta.height, 0))
+
+            indices = index_of(delta.pixels)
+            if transparent:
+                indices[~delta.mask] = TRANSPARENT_INDEX
+            f.write(b"\x08" + gif_sub_blocks(lzw_encode(indices)))
+
+        f.write(b"\x3B")
+
+
+ENCODERS = {"gif": write_gif, "apng": write_apng}
+
+
+def format_for_path(path):
+    """按扩展名选择格式：.gif → GIF，其他（.png / .apng）→ APNG"""
+    return "gif" if path.lower().endswith(".gif") else "apng"
+
+
+def encode_clip(clip, path):
+    """编码并写入动画（在工作线程中运行），返回错误信息（成功时为空）"""
+    temp_path = path + ".part"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        ENCODERS[format_for_path(path)](clip, temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return str(e) or "未知错误"
+    return ""
+
+
+class EncodeTask(QRunnable):
+    """等比较线程结束，编码并写入动画（在工作线程中运行）
+
+    主线程停止录制时不等待比较线程：它可能正在比较一帧
+    """
+
+    def __init__(self, recorder, thread, clip, end_time, path, dropped):
+        super().__init__()
+        self.recorder = recorder
+        self.thread = thread
+        self.clip = clip
+        self.end_time = end_time
+        self.path = path
+        self.dropped = dropped
+
+    def run(self):
+        self.thread.join()
+        clip = self.clip
+        clip.finish(self.end_time)
+        print(f"✓ 停止录制: {clip.duration():.1f} 秒，抓取 {clip.captured} 帧，"
+              f"有变化 {len(clip.frames)} 帧，变化数据 {clip.memory_bytes / 1024 / 1024:.1f} MB"
+              f"（丢帧 {self.dropped}），正在编码...")
+        error = encode_clip(clip, self.path)
+        self.clip = None
+        self.recorder.results.post(self.recorder.on_task_done, self.path, error)
+
+
+class ClipRecorder(QObject):
+    """区域录制"""
+
+    # 动画已写入：文件路径
+    finished = pyqtSignal(str)
+    # 写入失败：文件路径、错误信息
+    failed = pyqtSignal(str, str)
+    # 达到上限：录制的 Clip（停止之后才到达时忽略）
+    limit_reached = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.clip = None
+        self.path = None
+        self.source = None
+        self.fps = DEFAULT_FPS
+        self.max_seconds = MAX_SECONDS
+        self.thread = None
+        # 每次录制新建：上一次的比较线程可能还没结束
+        self.stop_event = None
+        self.dropped = 0
+
+        # 主线程定时抓取（抓屏不是线程安全的），放入队列交给比较线程
+        self.frames = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.grab_on_main_thread)
+
+        # 编码
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # 工作线程 → 主线程：编码结果
+        self.results = TaskResults(self)
+        self.limit_reached.connect(self.on_limit_reached)
+
+    def is_active(self):
+        return self.thread is not None
+
+    def start(self, source, path, fps=DEFAULT_FPS, max_seconds=MAX_SECONDS):
+        """开始录制（source 为 region_watch.ScreenRegionSource 等有 grab() 的对象），立即返回"""
+        if self.is_active():
+            print("录制进行中，忽略重复请求")
+            return False
+
+        first = source.grab()
+        self.clip = Clip(first.width(), first.height())
+        self.clip.add(first, time.perf_counter())
+        self.path = path
+        self.source = source
+        self.fps = fps
+        self.max_seconds = max_seconds
+        self.dropped = 0
+        self.stop_event = threading.Event()
+        self.frames = queue.Queue(MAX_QUEUED_FRAMES)
+
+        self.thread = threading.Thread(target=self.capture_loop, daemon=True,
+                                       args=(self.clip, self.frames, self.stop_event, max_seconds))
+        self.thread.start()
+        self.timer.start(int(1000 / fps))
+
+        print(f"✓ 开始录制: {first.width()}x{first.height()}，{fps} 帧/秒 → {path}")
+        return True
+
+    def grab_on_main_thread(self):
+        """定时器触发：抓取一帧放入队列（队列满时丢帧）"""
+        try:
+            self.frames.put_nowait((self.source.grab(), time.perf_counter()))
+        except queue.Full:
+            self.dropped += 1
+
+    def capture_loop(self, clip, frames, stop_event, max_seconds):
+        """比较线程：从队列取出主线程抓取的帧，与上一帧比较，保存变化部分"""
+        start = time.perf_counter()
+
+        while not stop_event.is_set():
+            try:
+                image, timestamp = frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            within_budget = clip.add(image, timestamp)
+            if not within_budget or timestamp - start >= max_seconds:
+                reason = "内存" if not within_budget else "时长"
+                print(f"[录制] 达到{reason}上限，自动停止")
+                self.limit_reached.emit(clip)
+                break
+
+    def on_limit_reached(self, clip):
+        if clip is self.clip:
+            self.stop()
+
+    def stop(self):
+        """停止录制，立即返回（不等待比较线程）；在后台编码写入，完成后发出 finished 信号"""
+        if not self.is_active():
+            return None
+
+        self.timer.stop()
+        self.stop_event.set()
+        thread, self.thread = self.thread, None
+        clip, self.clip = self.clip, None
+        self.pool.start(EncodeTask(self, thread, clip, time.perf_counter(), self.path, self.dropped))
+        return self.path
+
+    def on_task_done(self, path, error):
+        if error:
+            print(f"✗ 录制保存失败: {path}: {error}")
+            self.failed.emit(path, error)
+            return
+        print(f"✓ 录制已保存: {path}（{os.path.getsize(path) / 1024:.0f} KB）")
+        self.finished.emit(path)
+
+    def wait_for_done(self, msecs=-1):
+        """等待编码完成，并发出完成信号"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
+
+    def close(self):
+        """等待编码完成（退出程序前调用）"""
+        self.wait_for_done()
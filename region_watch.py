@@ -0,0 +1,175 @@
+"""
+区域监视：定时采样屏幕上的一个区域，内容变化时立即截图
+每次只抓取这个区域（不抓整个屏幕）。与上一次采样逐字节相同时直接跳过（静止画面的常见情况，
+比较是一次内存比较）；否则缩小成 64x36 的灰度签名（约 2 KB）再和基准比较，
+变化的格子比例超过阈值才算变化；轻微噪声（抗锯齿、光标闪烁）由逐格容差过滤
+变化后发出 changed 信号（带原尺寸的区域截图，独立的一份像素），并以这一帧作为新的基准；
+冷却时间内不重复触发（动画一直在变时不会每次采样都截图）
+采样源可以替换：ScreenRegionSource 抓取真实屏幕，FakeRegionSource 生成合成画面（测试用）
+"""
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QObject, QRect, QSize, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+
+from screen_capture import grab_screen
+
+# 签名尺寸（灰度，每格 1 字节）
+SIGNATURE_SIZE = QSize(64, 36)
+# 单格灰度差超过多少算变化（0-255）
+PIXEL_TOLERANCE = 12
+# 变化的格子比例超过多少算区域变化
+DEFAULT_THRESHOLD = 0.002
+# 默认采样间隔（毫秒）
+DEFAULT_INTERVAL_MS = 500
+# 触发后的冷却时间（毫秒）
+DEFAULT_COOLDOWN_MS = 2000
+
+
+def signature(image):
+    """区域签名：平滑缩小（面积平均）到 64x36 灰度，返回字节串"""
+    small = image.scaled(SIGNATURE_SIZE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format_Grayscale8)
+    bits = small.constBits()
+    bits.setsize(small.sizeInBytes())
+    width, stride = small.width(), small.bytesPerLine()
+    if width == stride:
+        return bytes(bits)
+    data = memoryview(bits)
+    return b"".join(data[y * stride:y * stride + width] for y in range(small.height()))
+
+
+def changed_fraction(a, b, tolerance=PIXEL_TOLERANCE):
+    """两个签名中差值超过容差的格子比例"""
+    if len(a) != len(b):
+        return 1.0
+    changed = sum(1 for x, y in zip(a, b) if abs(x - y) > tolerance)
+    return changed / max(1, len(a))
+
+
+class ScreenRegionSource:
+    """真实屏幕：只抓取区域所在屏幕上的这一块（跨屏幕时抓整个桌面再裁剪）"""
+
+    def __init__(self, rect):
+        self.rect = QRect(rect)
+
+    def grab(self):
+        """区域截图；跨屏时是整屏图像上的视图（image_buffer 规则 4），只用于采样，需要保存时先 .copy()"""
+        screen = QApplication.screenAt(self.rect.center())
+        if screen is not None and screen.geometry().contains(self.rect):
+            local = self.rect.translated(-screen.geometry().topLeft())
+            pixmap = screen.grabWindow(0, local.x(), local.y(), local.width(), local.height())
+            if not pixmap.isNull():
+                return pixmap.toImage()
+
+        frame = grab_screen(verbose=False)
+        image = frame.crop_image(self.rect.translated(-frame.geometry.topLeft()))
+        frame.discard()
+        return image
+
+
+class FakeRegionSource:
+    """合成画面：一个仪表盘，每采样 change_every 次数值变化一次；noise=True 时每次采样都有轻微噪点
+    不依赖真实屏幕，用于 Linux 下测试
+    """
+
+    def __init__(self, size=QSize(800, 450), change_every=10, noise=True):
+        self.size = QSize(size)
+        self.change_every = change_every
+        self.noise = noise
+        self.grabs = 0
+        self.value = 0
+
+    def grab(self):
+        if self.grabs and self.grabs % self.change_every == 0:
+            self.value += 1
+        self.grabs += 1
+
+        image = QImage(self.size, QImage.Format_RGB32)
+        image.fill(QColor(30, 34, 40))
+        painter = QPainter(image)
+        painter.fillRect(20, 20, self.size.width() - 40, 60, QColor(45, 52, 64))
+        painter.setPen(QColor(220, 220, 220))
+        painter.setFont(QFont("Arial", 28))
+        painter.drawText(40, 64, f"请求数 {1000 + self.value * 37}")
+        painter.fillRect(20, 120, (self.value * 53) % (self.size.width() - 40), 30, QColor(76, 175, 80))
+        if self.noise:
+            # 模拟光标闪烁 / 抗锯齿抖动：几个像素的轻微变化
+            for i in range(8):
+                color = QColor(30 + self.grabs % 3, 34, 40)
+                painter.fillRect((self.grabs * 97 + i * 131) % self.size.width(),
+                                 (self.grabs * 53 + i * 71) % self.size.height(), 2, 2, color)
+        painter.end()
+        return image
+
+
+class RegionWatcher(QObject):
+    """区域监视（定时器在主线程采样）"""
+
+    # 区域变化：区域截图（QImage）、变化的格子比例
+    changed = pyqtSignal(object, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.baseline = None
+        self.previous = None
+        self.threshold = DEFAULT_THRESHOLD
+        self.cooldown_ms = DEFAULT_COOLDOWN_MS
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        # 冷却计时（单次定时器在运行 = 冷却中）
+        self.cooldown = QTimer(self)
+        self.cooldown.setSingleShot(True)
+
+        self.samples = 0
+        self.triggered = 0
+
+    def is_active(self):
+        return self.source is not None
+
+    def start(self, source, interval_ms=DEFAULT_INTERVAL_MS, threshold=DEFAULT_THRESHOLD,
+              cooldown_ms=DEFAULT_COOLDOWN_MS):
+        """开始监视；source 为 ScreenRegionSource / FakeRegionSource 或任何有 grab() 的对象"""
+        self.stop()
+        self.source = source
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.samples = 0
+        self.triggered = 0
+        self.previous = source.grab()
+        self.baseline = signature(self.previous)
+        self.timer.start(interval_ms)
+        print(f"✓ 开始监视区域（每 {interval_ms} ms 采样，阈值 {threshold:.1%}）")
+
+    def sample(self):
+        """定时采样：与基准比较，超过阈值时触发（冷却中不采样）"""
+        if self.cooldown.isActive():
+            return
+        image = self.source.grab()
+        self.samples += 1
+        if image == self.previous:
+            return
+        self.previous = image
+        current = signature(image)
+
+        fraction = changed_fraction(self.baseline, current)
+        if fraction <= self.threshold:
+            return
+
+        self.baseline = current
+        self.triggered += 1
+        self.cooldown.start(self.cooldown_ms)
+        print(f"[监视] 区域变化 {fraction:.1%}，已截图（第 {self.triggered} 次）")
+        # 采样结果可能是整屏图像上的视图；发出去会被历史 / 截图库长期保存，拷贝成只有这个区域的一份
+        self.changed.emit(image.copy(), fraction)
+
+    def stop(self):
+        if not self.is_active():
+            return
+        self.timer.stop()
+        self.cooldown.stop()
+        self.source = None
+        self.baseline = None
+        self.previous = None
+        print(f"✓ 停止监视区域（采样 {self.samples} 次，触发 {self.triggered} 次）")
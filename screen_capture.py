@@ -0,0 +1,245 @@
+"""
+屏幕抓取层
+抓屏结果全程保存在内存中（抓屏 → 遮罩 → 裁剪 → 预览），不再经过临时 PNG 文件。
+多显示器：覆盖整个虚拟桌面，每个屏幕在线程池中并行抓取，各屏幕的图像分别保存，
+绘制和裁剪时只拼接用到的部分（不预先合成整张虚拟桌面图）。
+内存紧张的机器可以开启"落盘"模式：整帧以不压缩的 BMP 写入临时文件，
+选择结束后立即释放内存中的整帧，裁剪时从文件中只读取选中区域。
+"""
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPixmap, QPainter, QImageReader
+
+from image_buffer import NUMPY_AVAILABLE, pixel_array, crop_array, array_image
+
+# 支持在工作线程中抓屏的平台（Qt 的 ThreadedPixmaps 能力），其他平台在主线程逐个抓取
+THREADED_GRAB_PLATFORMS = ("windows", "xcb")
+
+
+class CaptureFrame:
+    """一帧虚拟桌面截图，由各屏幕的图像（tile）组成
+
+    tiles: [(rect, pixmap), ...]，rect 为该屏幕在帧内的位置（帧坐标原点 = 虚拟桌面左上角）
+    geometry: 虚拟桌面在全局坐标中的位置（可能有负坐标）
+    """
+
+    def __init__(self, pixmap, geometry, grab_ms=0.0, tiles=None):
+        self.geometry = QRect(geometry)
+        if tiles is None:
+            tiles = [(QRect(0, 0, self.geometry.width(), self.geometry.height()), pixmap)]
+        self.tiles = tiles
+        # 各屏幕图像的 QImage 缓存（放大镜取色用，第一次用到时转换）
+        self.images = None
+        self.grab_ms = grab_ms
+        self.spool_path = None
+        self.spool_ratio = 1.0
+        self.spool_ms = 0.0
+
+    def width(self):
+        return self.geometry.width()
+
+    def height(self):
+        return self.geometry.height()
+
+    def rect(self):
+        """帧坐标下的整帧区域"""
+        return QRect(0, 0, self.width(), self.height())
+
+    def is_released(self):
+        """整帧是否已经从内存中释放（只剩落盘文件）"""
+        return not self.tiles
+
+    def draw(self, painter, area):
+        """把帧内 area 区域画到 painter 的同一位置（只画与 area 相交的屏幕）"""
+        for rect, pixmap in self.tiles:
+            part = area.intersected(rect)
+            if part.isEmpty():
+                continue
+            ratio = pixmap.devicePixelRatio()
+            offset = part.translated(-rect.topLeft())
+            source = QRect(offset.topLeft() * ratio, offset.size() * ratio)
+            painter.drawPixmap(part, pixmap, source)
+
+    def tile_images(self):
+        """[(rect, image, ratio), ...]：各屏幕图像转成 QImage 并缓存（光栅平台上与 QPixmap 共享像素数据）"""
+        if self.images is None:
+            self.images = [(rect, pixmap.toImage(), pixmap.devicePixelRatio()) for rect, pixmap in self.tiles]
+        return self.images
+
+    def image_at(self, pos):
+        """帧内 pos 所在屏幕的 (QImage, pos 对应的图像像素坐标)；落在屏幕之间的空隙时返回 (None, None)"""
+        for rect, image, ratio in self.tile_images():
+            if rect.contains(pos):
+                offset = pos - rect.topLeft()
+                return image, QPoint(int(offset.x() * ratio), int(offset.y() * ratio))
+        return None, None
+
+    def composite(self, rect=None):
+        """拼接出帧内 rect 区域的图像（屏幕之间的空隙为黑色，按最高的设备像素比输出）"""
+        rect = self.rect() if rect is None else rect.intersected(self.rect())
+        tiles = [(tile_rect, pixmap) for tile_rect, pixmap in self.tiles if tile_rect.intersects(rect)]
+        ratio = max((pixmap.devicePixelRatio() for _, pixmap in tiles), default=1.0)
+
+        # 只涉及一个屏幕：直接复制，不需要拼接；正好是整个屏幕时共享这个屏幕的图像（隐式共享，不拷贝）
+        if len(tiles) == 1 and tiles[0][0].contains(rect):
+            tile_rect, pixmap = tiles[0]
+            offset = rect.translated(-tile_rect.topLeft())
+            if offset == QRect(QPoint(0, 0), tile_rect.size()):
+                return pixmap
+            result = pixmap.copy(QRect(offset.topLeft() * ratio, offset.size() * ratio))
+            result.setDevicePixelRatio(ratio)
+            return result
+
+        result = QPixmap(rect.size() * ratio)
+        result.setDevicePixelRatio(ratio)
+        result.fill(Qt.black)
+        painter = QPainter(result)
+        painter.translate(-rect.topLeft())
+        self.draw(painter, rect)
+        painter.end()
+        return result
+
+    def spool(self, directory=None):
+        """整帧写入临时文件（BMP 不压缩，只是一次内存拷贝的开销）"""
+        if self.spool_path or not self.tiles:
+            return self.spool_path
+
+        start = time.perf_counter()
+        fd, path = tempfile.mkstemp(suffix='.bmp', prefix='capture_', dir=directory)
+        os.close(fd)
+        composite = self.composite()
+        if not composite.save(path, 'BMP'):
+            os.remove(path)
+            raise IOError(f"整帧落盘失败: {path}")
+
+        self.spool_path = path
+        # 文件按最高的设备像素比写入，裁剪时把帧坐标换算成文件中的像素坐标
+        self.spool_ratio = composite.devicePixelRatio()
+        self.spool_ms = (time.perf_counter() - start) * 1000
+        return path
+
+    def release(self):
+        """释放内存中的整帧（仅在已落盘时释放，否则会丢失数据）"""
+        if self.spool_path:
+            self.tiles = []
+            self.images = None
+
+    def crop(self, rect):
+        """裁剪选中区域（rect 为帧内坐标），只拼接选区涉及的屏幕
+
+        结果会比整帧活得久（历史、预览），选区小于整个屏幕时复制一次，不让小截图占着整屏的内存；
+        只在采样期间用到的区域用 crop_array / crop_image（不拷贝）
+        """
+        rect = rect.intersected(self.rect())
+
+        if self.tiles:
+            return self.composite(rect)
+
+        # 已释放：只从落盘文件中读取选中区域（与内存中裁剪一样按设备像素读取，结果带设备像素比）
+        ratio = self.spool_ratio
+        reader = QImageReader(self.spool_path)
+        reader.setClipRect(QRect(rect.topLeft() * ratio, rect.size() * ratio))
+        image = reader.read()
+        if image.isNull():
+            raise IOError(f"读取落盘截图失败: {reader.errorString()}")
+        image.setDevicePixelRatio(ratio)
+        return QPixmap.fromImage(image)
+
+    def crop_array(self, rect):
+        """选中区域的 (高, 宽) uint32 只读数组（设备像素）：在一个屏幕内时直接引用这个屏幕的图像，不拷贝；
+        跨屏幕或整帧已释放时先拼接 / 读取一次
+
+        数组持有屏幕图像的内存（见 image_buffer），之后 discard() 整帧也不影响数组
+        """
+        rect = rect.intersected(self.rect())
+        for tile_rect, image, ratio in self.tile_images():
+            if tile_rect.contains(rect):
+                offset = rect.translated(-tile_rect.topLeft())
+                return crop_array(image, QRect(offset.topLeft() * ratio, offset.size() * ratio))
+        return pixel_array(self.crop(rect))
+
+    def crop_image(self, rect):
+        """选中区域的 QImage（设备像素），与 crop_array 共享内存、不拷贝；只用于采样分析，不要在上面绘制
+        没有 NumPy 时退回到 crop()
+        """
+        if not NUMPY_AVAILABLE:
+            return self.crop(rect).toImage()
+        return array_image(self.crop_array(rect))
+
+    def discard(self):
+        """丢弃整帧和落盘文件"""
+        self.tiles = []
+        self.images = None
+        if self.spool_path:
+            try:
+                os.remove(self.spool_path)
+            except OSError:
+                pass
+            self.spool_path = None
+
+
+def virtual_geometry():
+    """虚拟桌面（所有屏幕的并集）在全局坐标中的位置"""
+    geometry = QRect()
+    for screen in QApplication.screens():
+        geometry = geometry.united(screen.geometry())
+    return geometry
+
+
+def screen_name_at(rect):
+    """全局坐标区域（中心点）所在屏幕的名称，不在任何屏幕上时返回空字符串"""
+    screen = QApplication.screenAt(rect.center())
+    return screen.name() if screen else ""
+
+
+def grab_one(screen):
+    """抓取单个屏幕；失败时返回黑色图像"""
+    geometry = screen.geometry()
+    try:
+        pixmap = screen.grabWindow(0)  # 0 = 整个屏幕
+        if pixmap.isNull():
+            raise RuntimeError("grabWindow 返回空图像")
+        return pixmap
+
+    except Exception as e:
+        print(f"截图背景失败（{screen.name()}）: {e}")
+        pixmap = QPixmap(geometry.width(), geometry.height())
+        pixmap.fill(Qt.black)
+        print(f"使用黑色背景: {geometry.width()}x{geometry.height()}")
+        return pixmap
+
+
+def grab_screen(parallel=True, verbose=True):
+    """抓取整个虚拟桌面，返回 CaptureFrame
+
+    parallel: 多个屏幕时在线程池中同时抓取（仅在支持的平台上）
+    verbose: 打印抓取耗时（定时截图时关闭）
+    """
+    start = time.perf_counter()
+    screens = QApplication.screens()
+    geometry = virtual_geometry()
+
+    threaded = (parallel and len(screens) > 1
+                and QApplication.platformName() in THREADED_GRAB_PLATFORMS)
+    if threaded:
+        with ThreadPoolExecutor(max_workers=len(screens)) as pool:
+            pixmaps = list(pool.map(grab_one, screens))
+    else:
+        pixmaps = [grab_one(screen) for screen in screens]
+
+    tiles = []
+    for screen, pixmap in zip(screens, pixmaps):
+        rect = screen.geometry().translated(-geometry.topLeft())
+        tiles.append((rect, pixmap))
+
+    grab_ms = (time.perf_counter() - start) * 1000
+    mode = "并行" if threaded else "逐个"
+    if verbose:
+        print(f"✓ 屏幕截图成功: {geometry.width()}x{geometry.height()}，"
+              f"{len(screens)} 个屏幕{mode}抓取（{grab_ms:.1f} ms）")
+    return CaptureFrame(None, geometry, grab_ms, tiles)
@@ -0,0 +1,421 @@
+"""
+全屏区域选择窗口（各版本共用）
+选择完成 / 取消通过 Qt 信号通知，不需要外部轮询 isVisible()
+拖动时只重绘新旧选择框的边框和尺寸文字，而不是整张全屏截图
+高频鼠标移动事件合并到显示器刷新间隔：每个刷新周期最多更新一次画面
+窗口可以预先创建（不带截图），每次截图只调用 reset(frame) 换上新的背景再显示
+放大镜跟随鼠标显示光标周围的放大像素网格和颜色值（按 C 复制颜色），像素取自帧缓存的 QImage
+（CaptureFrame.tile_images），每次移动只读取十几个像素，不重新转换整张截图；放大镜也走脏矩形重绘
+窗口吸附：有窗口索引（set_window_index）时，悬停高亮光标下的窗口 / 控件，单击不拖动即选中它
+边缘吸附：有边缘图（set_edge_map）时，拖动的角吸附到附近的图像边缘（按住 Alt 暂时关闭）
+"""
+import time
+
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtCore import Qt, QPoint, QRect, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QRegion, QColor
+
+# 选择框边框宽度（重绘区域需要向外扩展半个线宽 + 抗锯齿余量）
+BORDER_WIDTH = 2
+
+# 无法获取刷新率时使用的默认值
+DEFAULT_REFRESH_RATE = 60.0
+
+# 放大镜：显示光标周围 LOUPE_PIXELS x LOUPE_PIXELS 个像素，每个像素放大 LOUPE_ZOOM 倍
+LOUPE_PIXELS = 15
+LOUPE_ZOOM = 8
+# 放大镜与光标的距离、下方颜色文字的高度
+LOUPE_OFFSET = 20
+LOUPE_LABEL_HEIGHT = 38
+
+# 按下到松开移动不超过这个距离（像素）算单击：选中高亮的窗口
+CLICK_DISTANCE = 4
+# 窗口高亮颜色
+HIGHLIGHT_COLOR = QColor(33, 150, 243)
+
+
+class PaintStats:
+    """绘制耗时统计"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.pixels = 0
+
+    def add(self, elapsed_ms, pixels):
+        self.frames += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.pixels += pixels
+
+    def average_ms(self):
+        return self.total_ms / self.frames if self.frames else 0.0
+
+    def average_pixels(self):
+        return self.pixels // self.frames if self.frames else 0
+
+    def __str__(self):
+        return (f"{self.frames} 帧，平均 {self.average_ms():.2f} ms/帧，"
+                f"最大 {self.max_ms:.2f} ms，平均 {self.average_pixels()} 像素/帧")
+
+
+class MoveStats:
+    """鼠标移动事件统计：收到 / 实际渲染 / 被合并丢弃"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.rendered = 0
+
+    @property
+    def dropped(self):
+        return self.received - self.rendered
+
+    def __str__(self):
+        return f"收到 {self.received} 个移动事件，渲染 {self.rendered} 次，合并 {self.dropped} 个"
+
+
+class ScreenSelector(QWidget):
+    """全屏区域选择窗口"""
+
+    # 选择完成：参数为选中的区域（窗口坐标）
+    selection_finished = pyqtSignal(QRect)
+    # 按 ESC 取消
+    selection_cancelled = pyqtSignal()
+    # 第一帧绘制完成（用于测量热键到遮罩显示的延迟）
+    first_painted = pyqtSignal(float)
+
+    def __init__(self, frame=None):
+        super().__init__()
+        self.frame = None
+
+        # True 时退回整窗重绘（用于对比性能）
+        self.full_repaint = False
+        self.paint_stats = PaintStats()
+
+        # 移动事件合并：只记录最新位置，每个刷新周期最多渲染一次
+        # False 时每个移动事件都立即更新（用于对比性能）
+        self.coalesce_moves = True
+        self.move_stats = MoveStats()
+        self.move_timer = QTimer(self)
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setTimerType(Qt.PreciseTimer)
+        self.move_timer.timeout.connect(self.flush_move)
+
+        # 放大镜（没有按下鼠标时也跟随光标，需要开启鼠标跟踪）
+        self.show_loupe = True
+        # 窗口吸附索引（window_snap.WindowIndex）和边缘图（edge_snap.EdgeMap），截图后由会话在后台算好再设置
+        self.window_index = None
+        self.edge_map = None
+
+        # 设置窗口属性
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
+        self.setCursor(Qt.CrossCursor)
+        self.setMouseTracking(True)
+
+        self.reset(frame)
+
+    def reset(self, frame):
+        """换上新的背景截图并清空选择状态（frame 为 None 时只清空）"""
+        self.move_timer.stop()
+        self.start_pos = QPoint()
+        self.end_pos = QPoint()
+        self.pending_pos = None
+        self.cursor_pos = None
+        self.hover_target = None
+        self.press_target = None
+        self.last_render_time = 0.0
+        self.selection_rect = None
+        self.first_paint_time = None
+
+        # 上一次绘制的选择框区域（边框 + 尺寸文字 + 放大镜），下次只重绘新旧区域的并集
+        self.dirty_region = QRegion()
+        self.paint_stats.reset()
+        self.move_stats.reset()
+
+        # 背景截图（只保存在内存中）
+        self.frame = frame
+        self.window_index = None
+        self.edge_map = None
+
+        # 覆盖整个虚拟桌面（所有屏幕）
+        if frame is not None and self.geometry() != frame.geometry:
+            self.setGeometry(frame.geometry)
+
+    def paintEvent(self, event):
+        """绘制背景和选择区域"""
+        if self.first_paint_time is None:
+            self.first_paint_time = time.perf_counter()
+            self.first_painted.emit(self.first_paint_time)
+
+        start = time.perf_counter()
+        painter = QPainter(self)
+        pixels = 0
+
+        # 只绘制背景中需要更新的部分
+        for area in event.region().rects():
+            pixels += area.width() * area.height()
+            if self.frame is not None:
+                self.frame.draw(painter, area)
+
+        painter.setOpacity(1.0)
+        painter.setPen(QPen(Qt.red, BORDER_WIDTH, Qt.SolidLine))
+        painter.setBrush(Qt.NoBrush)
+
+        if not self.start_pos.isNull() and not self.end_pos.isNull():
+            rect = QRect(self.start_pos, self.end_pos).normalized()
+            painter.drawRect(rect)
+
+            # 在选择框上方显示尺寸信息
+            painter.setPen(Qt.white)
+            painter.drawText(self.label_pos(rect), self.label_text(rect))
+        elif self.hover_target is not None:
+            # 悬停的窗口：高亮边框 + 标题和尺寸
+            rect = self.hover_target.rect
+            painter.setPen(QPen(HIGHLIGHT_COLOR, BORDER_WIDTH, Qt.SolidLine))
+            painter.drawRect(rect)
+            painter.setPen(Qt.white)
+            painter.drawText(self.label_pos(rect), self.highlight_text(self.hover_target))
+
+        if self.loupe_visible():
+            self.draw_loupe(painter)
+
+        painter.end()
+        self.paint_stats.add((time.perf_counter() - start) * 1000, pixels)
+
+    def label_text(self, rect):
+        """尺寸文字"""
+        return f"{rect.width()} x {rect.height()}"
+
+    def label_pos(self, rect):
+        """尺寸文字的基线位置"""
+        return rect.topLeft() + QPoint(5, -5)
+
+    def highlight_text(self, target):
+        """窗口的标题和尺寸"""
+        size = self.label_text(target.rect)
+        return f"{target.title}  {size}" if target.title else size
+
+    def selection_region(self):
+        """当前选择框需要重绘的区域：四条边框 + 尺寸文字（选择框内部没有变化，不需要重绘）"""
+        if self.start_pos.isNull() or self.end_pos.isNull():
+            if self.hover_target is not None:
+                return self.outline_region(self.hover_target.rect, self.highlight_text(self.hover_target))
+            return QRegion()
+
+        rect = QRect(self.start_pos, self.end_pos).normalized()
+        return self.outline_region(rect, self.label_text(rect))
+
+    def outline_region(self, rect, text):
+        """矩形边框 + 上方文字占用的区域"""
+        margin = BORDER_WIDTH + 1
+        outer = rect.adjusted(-margin, -margin, margin, margin)
+        inner = rect.adjusted(margin, margin, -margin, -margin)
+
+        region = QRegion(outer)
+        if inner.isValid():
+            region = region.subtracted(QRegion(inner))
+
+        label = self.fontMetrics().boundingRect(text)
+        label.translate(self.label_pos(rect))
+        return region.united(label.adjusted(-2, -2, 2, 2))
+
+    def loupe_visible(self):
+        return self.show_loupe and self.cursor_pos is not None and self.frame is not None \
+            and not self.frame.is_released()
+
+    def loupe_rect(self):
+        """放大镜（放大网格 + 颜色文字）的位置：光标右下方，靠近窗口边缘时翻到另一侧"""
+        size = LOUPE_PIXELS * LOUPE_ZOOM
+        width, height = size, size + LOUPE_LABEL_HEIGHT
+        x = self.cursor_pos.x() + LOUPE_OFFSET
+        y = self.cursor_pos.y() + LOUPE_OFFSET
+        if x + width > self.width():
+            x = self.cursor_pos.x() - LOUPE_OFFSET - width
+        if y + height > self.height():
+            y = self.cursor_pos.y() - LOUPE_OFFSET - height
+        return QRect(x, y, width, height)
+
+    def pixel_color(self, pos=None):
+        """光标（或 pos）处的像素颜色，取不到时返回 None"""
+        pos = self.cursor_pos if pos is None else pos
+        if pos is None or self.frame is None or self.frame.is_released():
+            return None
+        image, point = self.frame.image_at(pos)
+        if image is None or not image.valid(point):
+            return None
+        return QColor(image.pixel(point))
+
+    def draw_loupe(self, painter):
+        """放大镜：从缓存的 QImage 中取光标周围的像素，按最近邻放大，画网格和颜色值"""
+        loupe = self.loupe_rect()
+        size = LOUPE_PIXELS * LOUPE_ZOOM
+        grid = QRect(loupe.topLeft(), loupe.topLeft() + QPoint(size - 1, size - 1))
+        painter.fillRect(grid, Qt.black)
+
+        image, point = self.frame.image_at(self.cursor_pos)
+        if image is not None:
+            half = LOUPE_PIXELS // 2
+            source = QRect(point.x() - half, point.y() - half, LOUPE_PIXELS, LOUPE_PIXELS)
+            visible = source.intersected(image.rect())
+            if not visible.isEmpty():
+                target = QRect(grid.x() + (visible.x() - source.x()) * LOUPE_ZOOM,
+                               grid.y() + (visible.y() - source.y()) * LOUPE_ZOOM,
+                               visible.width() * LOUPE_ZOOM, visible.height() * LOUPE_ZOOM)
+                painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+                painter.drawImage(target, image, visible)
+
+        # 像素网格 + 中心像素框
+        painter.setPen(QPen(QColor(0, 0, 0, 60), 1))
+        for i in range(1, LOUPE_PIXELS):
+            offset = i * LOUPE_ZOOM
+            painter.drawLine(grid.left() + offset, grid.top(), grid.left() + offset, grid.bottom())
+            painter.drawLine(grid.left(), grid.top() + offset, grid.right(), grid.top() + offset)
+        center = LOUPE_PIXELS // 2 * LOUPE_ZOOM
+        painter.setPen(QPen(Qt.red, 1))
+        painter.drawRect(grid.x() + center, grid.y() + center, LOUPE_ZOOM, LOUPE_ZOOM)
+        painter.setPen(QPen(Qt.white, 1))
+        painter.drawRect(grid)
+
+        # 坐标和颜色值
+        label = QRect(loupe.left(), grid.bottom() + 1, loupe.width(), LOUPE_LABEL_HEIGHT)
+        painter.fillRect(label, QColor(0, 0, 0, 200))
+        color = self.pixel_color()
+        lines = [f"{self.cursor_pos.x()}, {self.cursor_pos.y()}"]
+        if color is not None:
+            lines.append(f"{color.name().upper()}  {color.red()},{color.green()},{color.blue()}")
+        painter.drawText(label.adjusted(4, 2, -2, -2), Qt.AlignLeft | Qt.AlignVCenter, "\n".join(lines))
+
+    def overlay_region(self):
+        """选择框 + 放大镜需要重绘的区域"""
+        region = self.selection_region()
+        if self.loupe_visible():
+            region = region.united(self.loupe_rect().adjusted(-1, -1, 1, 1))
+        return region
+
+    def set_window_index(self, index):
+        """设置窗口吸附索引（None = 关闭），立即按当前光标位置更新高亮"""
+        self.window_index = index
+        self.update_hover()
+        self.update_selection()
+
+    def set_edge_map(self, edge_map):
+        """设置边缘图（None = 关闭边缘吸附）"""
+        self.edge_map = edge_map
+
+    def snapped(self, pos):
+        """拖动中的角吸附到附近的边缘（没有边缘图或按住 Alt 时不吸附）"""
+        if self.edge_map is None or QApplication.keyboardModifiers() & Qt.AltModifier:
+            return pos
+        return self.edge_map.snap(pos, self.start_pos)
+
+    def update_hover(self):
+        """没有拖动时，查找光标下的窗口"""
+        if self.window_index is None or self.cursor_pos is None or not self.start_pos.isNull():
+            self.hover_target = None
+            return
+        self.hover_target = self.window_index.hit(self.cursor_pos)
+
+    def refresh_interval(self):
+        """显示器刷新间隔（秒）"""
+        screen = self.windowHandle().screen() if self.windowHandle() else None
+        screen = screen or QApplication.primaryScreen()
+        rate = screen.refreshRate() if screen else 0
+        return 1.0 / (rate if rate > 0 else DEFAULT_REFRESH_RATE)
+
+    def flush_move(self):
+        """把最新的鼠标位置渲染出来"""
+        if self.pending_pos is None:
+            return
+
+        self.cursor_pos = self.pending_pos
+        if not self.start_pos.isNull():
+            self.end_pos = self.snapped(self.pending_pos)
+        self.pending_pos = None
+        self.update_hover()
+        self.last_render_time = time.perf_counter()
+        self.move_stats.rendered += 1
+        self.update_selection()
+
+    def update_selection(self):
+        """选择框 / 放大镜变化：只重绘新旧区域的并集"""
+        if self.full_repaint:
+            self.update()
+            return
+
+        region = self.overlay_region()
+        self.update(self.dirty_region.united(region))
+        self.dirty_region = region
+
+    def mousePressEvent(self, event):
+        """鼠标按下：开始选择"""
+        if event.button() == Qt.LeftButton:
+            self.press_target = self.hover_target
+            self.start_pos = event.pos()
+            self.end_pos = event.pos()
+            self.cursor_pos = event.pos()
+            self.hover_target = None
+            self.move_stats.reset()
+            self.update_selection()
+
+    def mouseMoveEvent(self, event):
+        """鼠标移动：更新选择区域和放大镜"""
+        if self.start_pos.isNull() and not self.show_loupe and self.window_index is None:
+            return
+
+        self.pending_pos = event.pos()
+        self.move_stats.received += 1
+
+        if not self.coalesce_moves:
+            self.flush_move()
+            return
+
+        # 本刷新周期内已经渲染过：等到下一个周期再渲染最新位置
+        if not self.move_timer.isActive():
+            elapsed = time.perf_counter() - self.last_render_time
+            delay = max(0.0, self.refresh_interval() - elapsed)
+            self.move_timer.start(int(delay * 1000))
+
+    def mouseReleaseEvent(self, event):
+        """鼠标释放：完成选择"""
+        if event.button() == Qt.LeftButton:
+            # 松开时的位置总是生效，丢弃尚未渲染的移动
+            self.move_timer.stop()
+            self.pending_pos = None
+            # 单击（几乎没有拖动）：选中按下时高亮的窗口；按实际光标位置判断，不用吸附后的位置
+            moved = (event.pos() - self.start_pos).manhattanLength()
+            if self.press_target is not None and moved <= CLICK_DISTANCE:
+                self.end_pos = event.pos()
+                self.selection_rect = self.press_target.rect.intersected(self.rect())
+                print(f"已选中窗口: {self.highlight_text(self.press_target)}")
+            else:
+                self.end_pos = self.snapped(event.pos())
+                self.selection_rect = QRect(self.start_pos, self.end_pos).normalized()
+            print("区域选择完成！")
+            print(f"[绘制] {self.paint_stats}")
+            print(f"[移动] {self.move_stats}")
+            # 先发信号再关闭：接收方可以在选择窗口关闭前显示预览窗口
+            self.selection_finished.emit(self.selection_rect)
+            self.close()
+
+    def keyPressEvent(self, event):
+        """按键事件：ESC 取消，C 复制光标处的颜色值"""
+        if event.key() == Qt.Key_C:
+            color = self.pixel_color()
+            if color is not None:
+                QApplication.clipboard().setText(color.name().upper())
+                print(f"已复制颜色 {color.name().upper()}（RGB {color.red()}, {color.green()}, {color.blue()}）")
+            return
+
+        if event.key() == Qt.Key_Escape:
+            print("已取消截图")
+            self.move_timer.stop()
+            self.selection_rect = None
+            self.selection_cancelled.emit()
+            self.close()
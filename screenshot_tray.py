@@ -4,11 +4,8 @@ Windows 截图工具 - 托盘版（无需快捷键库）
 特点：无需 keyboard 库，使用 Windows API 注册热键
 """
 import sys
-import os
 import platform
-from datetime import datetime
 import ctypes
-from ctypes import wintypes
 
 # 检查系统
 if platform.system() != "Windows":
@@ -16,17 +13,19 @@ if platform.system() != "Windows":
     sys.exit(1)
 
 try:
-    from PyQt5.QtWidgets import (QApplication, QWidget, QLabel,
-                                  QPushButton, QVBoxLayout, QHBoxLayout,
-                                  QFileDialog, QMessageBox, QSystemTrayIcon,
-                                  QMenu, QAction)
-    from PyQt5.QtCore import Qt, QPoint, QRect
-    from PyQt5.QtGui import QPixmap, QPainter, QPen, QIcon, QKeySequence
+    from PyQt5.QtWidgets import (QApplication, QWidget, QMessageBox,
+                                  QSystemTrayIcon, QMenu, QAction)
+    from PyQt5.QtCore import Qt
 except ImportError:
     print("错误: 未安装 PyQt5")
     print("请运行: pip install PyQt5")
     sys.exit(1)
 
+from capture_session import CaptureSession
+from float_preview import FloatPreview
+from image_saver import ImageSaver
+from image_clipboard import ImageClipboard
+
 # ==================== Windows 热键 API ====================
 user32 = ctypes.windll.user32
 
@@ -49,204 +48,6 @@ def unregister_hotkey(hwnd, id):
     return user32.UnregisterHotKey(hwnd, id)
 
 
-# ==================== 区域选择窗口 ====================
-class ScreenSelector(QWidget):
-    """全屏区域选择窗口"""
-
-    def __init__(self):
-        super().__init__()
-        self.start_pos = QPoint()
-        self.end_pos = QPoint()
-        self.selection_rect = None
-        self.screen_pixmap = None
-
-        # 先截取整个屏幕作为背景
-        self.capture_screen()
-
-        # 设置窗口属性
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
-        self.setCursor(Qt.CrossCursor)
-
-        # 显示全屏
-        screen = QApplication.desktop().screenGeometry()
-        self.setGeometry(0, 0, screen.width(), screen.height())
-
-    def capture_screen(self):
-        """截取整个屏幕作为背景"""
-        try:
-            app = QApplication.instance()
-            if not app:
-                app = QApplication([])
-
-            screen = QApplication.primaryScreen()
-            self.screen_pixmap = screen.grabWindow(0)
-
-            import tempfile
-            self.temp_file = tempfile.mktemp(suffix='.png')
-            self.screen_pixmap.save(self.temp_file)
-
-            print(f"✓ 屏幕截图成功: {self.screen_pixmap.width()}x{self.screen_pixmap.height()}")
-
-        except Exception as e:
-            print(f"截图背景失败: {e}")
-            import traceback
-            traceback.print_exc()
-
-            screen = QApplication.desktop().screenGeometry()
-            self.screen_pixmap = QPixmap(screen.width(), screen.height())
-            self.screen_pixmap.fill(Qt.black)
-            print(f"使用黑色背景: {screen.width()}x{screen.height()}")
-
-    def paintEvent(self, event):
-        """绘制背景和选择区域"""
-        painter = QPainter(self)
-
-        if self.screen_pixmap:
-            painter.drawPixmap(0, 0, self.screen_pixmap)
-
-        painter.setOpacity(1.0)
-        painter.setPen(QPen(Qt.red, 2, Qt.SolidLine))
-        painter.setBrush(Qt.NoBrush)
-
-        if not self.start_pos.isNull() and not self.end_pos.isNull():
-            rect = QRect(self.start_pos, self.end_pos).normalized()
-            painter.drawRect(rect)
-
-            size_text = f"{rect.width()} x {rect.height()}"
-            painter.setPen(Qt.white)
-            painter.drawText(rect.topLeft() + QPoint(5, -5), size_text)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.start_pos = event.pos()
-            self.end_pos = event.pos()
-            self.update()
-
-    def mouseMoveEvent(self, event):
-        if not self.start_pos.isNull():
-            self.end_pos = event.pos()
-            self.update()
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.end_pos = event.pos()
-            self.selection_rect = QRect(self.start_pos, self.end_pos).normalized()
-            print("区域选择完成！")
-            self.cleanup_temp_file()
-            self.close()
-
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Escape:
-            print("已取消截图")
-            self.selection_rect = None
-            self.cleanup_temp_file()
-            self.close()
-
-    def cleanup_temp_file(self):
-        try:
-            if hasattr(self, 'temp_file') and os.path.exists(self.temp_file):
-                os.remove(self.temp_file)
-        except:
-            pass
-
-
-# ==================== 悬浮预览窗口 ====================
-class FloatPreview(QWidget):
-    """悬浮预览窗口"""
-
-    def __init__(self, pixmap):
-        super().__init__()
-        self.pixmap = pixmap
-
-        self.setWindowTitle("截图预览")
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
-        self.resize(pixmap.width(), pixmap.height() + 60)
-        self.drag_position = None
-
-        self.create_ui()
-
-    def create_ui(self):
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-
-        self.image_label = QLabel()
-        self.image_label.setPixmap(self.pixmap)
-        self.image_label.setStyleSheet("""
-            QLabel {
-                background-color: #333;
-                border: 2px solid #555;
-            }
-        """)
-        layout.addWidget(self.image_label)
-
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(10, 10, 10, 10)
-
-        self.save_btn = QPushButton("💾 保存")
-        self.save_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        self.save_btn.clicked.connect(self.save_image)
-        button_layout.addWidget(self.save_btn)
-
-        self.close_btn = QPushButton("✖ 关闭")
-        self.close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #da190b;
-            }
-        """)
-        self.close_btn.clicked.connect(self.close)
-        button_layout.addWidget(self.close_btn)
-
-        layout.addLayout(button_layout)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
-
-    def mouseMoveEvent(self, event):
-        if event.buttons() == Qt.LeftButton and self.drag_position:
-            self.move(event.globalPos() - self.drag_position)
-
-    def save_image(self):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_filename = f"截图_{timestamp}.png"
-        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-
-        file_path, _ = QFileDialog.getSaveFileName(
-            self,
-            "保存截图",
-            os.path.join(desktop_path, default_filename),
-            "PNG 图片 (*.png);;所有文件 (*.*)"
-        )
-
-        if file_path:
-            try:
-                self.pixmap.save(file_path)
-                QMessageBox.information(self, "保存成功", f"截图已保存到:\n{file_path}")
-                self.close()
-            except Exception as e:
-                QMessageBox.critical(self, "保存失败", f"保存失败:\n{str(e)}")
-
-
 # ==================== 系统托盘应用（Windows API 版）====================
 class ScreenshotApp:
     """截图应用主类（使用 Windows API 热键）"""
@@ -271,6 +72,16 @@ class ScreenshotApp:
         self.hotkey_registered = False
         self.register_windows_hotkeys(hwnd)
 
+        # 截图会话（信号驱动，不阻塞事件循环）
+        # 预览窗口只创建一次，保存在应用共享的后台线程池中进行，结果通过托盘消息 / 对话框提示
+        self.image_saver = ImageSaver()
+        self.image_saver.saved.connect(self.on_saved)
+        self.image_saver.failed.connect(self.on_save_failed)
+        self.image_clipboard = ImageClipboard()
+        self.preview = FloatPreview(saver=self.image_saver, clipboard=self.image_clipboard)
+        self.capture_session = CaptureSession()
+        self.capture_session.captured.connect(self.show_preview)
+
         # 创建托盘图标
         self.create_tray_icon()
 
@@ -368,37 +179,17 @@ class ScreenshotApp:
         )
 
     def start_screenshot(self):
-        """开始截图"""
+        """开始截图（立即返回，结果通过信号回调）"""
         print("\n[截图] 触发截图...")
+        self.capture_session.start()
 
-        selector = ScreenSelector()
-        selector.show()
-        selector.raise_()
-        selector.activateWindow()
-
-        print("请按住鼠标左键拖动选择截图区域")
-        print("按 ESC 键取消")
-
-        while selector.isVisible():
-            self.app.processEvents()
-
-        if not selector.selection_rect or selector.selection_rect.isEmpty():
-            print("未选择区域，已取消")
-            return
-
+    def show_preview(self, pixmap, rect):
+        """截图完成：显示悬浮预览"""
         try:
-            rect = selector.selection_rect
-
-            print(f"截取区域: x={rect.x()}, y={rect.y()}, w={rect.width()}, h={rect.height()}")
-
-            pixmap = selector.screen_pixmap.copy(rect.x(), rect.y(), rect.width(), rect.height())
-
-            print(f"✓ 截图成功: {pixmap.width()}x{pixmap.height()}")
-
-            preview = FloatPreview(pixmap)
-            preview.show()
-
-            preview.exec_()
+            self.preview.set_pixmap(pixmap)
+            self.preview.show()
+            self.preview.raise_()
+            self.preview.activateWindow()
 
             print("✓ 截图完成")
 
@@ -408,10 +199,24 @@ class ScreenshotApp:
             import traceback
             traceback.print_exc()
 
+    def on_saved(self, path):
+        """后台保存完成"""
+        self.tray_icon.showMessage("保存成功", f"截图已保存到:\n{path}",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def on_save_failed(self, path, error):
+        """后台保存失败"""
+        QMessageBox.critical(None, "保存失败", f"保存失败:\n{path}\n{error}")
+
     def quit_app(self):
         """退出应用"""
         print("\n退出程序...")
 
+        # 等待排队中的标注合成和保存任务
+        self.preview.wait_for_done()
+        self.image_saver.wait_for_done()
+        self.image_clipboard.shutdown()
+
         # 取消注册热键
         if self.hotkey_registered:
             try:
@@ -3,11 +3,12 @@ Windows 截图工具 - 托盘版（改进热键）
 功能：系统托盘 + Windows 原生热键（修复版）
 特点：正确处理 Windows 热键消息
 """
-import sys
 import os
+import sys
 import platform
-from datetime import datetime
+import time
 import ctypes
+from datetime import datetime
 from ctypes import wintypes
 
 # 检查系统
@@ -16,17 +17,40 @@ if platform.system() != "Windows":
     sys.exit(1)
 
 try:
-    from PyQt5.QtWidgets import (QApplication, QWidget, QLabel,
-                                  QPushButton, QVBoxLayout, QHBoxLayout,
-                                  QFileDialog, QMessageBox, QSystemTrayIcon,
-                                  QMenu, QAction, QDialog)
-    from PyQt5.QtCore import Qt, QPoint, QRect
-    from PyQt5.QtGui import QPixmap, QPainter, QPen, QIcon
+    from PyQt5.QtWidgets import (QApplication, QWidget, QMessageBox,
+                                  QSystemTrayIcon, QMenu, QAction, QActionGroup)
+    from PyQt5.QtCore import Qt, pyqtSignal, QSettings, QUrl
+    from PyQt5.QtGui import QPixmap, QDesktopServices
 except ImportError:
     print("错误: 未安装 PyQt5")
     print("请运行: pip install PyQt5")
     sys.exit(1)
 
+import image_formats
+from capture_history import CaptureHistory
+from capture_library import CaptureLibrary
+from capture_session import CaptureSession
+from float_preview import FloatPreview
+from gallery_window import GalleryWindow
+from image_saver import ImageSaver
+from image_clipboard import ImageClipboard
+from hotkeys import HotkeyDispatcher, parse_hotkey, hotkey_label
+from image_hash import content_hash as compute_content_hash
+import recorder
+from recorder import ClipRecorder
+from region_watch import RegionWatcher, ScreenRegionSource
+from screen_capture import screen_name_at
+import scroll_stitch
+from scroll_stitch import ScrollCapture
+import timelapse
+from timelapse import TimelapseRecorder
+
+# 托盘菜单"最近截图"中列出的条数
+HISTORY_MENU_ENTRIES = 10
+# "复制最近截图"的全局热键（设置项 copy_hotkey 可以修改）
+# 不用 Ctrl + Shift + C：终端复制、浏览器开发者工具等很多程序都在用，全局注册会抢走它
+DEFAULT_COPY_HOTKEY = "Ctrl+Alt+Shift+C"
+
 # ==================== Windows API ====================
 user32 = ctypes.windll.user32
 
@@ -62,13 +86,14 @@ def unregister_hotkey(hwnd, id):
 
 # ==================== 热键窗口（接收热键消息）====================
 class HotkeyWindow(QWidget):
-    """隐藏窗口，用于接收热键消息"""
+    """隐藏窗口，用于接收热键消息（Win32 热键来源）"""
 
-    hotkey_triggered = None  # 信号
+    # 热键按下：参数为热键 ID，由 HotkeyDispatcher 排队接收
+    hotkey_pressed = pyqtSignal(int)
 
-    def __init__(self):
+    def __init__(self, copy_hotkey=DEFAULT_COPY_HOTKEY):
         super().__init__()
-        self.hotkey_triggered = False
+        self.copy_hotkey = copy_hotkey
 
         # 创建隐藏窗口
         self.setWindowFlags(Qt.FramelessWindowHint)
@@ -108,7 +133,18 @@ class HotkeyWindow(QWidget):
         else:
             print("✗ 热键 3 注册失败: Ctrl + Shift + X")
 
-        if success1 or success2 or success3:
+        # 热键 4: 复制最近截图（可配置，默认 Ctrl + Alt + Shift + C）
+        label = hotkey_label(self.copy_hotkey)
+        parsed = parse_hotkey(self.copy_hotkey)
+        success4 = parsed is not None and register_hotkey(self.hwnd, 4, *parsed)
+        if success4:
+            print(f"✓ 热键 4 注册成功: {label}")
+        elif parsed is None:
+            print(f"✗ 热键 4 格式不支持: {self.copy_hotkey}（需要修饰键 + 字母 / 数字 / F1-F24）")
+        else:
+            print(f"✗ 热键 4 注册失败: {label}")
+
+        if success1 or success2 or success3 or success4:
             print("\n✓ 热键注册完成！")
             return True
         else:
@@ -135,9 +171,11 @@ class HotkeyWindow(QWidget):
                     print("✓ 触发: Ctrl + Alt + S")
                 elif hotkey_id == 3:
                     print("✓ 触发: Ctrl + Shift + X")
+                elif hotkey_id == 4:
+                    print(f"✓ 触发: {hotkey_label(self.copy_hotkey)}")
 
-                # 设置触发标志
-                self.hotkey_triggered = True
+                # 立即发出信号（排队分发，不在原生消息处理中执行截图）
+                self.hotkey_pressed.emit(hotkey_id)
 
                 # 返回已处理
                 return True, 0
@@ -150,208 +188,10 @@ class HotkeyWindow(QWidget):
         unregister_hotkey(self.hwnd, 1)
         unregister_hotkey(self.hwnd, 2)
         unregister_hotkey(self.hwnd, 3)
+        unregister_hotkey(self.hwnd, 4)
         print("✓ 热键已取消")
 
 
-# ==================== 区域选择窗口 ====================
-class ScreenSelector(QWidget):
-    """全屏区域选择窗口"""
-
-    def __init__(self):
-        super().__init__()
-        self.start_pos = QPoint()
-        self.end_pos = QPoint()
-        self.selection_rect = None
-        self.screen_pixmap = None
-
-        # 先截取整个屏幕作为背景
-        self.capture_screen()
-
-        # 设置窗口属性
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
-        self.setCursor(Qt.CrossCursor)
-
-        # 显示全屏
-        screen = QApplication.desktop().screenGeometry()
-        self.setGeometry(0, 0, screen.width(), screen.height())
-
-    def capture_screen(self):
-        """截取整个屏幕作为背景"""
-        try:
-            app = QApplication.instance()
-            if not app:
-                app = QApplication([])
-
-            screen = QApplication.primaryScreen()
-            self.screen_pixmap = screen.grabWindow(0)
-
-            import tempfile
-            self.temp_file = tempfile.mktemp(suffix='.png')
-            self.screen_pixmap.save(self.temp_file)
-
-            print(f"✓ 屏幕截图成功: {self.screen_pixmap.width()}x{self.screen_pixmap.height()}")
-
-        except Exception as e:
-            print(f"截图背景失败: {e}")
-            import traceback
-            traceback.print_exc()
-
-            screen = QApplication.desktop().screenGeometry()
-            self.screen_pixmap = QPixmap(screen.width(), screen.height())
-            self.screen_pixmap.fill(Qt.black)
-            print(f"使用黑色背景: {screen.width()}x{screen.height()}")
-
-    def paintEvent(self, event):
-        """绘制背景和选择区域"""
-        painter = QPainter(self)
-
-        if self.screen_pixmap:
-            painter.drawPixmap(0, 0, self.screen_pixmap)
-
-        painter.setOpacity(1.0)
-        painter.setPen(QPen(Qt.red, 2, Qt.SolidLine))
-        painter.setBrush(Qt.NoBrush)
-
-        if not self.start_pos.isNull() and not self.end_pos.isNull():
-            rect = QRect(self.start_pos, self.end_pos).normalized()
-            painter.drawRect(rect)
-
-            size_text = f"{rect.width()} x {rect.height()}"
-            painter.setPen(Qt.white)
-            painter.drawText(rect.topLeft() + QPoint(5, -5), size_text)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.start_pos = event.pos()
-            self.end_pos = event.pos()
-            self.update()
-
-    def mouseMoveEvent(self, event):
-        if not self.start_pos.isNull():
-            self.end_pos = event.pos()
-            self.update()
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.end_pos = event.pos()
-            self.selection_rect = QRect(self.start_pos, self.end_pos).normalized()
-            print("区域选择完成！")
-            self.cleanup_temp_file()
-            self.close()
-
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Escape:
-            print("已取消截图")
-            self.selection_rect = None
-            self.cleanup_temp_file()
-            self.close()
-
-    def cleanup_temp_file(self):
-        try:
-            if hasattr(self, 'temp_file') and os.path.exists(self.temp_file):
-                os.remove(self.temp_file)
-        except:
-            pass
-
-
-# ==================== 悬浮预览窗口 ====================
-class FloatPreview(QDialog):
-    """悬浮预览窗口"""
-
-    def __init__(self, pixmap):
-        super().__init__()
-        self.pixmap = pixmap
-        self.setModal(True)  # 设置为模态对话框
-
-        self.setWindowTitle("截图预览")
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
-        self.resize(pixmap.width(), pixmap.height() + 60)
-        self.drag_position = None
-
-        self.create_ui()
-
-    def create_ui(self):
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-
-        self.image_label = QLabel()
-        self.image_label.setPixmap(self.pixmap)
-        self.image_label.setStyleSheet("""
-            QLabel {
-                background-color: #333;
-                border: 2px solid #555;
-            }
-        """)
-        layout.addWidget(self.image_label)
-
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(10, 10, 10, 10)
-
-        self.save_btn = QPushButton("💾 保存")
-        self.save_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        self.save_btn.clicked.connect(self.save_image)
-        button_layout.addWidget(self.save_btn)
-
-        self.close_btn = QPushButton("✖ 关闭")
-        self.close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #da190b;
-            }
-        """)
-        self.close_btn.clicked.connect(self.close)
-        button_layout.addWidget(self.close_btn)
-
-        layout.addLayout(button_layout)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
-
-    def mouseMoveEvent(self, event):
-        if event.buttons() == Qt.LeftButton and self.drag_position:
-            self.move(event.globalPos() - self.drag_position)
-
-    def save_image(self):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_filename = f"截图_{timestamp}.png"
-        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-
-        file_path, _ = QFileDialog.getSaveFileName(
-            self,
-            "保存截图",
-            os.path.join(desktop_path, default_filename),
-            "PNG 图片 (*.png);;所有文件 (*.*)"
-        )
-
-        if file_path:
-            try:
-                self.pixmap.save(file_path)
-                QMessageBox.information(self, "保存成功", f"截图已保存到:\n{file_path}")
-                self.close()
-            except Exception as e:
-                QMessageBox.critical(self, "保存失败", f"保存失败:\n{str(e)}")
-
-
 # ==================== 系统托盘应用（改进热键版）====================
 class ScreenshotApp:
     """截图应用主类（改进热键处理）"""
@@ -361,17 +201,81 @@ class ScreenshotApp:
         self.app.setApplicationName("Windows 截图工具")
         self.app.setQuitOnLastWindowClosed(False)
 
+        self.settings = QSettings("ScreenshotTool", "ScreenshotTray")
+        self.copy_hotkey = self.settings.value("copy_hotkey", DEFAULT_COPY_HOTKEY)
+
         # 创建热键窗口（用于接收热键消息）
-        self.hotkey_window = HotkeyWindow()
+        self.hotkey_window = HotkeyWindow(self.copy_hotkey)
+
+        # 截图会话（信号驱动，不阻塞事件循环）
+        # 选择窗口和预览窗口都预先创建好，热键触发时只换图片再显示
+        # 保存在后台线程池中进行，结果通过托盘消息提示
+        self.image_saver = ImageSaver()
+        self.image_saver.set_output_format(
+            self.settings.value("output_format", image_formats.DEFAULT_FORMAT))
+        self.image_saver.saved.connect(self.on_saved)
+        self.image_saver.failed.connect(self.on_save_failed)
+
+        # 截图库：快速保存写入按日期分片的目录，并记录到 SQLite 索引
+        self.library = CaptureLibrary(self.settings.value("library_dir") or None)
+        self.library.set_output_format(self.image_saver.output_format)
+        self.library.saved.connect(self.on_library_saved)
+        self.library.failed.connect(self.on_save_failed)
+        # 感知哈希索引在后台加载，加载完成后再显示等待中的相似截图结果
+        self.library.similarity_ready.connect(self.on_similarity_ready)
+        self.similar_pending = False
+
+        # 剪贴板：复制时不编码，PNG 在目标程序请求时才生成
+        self.image_clipboard = ImageClipboard()
+        self.image_clipboard.copied.connect(self.on_copied)
+
+        self.preview = FloatPreview(saver=self.image_saver, library=self.library, recordable=True,
+                                    clipboard=self.image_clipboard)
+        self.preview.record_requested.connect(self.start_recording)
+        # 截图画廊（第一次打开时创建）
+        self.gallery = None
+        self.capture_session = CaptureSession(prewarm=True)
+        self.capture_session.captured.connect(self.show_preview)
+        self.capture_session.cancelled.connect(self.on_capture_cancelled)
+
+        # 定时截图 / 区域监视需要先框选区域时借用截图会话，选择完成后调用 region_callback
+        self.region_callback = None
+
+        # 定时截图：文件保存在截图库下的 timelapse 目录
+        self.timelapse = TimelapseRecorder(os.path.join(self.library.root, "timelapse"))
+        self.timelapse.failed.connect(
+            lambda error: QMessageBox.critical(None, "定时截图失败", f"定时截图已停止:\n{error}"))
+
+        # 区域录制：动画保存在截图库下的 recordings 目录
+        self.recorder = ClipRecorder()
+        self.recorder.finished.connect(self.on_recording_saved)
+        self.recorder.failed.connect(self.on_save_failed)
+        self.recorder.failed.connect(lambda *_: self.record_action.setText("🎬 录制区域..."))
+
+        # 滚动截图：长图保存在截图库下的 scrolling 目录
+        self.scroll_capture = ScrollCapture()
+        self.scroll_capture.finished.connect(self.on_scroll_saved)
+        self.scroll_capture.failed.connect(self.on_save_failed)
+
+        # 区域监视：区域内容变化时截图并存入截图库
+        self.region_watcher = RegionWatcher()
+        self.region_watcher.changed.connect(self.on_region_changed)
+        self.watched_rect = None
+
+        # 截图历史：预览关闭后还能从托盘菜单找回（内存预算可在设置中修改，单位 MB）
+        budget_mb = int(self.settings.value("history_budget_mb", 256))
+        self.history = CaptureHistory(memory_budget=budget_mb * 1024 * 1024)
 
         # 创建托盘图标
         self.create_tray_icon()
 
-        # 设置定时器检查热键触发
-        from PyQt5.QtCore import QTimer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_hotkey)
-        self.timer.start(100)  # 每 100ms 检查一次
+        # 热键分发：热键 ID → 动作
+        self.hotkey_dispatcher = HotkeyDispatcher()
+        self.hotkey_dispatcher.register(1, self.start_screenshot, "Ctrl + Shift + S → 截图")
+        self.hotkey_dispatcher.register(2, self.start_screenshot, "Ctrl + Alt + S → 截图")
+        self.hotkey_dispatcher.register(3, self.start_screenshot, "Ctrl + Shift + X → 截图")
+        self.hotkey_dispatcher.register(4, self.copy_latest, f"{hotkey_label(self.copy_hotkey)} → 复制最近截图")
+        self.hotkey_dispatcher.attach(self.hotkey_window)
 
         print("=" * 60)
         print("  Windows 截图工具 - 托盘版（改进热键）")
@@ -383,6 +287,7 @@ class ScreenshotApp:
         print(f"  • Ctrl + Shift + S (主)")
         print(f"  • Ctrl + Alt + S   (新增)")
         print(f"  • Ctrl + Shift + X (备用)")
+        print(f"  • {hotkey_label(self.copy_hotkey)} (复制最近截图)")
         print()
         print(f"托盘操作:")
         print(f"  • 双击托盘图标 → 截图")
@@ -408,6 +313,71 @@ class ScreenshotApp:
         screenshot_action.triggered.connect(self.start_screenshot)
         menu.addAction(screenshot_action)
 
+        # 最近截图（每次打开菜单时重新生成）
+        self.history_menu = menu.addMenu("🕘 最近截图")
+        self.history_menu.aboutToShow.connect(self.update_history_menu)
+
+        # 复制最近一张截图到剪贴板
+        copy_action = QAction("📋 复制最近截图", None)
+        copy_action.triggered.connect(self.copy_latest)
+        menu.addAction(copy_action)
+
+        # 快速保存模式：截图后不显示预览，直接存入截图库
+        self.quick_save_action = QAction("⚡ 快速保存模式", None)
+        self.quick_save_action.setCheckable(True)
+        self.quick_save_action.setChecked(self.settings.value("quick_save", False, type=bool))
+        self.quick_save_action.toggled.connect(lambda on: self.settings.setValue("quick_save", on))
+        menu.addAction(self.quick_save_action)
+
+        # 定时截图（每次打开菜单时按录制状态更新）
+        self.timelapse_menu = menu.addMenu("⏱ 定时截图")
+        self.timelapse_menu.aboutToShow.connect(self.update_timelapse_menu)
+        self.timelapse_menu.setEnabled(timelapse.NUMPY_AVAILABLE)
+
+        # 区域录制（GIF / APNG）
+        self.record_action = QAction("🎬 录制区域...", None)
+        self.record_action.triggered.connect(self.toggle_recording)
+        self.record_action.setEnabled(recorder.NUMPY_AVAILABLE)
+        menu.addAction(self.record_action)
+
+        # 滚动截图（长图）
+        self.scroll_action = QAction("📜 滚动截图...", None)
+        self.scroll_action.triggered.connect(self.toggle_scroll_capture)
+        self.scroll_action.setEnabled(scroll_stitch.NUMPY_AVAILABLE)
+        menu.addAction(self.scroll_action)
+
+        # 区域监视
+        self.watch_action = QAction("👁 监视区域...", None)
+        self.watch_action.triggered.connect(self.toggle_region_watch)
+        menu.addAction(self.watch_action)
+
+        # 截图画廊
+        gallery_action = QAction("🖼 截图画廊", None)
+        gallery_action.triggered.connect(self.show_all_captures)
+        menu.addAction(gallery_action)
+
+        # 在截图库中查找与最近一张截图相似的截图
+        similar_action = QAction("🔍 查找相似截图", None)
+        similar_action.triggered.connect(self.find_similar)
+        menu.addAction(similar_action)
+
+        # 打开截图库目录
+        library_action = QAction("📁 打开截图库", None)
+        library_action.triggered.connect(
+            lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(self.library.root)))
+        menu.addAction(library_action)
+
+        # 保存格式（选择后记住，下次启动沿用）
+        format_menu = menu.addMenu("💾 保存格式")
+        self.format_group = QActionGroup(format_menu)
+        for fmt in image_formats.available_formats():
+            action = QAction(fmt.label, self.format_group)
+            action.setCheckable(True)
+            action.setChecked(fmt is self.image_saver.output_format)
+            action.setData(fmt.key)
+            format_menu.addAction(action)
+        self.format_group.triggered.connect(self.set_output_format)
+
         menu.addSeparator()
 
         # 测试热键
@@ -423,7 +393,9 @@ class ScreenshotApp:
         menu.addAction(quit_action)
 
         # 设置托盘提示
-        self.tray_icon.setToolTip("Windows 截图工具\n\n快捷键:\n• Ctrl + Shift + S\n• Ctrl + Alt + S\n• Ctrl + Shift + X\n\n双击托盘图标也可以截图")
+        copy_label = hotkey_label(self.copy_hotkey)
+        self.tray_icon.setToolTip("Windows 截图工具\n\n快捷键:\n• Ctrl + Shift + S\n• Ctrl + Alt + S\n• Ctrl + Shift + X\n"
+                                  f"• {copy_label}（复制最近截图）\n\n双击托盘图标也可以截图")
 
         self.tray_icon.setContextMenu(menu)
         self.tray_icon.show()
@@ -434,7 +406,8 @@ class ScreenshotApp:
         # 显示启动提示
         self.tray_icon.showMessage(
             "截图工具已启动",
-            "快捷键:\n• Ctrl + Shift + S\n• Ctrl + Alt + S\n• Ctrl + Shift + X\n\n双击托盘图标也可以截图",
+            "快捷键:\n• Ctrl + Shift + S\n• Ctrl + Alt + S\n• Ctrl + Shift + X\n"
+            f"• {copy_label}（复制最近截图）\n\n双击托盘图标也可以截图",
             QSystemTrayIcon.Information,
             3000
         )
@@ -451,69 +424,319 @@ class ScreenshotApp:
         QMessageBox.information(
             None,
             "热键测试",
-            "请按下快捷键进行测试：\n\n• Ctrl + Shift + S\n• Ctrl + Alt + S  (新增)\n• Ctrl + Shift + X\n\n"
+            "请按下快捷键进行测试：\n\n• Ctrl + Shift + S\n• Ctrl + Alt + S  (新增)\n• Ctrl + Shift + X\n"
+            f"• {hotkey_label(self.copy_hotkey)}  (复制最近截图)\n\n"
             "如果热键工作正常，控制台会显示提示信息。\n\n如果没反应，请：\n1. 以管理员身份运行\n"
             "2. 关闭其他截图工具\n3. 使用双击托盘图标截图"
         )
 
-    def check_hotkey(self):
-        """定时检查热键是否被触发"""
-        if hasattr(self.hotkey_window, 'hotkey_triggered') and self.hotkey_window.hotkey_triggered:
-            self.hotkey_window.hotkey_triggered = False
-            print("[检测] 热键触发，开始截图...")
-            self.start_screenshot()
-
     def start_screenshot(self):
-        """开始截图"""
+        """开始截图（立即返回，结果通过信号回调）"""
         print("\n[截图] 开始截图...")
+        self.capture_session.start()
+
+    def show_preview(self, pixmap, rect):
+        """截图完成：加入历史并显示悬浮预览（快速保存模式下直接存入截图库）"""
+        try:
+            rect = self.capture_session.global_rect(rect)
+            if self.region_callback is not None:
+                callback, self.region_callback = self.region_callback, None
+                callback(rect)
+                return
 
-        selector = ScreenSelector()
-        selector.show()
-        selector.raise_()
-        selector.activateWindow()
+            screen = screen_name_at(rect)
+            content_hash = self.capture_session.content_hash
+            self.history.add(pixmap, rect, content_hash)
 
-        print("请按住鼠标左键拖动选择截图区域")
-        print("按 ESC 键取消")
+            if self.quick_save_action.isChecked():
+                self.library.quick_save(pixmap, rect, screen, content_hash=content_hash)
+                return
 
-        while selector.isVisible():
-            self.app.processEvents()
+            self.preview.set_pixmap(pixmap, rect, screen, content_hash)
+            self.preview.show()
+            self.preview.raise_()
+            self.preview.activateWindow()
 
-        if not selector.selection_rect or selector.selection_rect.isEmpty():
-            print("未选择区域，已取消")
+            print("✓ 截图完成")
+
+        except Exception as e:
+            QMessageBox.critical(None, "截图失败", f"截图失败:\n{str(e)}")
+            print(f"错误详情: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def on_capture_cancelled(self):
+        self.region_callback = None
+
+    def select_region(self, callback):
+        """框选一个区域，完成后以全局坐标区域调用 callback"""
+        if self.capture_session.start():
+            self.region_callback = callback
+
+    def update_timelapse_menu(self):
+        """定时截图菜单：未录制时选择范围，录制中显示进度和停止"""
+        self.timelapse_menu.clear()
+        if self.timelapse.is_active():
+            self.timelapse_menu.addAction(self.timelapse.stats()).setEnabled(False)
+            self.timelapse_menu.addAction("⏹ 停止").triggered.connect(self.stop_timelapse)
+        else:
+            self.timelapse_menu.addAction("整个屏幕").triggered.connect(lambda: self.start_timelapse())
+            self.timelapse_menu.addAction("选择区域...").triggered.connect(
+                lambda: self.select_region(self.start_timelapse))
+        self.timelapse_menu.addSeparator()
+        self.timelapse_menu.addAction("📁 打开定时截图目录").triggered.connect(
+            lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(self.timelapse.directory)))
+
+    def start_timelapse(self, rect=None):
+        """开始定时截图（间隔可在设置中修改，单位秒）"""
+        interval_s = float(self.settings.value("timelapse_interval_s", timelapse.DEFAULT_INTERVAL_S))
+        try:
+            self.timelapse.start(rect, interval_s)
+        except Exception as e:
+            QMessageBox.critical(None, "定时截图失败", f"定时截图失败:\n{e}")
             return
+        self.tray_icon.showMessage("定时截图已开始", f"每 {interval_s:g} 秒截图一次\n{self.timelapse.writer.path}",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def stop_timelapse(self):
+        stats = self.timelapse.stats()
+        path = self.timelapse.stop()
+        if path:
+            self.tray_icon.showMessage("定时截图已停止", f"{stats}\n{path}", QSystemTrayIcon.Information, 3000)
+
+    def toggle_recording(self):
+        """开始录制（先框选区域）或停止录制"""
+        if self.recorder.is_active():
+            self.stop_recording()
+            return
+        self.select_region(self.start_recording)
+
+    def start_recording(self, rect):
+        """录制区域（格式和帧率可在设置中修改：record_format = gif / apng，record_fps）"""
+        extension = ".gif" if self.settings.value("record_format", "gif") == "gif" else ".png"
+        fps = int(self.settings.value("record_fps", recorder.DEFAULT_FPS))
+        name = datetime.now().strftime("%Y%m%d_%H%M%S") + extension
+        path = os.path.join(self.library.root, "recordings", name)
+        try:
+            self.recorder.start(ScreenRegionSource(rect), path, fps)
+        except Exception as e:
+            QMessageBox.critical(None, "录制失败", f"录制失败:\n{e}")
+            return
+        self.record_action.setText("⏹ 停止录制")
+        self.tray_icon.showMessage("开始录制", f"{rect.width()} x {rect.height()}，{fps} 帧/秒\n"
+                                   f"再次点击托盘菜单中的\"停止录制\"结束",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def stop_recording(self):
+        self.recorder.stop()
+        self.record_action.setText("🎬 录制区域...")
+
+    def on_recording_saved(self, path):
+        self.record_action.setText("🎬 录制区域...")
+        self.tray_icon.showMessage("录制已保存", path, QSystemTrayIcon.Information, 3000)
+
+    def toggle_scroll_capture(self):
+        """开始滚动截图（先框选要滚动的区域）或完成滚动截图"""
+        if self.scroll_capture.is_active():
+            self.scroll_capture.stop()
+            self.scroll_action.setText("📜 滚动截图...")
+            return
+        self.select_region(self.start_scroll_capture)
 
+    def start_scroll_capture(self, rect):
+        """开始滚动截图（采样间隔可在设置中修改：scroll_interval_ms）"""
+        interval_ms = int(self.settings.value("scroll_interval_ms", scroll_stitch.DEFAULT_INTERVAL_MS))
+        name = datetime.now().strftime("%Y%m%d_%H%M%S") + ".png"
+        path = os.path.join(self.library.root, "scrolling", name)
         try:
-            rect = selector.selection_rect
+            self.scroll_capture.start(ScreenRegionSource(rect), path, interval_ms)
+        except Exception as e:
+            QMessageBox.critical(None, "滚动截图失败", f"滚动截图失败:\n{e}")
+            return
+        self.scroll_action.setText("⏹ 完成滚动截图")
+        self.tray_icon.showMessage("开始滚动截图", "请慢慢向下滚动页面\n"
+                                   "完成后点击托盘菜单中的\"完成滚动截图\"",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def on_scroll_saved(self, path, width, height):
+        self.tray_icon.showMessage("滚动截图已保存", f"{width} x {height}\n{path}",
+                                   QSystemTrayIcon.Information, 3000)
+
+    def toggle_region_watch(self):
+        """开始监视（先框选区域）或停止监视"""
+        if self.region_watcher.is_active():
+            self.region_watcher.stop()
+            self.watch_action.setText("👁 监视区域...")
+            return
+        self.select_region(self.start_region_watch)
+
+    def start_region_watch(self, rect):
+        """开始监视区域（采样间隔可在设置中修改，单位毫秒）"""
+        interval_ms = int(self.settings.value("watch_interval_ms", 500))
+        self.watched_rect = rect
+        self.region_watcher.start(ScreenRegionSource(rect), interval_ms)
+        self.watch_action.setText("⏹ 停止监视区域")
+        self.tray_icon.showMessage("开始监视区域", f"{rect.width()} x {rect.height()}，内容变化时自动截图",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def on_region_changed(self, image, fraction):
+        """监视的区域变化：加入历史并存入截图库"""
+        rect = self.watched_rect
+        image_hash = compute_content_hash(image)
+        self.history.add(image, rect, image_hash)
+        self.library.quick_save(image, rect, screen_name_at(rect), content_hash=image_hash)
+        self.tray_icon.showMessage("监视的区域已变化", f"变化 {fraction:.1%}，已存入截图库",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def update_history_menu(self):
+        """列出最近的截图"""
+        self.history_menu.clear()
+        entries = self.history.recent(HISTORY_MENU_ENTRIES)
+        if not entries:
+            self.history_menu.addAction("（暂无）").setEnabled(False)
+            return
 
-            print(f"截取区域: x={rect.x()}, y={rect.y()}, w={rect.width()}, h={rect.height()}")
+        for entry in entries:
+            action = self.history_menu.addAction(str(entry))
+            action.triggered.connect(lambda checked, entry_id=entry.id: self.reopen_capture(entry_id))
 
-            pixmap = selector.screen_pixmap.copy(rect.x(), rect.y(), rect.width(), rect.height())
+    def reopen_capture(self, entry_id):
+        """从历史中重新打开一张截图"""
+        image = self.history.get(entry_id)
+        if image is None:
+            return
 
-            print(f"✓ 截图成功: {pixmap.width()}x{pixmap.height()}")
+        entry = self.history.entries[entry_id]
+        self.preview.set_pixmap(QPixmap.fromImage(image), entry.rect, screen_name_at(entry.rect),
+                                entry.content_hash)
+        self.preview.show()
+        self.preview.raise_()
+        self.preview.activateWindow()
+        print(f"[历史] {self.history.stats()}")
+
+    def copy_latest(self):
+        """复制最近一张截图到剪贴板（历史中已经压缩成 PNG 的直接使用压缩数据）"""
+        entries = self.history.recent(1)
+        image = self.history.get(entries[0].id) if entries else None
+        if image is None:
+            self.tray_icon.showMessage("复制截图", "还没有截图", QSystemTrayIcon.Information, 2000)
+            return
 
-            preview = FloatPreview(pixmap)
-            preview.show()
+        png = entries[0].data if self.history.fmt.extension == "png" else None
+        self.image_clipboard.copy(image, png)
+
+    def on_copied(self, width, height):
+        """已复制到剪贴板"""
+        self.tray_icon.showMessage("已复制", f"{width} x {height}，可以直接粘贴",
+                                   QSystemTrayIcon.Information, 1500)
+
+    def show_gallery(self):
+        """打开截图画廊"""
+        if self.gallery is None:
+            self.gallery = GalleryWindow(self.library)
+            self.gallery.capture_activated.connect(self.open_library_capture)
+            self.library.saved.connect(self.gallery.on_saved)
+
+        self.gallery.show()
+        self.gallery.raise_()
+        self.gallery.activateWindow()
+
+    def show_all_captures(self):
+        """打开截图画廊，显示全部截图"""
+        self.show_gallery()
+        self.gallery.show_all()
+
+    def find_similar(self):
+        """查找与最近一张截图相似的截图，结果显示在画廊中"""
+        entries = self.history.recent(1)
+        image = self.history.get(entries[0].id) if entries else None
+        if image is None:
+            self.tray_icon.showMessage("查找相似截图", "还没有截图", QSystemTrayIcon.Information, 2000)
+            return
 
-            preview.exec_()
+        start = time.perf_counter()
+        results = self.library.find_similar(image, exclude_hash=entries[0].content_hash)
+        elapsed = (time.perf_counter() - start) * 1000
+        if results is None:
+            self.similar_pending = True
+            self.tray_icon.showMessage("查找相似截图", "正在加载索引，完成后显示结果",
+                                       QSystemTrayIcon.Information, 2000)
+            return
+        print(f"[相似] 找到 {len(results)} 张，耗时 {elapsed:.1f} ms")
+        if not results:
+            self.tray_icon.showMessage("查找相似截图", "截图库中没有相似的截图",
+                                       QSystemTrayIcon.Information, 2000)
+            return
 
-            print("✓ 截图完成")
+        self.show_gallery()
+        self.gallery.show_ids([record.id for _, record in results], "与最近一张截图相似")
 
-        except Exception as e:
-            QMessageBox.critical(None, "截图失败", f"截图失败:\n{str(e)}")
-            print(f"错误详情: {e}")
-            import traceback
-            traceback.print_exc()
+    def on_similarity_ready(self):
+        """感知哈希索引加载完成：显示等待中的相似截图结果"""
+        if self.similar_pending:
+            self.similar_pending = False
+            self.find_similar()
+
+    def open_library_capture(self, record_id):
+        """在预览窗口中打开截图库中的一张截图"""
+        record = self.library.get(record_id)
+        if record is None:
+            return
+        try:
+            image = image_formats.read_image(record.path)
+        except IOError as e:
+            QMessageBox.critical(None, "打开失败", f"打开失败:\n{record.path}\n{e}")
+            return
+
+        self.preview.set_pixmap(QPixmap.fromImage(image), record.rect, record.screen, record.hash)
+        self.preview.show()
+        self.preview.raise_()
+        self.preview.activateWindow()
+
+    def set_output_format(self, action):
+        """托盘菜单选择保存格式"""
+        key = action.data()
+        self.image_saver.set_output_format(key)
+        self.library.set_output_format(key)
+        self.settings.setValue("output_format", key)
+        print(f"✓ 保存格式: {self.image_saver.output_format.label}")
+
+    def on_saved(self, path):
+        """后台保存完成"""
+        self.tray_icon.showMessage("保存成功", f"截图已保存到:\n{path}",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def on_library_saved(self, record):
+        """快速保存完成"""
+        total = self.library.count()
+        note = "与已有截图相同，未重复保存文件\n" if record.deduplicated else ""
+        self.tray_icon.showMessage("已存入截图库", f"{note}{record.path}\n（共 {total} 张）",
+                                   QSystemTrayIcon.Information, 2000)
+
+    def on_save_failed(self, path, error):
+        """后台保存失败"""
+        QMessageBox.critical(None, "保存失败", f"保存失败:\n{path}\n{error}")
 
     def quit_app(self):
         """退出应用"""
         print("\n退出程序...")
 
-        # 停止定时器
-        if hasattr(self, 'timer'):
-            self.timer.stop()
+        # 等待排队中的标注合成和保存任务，清空历史缓存
+        self.preview.wait_for_done()
+        self.image_saver.wait_for_done()
+        self.image_clipboard.shutdown()
+        self.timelapse.stop()
+        self.region_watcher.stop()
+        self.recorder.stop()
+        self.recorder.close()
+        self.scroll_capture.stop()
+        self.scroll_capture.wait_for_done()
+        self.library.close()
+        self.history.clear()
 
         # 清理热键
         if hasattr(self, 'hotkey_window'):
+            self.hotkey_dispatcher.detach(self.hotkey_window)
             self.hotkey_window.cleanup()
 
         self.tray_icon.hide()
@@ -0,0 +1,300 @@
+"""
+滚动截图：同一区域的连续截图按垂直重叠对齐，拼接成一张长图
+对齐：每一行像素算一个 64 位哈希（NumPy 整幅一次计算），两帧中各自只出现一次的行按哈希配对，
+配对行的位置差的众数就是滚动距离，再用整段重叠区逐行核对；不逐像素、不逐行写 Python 循环
+固定的标题栏 / 底栏（两帧同一位置相同的首尾行）只保留一份；右侧滚动条（每帧都在变）不参与哈希
+内存：拼接结果按条带（strip）顺序写入临时文件，内存中只保留最近一帧；
+完成时从临时文件逐条带读出，流式压缩写成 PNG（不需要在内存中构造整张长图）
+"""
+import os
+import time
+import zlib
+import struct
+import tempfile
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from recorder import PNG_SIGNATURE, png_chunk
+from image_buffer import NUMPY_AVAILABLE, pixel_array
+from task_results import TaskResults
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# 右侧不参与对齐的宽度（滚动条）
+SCROLLBAR_MARGIN = 24
+# 重叠区中至少多少比例的行一致才接受（光标闪烁、动画等会让个别行不同）
+MIN_MATCH = 0.9
+# 重叠区最少行数（滚得太快、两帧没有足够重叠时放弃这一帧）
+MIN_OVERLAP_ROWS = 16
+# 写 PNG 时每次读取的行数
+STRIP_ROWS = 512
+# 默认采样间隔（毫秒）
+DEFAULT_INTERVAL_MS = 250
+
+# 行哈希的随机权重（固定种子：同一行在不同帧中的哈希相同）
+HASH_SEED = 0x5EED
+
+
+def row_hashes(pixels, ignore_right=SCROLLBAR_MARGIN):
+    """每一行的 64 位哈希（像素值与随机奇数权重的乘积和，uint64 自然溢出）"""
+    width = max(1, pixels.shape[1] - ignore_right)
+    weights = np.random.default_rng(HASH_SEED).integers(1, 1 << 63, size=width, dtype=np.uint64) | 1
+    return (pixels[:, :width].astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def unique_rows(hashes):
+    """只出现一次的行：(哈希, 行号)"""
+    values, index, counts = np.unique(hashes, return_index=True, return_counts=True)
+    single = counts == 1
+    return values[single], index[single]
+
+
+def find_scroll(old, new):
+    """两帧的行哈希 → (滚动距离, 底栏行数, 重叠区一致比例)；不能对齐时返回 None
+
+    滚动距离 0 表示画面没有滚动
+    """
+    height = len(new)
+    if len(old) != height:
+        return None
+
+    same = old == new
+    if same.all():
+        return 0, 0, 1.0
+
+    # 两帧中都只出现一次的行按哈希配对，位置差的众数即为滚动距离（只支持向下滚动）
+    old_values, old_rows = unique_rows(old)
+    new_values, new_rows = unique_rows(new)
+    _, old_at, new_at = np.intersect1d(old_values, new_values, assume_unique=True, return_indices=True)
+    shifts = old_rows[old_at] - new_rows[new_at]
+    shifts = shifts[shifts > 0]
+    if not len(shifts):
+        return None
+    shift = int(np.bincount(shifts).argmax())
+
+    # 固定的标题栏 / 底栏：同一位置相同的首尾行
+    # （内容恰好是空白行时底栏会被多算，这些行只是推迟写入，不会丢失，见 ScrollStitcher.add）
+    header = int(np.argmax(~same))
+    footer = int(np.argmax(~same[::-1]))
+
+    start, end = header, height - footer - shift
+    if end - start < MIN_OVERLAP_ROWS:
+        return None
+    match = float(np.mean(new[start:end] == old[start + shift:end + shift]))
+    if match < MIN_MATCH:
+        return None
+    return shift, footer, match
+
+
+class ScrollStitcher:
+    """滚动拼接（不依赖 Qt 事件循环，可以在任何线程中使用，但同一时间只能在一个线程中）"""
+
+    def __init__(self, directory=None, ignore_right=SCROLLBAR_MARGIN):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("滚动截图需要 NumPy: pip install numpy")
+        self.ignore_right = ignore_right
+        fd, self.strip_path = tempfile.mkstemp(suffix='.strip', prefix='scroll_', dir=directory)
+        self.strip_file = os.fdopen(fd, 'w+b')
+
+        self.width = None
+        self.height = 0          # 已写入的行数
+        self.frame = None        # 最近一帧的像素（直接引用这一帧的图像，不拷贝）
+        self.hashes = None       # 最近一帧的行哈希
+        self.committed = 0       # 最近一帧中已写入的行（不含）
+        self.frames = 0
+        self.rejected = 0
+        self.match_ms = 0.0
+
+    def append_rows(self, rows):
+        """追加若干行到条带文件"""
+        if len(rows):
+            self.strip_file.write(np.ascontiguousarray(rows).tobytes())
+            self.height += len(rows)
+
+    def add(self, image):
+        """加入一帧，返回滚动距离（0 = 没有滚动，None = 无法对齐，已丢弃）"""
+        pixels = pixel_array(image)
+        start = time.perf_counter()
+        hashes = row_hashes(pixels, self.ignore_right)
+
+        if self.frame is None:
+            self.width = pixels.shape[1]
+            self.frame, self.hashes = pixels, hashes
+            self.frames = 1
+            self.match_ms += (time.perf_counter() - start) * 1000
+            return 0
+
+        result = find_scroll(self.hashes, hashes) if pixels.shape == self.frame.shape else None
+        self.match_ms += (time.perf_counter() - start) * 1000
+        if result is None:
+            self.rejected += 1
+            return None
+
+        shift, footer, _ = result
+        if shift == 0:
+            return 0
+
+        height = len(hashes)
+        if self.frames == 1:
+            # 第一帧：写入底栏以上的部分（含标题栏）
+            self.append_rows(self.frame[:height - footer])
+            self.committed = height - footer
+
+        # 已写入的位置换算到新一帧的坐标，写入新露出的行（底栏留到最后）
+        committed = self.committed - shift
+        self.append_rows(pixels[max(0, committed):height - footer])
+        self.committed = max(committed, height - footer)
+
+        self.frame, self.hashes = pixels, hashes
+        self.frames += 1
+        return shift
+
+    def finish(self):
+        """写入最后一帧剩余的行（底栏），返回 (宽, 高)"""
+        if self.frame is not None:
+            self.append_rows(self.frame[self.committed:])
+            self.frame = None
+            self.hashes = None
+        self.strip_file.flush()
+        return self.width, self.height
+
+    def strips(self, rows=STRIP_ROWS):
+        """逐条带读出拼接结果（(行数, 宽) uint32 数组）"""
+        row_bytes = self.width * 4
+        self.strip_file.seek(0)
+        for start in range(0, self.height, rows):
+            count = min(rows, self.height - start)
+            data = self.strip_file.read(count * row_bytes)
+            yield np.frombuffer(data, dtype=np.uint32).reshape(count, self.width)
+
+    def write_png(self, path):
+        """流式写入 PNG（RGB，逐条带 Up 过滤 + 压缩，内存中最多一个条带）"""
+        width, height = self.finish()
+        compressor = zlib.compressobj(6)
+        previous = np.zeros(width * 3, dtype=np.uint8)
+
+        with open(path, 'wb') as f:
+            f.write(PNG_SIGNATURE)
+            f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+            for strip in self.strips():
+                bgra = strip.view(np.uint8).reshape(len(strip), width, 4)
+                rows = bgra[:, :, [2, 1, 0]].reshape(len(strip), width * 3)
+                filtered = np.empty((len(strip), width * 3 + 1), dtype=np.uint8)
+                filtered[:, 0] = 2
+                np.subtract(rows[0], previous, out=filtered[0, 1:])
+                np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+                previous = rows[-1].copy()
+
+                data = compressor.compress(filtered.tobytes())
+                if data:
+                    f.write(png_chunk(b"IDAT", data))
+            f.write(png_chunk(b"IDAT", compressor.flush()))
+            f.write(png_chunk(b"IEND", b""))
+
+    def close(self):
+        """关闭并删除临时条带文件"""
+        self.strip_file.close()
+        try:
+            os.remove(self.strip_path)
+        except OSError:
+            pass
+
+
+class StitchTask(QRunnable):
+    """写出拼接结果（在工作线程中运行）"""
+
+    def __init__(self, capture, stitcher, path):
+        super().__init__()
+        self.capture = capture
+        self.stitcher = stitcher
+        self.path = path
+
+    def run(self):
+        error = ""
+        temp_path = self.path + ".part"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.stitcher.write_png(temp_path)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            error = str(e) or "未知错误"
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        finally:
+            self.stitcher.close()
+        self.capture.results.post(self.capture.on_task_done, self.path, error)
+
+
+class ScrollCapture(QObject):
+    """滚动截图：定时抓取区域，用户滚动页面，完成后写出长图"""
+
+    # 长图已写入：文件路径、宽、高
+    finished = pyqtSignal(str, int, int)
+    # 写入失败：文件路径、错误信息
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.stitcher = None
+        self.path = None
+        self.size = (0, 0)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # 工作线程 → 主线程：写出结果
+        self.results = TaskResults(self)
+
+    def is_active(self):
+        return self.stitcher is not None
+
+    def start(self, source, path, interval_ms=DEFAULT_INTERVAL_MS):
+        """开始滚动截图（source 为 region_watch.ScreenRegionSource 等有 grab() 的对象）"""
+        if self.is_active():
+            print("滚动截图进行中，忽略重复请求")
+            return False
+        self.stitcher = ScrollStitcher()
+        self.source = source
+        self.path = path
+        self.stitcher.add(source.grab())
+        self.timer.start(interval_ms)
+        print(f"✓ 开始滚动截图（每 {interval_ms} ms 抓取一次），请向下滚动页面")
+        return True
+
+    def sample(self):
+        shift = self.stitcher.add(self.source.grab())
+        if shift is None:
+            print("[滚动截图] 与上一帧没有足够的重叠（滚动太快？），已跳过这一帧")
+        elif shift:
+            print(f"[滚动截图] 滚动 {shift} px，长图已有 {self.stitcher.height} 行")
+
+    def stop(self):
+        """停止抓取，在后台写出长图，立即返回"""
+        if not self.is_active():
+            return None
+        self.timer.stop()
+        stitcher, self.stitcher = self.stitcher, None
+        self.size = stitcher.finish()
+        print(f"✓ 滚动截图结束: {stitcher.frames} 帧，{self.size[0]}x{self.size[1]}，"
+              f"对齐 {stitcher.match_ms / max(1, stitcher.frames):.1f} ms/帧，跳过 {stitcher.rejected} 帧")
+        self.pool.start(StitchTask(self, stitcher, self.path))
+        return self.path
+
+    def on_task_done(self, path, error):
+        if error:
+            print(f"✗ 滚动截图保存失败: {path}: {error}")
+            self.failed.emit(path, error)
+            return
+        print(f"✓ 滚动截图已保存: {path}")
+        self.finished.emit(path, *self.size)
+
+    def wait_for_done(self, msecs=-1):
+        """等待长图写完，并发出完成信号"""
+        done = self.pool.waitForDone(msecs)
+        self.results.deliver()
+        return done
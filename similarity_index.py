@@ -0,0 +1,96 @@
+"""
+相似截图索引：64 位感知哈希的多索引哈希表（multi-index hashing）
+把哈希切成 4 段 16 位，每段一张哈希表。两个哈希的汉明距离 ≤ r 时，
+至少有一段的距离 ≤ r // 4（抽屉原理），所以只需在每张表中查找与查询段距离 ≤ r // 4 的几十个键，
+再对候选逐个验证，不需要和库中每一张截图比较
+"""
+from itertools import combinations
+
+from image_hash import hamming
+
+# 切成几段、每段几位
+CHUNKS = 4
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# 每段最多枚举的翻转位数（更大的查询半径退回逐个比较）
+MAX_CHUNK_RADIUS = 3
+
+
+def chunk_values(value):
+    """64 位哈希 → 4 段 16 位"""
+    return [(value >> (i * CHUNK_BITS)) & CHUNK_MASK for i in range(CHUNKS)]
+
+
+def neighbours(chunk, radius):
+    """与 chunk 汉明距离 ≤ radius 的所有 16 位值"""
+    yield chunk
+    for flips in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), flips):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            yield chunk ^ mask
+
+
+class SimilarityIndex:
+    """感知哈希索引：key → 64 位哈希"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.tables = [{} for _ in range(CHUNKS)]
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, key):
+        return key in self.hashes
+
+    def add(self, key, value):
+        if key in self.hashes:
+            self.remove(key)
+        self.hashes[key] = value
+        for table, chunk in zip(self.tables, chunk_values(value)):
+            table.setdefault(chunk, set()).add(key)
+
+    def remove(self, key):
+        value = self.hashes.pop(key, None)
+        if value is None:
+            return
+        for table, chunk in zip(self.tables, chunk_values(value)):
+            keys = table.get(chunk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del table[chunk]
+
+    def candidates(self, value, radius):
+        """可能在 radius 以内的 key（包含一些更远的，需要再验证）"""
+        chunk_radius = radius // CHUNKS
+        found = set()
+        for table, chunk in zip(self.tables, chunk_values(value)):
+            for neighbour in neighbours(chunk, chunk_radius):
+                keys = table.get(neighbour)
+                if keys:
+                    found.update(keys)
+        return found
+
+    def query(self, value, radius=10, limit=None):
+        """汉明距离 ≤ radius 的 key，按距离从近到远，返回 [(距离, key), ...]"""
+        if radius // CHUNKS > MAX_CHUNK_RADIUS:
+            keys = self.hashes.keys()
+        else:
+            keys = self.candidates(value, radius)
+
+        results = []
+        for key in keys:
+            distance = hamming(value, self.hashes[key])
+            if distance <= radius:
+                results.append((distance, key))
+        results.sort()
+        return results if limit is None else results[:limit]
+
+    def scan(self, value, radius=10):
+        """逐个比较（对照用）"""
+        results = [(hamming(value, other), key) for key, other in self.hashes.items()]
+        return sorted(result for result in results if result[0] <= radius)
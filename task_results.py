@@ -0,0 +1,34 @@
+"""
+工作线程的结果 → 主线程
+任务完成时把（处理函数, 参数）放进队列并发出 ready 信号，由主事件循环按顺序执行处理函数；
+等待任务完成时（wait_for_done、停止录制）在 waitForDone 之后直接调用 deliver() 处理剩下的结果，
+不用 QApplication.processEvents()（在槽函数里重入事件循环会执行任意其他事件）
+之后才到达的 ready 信号发现队列已空，什么也不做
+"""
+from collections import deque
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class TaskResults(QObject):
+    """工作线程结果队列（属于主线程）"""
+
+    # 队列中有新结果（工作线程发出时排队投递到主线程）
+    ready = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # deque 的 append / popleft 是线程安全的
+        self.queue = deque()
+        self.ready.connect(self.deliver)
+
+    def post(self, handler, *args):
+        """（任意线程）把结果交给主线程：handler(*args) 在主线程中执行"""
+        self.queue.append((handler, args))
+        self.ready.emit()
+
+    def deliver(self):
+        """（主线程）按顺序执行队列中的结果处理函数"""
+        while self.queue:
+            handler, args = self.queue.popleft()
+            handler(*args)
@@ -0,0 +1,19 @@
+"""
+pytest 公共设置：无界面运行 Qt（QT_QPA_PLATFORM=offscreen），模块从仓库根目录导入
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
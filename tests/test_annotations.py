@@ -0,0 +1,134 @@
+"""标注：撤销 / 重做只移动命令；分块缓存只渲染有标注的块，画面与合成结果一致；在画布上拖动添加标注；打码在工作线程中计算"""
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+from PyQt5.QtGui import QImage, QColor, QPainter
+
+from bench_capture import send_mouse
+from annotations import (AnnotationDocument, AnnotationCanvas, TileCache, BoxAnnotation,
+                         HighlightAnnotation, ArrowAnnotation, RedactAnnotation, flatten)
+
+
+def make_base(width=1000, height=700):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(240, 240, 240))
+    return image
+
+
+def compose(cache):
+    """分块缓存画出的整幅画面"""
+    base = cache.document.base
+    image = QImage(base.size(), QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    cache.draw(painter, base.rect())
+    painter.end()
+    return image.convertToFormat(QImage.Format_RGB32)
+
+
+def test_undo_redo_returns_dirty_bounds():
+    document = AnnotationDocument(make_base())
+    box = BoxAnnotation(QRect(10, 10, 100, 50))
+    arrow = ArrowAnnotation(QPoint(300, 300), QPoint(400, 350))
+
+    assert document.add(box) == box.bounds()
+    document.add(arrow)
+    assert document.undo() == arrow.bounds()
+    assert document.commands == [box]
+    assert document.redo() == arrow.bounds()
+    assert document.redo() is None
+
+    document.undo()
+    # 新的编辑清空重做栈
+    document.add(HighlightAnnotation(QRect(500, 500, 50, 20)))
+    assert document.redo() is None
+    assert len(document.commands) == 2
+    base, commands = document.snapshot()
+    assert commands == document.commands and commands is not document.commands
+
+
+def test_tile_cache_matches_flatten():
+    document = AnnotationDocument(make_base())
+    cache = TileCache(document, tile_size=256)
+    document.add(BoxAnnotation(QRect(20, 20, 100, 80)))
+    assert compose(cache) == flatten(document.base, document.commands)
+    # 只有左上角的一块有标注，其余直接画底图
+    assert cache.rendered == 1
+
+    bounds = document.add(HighlightAnnotation(QRect(560, 400, 150, 80)))
+    cache.invalidate(bounds)
+    assert compose(cache) == flatten(document.base, document.commands)
+    assert cache.rendered == 2
+
+    cache.invalidate(document.undo())
+    assert compose(cache) == flatten(document.base, document.commands)
+
+
+def test_flatten_keeps_base():
+    base = make_base()
+    image = flatten(base, [BoxAnnotation(QRect(10, 10, 100, 100), QColor(255, 0, 0))])
+    assert image.format() == QImage.Format_RGB32
+    assert image.pixelColor(10, 50) == QColor(255, 0, 0)
+    assert base.pixelColor(10, 50) == QColor(240, 240, 240)
+
+
+def test_canvas_drag_adds_annotation(qapp):
+    canvas = AnnotationCanvas()
+    canvas.set_image(make_base(400, 300))
+    canvas.set_tool('box')
+    canvas.show()
+
+    send_mouse(canvas, QEvent.MouseButtonPress, QPoint(50, 60))
+    send_mouse(canvas, QEvent.MouseMove, QPoint(150, 160))
+    assert canvas.draft is not None
+    send_mouse(canvas, QEvent.MouseButtonRelease, QPoint(200, 180), Qt.NoButton)
+
+    assert canvas.draft is None
+    assert canvas.is_modified()
+    (box,) = canvas.document.commands
+    assert box.rect == QRect(QPoint(50, 60), QPoint(200, 180))
+
+    # 太短的拖动不添加
+    send_mouse(canvas, QEvent.MouseButtonPress, QPoint(10, 10))
+    send_mouse(canvas, QEvent.MouseButtonRelease, QPoint(11, 10), Qt.NoButton)
+    assert len(canvas.document.commands) == 1
+
+    assert canvas.undo() and not canvas.is_modified()
+    assert canvas.redo() and canvas.is_modified()
+    canvas.close()
+
+
+def test_canvas_redaction_computed_in_background(qapp):
+    canvas = AnnotationCanvas()
+    base = make_base(400, 300)
+    base.setPixelColor(100, 100, QColor(0, 0, 0))
+    canvas.set_image(base)
+    canvas.set_tool('mosaic')
+    canvas.show()
+
+    send_mouse(canvas, QEvent.MouseButtonPress, QPoint(50, 60))
+    send_mouse(canvas, QEvent.MouseMove, QPoint(150, 160))
+    # 拖动中只画矩形框
+    assert isinstance(canvas.draft, BoxAnnotation)
+    send_mouse(canvas, QEvent.MouseButtonRelease, QPoint(150, 160), Qt.NoButton)
+
+    # 计算完成前只显示矩形框，命令列表中还没有打码
+    assert len(canvas.pending) == 1 and canvas.document.commands == []
+    canvas.wait_for_done()
+    assert canvas.pending == []
+    (redact,) = canvas.document.commands
+    assert isinstance(redact, RedactAnnotation)
+    assert redact.rect == QRect(QPoint(50, 60), QPoint(150, 160))
+    assert flatten(canvas.document.base, canvas.document.commands).pixelColor(100, 100) != QColor(0, 0, 0)
+    assert canvas.document.base.pixelColor(100, 100) == QColor(0, 0, 0)
+    canvas.close()
+
+
+def test_redaction_dropped_after_image_changes(qapp):
+    canvas = AnnotationCanvas()
+    canvas.set_image(make_base(400, 300))
+    canvas.set_tool('blur')
+    send_mouse(canvas, QEvent.MouseButtonPress, QPoint(10, 10))
+    send_mouse(canvas, QEvent.MouseButtonRelease, QPoint(100, 100), Qt.NoButton)
+
+    # 算好之前换了截图：结果不加到新截图上
+    canvas.set_image(make_base(300, 200))
+    canvas.wait_for_done()
+    assert canvas.document.commands == [] and canvas.pending == []
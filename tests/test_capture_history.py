@@ -0,0 +1,133 @@
+"""截图历史：最近几张保持原图，其余后台压缩；超出内存预算写入缓存目录；超出条数 / 磁盘上限淘汰"""
+import os
+
+from PyQt5.QtGui import QImage, QColor
+
+from capture_history import CaptureHistory
+
+
+def make_image(index, width=512, height=512):
+    """每张颜色不同（内容哈希不同），大片同色，压缩后很小"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(index * 37 % 256, index * 11 % 256, 200))
+    image.setPixelColor(index % width, 0, QColor(0, 0, 0))
+    return image
+
+
+class FailingFormat:
+    """编码总是失败的格式（模拟压缩失败），记录每张截图的编码次数"""
+
+    extension = "png"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, image):
+        self.calls += 1
+        raise IOError("编码失败")
+
+
+def states(history):
+    return [entry.state for entry in history.entries.values()]
+
+
+def test_recent_entries_stay_raw_others_compress(qapp, tmp_path):
+    history = CaptureHistory(raw_entries=2, cache_dir=str(tmp_path))
+    ids = [history.add(make_image(i)) for i in range(4)]
+    history.wait_for_done()
+
+    assert states(history) == ["压缩", "压缩", "原始", "原始"]
+    # 取出压缩的截图：恢复成原图并标记为最近使用
+    assert history.get(ids[0]) == make_image(0)
+    assert history.recent(1)[0].id == ids[0]
+    history.clear()
+
+
+def test_over_budget_spills_to_disk(qapp, tmp_path):
+    history = CaptureHistory(raw_entries=1, memory_budget=make_image(0).sizeInBytes() + 1,
+                             cache_dir=str(tmp_path))
+    ids = [history.add(make_image(i)) for i in range(5)]
+    history.wait_for_done()
+
+    assert history.memory_usage() <= history.memory_budget
+    assert states(history)[-1] == "原始"
+    assert "磁盘" in states(history)
+    spilled = [entry for entry in history.entries.values() if entry.state == "磁盘"]
+    assert all(os.path.exists(entry.path) for entry in spilled)
+    assert history.get(spilled[0].id) == make_image(ids.index(spilled[0].id))
+    history.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_raw_entries_are_compressed_when_over_budget(qapp, tmp_path):
+    # 最近使用的原图本来不压缩；预算只放得下一张原图时，较早的也压缩并写入缓存目录
+    history = CaptureHistory(raw_entries=3, memory_budget=make_image(0).sizeInBytes() + 1,
+                             cache_dir=str(tmp_path))
+    for i in range(3):
+        history.add(make_image(i))
+    history.wait_for_done()
+
+    assert states(history)[-1] == "原始"
+    assert all(state != "原始" for state in states(history)[:-1])
+    assert history.memory_usage() <= history.memory_budget
+    history.clear()
+
+
+def test_failed_compression_is_not_retried(qapp, tmp_path):
+    history = CaptureHistory(raw_entries=0, cache_dir=str(tmp_path))
+    history.fmt = FailingFormat()
+    first = history.add(make_image(0))
+    history.wait_for_done()
+    entry = history.entries[first]
+    assert entry.compress_failed and entry.state == "原始"
+
+    for i in range(1, 4):
+        history.add(make_image(i))
+        history.wait_for_done()
+    history.get(first)
+    history.wait_for_done()
+    # 每张只尝试一次
+    assert history.fmt.calls == 4
+    history.clear()
+
+
+def test_failed_raw_entries_are_evicted_over_budget(qapp, tmp_path):
+    history = CaptureHistory(raw_entries=0, memory_budget=make_image(0).sizeInBytes() + 1,
+                             cache_dir=str(tmp_path))
+    history.fmt = FailingFormat()
+    ids = [history.add(make_image(i)) for i in range(3)]
+    history.wait_for_done()
+
+    # 只剩最新的一张（最新的一张总是保留）
+    assert list(history.entries) == [ids[-1]]
+    assert history.evicted == 2
+    history.clear()
+
+
+def test_eviction_by_count_and_disk(qapp, tmp_path):
+    history = CaptureHistory(max_entries=3, cache_dir=str(tmp_path))
+    ids = [history.add(make_image(i)) for i in range(5)]
+    assert list(history.entries) == ids[2:]
+    assert history.evicted == 2
+    assert history.get(ids[0]) is None
+    history.clear()
+
+    history = CaptureHistory(raw_entries=0, memory_budget=0, disk_budget=1, cache_dir=str(tmp_path))
+    ids = [history.add(make_image(i)) for i in range(3)]
+    history.wait_for_done()
+    # 写入缓存目录的两张超出磁盘上限被淘汰，最新的一张还在内存中
+    assert list(history.entries) == ids[-1:]
+    assert history.disk_usage() == 0
+    assert os.listdir(tmp_path) == []
+    history.clear()
+
+
+def test_duplicates_are_not_stored_twice(qapp, tmp_path):
+    history = CaptureHistory(cache_dir=str(tmp_path))
+    first = history.add(make_image(0))
+    history.add(make_image(1))
+    assert history.add(make_image(0)) == first
+    assert len(history) == 2
+    assert history.deduplicated == 1
+    assert history.recent(1)[0].id == first
+    history.clear()
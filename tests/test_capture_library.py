@@ -0,0 +1,167 @@
+"""截图库：快速保存到按日期分片的目录 + SQLite 索引；按条件搜索；相同内容去重；旧版本索引升级"""
+import os
+import re
+import sqlite3
+import time
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QColor
+
+from capture_library import CaptureLibrary, INDEX_NAME, SCHEMA_VERSION
+
+
+def make_image(color, width=320, height=200):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(color)
+    image.setPixelColor(10, 10, QColor(Qt.black))
+    return image
+
+
+def library_files(root):
+    return [name for _, _, names in os.walk(root) for name in names if name.endswith(".png")]
+
+
+def test_quick_save_writes_sharded_file_and_index(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    library.set_output_format("png_fast")
+    saved = []
+    library.saved.connect(saved.append)
+
+    image = make_image(QColor(200, 30, 30))
+    library.quick_save(image, QRect(15, 25, 320, 200), "DP-1")
+    assert saved == []
+    library.wait_for_done()
+
+    assert len(saved) == 1
+    record = saved[0]
+    assert re.fullmatch(r"\d{4}/\d{2}/\d{2}/\d{6}_\d{6}\.png", record.relative_path.replace(os.sep, "/"))
+    assert os.path.exists(record.path)
+    assert QImage(record.path).convertToFormat(QImage.Format_RGB32) == image
+    assert record.rect == QRect(15, 25, 320, 200)
+    assert (record.screen, record.format) == ("DP-1", "png_fast")
+    assert record.bytes == os.path.getsize(record.path)
+    assert library.get(record.id).path == record.path
+    library.close()
+
+
+def test_search_filters(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    library.set_output_format("png_fast")
+    library.quick_save(make_image(QColor(1, 2, 3), 100, 50), screen="A")
+    library.quick_save(make_image(QColor(4, 5, 6), 800, 600), screen="B")
+    library.wait_for_done()
+    middle = time.time()
+    time.sleep(0.01)
+    library.quick_save(make_image(QColor(7, 8, 9), 400, 300), screen="A")
+    library.wait_for_done()
+
+    assert library.count() == 3
+    assert [r.rect.width() for r in library.recent()] == [400, 800, 100]
+    assert [r.rect.width() for r in library.search(screen="A")] == [400, 100]
+    assert [r.rect.width() for r in library.search(min_width=300, min_height=300)] == [400, 800]
+    assert [r.rect.width() for r in library.search(start=middle)] == [400]
+    assert library.count(end=middle) == 2
+    assert library.ids(screen="B") == [library.search(screen="B")[0].id]
+    assert len(library.search(limit=1, offset=1)) == 1
+    library.close()
+
+
+def test_failed_save_is_reported(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    failed = []
+    library.failed.connect(lambda path, error: failed.append(path))
+    # 分片目录的位置被一个文件占住：无法创建目录
+    library.shard_path = lambda created, fmt: os.path.join("blocked", "shot.png")
+    open(tmp_path / "blocked", 'w').close()
+
+    library.quick_save(make_image(QColor(9, 9, 9)))
+    library.wait_for_done()
+    assert failed == [os.path.join(str(tmp_path), "blocked", "shot.png")]
+    assert library.count() == 0
+    library.close()
+
+
+def test_remove(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    library.quick_save(make_image(QColor(50, 60, 70)))
+    library.wait_for_done()
+    record = library.recent(1)[0]
+
+    assert library.remove(record.id)
+    assert library.get(record.id) is None
+    assert not os.path.exists(record.path)
+    assert not library.remove(record.id)
+    library.close()
+
+
+def test_duplicates_share_one_file(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    library.set_output_format("png_fast")
+    saved = []
+    library.saved.connect(saved.append)
+
+    # 第二张在第一张还在保存时到达，第三张在第一张保存完成后到达
+    library.quick_save(make_image(QColor(200, 30, 30)), QRect(0, 0, 320, 200))
+    library.quick_save(make_image(QColor(200, 30, 30)), QRect(5, 5, 320, 200))
+    library.wait_for_done()
+    library.quick_save(make_image(QColor(200, 30, 30)), QRect(9, 9, 320, 200))
+    library.quick_save(make_image(QColor(30, 30, 200)), QRect(0, 0, 320, 200))
+    library.wait_for_done()
+
+    assert len(saved) == 4
+    red = [record for record in saved if record.hash == saved[0].hash]
+    assert [record.deduplicated for record in red] == [False, True, True]
+    assert len({record.path for record in red}) == 1
+    assert library.deduplicated == 2
+    assert library.count() == 4
+    assert len(library_files(str(tmp_path))) == 2
+
+    # 文件还被其他记录引用时删除记录不删除文件
+    assert library.remove(red[0].id)
+    assert os.path.exists(red[1].path)
+    library.close()
+
+
+def test_migrates_version_0_index(qapp, tmp_path):
+    db = sqlite3.connect(os.path.join(str(tmp_path), INDEX_NAME))
+    db.executescript("""
+        CREATE TABLE captures (
+            id      INTEGER PRIMARY KEY,
+            created REAL NOT NULL,
+            x       INTEGER NOT NULL,
+            y       INTEGER NOT NULL,
+            width   INTEGER NOT NULL,
+            height  INTEGER NOT NULL,
+            screen  TEXT NOT NULL DEFAULT '',
+            format  TEXT NOT NULL,
+            bytes   INTEGER NOT NULL,
+            hash    TEXT NOT NULL,
+            path    TEXT NOT NULL UNIQUE
+        );
+        CREATE INDEX idx_captures_created ON captures(created);
+        CREATE INDEX idx_captures_hash ON captures(hash);
+        INSERT INTO captures VALUES (7, 1700000000.0, 1, 2, 30, 40, 'DP-1', 'png', 123, 'abc', 'old/a.png');
+    """)
+    db.close()
+
+    library = CaptureLibrary(str(tmp_path))
+    assert library.db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = [row[1] for row in library.db.execute("PRAGMA table_info(captures)")]
+    assert "phash" in columns
+
+    record = library.get(7)
+    assert record.rect == QRect(1, 2, 30, 40)
+    assert (record.screen, record.format, record.bytes, record.hash) == ("DP-1", "png", 123, "abc")
+    assert record.relative_path == "old/a.png"
+    assert record.phash is None
+
+    # 升级后 path 不再唯一：去重记录可以引用同一个文件
+    library.add_record({'created': 1700000001.0, 'x': 0, 'y': 0, 'width': 30, 'height': 40,
+                        'screen': '', 'format': 'png', 'bytes': 123, 'hash': 'def', 'path': 'old/a.png'})
+    assert library.count() == 2
+    library.close()
+
+    # 再次打开不重复升级
+    library = CaptureLibrary(str(tmp_path))
+    assert library.count() == 2
+    library.close()
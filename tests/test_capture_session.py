@@ -0,0 +1,92 @@
+"""截图会话：抓屏 → 选择窗口 → captured / cancelled 信号（不依赖 processEvents 循环等待）"""
+import pytest
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+from PyQt5.QtTest import QTest
+
+from bench_capture import send_mouse
+from capture_session import CaptureSession
+
+
+@pytest.fixture
+def make_session(qapp):
+    """创建会话；测试结束时等待后台的边缘图任务（任务完成前会话不能被回收）"""
+    sessions = []
+
+    def make(**kwargs):
+        session = CaptureSession(window_source=None, **kwargs)
+        captured, cancelled = [], []
+        session.captured.connect(lambda pixmap, rect: captured.append((pixmap, rect)))
+        session.cancelled.connect(lambda: cancelled.append(True))
+        sessions.append(session)
+        return session, captured, cancelled
+
+    yield make
+    for session in sessions:
+        session.pool.waitForDone()
+        qapp.processEvents()
+
+
+def drag(selector, start, end):
+    send_mouse(selector, QEvent.MouseButtonPress, start)
+    send_mouse(selector, QEvent.MouseMove, end)
+    send_mouse(selector, QEvent.MouseButtonRelease, end, Qt.NoButton)
+
+
+def test_start_returns_immediately_and_captures(make_session):
+    session, captured, cancelled = make_session()
+    assert session.start()
+    assert session.is_active()
+    assert session.selector.isVisible()
+    # 选择进行中再次触发被忽略
+    assert not session.start()
+
+    drag(session.selector, QPoint(100, 100), QPoint(300, 250))
+    expected = QRect(QPoint(100, 100), QPoint(300, 250))
+    assert len(captured) == 1
+    pixmap, rect = captured[0]
+    assert rect == expected
+    assert pixmap.size() == expected.size()
+    assert session.content_hash
+    assert cancelled == []
+    assert not session.is_active()
+    assert session.frame is None
+
+
+def test_escape_cancels(make_session):
+    session, captured, cancelled = make_session()
+    session.start()
+    QTest.keyClick(session.selector, Qt.Key_Escape)
+
+    assert cancelled == [True]
+    assert captured == []
+    assert not session.is_active()
+    # 取消后可以立即开始下一次截图
+    assert session.start()
+    QTest.keyClick(session.selector, Qt.Key_Escape)
+
+
+def test_empty_selection_is_cancelled(make_session):
+    session, captured, cancelled = make_session()
+    session.start()
+    session.selector.selection_finished.emit(QRect())
+
+    assert cancelled == [True]
+    assert captured == []
+
+
+def test_prewarmed_overlay_is_reused(make_session):
+    session, captured, _ = make_session(prewarm=True)
+    overlay = session.overlay
+    assert overlay is not None and not overlay.isVisible()
+
+    for end in (QPoint(200, 150), QPoint(50, 60)):
+        session.start()
+        assert session.selector is overlay
+        assert overlay.isVisible()
+        drag(overlay, QPoint(10, 10), end)
+        assert not overlay.isVisible()
+        # 选择结束后预热的窗口不再持有整帧
+        assert overlay.frame is None
+
+    assert [rect for _, rect in captured] == [QRect(QPoint(10, 10), QPoint(200, 150)),
+                                              QRect(QPoint(10, 10), QPoint(50, 60))]
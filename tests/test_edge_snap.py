@@ -0,0 +1,53 @@
+"""边缘吸附：行 / 列投影找出附近的图像边缘；拖动的角吸附到边缘内侧（下 / 右）或外侧（上 / 左）"""
+import pytest
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtGui import QImage, QColor, QPainter
+
+import edge_snap
+from edge_snap import EdgeTile, EdgeMap
+
+pytestmark = pytest.mark.skipif(not edge_snap.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+BOX = QRect(100, 100, 400, 300)
+
+
+def make_image(inside=QColor(0, 0, 0), outside=QColor(255, 255, 255)):
+    image = QImage(800, 600, QImage.Format_RGB32)
+    image.fill(outside)
+    painter = QPainter(image)
+    painter.fillRect(BOX, inside)
+    painter.end()
+    return image
+
+
+def test_tile_finds_box_edges():
+    tile = EdgeTile(make_image())
+    # 边缘在第 399 行与第 400 行之间、第 99 列与第 100 列之间
+    assert tile.snap_row(403, 150, 450) == 399
+    assert tile.snap_row(95, 150, 450) == 99
+    assert tile.snap_column(96, 150, 350) == 99
+    assert tile.snap_column(504, 150, 350) == 499
+    # 超出吸附距离 / 跨度上边缘太少
+    assert tile.snap_row(420, 150, 450) is None
+    assert tile.snap_row(403, 150, 790) is None
+
+
+def test_color_edge_with_similar_brightness():
+    tile = EdgeTile(make_image(inside=QColor(180, 60, 60), outside=QColor(60, 60, 180)))
+    assert tile.snap_column(502, 150, 350) == 499
+
+
+def test_map_snaps_dragged_corner():
+    edge_map = EdgeMap([(QRect(0, 0, 800, 600), EdgeTile(make_image()))])
+    # 向右下拖：选择框包含边缘内侧的行和列
+    assert edge_map.snap(QPoint(503, 404), QPoint(150, 150)) == QPoint(499, 399)
+    # 向左上拖：从边缘外侧的下一行 / 列开始
+    assert edge_map.snap(QPoint(96, 97), QPoint(300, 300)) == QPoint(100, 100)
+    # 附近没有边缘，或不在任何屏幕上
+    assert edge_map.snap(QPoint(650, 500), QPoint(600, 450)) == QPoint(650, 500)
+    assert edge_map.snap(QPoint(900, 50), QPoint(300, 300)) == QPoint(900, 50)
+
+
+def test_map_uses_screen_offset():
+    edge_map = EdgeMap([(QRect(800, 0, 800, 600), EdgeTile(make_image()))])
+    assert edge_map.snap(QPoint(1303, 404), QPoint(950, 150)) == QPoint(1299, 399)
@@ -0,0 +1,64 @@
+"""悬浮预览：窗口框架复用，每次截图只换图片；保存前在后台合成标注"""
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPixmap, QColor
+
+from float_preview import FloatPreview
+from annotations import BoxAnnotation
+
+
+def make_pixmap(width, height, color=Qt.blue):
+    pixmap = QPixmap(width, height)
+    pixmap.fill(color)
+    return pixmap
+
+
+def test_preview_is_reused(qapp):
+    preview = FloatPreview()
+    buttons = preview.save_btn, preview.canvas
+
+    preview.set_pixmap(make_pixmap(300, 200))
+    preview.show()
+    preview.close()
+    # 关闭时释放截图，窗口框架保留
+    assert preview.pixmap is None
+
+    preview.set_pixmap(make_pixmap(500, 100, Qt.red), QRect(0, 0, 500, 100))
+    preview.show()
+    assert (preview.save_btn, preview.canvas) == buttons
+    assert preview.pixmap.size() == make_pixmap(500, 100).size()
+    preview.close()
+
+
+def test_output_image_flattens_annotations_in_background(qapp):
+    preview = FloatPreview()
+    preview.set_pixmap(make_pixmap(300, 200, Qt.white))
+    results = []
+
+    # 没有标注：直接使用截图
+    preview.with_output_image(results.append)
+    assert len(results) == 1
+
+    preview.canvas.add(BoxAnnotation(QRect(10, 10, 50, 50), QColor(255, 0, 0)))
+    preview.with_output_image(results.append)
+    # 等待合成时直接执行后续操作，不需要事件循环
+    preview.wait_for_done()
+    assert len(results) == 2
+    assert results[1].pixelColor(10, 30) == QColor(255, 0, 0)
+    assert preview.pixmap.toImage().pixelColor(10, 30) == QColor(Qt.white)
+    preview.close()
+
+
+def test_output_image_waits_for_pending_redaction(qapp):
+    preview = FloatPreview()
+    pixmap = make_pixmap(300, 200, Qt.white)
+    preview.set_pixmap(pixmap)
+    preview.canvas.start_redaction(QPoint(0, 0), QPoint(299, 199), 'mosaic')
+    assert not preview.canvas.is_modified()
+
+    # 打码还在计算中时保存：先等打码完成，保存的图片不是原图
+    results = []
+    preview.with_output_image(results.append)
+    preview.wait_for_done()
+    assert preview.canvas.pending == []
+    assert len(results) == 1 and len(preview.canvas.document.commands) == 1
+    preview.close()
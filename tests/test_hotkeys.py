@@ -0,0 +1,57 @@
+"""热键分发：假热键源 → 注册的动作；热键文字 → RegisterHotKey 参数"""
+from hotkeys import HotkeyDispatcher, FakeHotkeySource, parse_hotkey, hotkey_label
+
+
+def test_fake_source_reaches_handler(qapp):
+    dispatcher = HotkeyDispatcher()
+    source = FakeHotkeySource()
+    dispatcher.attach(source)
+    calls, dispatched = [], []
+    dispatcher.register(1, lambda: calls.append(1), "截图")
+    dispatcher.register(2, lambda: calls.append(2), "复制")
+    dispatcher.dispatched.connect(dispatched.append)
+
+    source.press(2)
+    # 排队连接：按下时不在热键来源的调用栈里执行动作
+    assert calls == []
+    qapp.processEvents()
+    assert calls == [2]
+    assert dispatched == [2]
+
+
+def test_unregistered_and_failing_actions(qapp):
+    dispatcher = HotkeyDispatcher()
+    source = FakeHotkeySource()
+    dispatcher.attach(source)
+    dispatched = []
+    dispatcher.dispatched.connect(dispatched.append)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    dispatcher.register(5, broken)
+    source.press(4)
+    source.press(5)
+    qapp.processEvents()
+    # 未注册的 ID 被忽略；动作出错也照常发出 dispatched，不影响后续热键
+    assert dispatched == [5]
+
+    dispatcher.detach(source)
+    source.press(5)
+    qapp.processEvents()
+    assert dispatched == [5]
+
+
+
+def test_parse_hotkey():
+    assert parse_hotkey("Ctrl+Alt+Shift+C") == (0x0002 | 0x0001 | 0x0004, 0x43)
+    assert parse_hotkey("Ctrl+Shift+F5") == (0x0002 | 0x0004, 0x74)
+    assert parse_hotkey("Alt+7") == (0x0001, 0x37)
+    # 没有修饰键、不支持的按键、无效文字
+    assert parse_hotkey("C") is None
+    assert parse_hotkey("Ctrl+Alt+Left") is None
+    assert parse_hotkey("") is None
+
+
+def test_hotkey_label():
+    assert hotkey_label("Ctrl+Alt+Shift+C") == "Ctrl + Alt + Shift + C"
@@ -0,0 +1,87 @@
+"""QImage ↔ NumPy 零拷贝：数组直接引用像素内存并持有图像；裁剪是视图；数组 → QImage 不拷贝"""
+import gc
+
+import pytest
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QColor, QPixmap
+
+import image_buffer
+from image_buffer import pixel_array, channel_array, crop_array, array_image
+
+pytestmark = pytest.mark.skipif(not image_buffer.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+if image_buffer.NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def make_image(width=50, height=30, fmt=QImage.Format_RGB32):
+    image = QImage(width, height, fmt)
+    image.fill(QColor(10, 20, 30))
+    image.setPixelColor(7, 3, QColor(200, 100, 50))
+    return image
+
+
+def test_pixel_array_references_image_memory():
+    image = make_image()
+    pixels = pixel_array(image)
+    assert pixels.shape == (30, 50) and pixels.dtype == np.uint32
+    assert pixels.ctypes.data == int(image.constBits())
+    assert pixels[3, 7] == QColor(200, 100, 50).rgb()
+    assert not pixels.flags.writeable
+
+    # 数组持有图像：原来的引用释放后像素仍然有效
+    del image
+    gc.collect()
+    assert pixels[3, 7] == QColor(200, 100, 50).rgb()
+
+
+def test_channel_array_is_bgra_view():
+    image = make_image()
+    channels = channel_array(image)
+    assert channels.shape == (30, 50, 4)
+    assert list(channels[3, 7]) == [50, 100, 200, 255]
+    assert np.shares_memory(channels, pixel_array(image))
+
+
+def test_other_formats_are_converted_once():
+    image = make_image(fmt=QImage.Format_RGB888)
+    pixels = pixel_array(image)
+    assert pixels[3, 7] == QColor(200, 100, 50).rgb()
+    # QPixmap 也可以直接传入
+    assert pixel_array(QPixmap.fromImage(make_image()))[3, 7] == QColor(200, 100, 50).rgb()
+
+
+def test_crop_array_is_clipped_view():
+    image = make_image()
+    crop = crop_array(image, QRect(5, 2, 10, 4))
+    assert crop.shape == (4, 10)
+    assert crop[1, 2] == QColor(200, 100, 50).rgb()
+    assert np.shares_memory(crop, pixel_array(image))
+    # 超出图像的部分被裁掉
+    assert crop_array(image, QRect(40, 20, 30, 30)).shape == (10, 10)
+
+
+def test_array_image_round_trip_without_copy():
+    array = np.zeros((20, 40), dtype=np.uint32)
+    array[5, 6] = 0xFF336699
+    image = array_image(array)
+    assert image.size().width() == 40 and image.height() == 20
+    assert image.pixelColor(6, 5) == QColor(0x33, 0x66, 0x99)
+    assert int(image.constBits()) == array.ctypes.data
+
+    # 裁剪出的视图（行间有间隔）也不拷贝
+    view = array[2:10, 4:20]
+    cropped = array_image(view)
+    assert cropped.bytesPerLine() == array.strides[0]
+    assert cropped.pixelColor(2, 3) == QColor(0x33, 0x66, 0x99)
+
+    # (高, 宽, 4) uint8 的 B G R A
+    channels = np.zeros((3, 4, 4), dtype=np.uint8)
+    channels[1, 2] = (30, 20, 10, 255)
+    assert array_image(channels).pixelColor(2, 1) == QColor(10, 20, 30)
+
+    # 拷贝之后与数组无关
+    copy = image.copy()
+    array[5, 6] = 0xFF000000
+    assert image.pixelColor(6, 5) == QColor(Qt.black)
+    assert copy.pixelColor(6, 5) == QColor(0x33, 0x66, 0x99)
@@ -0,0 +1,64 @@
+"""剪贴板：复制时不编码，只在请求 image/png 时编码一次；已有 PNG / 大图提前编码"""
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QColor
+
+import image_formats
+from image_clipboard import ImageClipboard, PNG_MIME, PNG_FORMAT
+
+
+def make_image(width=400, height=300):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(20, 120, 220))
+    image.setPixelColor(5, 7, QColor(Qt.red))
+    return image
+
+
+def decode(data):
+    return QImage.fromData(bytes(data), "PNG").convertToFormat(QImage.Format_RGB32)
+
+
+def test_png_only_when_requested(qapp):
+    clipboard = ImageClipboard()
+    image = make_image()
+    data = clipboard.copy(image)
+    system = QApplication.clipboard()
+
+    assert data.encodes == 0
+    assert system.image() == image
+    assert data.encodes == 0
+
+    first = system.mimeData().data(PNG_MIME)
+    assert data.encodes == 1
+    assert decode(first) == image
+    second = system.mimeData().data(PNG_MIME)
+    assert data.encodes == 1
+    assert second == first
+    clipboard.shutdown()
+
+
+def test_existing_png_is_not_encoded(qapp):
+    clipboard = ImageClipboard()
+    image = make_image()
+    png = image_formats.get_format(PNG_FORMAT).encode(image)
+    data = clipboard.copy(image, png)
+
+    assert bytes(QApplication.clipboard().mimeData().data(PNG_MIME)) == png
+    assert data.encodes == 0
+    clipboard.shutdown()
+
+
+def test_large_image_prepared_in_background(qapp):
+    clipboard = ImageClipboard(prepare_pixels=100 * 100)
+    small = clipboard.copy(make_image(90, 90))
+    assert small.pending is None
+
+    image = make_image()
+    data = clipboard.copy(image)
+    assert data.pending is not None
+    data.pending.result()
+    assert data.encodes == 1
+
+    assert decode(QApplication.clipboard().mimeData().data(PNG_MIME)) == image
+    assert data.encodes == 1
+    clipboard.shutdown()
@@ -0,0 +1,91 @@
+"""输出格式：QOI 编解码往返；各格式写文件 / 读回；按扩展名选择格式"""
+import numpy as np
+import pytest
+from PyQt5.QtGui import QImage, QColor
+
+import image_formats
+import qoi_codec
+
+
+def mixed_pixels(width, height, seed=5):
+    """同色长串（超过 62 个像素的 RUN）、小差值、亮度差值、随机颜色和透明度混在一起"""
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 4), dtype=np.uint8)
+    pixels[:] = (30, 60, 90, 255)
+    pixels[height // 4:height // 2] += rng.integers(0, 2, size=(height // 2 - height // 4, width, 1),
+                                                     dtype=np.uint8)
+    pixels[height // 2:, :width // 2] = rng.integers(0, 256, size=(height - height // 2, width // 2, 4),
+                                                      dtype=np.uint8)
+    ramp = (np.arange(width) * 7 % 256).astype(np.uint8)
+    pixels[height // 2:, width // 2:, 1] = ramp[width // 2:]
+    return pixels
+
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_qoi_round_trip(channels):
+    width, height = 257, 64
+    pixels = mixed_pixels(width, height)
+    if channels == 3:
+        pixels[:, :, 3] = 255
+    data = qoi_codec.encode(pixels, width, height, channels)
+
+    assert qoi_codec.read_header(data) == (width, height, channels, 0)
+    assert data.endswith(qoi_codec.QOI_END_MARKER)
+    decoded, w, h, c = qoi_codec.decode(data)
+    assert (w, h, c) == (width, height, channels)
+    assert np.array_equal(np.frombuffer(decoded, dtype=np.uint8).reshape(height, width, 4), pixels)
+
+
+def test_qoi_known_bytes():
+    # 与初始的"前一个像素"（0, 0, 0, 255）相同：一个 RUN；之后一个新颜色：RGB
+    pixels = np.array([[[0, 0, 0, 255], [0, 0, 0, 255], [200, 10, 20, 255]]], dtype=np.uint8)
+    data = qoi_codec.encode(pixels, 3, 1, 3)
+    body = data[qoi_codec.QOI_HEADER_SIZE:-len(qoi_codec.QOI_END_MARKER)]
+    assert body == bytes([qoi_codec.QOI_OP_RUN | 1, qoi_codec.QOI_OP_RGB, 200, 10, 20])
+
+
+def make_image(alpha=False):
+    image = QImage(97, 61, QImage.Format_ARGB32 if alpha else QImage.Format_RGB32)
+    image.fill(QColor(40, 80, 160, 128 if alpha else 255))
+    for x in range(0, 97, 3):
+        image.setPixelColor(x, x % 61, QColor(255, x * 2, 0))
+    return image
+
+
+@pytest.mark.parametrize("alpha", [False, True])
+def test_qoi_image_round_trip(qapp, tmp_path, alpha):
+    image = make_image(alpha)
+    fmt = image_formats.get_format("qoi")
+    assert fmt.key == "qoi"
+    path = str(tmp_path / "shot.qoi")
+    fmt.write(image, path)
+
+    decoded = image_formats.read_image(path)
+    target = QImage.Format_ARGB32 if alpha else QImage.Format_RGB32
+    assert decoded.convertToFormat(target) == image
+
+
+def test_every_available_format_round_trips(qapp):
+    image = make_image()
+    for fmt in image_formats.available_formats():
+        decoded = fmt.decode(fmt.encode(image))
+        assert decoded.size() == image.size(), fmt.key
+        if fmt.key.startswith("png") or fmt.key == "qoi":
+            assert decoded.convertToFormat(QImage.Format_RGB32) == image, fmt.key
+
+
+def test_png_levels_trade_size(qapp):
+    image = make_image()
+    sizes = [len(image_formats.get_format(key).encode(image)) for key in ("png_fast", "png_small")]
+    assert sizes[1] <= sizes[0]
+
+
+def test_format_for_path():
+    png_fast = image_formats.get_format("png_fast")
+    assert image_formats.format_for_path("a.png", png_fast) is png_fast
+    assert image_formats.format_for_path("a.PNG").key == "png"
+    assert image_formats.format_for_path("a.jpeg").key == "jpeg"
+    assert image_formats.format_for_path("a.qoi", png_fast).key == "qoi"
+    assert image_formats.format_for_path("a.unknown", png_fast) is png_fast
+    # 不存在的格式名退回默认 PNG
+    assert image_formats.get_format("nope").key == image_formats.DEFAULT_FORMAT
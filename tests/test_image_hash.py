@@ -0,0 +1,41 @@
+"""内容哈希：只取决于尺寸、像素格式和像素（行末对齐填充不参与）"""
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QColor, QPixmap
+
+from image_hash import content_hash
+
+
+def make_image(width, height, fmt=QImage.Format_RGB888):
+    image = QImage(width, height, fmt)
+    image.fill(QColor(12, 34, 56))
+    image.setPixelColor(1, 1, QColor(Qt.red))
+    return image
+
+
+def test_same_pixels_same_hash(qapp):
+    image = make_image(5, 4)  # RGB888 每行 15 字节，对齐到 16 字节
+    assert image.bytesPerLine() != image.width() * 3
+    assert content_hash(image) == content_hash(make_image(5, 4))
+    assert content_hash(image) == content_hash(image.copy())
+    assert content_hash(QPixmap.fromImage(make_image(8, 8, QImage.Format_RGB32))) == \
+        content_hash(make_image(8, 8, QImage.Format_RGB32))
+
+
+def test_padding_is_ignored(qapp):
+    image = make_image(5, 4)
+    padded = make_image(5, 4)
+    bits = padded.bits()
+    bits.setsize(padded.sizeInBytes())
+    for y in range(padded.height()):
+        bits[y * padded.bytesPerLine() + padded.bytesPerLine() - 1] = b"\xab"
+    assert content_hash(padded) == content_hash(image)
+
+
+def test_differences_change_hash(qapp):
+    image = make_image(5, 4)
+    other = make_image(5, 4)
+    other.setPixelColor(4, 3, QColor(Qt.blue))
+    assert content_hash(other) != content_hash(image)
+    assert content_hash(make_image(4, 5)) != content_hash(image)
+    assert content_hash(image.convertToFormat(QImage.Format_RGB32)) != content_hash(image)
+    assert content_hash(image.copy(QRect(0, 0, 4, 4))) != content_hash(image)
@@ -0,0 +1,63 @@
+"""后台保存：编码和写文件在线程池中进行，完成 / 失败通过信号回到主线程"""
+import os
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QColor
+
+from image_saver import ImageSaver
+
+
+def make_image():
+    image = QImage(120, 80, QImage.Format_RGB32)
+    image.fill(QColor(10, 200, 90))
+    image.setPixelColor(3, 4, QColor(Qt.red))
+    return image
+
+
+def test_save_returns_immediately_and_reports(qapp, tmp_path):
+    saver = ImageSaver()
+    saved, failed = [], []
+    saver.saved.connect(saved.append)
+    saver.failed.connect(lambda path, error: failed.append(path))
+
+    paths = [str(tmp_path / f"shot_{i}.png") for i in range(3)]
+    for path in paths:
+        saver.save(make_image(), path)
+    assert saver.pending == 3
+
+    assert saver.wait_for_done()
+    assert saver.pending == 0
+    assert sorted(saved) == paths
+    assert failed == []
+    for path in paths:
+        image = QImage(path)
+        assert image.convertToFormat(QImage.Format_RGB32) == make_image()
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+
+def test_failed_save_is_reported_without_partial_file(qapp, tmp_path):
+    saver = ImageSaver()
+    saved, failed = [], []
+    saver.saved.connect(saved.append)
+    saver.failed.connect(lambda path, error: failed.append((path, error)))
+
+    path = str(tmp_path / "missing" / "shot.png")
+    saver.save(make_image(), path)
+    saver.wait_for_done()
+
+    assert saved == []
+    assert len(failed) == 1 and failed[0][0] == path and failed[0][1]
+    assert os.listdir(tmp_path) == []
+
+
+def test_format_follows_extension(qapp, tmp_path):
+    saver = ImageSaver()
+    saver.set_output_format("png_fast")
+    saver.save(make_image(), str(tmp_path / "shot.jpg"))
+    saver.save(make_image(), str(tmp_path / "shot.png"))
+    saver.wait_for_done()
+
+    with open(tmp_path / "shot.jpg", 'rb') as f:
+        assert f.read(3) == b"\xff\xd8\xff"
+    with open(tmp_path / "shot.png", 'rb') as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
@@ -0,0 +1,144 @@
+"""区域录制：逐帧只保存变化部分；GIF（Qt 读回逐帧一致）/ APNG 输出；主线程抓取 + 后台编码"""
+import struct
+import threading
+import zlib
+
+import pytest
+from PyQt5.QtCore import QSize, QEventLoop, QTimer
+from PyQt5.QtGui import QImage, QImageReader, QColor
+
+import recorder
+from recorder import Clip, ClipRecorder, write_gif, write_apng, lzw_encode, PNG_SIGNATURE
+
+pytestmark = pytest.mark.skipif(not recorder.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+if recorder.NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def make_frame(index, size=QSize(120, 80)):
+    """浅灰底，一个随帧序号右移的色块"""
+    image = QImage(size, QImage.Format_RGB32)
+    image.fill(QColor(220, 220, 220))
+    for y in range(20, 40):
+        for x in range(10 + index * 5, 30 + index * 5):
+            image.setPixelColor(x, y, QColor(200, 40, 40))
+    return image
+
+
+def make_clip(frames):
+    clip = Clip(frames[0].width(), frames[0].height())
+    for index, image in enumerate(frames):
+        clip.add(image, index * 0.1)
+    clip.finish(len(frames) * 0.1)
+    return clip
+
+
+def png_chunks(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.startswith(PNG_SIGNATURE)
+    offset, chunks = len(PNG_SIGNATURE), []
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        assert struct.unpack_from(">I", data, offset + 8 + length)[0] == zlib.crc32(kind + body)
+        chunks.append((kind, body))
+        offset += 12 + length
+    return chunks
+
+
+def test_clip_keeps_only_changed_rectangles():
+    frames = [make_frame(0), make_frame(0), make_frame(1)]
+    clip = make_clip(frames)
+
+    # 没变的帧只延长上一帧的显示时间
+    assert clip.captured == 3
+    assert len(clip.frames) == 2
+    first, second = clip.frames
+    assert first.mask is None and (first.width, first.height) == (120, 80)
+    assert first.duration == pytest.approx(0.2)
+    # 色块右移 5 像素：变化的是左边露出的 5 列和右边新盖住的 5 列
+    assert (second.x, second.y, second.width, second.height) == (10, 20, 25, 20)
+    assert second.mask.sum() == 2 * 5 * 20
+    assert second.duration == pytest.approx(0.1)
+    assert clip.duration() == pytest.approx(0.3)
+
+
+def read_frames(path, count):
+    reader = QImageReader(path)
+    assert reader.imageCount() == count
+    return [reader.read().convertToFormat(QImage.Format_RGB32) for _ in range(count)]
+
+
+def test_gif_decodes_to_every_frame(tmp_path):
+    frames = [make_frame(i) for i in range(4)]
+    path = str(tmp_path / "a.gif")
+    write_gif(make_clip(frames), path)
+    assert read_frames(path, 4) == frames
+
+
+def test_lzw_handles_long_runs_and_table_resets(tmp_path):
+    # 大片同色（一段游程跨过多次清除码）+ 随机噪点（短游程，码表多次写满）
+    rng = np.random.default_rng(3)
+    image = QImage(600, 400, QImage.Format_RGB32)
+    image.fill(QColor(10, 20, 30))
+    colors = [QColor(int(r), int(g), int(b)) for r, g, b in rng.integers(0, 256, (40, 3))]
+    for y in range(300, 400):
+        for x in range(600):
+            image.setPixelColor(x, y, colors[rng.integers(0, len(colors))])
+    path = str(tmp_path / "b.gif")
+    write_gif(make_clip([image]), path)
+    assert read_frames(path, 1) == [image]
+
+    # 一个像素：清除码、一个码、结束码
+    assert lzw_encode(np.array([7], dtype=np.uint8)) == bytes([0x00, 0x0F, 0x04, 0x04])
+
+
+def test_apng_frames(tmp_path):
+    frames = [make_frame(i) for i in range(3)]
+    path = str(tmp_path / "a.png")
+    write_apng(make_clip(frames), path)
+
+    chunks = png_chunks(path)
+    kinds = [kind for kind, _ in chunks]
+    assert kinds[:2] == [b"IHDR", b"acTL"]
+    assert struct.unpack(">II", chunks[1][1]) == (3, 0)
+    assert kinds.count(b"fcTL") == 3 and kinds.count(b"fdAT") == 2
+    # 不支持动画的读取器显示第一帧
+    assert QImage(path).convertToFormat(QImage.Format_RGB32) == frames[0]
+
+
+class CountingSource:
+    """每次抓取返回下一帧，记录抓取所在的线程"""
+
+    def __init__(self):
+        self.index = 0
+        self.threads = set()
+
+    def grab(self):
+        self.threads.add(threading.current_thread())
+        image = make_frame(self.index % 10)
+        self.index += 1
+        return image
+
+
+def test_recorder_grabs_on_main_thread_and_encodes_in_background(qapp, tmp_path):
+    clip_recorder = ClipRecorder()
+    finished = []
+    clip_recorder.finished.connect(finished.append)
+    source = CountingSource()
+    path = str(tmp_path / "live.gif")
+    assert clip_recorder.start(source, path, fps=50)
+
+    loop = QEventLoop()
+    QTimer.singleShot(300, loop.quit)
+    loop.exec_()
+    assert clip_recorder.stop() == path
+    assert not clip_recorder.is_active()
+    clip_recorder.close()
+
+    assert finished == [path]
+    assert source.threads == {threading.main_thread()}
+    assert source.index > 3
+    assert QImageReader(path).imageCount() >= 2
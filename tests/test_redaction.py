@@ -0,0 +1,68 @@
+"""打码：窗口和与逐个相加一致；马赛克每块为块内平均；模糊只用到区域周围一个半径；结果不含原像素"""
+import pytest
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QColor
+
+import redaction
+from redaction import window_sums, pixelate_pixels, blur_pixels, redacted_patch
+
+pytestmark = pytest.mark.skipif(not redaction.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+if redaction.NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def random_channels(height, width, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_window_sums_match_naive(axis):
+    values = random_channels(23, 31)
+    radius = 4
+    sums, counts = window_sums(values, radius, axis)
+    moved = np.moveaxis(values.astype(np.uint32), axis, 0)
+    for index in range(moved.shape[0]):
+        window = moved[max(0, index - radius):index + radius + 1]
+        assert counts[index] == len(window)
+        assert np.array_equal(np.take(sums, index, axis=axis), window.sum(axis=0))
+
+
+def test_mosaic_blocks_are_means():
+    channels = random_channels(20, 27)
+    result = pixelate_pixels(channels, block=8)
+    for y0 in range(0, 20, 8):
+        for x0 in range(0, 27, 8):
+            block = channels[y0:y0 + 8, x0:x0 + 8].reshape(-1, 4).astype(np.float64)
+            expected = np.floor(block.mean(axis=0) + 0.5)
+            assert (result[y0:y0 + 8, x0:x0 + 8] == expected.astype(np.uint8)).all()
+
+
+def test_blur_matches_naive_box_blur():
+    channels = random_channels(30, 40)
+    radius = 3
+    inner = (5, 25, 6, 30)
+    result = blur_pixels(channels, radius, inner)
+    assert result.shape == (20, 24, 4)
+    values = channels.astype(np.float64)
+    for y in range(5, 25, 4):
+        for x in range(6, 30, 5):
+            window = values[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1]
+            expected = window.reshape(-1, 4).mean(axis=0)
+            assert np.abs(result[y - 5, x - 6] - expected).max() <= 1
+
+
+def test_patch_covers_rect_without_original_pixels():
+    image = QImage(200, 120, QImage.Format_RGB32)
+    image.fill(QColor(30, 30, 30))
+    # 1 像素宽的白线：马赛克 / 模糊后不再出现纯白
+    for x in range(40, 160):
+        image.setPixelColor(x, 60, QColor(255, 255, 255))
+    for mode in ('mosaic', 'blur'):
+        patch = redacted_patch(image, QRect(30, 40, 140, 40), mode)
+        assert patch.size() == QRect(30, 40, 140, 40).size()
+        assert patch.pixelColor(50, 20) != QColor(255, 255, 255)
+    # 与图像不相交
+    assert redacted_patch(image, QRect(300, 300, 10, 10), 'mosaic') is None
+    # 原图不变
+    assert image.pixelColor(50, 60) == QColor(255, 255, 255)
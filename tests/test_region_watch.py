@@ -0,0 +1,134 @@
+"""区域监视：签名比较过滤噪点、内容变化时触发、冷却时间内不重复触发；发出的图像是拷贝"""
+import pytest
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QColor
+
+import image_buffer
+from image_buffer import array_image
+from region_watch import (RegionWatcher, FakeRegionSource, signature, changed_fraction,
+                          SIGNATURE_SIZE)
+
+if image_buffer.NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class StillSource:
+    """每次返回同一张图像"""
+
+    def __init__(self):
+        self.image = QImage(320, 180, QImage.Format_RGB32)
+        self.image.fill(Qt.white)
+        self.grabs = 0
+
+    def grab(self):
+        self.grabs += 1
+        return self.image
+
+
+def test_signature_and_changed_fraction():
+    image = QImage(640, 360, QImage.Format_RGB32)
+    image.fill(Qt.white)
+    base = signature(image)
+    assert len(base) == SIGNATURE_SIZE.width() * SIGNATURE_SIZE.height()
+    assert changed_fraction(base, base) == 0.0
+    assert changed_fraction(base, base[:-1]) == 1.0
+
+    image.fill(Qt.black)
+    assert changed_fraction(base, signature(image)) == 1.0
+
+
+def watch(source, cooldown_ms=0):
+    watcher = RegionWatcher()
+    events = []
+    watcher.changed.connect(lambda image, fraction: events.append((image, fraction)))
+    watcher.start(source, interval_ms=60000, cooldown_ms=cooldown_ms)
+    return watcher, events
+
+
+def sample(qapp, watcher, count=1):
+    """采样 count 次，每次之间运行事件循环（冷却定时器到期）"""
+    for _ in range(count):
+        watcher.sample()
+        qapp.processEvents()
+
+
+def test_noise_ignored_and_changes_trigger(qapp):
+    source = FakeRegionSource(QSize(400, 225), change_every=5, noise=True)
+    watcher, events = watch(source)
+    sample(qapp, watcher, 4)
+    assert events == []
+
+    # 第 5 次采样时数值变化
+    sample(qapp, watcher)
+    assert len(events) == 1
+    image, fraction = events[0]
+    assert image.size() == QSize(400, 225)
+    assert fraction > watcher.threshold
+
+    # 新的基准：之后的噪点不再触发
+    sample(qapp, watcher, 4)
+    assert len(events) == 1
+    sample(qapp, watcher)
+    assert len(events) == 2
+    assert (watcher.samples, watcher.triggered) == (10, 2)
+    watcher.stop()
+    assert not watcher.is_active()
+
+
+def test_cooldown_suppresses_sampling(qapp):
+    source = FakeRegionSource(QSize(400, 225), change_every=1, noise=False)
+    watcher, events = watch(source, cooldown_ms=60000)
+    watcher.sample()
+    assert len(events) == 1
+    grabs = source.grabs
+    for _ in range(3):
+        watcher.sample()
+    assert len(events) == 1
+    assert source.grabs == grabs
+
+    watcher.cooldown.stop()
+    watcher.sample()
+    assert len(events) == 2
+    watcher.stop()
+
+
+def test_identical_frames_skip_signature(qapp, monkeypatch):
+    source = StillSource()
+    watcher, events = watch(source)
+    calls = []
+    monkeypatch.setattr("region_watch.signature", lambda image: calls.append(image) or b"")
+    for _ in range(5):
+        watcher.sample()
+    assert source.grabs == 6
+    assert calls == []
+    assert events == []
+    watcher.stop()
+
+
+class ViewSource:
+    """每次抓取一幅新的"整屏"数组，返回其中区域的视图（array_image），白黑交替"""
+
+    def __init__(self):
+        self.screen = None
+        self.grabs = 0
+
+    def grab(self):
+        self.grabs += 1
+        self.screen = np.full((200, 300), 0xFFFFFFFF if self.grabs % 2 else 0xFF000000, dtype=np.uint32)
+        return array_image(self.screen[50:150, 100:250])
+
+
+@pytest.mark.skipif(not image_buffer.NUMPY_AVAILABLE, reason="需要 NumPy")
+def test_emitted_image_is_detached_copy(qapp):
+    source = ViewSource()
+    watcher, events = watch(source)
+    sample(qapp, watcher)
+    (image, _), = events
+    assert image.size() == QSize(150, 100)
+    assert image.pixelColor(0, 0) == QColor(Qt.black)
+
+    # 发出的是只有这个区域的拷贝：改写整屏内存不影响它
+    assert image.bytesPerLine() == 150 * 4
+    source.screen[:] = 0xFFFFFFFF
+    assert image.pixelColor(0, 0) == QColor(Qt.black)
+    watcher.stop()
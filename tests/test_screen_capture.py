@@ -0,0 +1,105 @@
+"""抓屏层：内存中裁剪；多屏幕拼接；落盘模式释放整帧后从文件中裁剪（含高 DPI 屏幕）"""
+import os
+
+import pytest
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPixmap, QPainter, QColor, QImage
+
+from screen_capture import CaptureFrame
+
+
+def make_frame(width=800, height=600, ratio=1.0):
+    """逻辑尺寸 width x height 的一帧，按 ratio 的设备像素绘制色块"""
+    pixmap = QPixmap(int(width * ratio), int(height * ratio))
+    pixmap.fill(Qt.white)
+    painter = QPainter(pixmap)
+    for i in range(0, int(width * ratio), 50):
+        painter.fillRect(i, 0, 25, int(height * ratio), QColor(i % 256, (i * 3) % 256, 120))
+    painter.fillRect(0, 0, 40, 40, QColor(Qt.red))
+    painter.end()
+    pixmap.setDevicePixelRatio(ratio)
+    return CaptureFrame(pixmap, QRect(0, 0, width, height))
+
+
+def same_pixels(a, b):
+    return (a.toImage().convertToFormat(QImage.Format_RGB32)
+            == b.toImage().convertToFormat(QImage.Format_RGB32))
+
+
+def test_crop_in_memory(qapp):
+    frame = make_frame()
+    pixmap = frame.crop(QRect(0, 0, 40, 40))
+    assert pixmap.size() == QRect(0, 0, 40, 40).size()
+    assert pixmap.toImage().pixelColor(20, 20) == QColor(Qt.red)
+
+    # 超出整帧的部分被裁掉
+    assert frame.crop(QRect(700, 500, 300, 300)).size() == QRect(700, 500, 100, 100).size()
+
+
+@pytest.mark.parametrize("ratio", [1.0, 2.0])
+def test_spooled_crop_matches_in_memory_crop(qapp, tmp_path, ratio):
+    rect = QRect(130, 70, 210, 95)
+    frame = make_frame(ratio=ratio)
+    expected = frame.crop(rect)
+
+    path = frame.spool(str(tmp_path))
+    frame.release()
+    assert frame.is_released()
+    cropped = frame.crop(rect)
+
+    assert cropped.devicePixelRatio() == ratio
+    assert cropped.size() == expected.size() == rect.size() * ratio
+    assert same_pixels(cropped, expected)
+
+    frame.discard()
+    assert not os.path.exists(path)
+
+
+def test_release_without_spool_keeps_frame(qapp):
+    frame = make_frame()
+    frame.release()
+    assert not frame.is_released()
+    assert frame.crop(QRect(0, 0, 10, 10)).size() == QRect(0, 0, 10, 10).size()
+
+
+def tile(width, height, color, ratio=1.0):
+    pixmap = QPixmap(int(width * ratio), int(height * ratio))
+    pixmap.fill(color)
+    pixmap.setDevicePixelRatio(ratio)
+    return pixmap
+
+
+def two_screens(right_ratio=1.0):
+    """左屏 400x300 红色，右屏 400x200 绿色（右屏下方是空隙）"""
+    tiles = [(QRect(0, 0, 400, 300), tile(400, 300, Qt.red)),
+             (QRect(400, 0, 400, 200), tile(400, 200, Qt.green, right_ratio))]
+    return CaptureFrame(None, QRect(-400, 0, 800, 300), tiles=tiles)
+
+
+def test_crop_across_screens(qapp):
+    frame = two_screens()
+    image = frame.crop(QRect(350, 150, 100, 100)).toImage()
+
+    assert image.size() == QRect(0, 0, 100, 100).size()
+    assert image.pixelColor(10, 10) == QColor(Qt.red)
+    assert image.pixelColor(90, 10) == QColor(Qt.green)
+    # 屏幕之间的空隙为黑色
+    assert image.pixelColor(90, 90) == QColor(Qt.black)
+
+
+def test_crop_within_one_screen_shares_whole_screen(qapp):
+    frame = two_screens()
+    left = frame.tiles[0][1]
+    assert frame.crop(QRect(0, 0, 400, 300)).cacheKey() == left.cacheKey()
+    assert frame.crop(QRect(450, 20, 50, 50)).toImage().pixelColor(0, 0) == QColor(Qt.green)
+
+
+def test_mixed_ratio_composite_uses_highest_ratio(qapp):
+    frame = two_screens(right_ratio=2.0)
+    pixmap = frame.crop(QRect(300, 0, 200, 100))
+    assert pixmap.devicePixelRatio() == 2.0
+    assert pixmap.size() == QRect(0, 0, 400, 200).size()
+
+    image, point = frame.image_at(QPoint(500, 50))
+    assert image is not None and point == QPoint(200, 100)
+    assert frame.image_at(QPoint(500, 250)) == (None, None)
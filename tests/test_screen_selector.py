@@ -0,0 +1,212 @@
+"""区域选择：脚本驱动的按下 / 移动 / 松开 → selection_finished 的区域；拖动时只重绘边框和文字；移动事件合并"""
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+from PyQt5.QtGui import QPixmap, QPainter, QColor
+from PyQt5.QtTest import QTest
+
+from bench_capture import send_mouse
+from screen_capture import CaptureFrame
+from screen_selector import ScreenSelector
+from window_snap import SnapTarget, WindowIndex
+from edge_snap import EdgeMap, EdgeTile
+
+WINDOW = QRect(100, 100, 400, 300)
+
+
+def make_selector(windows=False, edges=False):
+    """800x600 白色背景，WINDOW 处画一个黑色窗口；windows / edges=True 时开启窗口 / 边缘吸附"""
+    pixmap = QPixmap(800, 600)
+    pixmap.fill(Qt.white)
+    painter = QPainter(pixmap)
+    painter.fillRect(WINDOW, QColor(0, 0, 0))
+    painter.end()
+
+    selector = ScreenSelector(CaptureFrame(pixmap, QRect(0, 0, 800, 600)))
+    selector.show()
+    if windows:
+        selector.set_window_index(WindowIndex([SnapTarget(QRect(WINDOW), "窗口", 0, 0)]))
+    if edges:
+        selector.set_edge_map(EdgeMap([(QRect(0, 0, 800, 600), EdgeTile(pixmap.toImage()))]))
+    results = []
+    selector.selection_finished.connect(results.append)
+    return selector, results
+
+
+def test_drag_selects_rect(qapp):
+    selector, results = make_selector()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(600, 450))
+    for step in range(1, 11):
+        send_mouse(selector, QEvent.MouseMove, QPoint(600 - step * 40, 450 - step * 30))
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(200, 150), Qt.NoButton)
+
+    # 反向拖动也得到规范化的区域；松开的位置总是生效
+    assert results == [QRect(QPoint(200, 150), QPoint(600, 450))]
+    assert not selector.isVisible()
+
+
+def test_click_selects_hovered_window(qapp):
+    selector, results = make_selector(windows=True)
+    send_mouse(selector, QEvent.MouseMove, QPoint(250, 250), Qt.NoButton)
+    selector.flush_move()
+    assert selector.hover_target.rect == WINDOW
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(250, 250))
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(250, 250), Qt.NoButton)
+
+    assert results == [WINDOW]
+
+
+def test_drag_snaps_to_edges(qapp):
+    selector, results = make_selector(edges=True)
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(200, 200))
+    send_mouse(selector, QEvent.MouseMove, QPoint(503, 404))
+    selector.flush_move()
+    assert selector.end_pos == QPoint(499, 399)
+    # 松开的位置同样吸附
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(502, 403), Qt.NoButton)
+
+    assert results == [QRect(QPoint(200, 200), QPoint(499, 399))]
+
+
+def test_click_selects_window_despite_edge_snap(qapp):
+    selector, results = make_selector(windows=True, edges=True)
+    # 光标停在窗口边缘附近：边缘吸附会把角吸到 (99, 99)，单击仍然选中整个窗口
+    send_mouse(selector, QEvent.MouseMove, QPoint(104, 104), Qt.NoButton)
+    selector.flush_move()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(104, 104))
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(104, 104), Qt.NoButton)
+
+    assert results == [WINDOW]
+
+
+def test_drag_inside_window_ignores_click_target(qapp):
+    selector, results = make_selector(windows=True)
+    send_mouse(selector, QEvent.MouseMove, QPoint(250, 250), Qt.NoButton)
+    selector.flush_move()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(250, 250))
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(350, 320), Qt.NoButton)
+
+    assert results == [QRect(QPoint(250, 250), QPoint(350, 320))]
+
+
+def test_escape_cancels(qapp):
+    selector, results = make_selector()
+    cancelled = []
+    selector.selection_cancelled.connect(lambda: cancelled.append(True))
+    QTest.keyClick(selector, Qt.Key_Escape)
+
+    assert cancelled == [True]
+    assert results == []
+    assert selector.selection_rect is None
+
+
+def test_selection_region_is_only_the_outline(qapp):
+    selector, _ = make_selector()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(100, 100))
+    send_mouse(selector, QEvent.MouseMove, QPoint(500, 400))
+    selector.flush_move()
+
+    region = selector.selection_region()
+    assert region.contains(QPoint(100, 250))
+    assert region.contains(QPoint(500, 250))
+    assert region.contains(QPoint(300, 400))
+    assert not region.contains(QPoint(300, 250))
+    area = sum(rect.width() * rect.height() for rect in region.rects())
+    assert area < 400 * 300 // 10
+    selector.close()
+
+
+def test_drag_repaints_only_dirty_region(qapp):
+    selector, _ = make_selector()
+    qapp.processEvents()
+    full = selector.width() * selector.height()
+
+    for full_repaint in (False, True):
+        selector.full_repaint = full_repaint
+        selector.paint_stats.reset()
+        send_mouse(selector, QEvent.MouseButtonPress, QPoint(100, 100))
+        for step in range(1, 6):
+            send_mouse(selector, QEvent.MouseMove, QPoint(100 + step * 60, 100 + step * 40))
+            selector.flush_move()
+            qapp.processEvents()
+        assert selector.paint_stats.frames >= 5
+        if full_repaint:
+            assert selector.paint_stats.average_pixels() == full
+        else:
+            # 边框 + 尺寸文字 + 放大镜，远小于整个窗口
+            assert selector.paint_stats.average_pixels() < full // 5
+        selector.reset(selector.frame)
+    selector.close()
+
+
+def test_moves_are_coalesced(qapp):
+    selector, results = make_selector()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(10, 10))
+    # 事件循环不转：所有移动在同一个刷新周期内到达，只记录最新位置
+    for step in range(200):
+        send_mouse(selector, QEvent.MouseMove, QPoint(10 + step, 10 + step))
+    assert selector.move_stats.received == 200
+    assert selector.move_stats.rendered == 0
+    assert selector.pending_pos == QPoint(209, 209)
+    assert selector.move_timer.isActive()
+
+    selector.flush_move()
+    assert selector.move_stats.rendered == 1
+    assert selector.move_stats.dropped == 199
+    assert selector.end_pos == QPoint(209, 209)
+
+    # 松开时丢弃尚未渲染的移动，松开的位置生效
+    send_mouse(selector, QEvent.MouseMove, QPoint(250, 250))
+    send_mouse(selector, QEvent.MouseButtonRelease, QPoint(240, 230), Qt.NoButton)
+    assert not selector.move_timer.isActive()
+    assert results == [QRect(QPoint(10, 10), QPoint(240, 230))]
+
+
+def test_move_timer_renders_latest_position(qapp):
+    selector, _ = make_selector()
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(10, 10))
+    for step in range(20):
+        send_mouse(selector, QEvent.MouseMove, QPoint(20 + step, 30))
+    QTest.qWait(int(selector.refresh_interval() * 1000) * 3)
+
+    assert selector.move_stats.rendered == 1
+    assert selector.end_pos == QPoint(39, 30)
+    selector.close()
+
+
+def test_moves_without_coalescing(qapp):
+    selector, _ = make_selector()
+    selector.coalesce_moves = False
+    send_mouse(selector, QEvent.MouseButtonPress, QPoint(10, 10))
+    for step in range(50):
+        send_mouse(selector, QEvent.MouseMove, QPoint(10 + step, 10 + step))
+    assert selector.move_stats.received == 50
+    assert selector.move_stats.rendered == 50
+    selector.close()
+
+
+def test_loupe_follows_cursor_and_reads_pixel(qapp):
+    selector, _ = make_selector()
+    send_mouse(selector, QEvent.MouseMove, QPoint(150, 150), Qt.NoButton)
+    selector.flush_move()
+
+    assert selector.loupe_visible()
+    assert selector.pixel_color() == QColor(Qt.black)
+    assert selector.pixel_color(QPoint(50, 50)) == QColor(Qt.white)
+    assert selector.pixel_color(QPoint(900, 50)) is None
+    # 放大镜在光标右下方；靠近右下角时翻到左上方，不超出窗口
+    assert selector.loupe_rect().topLeft().x() > 150
+    selector.cursor_pos = QPoint(790, 590)
+    assert selector.rect().contains(selector.loupe_rect())
+    assert selector.overlay_region().contains(selector.loupe_rect().center())
+    selector.close()
+
+
+def test_c_copies_cursor_color(qapp):
+    selector, _ = make_selector()
+    send_mouse(selector, QEvent.MouseMove, QPoint(120, 130), Qt.NoButton)
+    selector.flush_move()
+    QTest.keyClick(selector, Qt.Key_C)
+
+    assert qapp.clipboard().text() == "#000000"
+    # C 不结束选择
+    assert selector.isVisible()
+    selector.close()
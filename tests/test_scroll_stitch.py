@@ -0,0 +1,50 @@
+"""滚动拼接：已知滚动距离的帧 → 拼接结果的高度和内容"""
+import numpy as np
+from PyQt5.QtGui import QImage
+
+from scroll_stitch import ScrollStitcher
+
+WIDTH = 200
+VIEW_HEIGHT = 150
+
+
+def make_document(height, seed=11):
+    """每行都不相同的随机像素（行哈希唯一，对齐不会有歧义）"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 1 << 24, size=(height, WIDTH), dtype=np.uint32) | np.uint32(0xFF000000)
+
+
+def view(document, top):
+    pixels = np.ascontiguousarray(document[top:top + VIEW_HEIGHT])
+    image = QImage(pixels.data, WIDTH, VIEW_HEIGHT, WIDTH * 4, QImage.Format_RGB32)
+    return image.copy()
+
+
+def stitched(stitcher):
+    return np.concatenate(list(stitcher.strips()))
+
+
+def test_height_and_content_for_known_shifts(tmp_path):
+    document = make_document(1000)
+    tops = [0, 40, 40, 130, 237, 300, 420, 540]
+    stitcher = ScrollStitcher(str(tmp_path))
+    shifts = [stitcher.add(view(document, top)) for top in tops]
+
+    assert shifts == [0] + [b - a for a, b in zip(tops, tops[1:])]
+    width, height = stitcher.finish()
+    assert (width, height) == (WIDTH, VIEW_HEIGHT + tops[-1])
+    assert stitcher.frames == len(set(tops))
+    assert np.array_equal(stitched(stitcher), document[:height])
+    stitcher.close()
+
+
+def test_unaligned_frame_is_rejected(tmp_path):
+    document = make_document(600)
+    stitcher = ScrollStitcher(str(tmp_path))
+    stitcher.add(view(document, 0))
+    assert stitcher.add(view(make_document(600, seed=99), 0)) is None
+    assert stitcher.add(view(document, 100)) == 100
+
+    assert stitcher.rejected == 1
+    assert stitcher.finish() == (WIDTH, VIEW_HEIGHT + 100)
+    stitcher.close()
@@ -0,0 +1,130 @@
+"""相似截图：感知哈希、多索引哈希表、截图库 find_similar（后台加载索引、相同内容只返回最新的一条）"""
+import os
+import random
+import sqlite3
+
+import pytest
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QColor, QPainter
+
+import image_hash
+from capture_library import CaptureLibrary, INDEX_NAME, SCHEMA_VERSION
+from similarity_index import SimilarityIndex
+
+pytestmark = pytest.mark.skipif(not image_hash.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+
+def make_image(shade=0, width=640, height=400):
+    """有明显结构的图：左右两块灰度不同，中间一条黑带"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(230, 230, 230))
+    painter = QPainter(image)
+    painter.fillRect(0, 0, width // 3, height, QColor(40 + shade, 60, 90))
+    painter.fillRect(width // 2, height // 3, width // 8, height // 3, Qt.black)
+    painter.end()
+    return image
+
+
+def make_meta(created, content_hash, phash, path=None):
+    return {'created': created, 'x': 0, 'y': 0, 'width': 640, 'height': 400, 'screen': "",
+            'format': "png", 'bytes': 0, 'hash': content_hash, 'path': path or f"{content_hash}.png",
+            'phash': phash}
+
+
+def test_perceptual_hash_tolerates_small_changes():
+    base = image_hash.perceptual_hash(make_image())
+    assert image_hash.hamming(base, image_hash.perceptual_hash(make_image(shade=6))) <= 4
+    assert image_hash.hamming(base, image_hash.perceptual_hash(make_image(width=1280, height=800))) <= 4
+
+    other = make_image().mirrored(True, False)
+    assert image_hash.hamming(base, image_hash.perceptual_hash(other)) > 10
+
+
+def test_index_query_matches_scan():
+    rng = random.Random(5)
+    index = SimilarityIndex()
+    for key in range(2000):
+        index.add(key, rng.getrandbits(64))
+    target = index.hashes[17]
+    for bit in range(6):
+        index.add(3000 + bit, target ^ (1 << (bit * 9)))
+
+    assert index.query(target, 10) == index.scan(target, 10)
+    assert (0, 17) in index.query(target, 10)
+    index.remove(17)
+    assert 17 not in index
+    assert index.query(target, 10) == index.scan(target, 10)
+
+
+def test_find_similar_loads_index_in_background(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    value = image_hash.perceptual_hash(make_image())
+    near, far = library.add_records([make_meta(1.7e9, "a", value ^ 0b101),
+                                     make_meta(1.7e9 + 1, "b", ~value & (2 ** 64 - 1))])
+    ready = []
+    library.similarity_ready.connect(lambda: ready.append(True))
+
+    assert library.find_similar(value) is None
+    # 加载期间新增的记录在加载完成后补进索引
+    added, = library.add_records([make_meta(1.7e9 + 2, "c", value)])
+    library.wait_for_done()
+    assert ready == [True]
+
+    results = library.find_similar(value)
+    assert [(distance, record.id) for distance, record in results] == [(0, added), (2, near)]
+    assert [record.id for _, record in library.find_similar(value, exclude_hash="c")] == [near]
+    library.close()
+
+
+def test_find_similar_returns_newest_duplicate(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    value = image_hash.perceptual_hash(make_image())
+    # 旧记录的 ID 小，查询按 (距离, ID) 排序时排在前面：去重不能依赖查询顺序
+    oldest, newest, middle = library.add_records([
+        make_meta(1.7e9, "same", value, "shared.png"),
+        make_meta(1.7e9 + 20, "same", value, "shared.png"),
+        make_meta(1.7e9 + 10, "same", value, "shared.png"),
+    ])
+    library.find_similar(value)
+    library.wait_for_done()
+
+    results = library.find_similar(value)
+    assert [record.id for _, record in results] == [newest]
+    library.close()
+
+
+def test_migrates_version_1_index_and_backfills_phash(qapp, tmp_path):
+    image = make_image()
+    path = tmp_path / "old.png"
+    assert image.save(str(path))
+    db = sqlite3.connect(os.path.join(str(tmp_path), INDEX_NAME))
+    db.executescript("""
+        CREATE TABLE captures (
+            id      INTEGER PRIMARY KEY,
+            created REAL NOT NULL,
+            x       INTEGER NOT NULL,
+            y       INTEGER NOT NULL,
+            width   INTEGER NOT NULL,
+            height  INTEGER NOT NULL,
+            screen  TEXT NOT NULL DEFAULT '',
+            format  TEXT NOT NULL,
+            bytes   INTEGER NOT NULL,
+            hash    TEXT NOT NULL,
+            path    TEXT NOT NULL
+        );
+        INSERT INTO captures VALUES (3, 1700000000.0, 0, 0, 640, 400, '', 'png', 1, 'abc', 'old.png');
+        PRAGMA user_version = 1;
+    """)
+    db.close()
+
+    library = CaptureLibrary(str(tmp_path))
+    assert library.db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert library.get(3).phash is None
+
+    value = image_hash.perceptual_hash(image)
+    assert library.find_similar(value) is None
+    library.wait_for_done()
+    assert library.get(3).phash == value
+    assert [record.id for _, record in library.find_similar(value)] == [3]
+    assert library.get(3).rect == QRect(0, 0, 640, 400)
+    library.close()
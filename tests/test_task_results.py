@@ -0,0 +1,41 @@
+"""工作线程结果队列：按顺序在主线程中处理；deliver() 不需要事件循环，之后到达的信号不重复处理"""
+from PyQt5.QtCore import QRunnable, QThreadPool
+
+from task_results import TaskResults
+
+
+class PostTask(QRunnable):
+    def __init__(self, results, handler, value):
+        super().__init__()
+        self.results = results
+        self.handler = handler
+        self.value = value
+
+    def run(self):
+        self.results.post(self.handler, self.value)
+
+
+def test_deliver_after_wait_without_event_loop(qapp):
+    results = TaskResults()
+    pool = QThreadPool()
+    pool.setMaxThreadCount(1)
+    received = []
+    for value in range(5):
+        pool.start(PostTask(results, received.append, value))
+    pool.waitForDone()
+    assert received == []
+
+    results.deliver()
+    assert received == [0, 1, 2, 3, 4]
+    qapp.processEvents()
+    assert received == [0, 1, 2, 3, 4]
+
+
+def test_queued_results_arrive_through_event_loop(qapp):
+    results = TaskResults()
+    pool = QThreadPool()
+    received = []
+    pool.start(PostTask(results, received.append, "done"))
+    pool.waitForDone()
+    qapp.processEvents()
+    assert received == ["done"]
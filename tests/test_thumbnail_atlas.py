@@ -0,0 +1,103 @@
+"""缩略图图集：追加写入 + mmap 读取（不解码、不拷贝）；截图库保存时生成缩略图；画廊按需补生成"""
+import os
+
+from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtTest import QTest
+
+from capture_library import CaptureLibrary
+from gallery_window import GalleryWindow
+from thumbnail_atlas import ThumbnailAtlas, make_thumbnail, THUMB_SIZE, INDEX_NAME
+
+
+def make_image(color, width=640, height=400):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(color)
+    return image
+
+
+def test_add_view_and_reopen(qapp, tmp_path):
+    atlas = ThumbnailAtlas(str(tmp_path))
+    thumbs = {key: make_thumbnail(make_image(QColor(key * 40, 100, 200), 300 + key, 200))
+              for key in range(1, 5)}
+    for key, thumb in thumbs.items():
+        atlas.add(key, *thumb)
+    assert atlas.add_alias(9, 2)
+    assert not atlas.add_alias(10, 99)
+
+    def check(atlas):
+        assert len(atlas) == 5
+        for key, (width, height, _) in thumbs.items():
+            view = atlas.view(key)
+            assert (view.width(), view.height()) == (width, height)
+            assert width <= THUMB_SIZE.width() and height <= THUMB_SIZE.height()
+            assert view.pixelColor(width // 2, height // 2) == QColor(key * 40, 100, 200)
+        assert atlas.view(9).pixelColor(0, 0) == atlas.view(2).pixelColor(0, 0)
+        assert atlas.view(99) is None
+
+    check(atlas)
+    atlas.close()
+    atlas = ThumbnailAtlas(str(tmp_path))
+    check(atlas)
+    atlas.close()
+
+
+def test_incomplete_index_record_is_dropped(qapp, tmp_path):
+    atlas = ThumbnailAtlas(str(tmp_path))
+    atlas.add(1, *make_thumbnail(make_image(QColor(Qt.red))))
+    atlas.close()
+    # 上次写到一半退出：索引末尾多出半条记录
+    with open(os.path.join(str(tmp_path), INDEX_NAME), 'ab') as f:
+        f.write(b"\x02\x00\x00")
+
+    atlas = ThumbnailAtlas(str(tmp_path))
+    assert len(atlas) == 1
+    atlas.add(2, *make_thumbnail(make_image(QColor(Qt.green))))
+    atlas.close()
+    atlas = ThumbnailAtlas(str(tmp_path))
+    assert atlas.view(2).pixelColor(5, 5) == QColor(Qt.green)
+    atlas.close()
+
+
+def test_library_close_keeps_queued_saves(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    for i in range(4):
+        library.quick_save(make_image(QColor(i * 50, 10, 10)))
+    library.close()
+
+    library = CaptureLibrary(str(tmp_path))
+    assert library.count() == 4
+    assert all(record_id in library.atlas for record_id in library.ids())
+    library.close()
+
+
+def test_gallery_requests_missing_thumbnails(qapp, tmp_path):
+    library = CaptureLibrary(str(tmp_path))
+    library.quick_save(make_image(QColor(Qt.blue)))
+    library.wait_for_done()
+    record = library.recent(1)[0]
+    library.close()
+    # 图集丢失：画廊绘制时在后台补生成
+    for name in os.listdir(tmp_path):
+        if name.startswith("thumbnails."):
+            os.remove(os.path.join(str(tmp_path), name))
+
+    library = CaptureLibrary(str(tmp_path))
+    ready = []
+    library.thumbnail_ready.connect(ready.append)
+    gallery = GalleryWindow(library)
+    gallery.show()
+    assert gallery.view.ids == [record.id]
+    qapp.processEvents()
+    library.wait_for_done()
+    assert ready == [record.id]
+    assert library.atlas.view(record.id).pixelColor(3, 3) == QColor(Qt.blue)
+
+    activated = []
+    gallery.capture_activated.connect(activated.append)
+    QTest.mouseDClick(gallery.view.viewport(), Qt.LeftButton, Qt.NoModifier, QPoint(20, 20))
+    assert activated == [record.id]
+    assert gallery.view.index_at(QPoint(5, 5)) == 0
+    assert gallery.view.index_at(QPoint(5, 5000)) is None
+    gallery.close()
+    library.close()
@@ -0,0 +1,111 @@
+"""定时截图：.tlap 容器写入 / 读取、只写变化的小块、关键帧、录制中读取；停止时直接处理最后一帧"""
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QColor
+
+import timelapse
+from timelapse import TimelapseWriter, TimelapseReader, TimelapseRecorder
+
+pytestmark = pytest.mark.skipif(not timelapse.NUMPY_AVAILABLE, reason="需要 NumPy")
+
+
+def make_frame(index, width=200, height=150):
+    """白底，左上角一个随帧序号移动的黑点（尺寸不是小块的整数倍）"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(Qt.white)
+    image.setPixelColor(index * 10 % width, 5, QColor(Qt.black))
+    return image
+
+
+def test_round_trip_with_changed_tiles_and_keyframes(tmp_path):
+    path = str(tmp_path / "a.tlap")
+    writer = TimelapseWriter(path, 200, 150, tile_size=64, keyframe_interval=4)
+    frames = [make_frame(i) for i in range(10)]
+    results = [writer.write_frame(frame, 1.7e9 + i) for i, frame in enumerate(frames)]
+    # 一帧重复：没有变化的小块
+    results.append(writer.write_frame(frames[-1], 1.7e9 + 10))
+    writer.close()
+
+    # 4x3 个小块；关键帧写入全部小块，其余只写黑点离开和到达的小块
+    assert [changed for changed, _ in results] == [12, 1, 1, 1, 12, 1, 1, 2, 12, 1, 0]
+    assert results[-1][1] == timelapse.FRAME_HEADER.size
+
+    reader = TimelapseReader(path)
+    assert len(reader) == 11
+    assert (reader.width, reader.height) == (200, 150)
+    assert reader.keyframes == [0, 4, 8]
+    assert reader.frame_time(3).timestamp() == pytest.approx(1.7e9 + 3)
+    # 顺序、倒序、跳跃读取都与原图一致
+    for index in list(range(11)) + [9, 2, 7, 0, 10]:
+        assert reader.frame(index) == frames[min(index, 9)]
+    with pytest.raises(IndexError):
+        reader.frame(11)
+
+
+def test_reader_refresh_sees_new_frames(tmp_path):
+    path = str(tmp_path / "live.tlap")
+    writer = TimelapseWriter(path, 200, 150)
+    writer.write_frame(make_frame(0))
+    reader = TimelapseReader(path)
+    assert len(reader) == 1
+
+    writer.write_frame(make_frame(1))
+    # 写了一半的帧不读
+    writer.file.write(b"FRAM")
+    writer.file.flush()
+    assert reader.refresh() == 2
+    assert reader.frame(1) == make_frame(1)
+    writer.close()
+
+
+def test_not_a_timelapse_file(tmp_path):
+    path = tmp_path / "other.tlap"
+    path.write_bytes(b"PNG not a timelapse header at all")
+    with pytest.raises(IOError):
+        TimelapseReader(str(path))
+
+
+def start_recorder(tmp_path, monkeypatch, frames):
+    recorder = TimelapseRecorder(str(tmp_path))
+    images = iter(frames)
+    monkeypatch.setattr(recorder, "grab", lambda: next(images))
+    written = []
+    recorder.frame_written.connect(lambda index, changed, size: written.append((index, changed)))
+    assert recorder.start(interval_s=3600, path=str(tmp_path / "rec.tlap"))
+    return recorder, written
+
+
+def test_stop_delivers_last_frame_without_event_loop(qapp, tmp_path, monkeypatch):
+    recorder, written = start_recorder(tmp_path, monkeypatch, [make_frame(0), make_frame(1)])
+    recorder.pool.waitForDone()
+    recorder.results.deliver()
+    recorder.capture()
+
+    path = recorder.stop()
+    assert not recorder.is_active()
+    assert written == [(0, 12), (1, 1)]
+    # 之后才到达的排队信号不重复处理
+    qapp.processEvents()
+    assert written == [(0, 12), (1, 1)]
+    assert recorder.frames == 2
+    assert len(TimelapseReader(path)) == 2
+
+
+def test_failed_write_stops_recording(qapp, tmp_path, monkeypatch):
+    recorder, written = start_recorder(tmp_path, monkeypatch, [make_frame(0)])
+    failures = []
+    recorder.failed.connect(failures.append)
+    recorder.pool.waitForDone()
+    recorder.results.deliver()
+
+    def fail(image, timestamp):
+        raise IOError("磁盘已满")
+    monkeypatch.setattr(recorder.writer, "write_frame", fail)
+    recorder.submit(make_frame(1))
+
+    path = recorder.stop()
+    assert path == str(tmp_path / "rec.tlap")
+    assert not recorder.is_active()
+    assert failures == ["磁盘已满"]
+    assert written == [(0, 12)]
+    assert recorder.stop() is None
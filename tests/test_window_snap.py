@@ -0,0 +1,34 @@
+"""窗口吸附：网格索引的命中测试（最上层窗口里最内层的控件）与逐个比较一致"""
+import random
+
+from PyQt5.QtCore import QPoint, QRect
+
+from window_snap import WindowIndex, SnapTarget, FakeWindowSource
+
+
+def brute_force_hit(targets, pos):
+    hits = [target for target in targets if target.rect.contains(pos)]
+    return min(hits, key=SnapTarget.priority) if hits else None
+
+
+def test_hit_prefers_topmost_window_and_innermost_control():
+    back = SnapTarget(QRect(0, 0, 600, 400), "后面的窗口", z=1)
+    front = SnapTarget(QRect(300, 200, 500, 300), "前面的窗口", z=0)
+    button = SnapTarget(QRect(320, 220, 80, 30), "按钮", z=0, depth=2)
+    hidden = SnapTarget(QRect(310, 210, 100, 50), "被挡住的控件", z=1, depth=1)
+    index = WindowIndex([back, button, hidden, front], cell=128)
+
+    assert index.hit(QPoint(10, 10)) is back
+    assert index.hit(QPoint(350, 230)) is button
+    assert index.hit(QPoint(405, 255)) is front
+    assert index.hit(QPoint(900, 900)) is None
+    assert len(index) == 4
+
+
+def test_grid_matches_brute_force(qapp):
+    targets = FakeWindowSource(QRect(0, 0, 2560, 1440), count=40, seed=7).snapshot()
+    index = WindowIndex(targets)
+    rng = random.Random(3)
+    for _ in range(2000):
+        pos = QPoint(rng.randrange(-50, 2600), rng.randrange(-50, 1500))
+        assert index.hit(pos) is brute_force_hit(targets, pos)
@@ -0,0 +1,152 @@
+"""
+缩略图图集：每张截图的缩略图只生成一次（保存时在工作线程中顺便生成），
+追加写入一个图集文件，另有一个定长记录的偏移索引文件
+读取时把图集文件映射到内存（mmap），缩略图 QImage 直接引用映射内存：
+没有解码、没有拷贝，内存占用由操作系统按页管理，几千张缩略图的画廊也能即时打开
+
+  thumbnails.atlas  原始 RGB888 像素，每张缩略图按 4 字节对齐
+  thumbnails.idx    每条 24 字节：记录 ID、偏移、宽、高
+"""
+import os
+import mmap
+import struct
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage
+
+ATLAS_NAME = "thumbnails.atlas"
+INDEX_NAME = "thumbnails.idx"
+
+# 缩略图最大尺寸（保持宽高比）
+THUMB_SIZE = QSize(128, 80)
+
+# 索引记录：记录 ID (u64)、偏移 (u64)、宽 (u16)、高 (u16)、保留 (4 字节)
+INDEX_RECORD = struct.Struct("<QQHH4x")
+
+
+def thumbnail_stride(width):
+    """RGB888 每行字节数（与 QImage 的 4 字节行对齐一致）"""
+    return (width * 3 + 3) & ~3
+
+
+def make_thumbnail(image, size=THUMB_SIZE):
+    """生成缩略图，返回 (宽, 高, RGB888 像素字节串)；可以在工作线程中调用"""
+    thumb = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    thumb = thumb.convertToFormat(QImage.Format_RGB888)
+    bits = thumb.constBits()
+    bits.setsize(thumb.sizeInBytes())
+    return thumb.width(), thumb.height(), bytes(bits)
+
+
+class ThumbnailAtlas:
+    """缩略图图集（只在主线程中读写）"""
+
+    def __init__(self, directory):
+        self.atlas_path = os.path.join(directory, ATLAS_NAME)
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        os.makedirs(directory, exist_ok=True)
+
+        # 记录 ID → (偏移, 宽, 高)
+        self.entries = {}
+        self.load_index()
+
+        self.atlas_file = open(self.atlas_path, 'ab')
+        self.index_file = open(self.index_path, 'ab')
+
+        # 只读映射；图集变长后重新映射。旧的映射可能还被缩略图 QImage 引用，
+        # 由 Python 引用计数决定何时释放，这里不主动关闭
+        self.reader = None
+        self.map = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def load_index(self):
+        """读取偏移索引；丢弃超出图集文件末尾的记录（上次写入中途退出）"""
+        atlas_size = os.path.getsize(self.atlas_path) if os.path.exists(self.atlas_path) else 0
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, 'rb') as f:
+            data = f.read()
+
+        valid = len(data) // INDEX_RECORD.size * INDEX_RECORD.size
+        for key, offset, width, height in INDEX_RECORD.iter_unpack(data[:valid]):
+            if offset + thumbnail_stride(width) * height > atlas_size:
+                break
+            self.entries[key] = (offset, width, height)
+
+        # 截掉不完整的记录，之后的追加从完整记录之后开始
+        complete = len(self.entries) * INDEX_RECORD.size
+        if complete < len(data):
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(complete)
+
+    def add(self, key, width, height, pixels):
+        """追加一张缩略图（make_thumbnail 的结果）"""
+        if key in self.entries:
+            return
+
+        # 4 字节对齐
+        offset = self.atlas_file.tell()
+        padding = -offset % 4
+        if padding:
+            self.atlas_file.write(b"\0" * padding)
+            offset += padding
+
+        self.atlas_file.write(pixels)
+        self.atlas_file.flush()
+        self.index_file.write(INDEX_RECORD.pack(key, offset, width, height))
+        self.index_file.flush()
+        self.entries[key] = (offset, width, height)
+
+    def add_alias(self, key, existing):
+        """key 与 existing 共用同一张缩略图（只追加一条索引记录），existing 没有缩略图时返回 False"""
+        entry = self.entries.get(existing)
+        if entry is None or key in self.entries:
+            return False
+
+        self.index_file.write(INDEX_RECORD.pack(key, *entry))
+        self.index_file.flush()
+        self.entries[key] = entry
+        return True
+
+    def remap(self, size):
+        """图集长度超出当前映射时重新映射"""
+        if self.map is not None and len(self.map) >= size:
+            return True
+
+        self.atlas_file.flush()
+        if os.path.getsize(self.atlas_path) < size:
+            return False
+        if self.reader is None:
+            self.reader = open(self.atlas_path, 'rb')
+        self.map = mmap.mmap(self.reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def view(self, key):
+        """缩略图 QImage（直接引用映射内存，不解码、不拷贝）；不存在时返回 None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        offset, width, height = entry
+        stride = thumbnail_stride(width)
+        end = offset + stride * height
+        if not self.remap(end):
+            return None
+
+        # QImage 持有 memoryview，映射在图像释放前不会被关闭
+        pixels = memoryview(self.map)[offset:end]
+        return QImage(pixels, width, height, stride, QImage.Format_RGB888)
+
+    def close(self):
+        self.atlas_file.close()
+        self.index_file.close()
+        self.map = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
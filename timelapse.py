@@ -0,0 +1,392 @@
+"""
+定时截图（延时摄影）：按固定间隔截取某个区域或整个屏幕，适合长时间记录（例如通宵运行的任务）
+每帧切成 64x64 的小块，用 NumPy 一次比较整帧找出变化的小块，只把变化的小块（zlib 压缩）
+追加写入一个容器文件；画面不变时每帧只写 28 字节的帧头
+每隔 100 帧写一个完整的关键帧，读取任意一帧最多回放 100 帧的增量
+抓屏在主线程（定时器触发），比较、压缩和写文件在工作线程中进行；
+工作线程还没处理完上一帧时跳过这一次抓屏
+
+容器格式（.tlap，只追加写入，录制中途退出也能读出已写完的帧）：
+  文件头  魔数 TLAP、版本、小块边长、宽、高、开始时间
+  每帧    魔数 FRAM、帧序号、时间戳、是否关键帧、小块数、数据长度，
+          之后是每个小块：列、行、压缩后长度、zlib 压缩的 RGB32 像素
+
+读取某一帧：python timelapse.py 文件.tlap [帧序号] [输出.png]
+"""
+import os
+import sys
+import time
+import zlib
+import bisect
+import struct
+from datetime import datetime
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from screen_capture import grab_screen
+from image_buffer import NUMPY_AVAILABLE, pixel_array, array_image
+from task_results import TaskResults
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+MAGIC = b"TLAP"
+FRAME_MAGIC = b"FRAM"
+VERSION = 1
+
+# 文件头：魔数、版本、小块边长、宽、高、开始时间
+HEADER = struct.Struct("<4sHHIId")
+# 帧头：魔数、帧序号、时间戳、是否关键帧、小块数、数据长度
+FRAME_HEADER = struct.Struct("<4sIdB3xII")
+# 小块：列、行、压缩后长度
+TILE_HEADER = struct.Struct("<HHI")
+
+# 小块边长（像素）
+DEFAULT_TILE_SIZE = 64
+# 默认截图间隔（秒）
+DEFAULT_INTERVAL_S = 10
+# 每隔多少帧写一个关键帧
+KEYFRAME_INTERVAL = 100
+# zlib 压缩级别（截图内容大片同色，级别 1 已经接近最高级别的大小）
+COMPRESS_LEVEL = 1
+
+
+class TimelapseWriter:
+    """写入定时截图容器（write_frame 同一时间只能在一个线程中调用）"""
+
+    def __init__(self, path, width, height, tile_size=DEFAULT_TILE_SIZE,
+                 keyframe_interval=KEYFRAME_INTERVAL, started=None):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("定时截图需要 NumPy: pip install numpy")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        self.columns = -(-width // tile_size)
+        self.rows = -(-height // tile_size)
+
+        # 上一帧（补齐到小块的整数倍）
+        self.previous = None
+        self.frames = 0
+        self.tiles_written = 0
+
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, tile_size, width, height, started or time.time()))
+        self.file.flush()
+        self.bytes_written = HEADER.size
+
+    @property
+    def raw_bytes(self):
+        """同样帧数的未压缩整帧大小（对比用）"""
+        return self.frames * self.width * self.height * 4
+
+    def padded(self, image):
+        """图像 → 补齐到小块整数倍的像素数组（尺寸变化时按第一帧的尺寸裁剪或补黑）"""
+        pixels = pixel_array(image)
+        canvas = np.zeros((self.rows * self.tile_size, self.columns * self.tile_size), dtype=np.uint32)
+        height = min(self.height, pixels.shape[0])
+        width = min(self.width, pixels.shape[1])
+        canvas[:height, :width] = pixels[:height, :width]
+        return canvas
+
+    def changed_tiles(self, canvas, keyframe):
+        """与上一帧不同的小块 [(列, 行), ...]（整帧一次比较，不逐块循环）"""
+        if keyframe or self.previous is None:
+            grid = np.ones((self.rows, self.columns), dtype=bool)
+        else:
+            size = self.tile_size
+            diff = canvas != self.previous
+            grid = diff.reshape(self.rows, size, self.columns, size).any(axis=(1, 3))
+        rows, columns = np.nonzero(grid)
+        return list(zip(columns.tolist(), rows.tolist()))
+
+    def write_frame(self, image, timestamp=None):
+        """追加一帧，返回 (变化的小块数, 写入字节数)"""
+        canvas = self.padded(image)
+        keyframe = self.frames % self.keyframe_interval == 0
+        tiles = self.changed_tiles(canvas, keyframe)
+
+        size = self.tile_size
+        blocks = canvas.reshape(self.rows, size, self.columns, size)
+        payload = bytearray()
+        for column, row in tiles:
+            data = zlib.compress(blocks[row, :, column, :].tobytes(), COMPRESS_LEVEL)
+            payload += TILE_HEADER.pack(column, row, len(data))
+            payload += data
+
+        header = FRAME_HEADER.pack(FRAME_MAGIC, self.frames, timestamp or time.time(),
+                                   keyframe, len(tiles), len(payload))
+        self.file.write(header)
+        self.file.write(payload)
+        self.file.flush()
+
+        self.previous = canvas
+        self.frames += 1
+        self.tiles_written += len(tiles)
+        written = len(header) + len(payload)
+        self.bytes_written += written
+        return len(tiles), written
+
+    def close(self):
+        self.file.close()
+        self.previous = None
+
+
+class TimelapseReader:
+    """读取定时截图容器：打开时只读帧头建立索引，需要哪一帧再从最近的关键帧回放"""
+
+    def __init__(self, path):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("定时截图需要 NumPy: pip install numpy")
+
+        self.path = path
+        self.file = open(path, 'rb')
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise IOError(f"不是定时截图文件: {path}")
+        magic, version, self.tile_size, self.width, self.height, started = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise IOError(f"不是定时截图文件: {path}")
+
+        self.started = datetime.fromtimestamp(started)
+        self.columns = -(-self.width // self.tile_size)
+        self.rows = -(-self.height // self.tile_size)
+
+        # 每帧的文件偏移和时间戳；关键帧的帧序号
+        self.offsets = []
+        self.timestamps = []
+        self.keyframes = []
+        self.end = HEADER.size
+        self.refresh()
+
+        # 最近一次重建的帧（顺序读取时只需要应用一帧的增量）
+        self.canvas = None
+        self.current = -1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def refresh(self):
+        """读取新追加的帧头（录制中也可以读取）；末尾写了一半的帧留到下次"""
+        size = os.fstat(self.file.fileno()).st_size
+        while self.end + FRAME_HEADER.size <= size:
+            self.file.seek(self.end)
+            magic, index, timestamp, keyframe, count, length = FRAME_HEADER.unpack(
+                self.file.read(FRAME_HEADER.size))
+            end = self.end + FRAME_HEADER.size + length
+            if magic != FRAME_MAGIC or end > size:
+                break
+
+            if keyframe:
+                self.keyframes.append(len(self.offsets))
+            self.offsets.append(self.end)
+            self.timestamps.append(timestamp)
+            self.end = end
+        return len(self.offsets)
+
+    def frame_time(self, index):
+        return datetime.fromtimestamp(self.timestamps[index])
+
+    def apply(self, index):
+        """把第 index 帧的小块写入当前画面"""
+        self.file.seek(self.offsets[index])
+        _, _, _, _, count, length = FRAME_HEADER.unpack(self.file.read(FRAME_HEADER.size))
+        payload = memoryview(self.file.read(length))
+
+        size = self.tile_size
+        blocks = self.canvas.reshape(self.rows, size, self.columns, size)
+        offset = 0
+        for _ in range(count):
+            column, row, compressed = TILE_HEADER.unpack_from(payload, offset)
+            offset += TILE_HEADER.size
+            tile = zlib.decompress(payload[offset:offset + compressed])
+            offset += compressed
+            blocks[row, :, column, :] = np.frombuffer(tile, dtype=np.uint32).reshape(size, size)
+
+    def frame(self, index):
+        """重建第 index 帧（QImage）"""
+        if not 0 <= index < len(self.offsets):
+            raise IndexError(f"帧序号超出范围: {index}（共 {len(self.offsets)} 帧）")
+
+        keyframe = self.keyframes[bisect.bisect_right(self.keyframes, index) - 1]
+        if self.canvas is not None and keyframe <= self.current <= index:
+            start = self.current + 1
+        else:
+            if self.canvas is None:
+                self.canvas = np.zeros((self.rows * self.tile_size, self.columns * self.tile_size),
+                                       dtype=np.uint32)
+            start = keyframe
+
+        for i in range(start, index + 1):
+            self.apply(i)
+        self.current = index
+
+        # 画布会被之后的读取修改，返回拷贝
+        return array_image(self.canvas).copy(0, 0, self.width, self.height)
+
+    def close(self):
+        self.file.close()
+        self.canvas = None
+
+
+class TimelapseTask(QRunnable):
+    """比较、压缩并写入一帧（在工作线程中运行）"""
+
+    def __init__(self, recorder, image, timestamp):
+        super().__init__()
+        self.recorder = recorder
+        self.image = image
+        self.timestamp = timestamp
+
+    def run(self):
+        error = ""
+        changed = written = 0
+        try:
+            changed, written = self.recorder.writer.write_frame(self.image, self.timestamp)
+        except Exception as e:
+            error = str(e) or "未知错误"
+        self.recorder.results.post(self.recorder.on_task_done, changed, written, error)
+
+
+class TimelapseRecorder(QObject):
+    """定时截图录制"""
+
+    # 写入一帧：帧序号、变化的小块数、写入字节数
+    frame_written = pyqtSignal(int, int, int)
+    # 写入失败（录制已停止）：错误信息
+    failed = pyqtSignal(str)
+
+    def __init__(self, directory, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.writer = None
+        self.rect = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.capture)
+
+        # 单线程：帧按顺序写入
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.busy = False
+        self.frames = 0
+        self.skipped = 0
+        # 工作线程 → 主线程：每一帧的写入结果
+        self.results = TaskResults(self)
+
+    def is_active(self):
+        return self.writer is not None
+
+    def start(self, rect=None, interval_s=DEFAULT_INTERVAL_S, path=None):
+        """开始录制，立即写入第一帧
+
+        rect: 全局坐标区域，None 为整个虚拟桌面
+        """
+        if self.is_active():
+            print("定时截图进行中，忽略重复请求")
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = path or os.path.join(self.directory, datetime.now().strftime("%Y%m%d_%H%M%S") + ".tlap")
+        self.rect = rect
+        self.frames = 0
+        self.skipped = 0
+
+        image = self.grab()
+        self.writer = TimelapseWriter(path, image.width(), image.height())
+        self.submit(image)
+        self.timer.start(int(interval_s * 1000))
+        print(f"✓ 定时截图开始: {path}（{image.width()}x{image.height()}，每 {interval_s} 秒一帧）")
+        return True
+
+    def grab(self):
+        """抓取录制区域（主线程）"""
+        frame = grab_screen(verbose=False)
+        rect = frame.rect() if self.rect is None else self.rect.translated(-frame.geometry.topLeft())
+        # 只在这一帧写完之前用到，直接引用抓屏的图像（不拷贝）
+        image = frame.crop_image(rect)
+        frame.discard()
+        return image
+
+    def capture(self):
+        """定时器触发：上一帧还没写完时跳过这一次"""
+        if self.busy:
+            self.skipped += 1
+            print(f"[定时截图] 上一帧还在写入，跳过（已跳过 {self.skipped} 次）")
+            return
+        self.submit(self.grab())
+
+    def submit(self, image):
+        self.busy = True
+        self.pool.start(TimelapseTask(self, image, time.time()))
+
+    def on_task_done(self, changed, written, error):
+        """一帧写入完成（主线程）"""
+        self.busy = False
+        if error:
+            print(f"✗ 定时截图写入失败: {error}")
+            self.stop()
+            self.failed.emit(error)
+            return
+
+        self.frames += 1
+        self.frame_written.emit(self.frames - 1, changed, written)
+
+    def stats(self):
+        writer = self.writer
+        if writer is None:
+            return "未在录制"
+        return (f"{writer.frames} 帧，{writer.bytes_written / 1024 / 1024:.1f} MB"
+                f"（未压缩整帧 {writer.raw_bytes / 1024 / 1024:.0f} MB），跳过 {self.skipped} 次")
+
+    def stop(self):
+        """停止录制（等待最后一帧写完），返回文件路径"""
+        if not self.is_active():
+            return None
+
+        self.timer.stop()
+        self.pool.waitForDone()
+        path = self.writer.path
+        # 直接处理最后一帧的写入结果（发出 frame_written）；写入失败时 on_task_done 已经停止了录制
+        self.results.deliver()
+        if not self.is_active():
+            return path
+
+        stats = self.stats()
+        writer, self.writer = self.writer, None
+        writer.close()
+        print(f"✓ 定时截图已停止: {path}（{stats}）")
+        return path
+
+
+def main():
+    """命令行：查看定时截图文件，导出某一帧"""
+    if len(sys.argv) < 2:
+        print("用法: python timelapse.py 文件.tlap [帧序号] [输出.png]")
+        return 1
+
+    app = QApplication(sys.argv)
+    reader = TimelapseReader(sys.argv[1])
+    print(f"{reader.path}: {reader.width}x{reader.height}，{len(reader)} 帧，"
+          f"开始于 {reader.started.strftime('%Y-%m-%d %H:%M:%S')}")
+    if len(reader) == 0:
+        return 0
+
+    index = int(sys.argv[2]) if len(sys.argv) > 2 else len(reader) - 1
+    output = sys.argv[3] if len(sys.argv) > 3 else f"frame_{index:06d}.png"
+    start = time.perf_counter()
+    image = reader.frame(index)
+    elapsed = (time.perf_counter() - start) * 1000
+    image.save(output)
+    print(f"✓ 第 {index} 帧（{reader.frame_time(index).strftime('%Y-%m-%d %H:%M:%S')}）"
+          f"已导出: {output}（重建 {elapsed:.1f} ms）")
+    reader.close()
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+窗口吸附：截图时记下屏幕上所有可见窗口 / 子控件的矩形，建立网格空间索引
+选择窗口中鼠标悬停时高亮光标下最上层窗口里最内层的控件，单击（不拖动）直接选中这个矩形
+命中测试只检查光标所在网格中的少量矩形（按 z 序和嵌套深度预先排好），与窗口总数无关
+窗口来源可以替换：Win32WindowSource 枚举真实窗口（Windows），FakeWindowSource 生成合成窗口（测试用）
+枚举和建索引在工作线程中进行，不增加热键到遮罩显示的延迟
+"""
+import os
+import time
+import random
+import platform
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QRect, QRunnable
+
+WINDOWS = platform.system() == "Windows"
+
+if WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+
+# 网格边长（像素）
+GRID_CELL = 256
+# 太小的控件不参与吸附
+MIN_TARGET_SIZE = 8
+# 每个顶层窗口最多记录的子控件数、最大嵌套深度
+MAX_CHILDREN = 256
+MAX_DEPTH = 4
+
+
+class SnapTarget:
+    """一个可吸附的矩形：rect（帧坐标）、标题、顶层窗口的 z 序（0 = 最上层）、嵌套深度（0 = 顶层窗口）"""
+
+    __slots__ = ("rect", "title", "z", "depth")
+
+    def __init__(self, rect, title="", z=0, depth=0):
+        self.rect = QRect(rect)
+        self.title = title
+        self.z = z
+        self.depth = depth
+
+    def priority(self):
+        """排序键：上层窗口优先，同一窗口内嵌套越深（越具体）越优先，再按面积从小到大"""
+        return self.z, -self.depth, self.rect.width() * self.rect.height()
+
+    def __repr__(self):
+        r = self.rect
+        return f"SnapTarget({self.title!r}, {r.x()},{r.y()} {r.width()}x{r.height()}, z={self.z}, depth={self.depth})"
+
+
+class WindowIndex:
+    """均匀网格空间索引：每个格子保存与它相交的矩形，按优先级排好序"""
+
+    def __init__(self, targets, cell=GRID_CELL):
+        self.cell = cell
+        self.targets = sorted(targets, key=SnapTarget.priority)
+        self.grid = {}
+        # 按优先级顺序插入，每个格子的列表自然有序
+        for target in self.targets:
+            rect = target.rect
+            for gy in range(rect.top() // cell, rect.bottom() // cell + 1):
+                for gx in range(rect.left() // cell, rect.right() // cell + 1):
+                    self.grid.setdefault((gx, gy), []).append(target)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def hit(self, pos):
+        """pos 处优先级最高的矩形，没有时返回 None"""
+        for target in self.grid.get((pos.x() // self.cell, pos.y() // self.cell), ()):
+            if target.rect.contains(pos):
+                return target
+        return None
+
+
+class FakeWindowSource:
+    """合成窗口：随机摆放的顶层窗口，每个窗口里有工具栏、侧边栏、内容区和若干按钮
+    不依赖窗口系统，用于 Linux 下测试
+    """
+
+    def __init__(self, geometry=None, count=30, seed=1):
+        self.geometry = QRect(geometry) if geometry is not None else None
+        self.count = count
+        self.seed = seed
+
+    def snapshot(self):
+        geometry = self.geometry or QApplication.primaryScreen().virtualGeometry()
+        rng = random.Random(self.seed)
+        targets = []
+        for z in range(self.count):
+            width = rng.randint(min(320, geometry.width()), min(1600, geometry.width()))
+            height = rng.randint(min(240, geometry.height()), min(1000, geometry.height()))
+            x = geometry.x() + rng.randint(0, geometry.width() - width)
+            y = geometry.y() + rng.randint(0, geometry.height() - height)
+            window = QRect(x, y, width, height)
+            targets.append(SnapTarget(window, f"窗口 {z}", z, 0))
+
+            toolbar = QRect(x, y + 30, width, 40)
+            sidebar = QRect(x, y + 70, width // 4, height - 70)
+            content = QRect(x + width // 4, y + 70, width - width // 4, height - 70)
+            targets += [SnapTarget(toolbar, "工具栏", z, 1), SnapTarget(sidebar, "侧边栏", z, 1),
+                        SnapTarget(content, "内容", z, 1)]
+            for i in range(width // 80):
+                targets.append(SnapTarget(QRect(x + 8 + i * 80, y + 36, 72, 28), f"按钮 {i}", z, 2))
+        return targets
+
+
+class Win32WindowSource:
+    """Windows：按 z 序枚举可见的顶层窗口（跳过最小化和被隐藏的 UWP 窗口）及其子控件
+    跳过本进程自己的窗口：枚举时选择遮罩（覆盖整个桌面、置顶）或预览窗口可能已经显示，否则会挡住所有窗口
+    坐标为物理像素，按主屏幕的设备像素比换算成 Qt 的逻辑坐标
+    """
+
+    DWMWA_EXTENDED_FRAME_BOUNDS = 9
+    DWMWA_CLOAKED = 14
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        self.dwmapi = ctypes.windll.dwmapi
+        self.enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+    def window_rect(self, hwnd, top_level):
+        rect = wintypes.RECT()
+        if top_level:
+            # 不含 Win10/11 的透明阴影边框
+            result = self.dwmapi.DwmGetWindowAttribute(hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS,
+                                                       ctypes.byref(rect), ctypes.sizeof(rect))
+            if result == 0:
+                return rect
+        self.user32.GetWindowRect(hwnd, ctypes.byref(rect))
+        return rect
+
+    def is_cloaked(self, hwnd):
+        cloaked = wintypes.DWORD()
+        result = self.dwmapi.DwmGetWindowAttribute(hwnd, self.DWMWA_CLOAKED,
+                                                   ctypes.byref(cloaked), ctypes.sizeof(cloaked))
+        return result == 0 and cloaked.value != 0
+
+    def title(self, hwnd):
+        buffer = ctypes.create_unicode_buffer(256)
+        self.user32.GetWindowTextW(hwnd, buffer, 256)
+        return buffer.value
+
+    def is_own(self, hwnd):
+        pid = wintypes.DWORD()
+        self.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return pid.value == os.getpid()
+
+    def depth(self, hwnd, top):
+        depth = 0
+        while hwnd and hwnd != top and depth < MAX_DEPTH:
+            hwnd = self.user32.GetParent(hwnd)
+            depth += 1
+        return depth
+
+    def snapshot(self):
+        screen = QApplication.primaryScreen()
+        ratio = screen.devicePixelRatio() if screen else 1.0
+        top_levels = []
+
+        def collect(hwnd, _):
+            if self.user32.IsWindowVisible(hwnd) and not self.user32.IsIconic(hwnd) \
+                    and not self.is_cloaked(hwnd) and not self.is_own(hwnd):
+                top_levels.append(hwnd)
+            return True
+
+        self.user32.EnumWindows(self.enum_proc(collect), 0)
+
+        def to_target(hwnd, title, z, depth):
+            r = self.window_rect(hwnd, depth == 0)
+            rect = QRect(int(r.left / ratio), int(r.top / ratio),
+                         int((r.right - r.left) / ratio), int((r.bottom - r.top) / ratio))
+            if rect.width() < MIN_TARGET_SIZE or rect.height() < MIN_TARGET_SIZE:
+                return None
+            return SnapTarget(rect, title, z, depth)
+
+        targets = []
+        for z, hwnd in enumerate(top_levels):
+            target = to_target(hwnd, self.title(hwnd), z, 0)
+            if target is None:
+                continue
+            targets.append(target)
+
+            children = []
+
+            def collect_child(child, _):
+                if self.user32.IsWindowVisible(child):
+                    children.append(child)
+                return len(children) < MAX_CHILDREN
+
+            self.user32.EnumChildWindows(hwnd, self.enum_proc(collect_child), 0)
+            for child in children:
+                target = to_target(child, "", z, self.depth(child, hwnd))
+                if target is not None:
+                    targets.append(target)
+        return targets
+
+
+def default_window_source():
+    """当前平台的窗口来源（不支持的平台返回 None，不启用窗口吸附）"""
+    return Win32WindowSource() if WINDOWS else None
+
+
+class WindowSnapshotTask(QRunnable):
+    """枚举窗口并建立索引（在工作线程中运行），完成后通过 owner.windows_ready 信号回到主线程"""
+
+    def __init__(self, owner, source, origin, token):
+        super().__init__()
+        self.owner = owner
+        self.source = source
+        self.origin = origin
+        self.token = token
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            targets = self.source.snapshot()
+        except Exception as e:
+            print(f"✗ 枚举窗口失败: {e}")
+            return
+        # 全局坐标 → 帧坐标（虚拟桌面左上角为原点）
+        for target in targets:
+            target.rect.translate(-self.origin)
+        index = WindowIndex(targets)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.owner.windows_ready.emit(self.token, index, elapsed)